@@ -11,6 +11,8 @@ import google.generativeai as genai
 from dataclasses import dataclass, asdict
 import time
 
+from .utils.model_router import get_model_router
+
 
 @dataclass
 class EvaluationResult:
@@ -49,7 +51,7 @@ class DeepResearchMatcher:
             max_cycles: 最大サイクル数（デフォルト3）
         """
         genai.configure(api_key=gemini_api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+        self.model = get_model_router().model_for("DeepResearchMatcher")
         self.max_cycles = max_cycles
         
     def load_file(self, filepath: str) -> str:
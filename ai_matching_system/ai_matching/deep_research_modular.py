@@ -8,6 +8,8 @@ from typing import Dict, List, Optional
 from dataclasses import dataclass
 import google.generativeai as genai
 
+from .utils.model_router import get_model_router
+
 
 # ========== データ構造 ==========
 @dataclass
@@ -241,7 +243,7 @@ class ModularDeepResearchMatcher:
     
     def __init__(self, api_key: str):
         genai.configure(api_key=api_key)
-        llm = genai.GenerativeModel('gemini-2.0-flash')
+        llm = get_model_router().model_for("ModularDeepResearchMatcher")
         
         # 各処理ノードを初期化
         self.evaluator = CandidateEvaluator(llm)
@@ -9,6 +9,9 @@ import google.generativeai as genai
 import tiktoken
 import re
 
+from ..utils.prompt_budget import PromptBudgetBuilder, estimate_tokens
+from ..utils.resilience import call_sync
+
 
 class GeminiEmbedder:
     """Gemini Embedding APIを使用してテキストをベクトル化"""
@@ -55,7 +58,9 @@ class GeminiEmbedder:
             return self._cache[cache_key]
         
         try:
-            result = genai.embed_content(
+            result = call_sync(
+                "gemini",
+                genai.embed_content,
                 model=self.model_name,
                 content=text,
                 task_type=task_type
@@ -182,39 +187,17 @@ class GeminiEmbedder:
         if max_tokens is None:
             max_tokens = self.max_tokens
             
-        # 簡易的なトークン数推定（日本語を考慮）
-        # より正確にはtiktokenを使用することも可能
-        estimated_tokens = len(text) // 2  # 日本語は概ね2文字で1トークン
-        
-        if estimated_tokens <= max_tokens:
+        if estimate_tokens(text) <= max_tokens:
             return text
-            
-        # テキストを段落に分割
-        paragraphs = text.split('\n\n')
-        
-        # 重要な情報を優先的に保持
-        priority_sections = []
-        normal_sections = []
-        
-        for para in paragraphs:
-            # 重要なセクション（タイトルや必須要件など）を識別
-            if any(keyword in para for keyword in ['必須', '【', 'ポジション', '経験', 'スキル']):
-                priority_sections.append(para)
-            else:
-                normal_sections.append(para)
         
-        # 優先セクションから構築
-        result = '\n\n'.join(priority_sections)
+        # 段落単位でトークン予算内に収める（元の順序は維持し、通常段落の後方から削る）
+        budget = PromptBudgetBuilder(max_tokens, label="embedding", verbose=False)
+        for i, para in enumerate(text.split('\n\n')):
+            # 重要なセクション（タイトルや必須要件など）を優先的に保持
+            is_priority = any(keyword in para for keyword in ['必須', '【', 'ポジション', '経験', 'スキル'])
+            budget.add(f"paragraph:{i}", para, priority=60 if is_priority else 40)
         
-        # 残りのトークン数で通常セクションを追加
-        for section in normal_sections:
-            test_text = result + '\n\n' + section
-            if len(test_text) // 2 <= max_tokens:
-                result = test_text
-            else:
-                break
-                
-        return result
+        return budget.build()
     
     def _extract_key_information(self, text: str, text_type: str = "general") -> str:
         """
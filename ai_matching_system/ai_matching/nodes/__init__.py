@@ -14,6 +14,7 @@ from .evaluator import EvaluatorNode
 from .gap_analyzer import GapAnalyzerNode
 from .searcher import TavilySearcherNode
 from .reporter import ReportGeneratorNode
+from .graph import GraphNode, NodeGraph
 from .orchestrator import DeepResearchOrchestrator, SeparatedDeepResearchMatcher
 from .skill_evaluator import SkillEvaluatorNode
 from .experience_evaluator import ExperienceEvaluatorNode
@@ -41,6 +42,10 @@ __all__ = [
     'FitEvaluatorNode',
     'FinalScorerNode',
     
+    # Graph
+    'GraphNode',
+    'NodeGraph',
+    
     # Orchestrator
     'DeepResearchOrchestrator',
     'SeparatedDeepResearchMatcher'
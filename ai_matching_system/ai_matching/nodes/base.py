@@ -2,8 +2,10 @@
 基底クラスとデータ構造の定義
 """
 
+import importlib
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields, is_dataclass
+from datetime import date, datetime
 from typing import Dict, List, Optional, Any
 from enum import Enum
 
@@ -41,10 +43,15 @@ class ResearchState:
     current_evaluation: Optional['EvaluationResult'] = None
     information_gaps: List['InformationGap'] = field(default_factory=list)
     search_results: Dict[str, 'SearchResult'] = field(default_factory=dict)
+    # 評価と並行して先読みした検索結果（正規化クエリ -> 結果。ギャップ分析後は使用するギャップの種類 -> 結果）
+    speculative_searches: Dict[str, 'PrefetchedSearch'] = field(default_factory=dict)
     
     # 履歴
     evaluation_history: List['CycleResult'] = field(default_factory=list)
     
+    # サイクル不変の分析結果のメモ（入力フィンガープリント -> 分析結果）
+    analysis_memo: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    
     # 制御フラグ
     current_cycle: int = 0
     max_cycles: int = 3
@@ -65,6 +72,23 @@ class ResearchState:
         # 最大サイクル数に達したら終了
         if self.current_cycle >= self.max_cycles:
             self.should_continue = False
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        JSONに変換可能な辞書に変換（チェックポイント用）
+        
+        ノードが動的に追加した属性（rag_insights等）も含む。
+        同一オブジェクトへの参照（サイクル結果間で共有される検索結果など）は1回だけ出力する
+        """
+        return _encode(self, {})
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ResearchState':
+        """to_dictの出力から状態を復元"""
+        state = _decode(data, {})
+        if not isinstance(state, cls):
+            raise TypeError(f"ResearchStateではありません: {type(state).__name__}")
+        return state
 
 
 @dataclass
@@ -92,6 +116,7 @@ class EvaluationResult:
     contradiction_report: Optional[Any] = None  # 矛盾解決レポート
     career_assessment: Optional[Any] = None  # キャリア継続性評価
     age_experience_assessment: Optional[Any] = None  # 年齢・経験社数評価
+    evaluated_search_summaries: Optional[Dict[str, str]] = None  # この評価に反映した検索結果（キー -> 要約）
 
 
 @dataclass
@@ -112,6 +137,15 @@ class SearchResult:
     summary: str
     sources: List[str]
     timestamp: str
+    from_cache: bool = False  # 検索結果キャッシュから取得したか
+
+
+@dataclass
+class PrefetchedSearch:
+    """先読み検索の結果（要約前）"""
+    gap: InformationGap  # 予測したギャップ
+    results: List[Dict[str, Any]]  # 信頼性スコア付きの検索結果
+    from_cache: bool = False
 
 
 @dataclass
@@ -124,6 +158,71 @@ class CycleResult:
     duration_seconds: float
 
 
+# 復元時にインポートを許可するパッケージ（nodes / utils 配下のdataclass）
+_CODEC_PACKAGE = __name__.rsplit('.', 2)[0]
+
+
+def _encode(value: Any, seen: Dict[int, int]) -> Any:
+    """dataclassを型名付きの辞書に再帰的に変換"""
+    if is_dataclass(value) and not isinstance(value, type):
+        if id(value) in seen:
+            return {"__ref__": seen[id(value)]}
+        seen[id(value)] = len(seen)
+        value_type = type(value)
+        return {
+            "__dataclass__": f"{value_type.__module__}:{value_type.__qualname__}",
+            "attrs": {name: _encode(attr, seen) for name, attr in vars(value).items()}
+        }
+    if isinstance(value, dict):
+        if not all(isinstance(key, str) for key in value):
+            raise TypeError("文字列以外のキーを持つ辞書はチェックポイントに保存できません")
+        return {key: _encode(item, seen) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item, seen) for item in value]
+    if isinstance(value, (datetime, date)):
+        # 矛盾レポートの職歴期間など
+        return {"__datetime__" if isinstance(value, datetime) else "__date__": value.isoformat()}
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    raise TypeError(f"チェックポイントに保存できない型です: {type(value).__name__}")
+
+
+def _decode(value: Any, objects: Dict[int, Any]) -> Any:
+    """_encodeの出力を復元（出力時と同じ順序で走査するため参照番号が一致する）"""
+    if isinstance(value, list):
+        return [_decode(item, objects) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if "__ref__" in value:
+        return objects[value["__ref__"]]
+    if "__datetime__" in value:
+        return datetime.fromisoformat(value["__datetime__"])
+    if "__date__" in value:
+        return date.fromisoformat(value["__date__"])
+    if "__dataclass__" not in value:
+        return {key: _decode(item, objects) for key, item in value.items()}
+
+    module_name, _, qualname = value["__dataclass__"].partition(":")
+    if not module_name.startswith(_CODEC_PACKAGE + "."):
+        raise TypeError(f"復元できない型です: {value['__dataclass__']}")
+    value_type = importlib.import_module(module_name)
+    for part in qualname.split("."):
+        value_type = getattr(value_type, part)
+    if not is_dataclass(value_type):
+        raise TypeError(f"dataclassではありません: {value['__dataclass__']}")
+
+    ref = len(objects)
+    objects[ref] = None  # 参照番号を出力時の順序で確保
+    attrs = {name: _decode(item, objects) for name, item in value["attrs"].items()}
+    init_names = {f.name for f in fields(value_type) if f.init}
+    obj = value_type(**{name: item for name, item in attrs.items() if name in init_names})
+    for name, item in attrs.items():
+        if name not in init_names:
+            setattr(obj, name, item)
+    objects[ref] = obj
+    return obj
+
+
 class BaseNode(ABC):
     """全ノードの基底クラス"""
     
@@ -12,6 +12,10 @@ from .base import BaseNode, ResearchState, EvaluationResult, ScoreDetail
 from ..utils.semantic_guards import SemanticGuards
 from ..utils.evaluation_formatters import EvaluationFormatters
 from ..utils.evaluation_parser import EvaluationParser
+from ..utils.prompt_assembler import PromptAssembler, PromptSegments
+from ..utils.model_router import get_model_router
+from ..utils.prompt_budget import PromptBudgetBuilder
+from ..utils.structured_output import StructuredOutputDecoder, json_generation_config, EVALUATION_SCHEMA
 from ..prompts import EvaluationPrompts, ScoringCriteria, RequirementRules
 
 
@@ -21,7 +25,11 @@ class EvaluatorNode(BaseNode):
     def __init__(self, api_key: str, supabase_url: Optional[str] = None, supabase_key: Optional[str] = None):
         super().__init__("Evaluator")
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.model = get_model_router().model_for(self.name)
+        self.prompt_assembler = PromptAssembler(self.model)
+        self.evaluation_decoder = StructuredOutputDecoder(self.name, EVALUATION_SCHEMA)
+        # 候補者セグメントのトークン予算（超過時は古い履歴・信頼度の低い検索結果から削る）
+        self.candidate_token_budget = int(os.getenv('EVALUATOR_CANDIDATE_TOKEN_BUDGET', '8000'))
         
         # Supabaseクライアントの初期化
         self.supabase_client = None
@@ -63,13 +71,10 @@ class EvaluatorNode(BaseNode):
         
         print(f"  候補者評価を開始（サイクル{state.current_cycle}）")
         
-        # 追加情報のフォーマット
-        additional_info = EvaluationFormatters.format_additional_info(state.search_results)
-        if additional_info:
+        # 追加情報・評価履歴は1件ずつトークン予算の管理対象として候補者セグメントに追加する
+        if state.search_results:
             print(f"  追加情報を含めて評価: {len(state.search_results)}件の検索結果")
         
-        # 評価履歴のフォーマット
-        history_text = EvaluationFormatters.format_history(state.evaluation_history)
         if state.evaluation_history:
             print(f"  過去の評価履歴を考慮: {len(state.evaluation_history)}サイクル分")
         
@@ -92,26 +97,66 @@ class EvaluatorNode(BaseNode):
         structured_resume_data_text = EvaluationFormatters.format_structured_resume_data(state) if has_structured_resume_data else ''
         
         # テンプレートを使用してプロンプトを構築
-        input_data_section = EvaluationPrompts.build_input_data_section(
-            resume=state.resume,
-            candidate_info=candidate_info,
-            structured_resume_data=structured_resume_data_text,
-            structured_job_data=structured_job_data_text,
-            job_description=state.job_description or "",
-            job_memo=state.job_memo or "",
-            additional_info=additional_info,
-            history_text=history_text,
-            rag_insights_text=rag_insights_text,
-            guard_insights=guard_insights
+        # 静的プレフィックス・求人セグメントはコンテキストキャッシュで求人単位に再利用する
+        segments = PromptSegments(
+            static_prefix=self._build_static_prefix(),
+            job_segment=EvaluationPrompts.build_job_section(
+                structured_job_data=structured_job_data_text,
+                job_description=state.job_description or "",
+                job_memo=state.job_memo or ""
+            ),
+            candidate_segment=self._build_candidate_segment(
+                state,
+                candidate_info=candidate_info,
+                structured_resume_data_text=structured_resume_data_text,
+                rag_insights_text=rag_insights_text,
+                guard_insights=guard_insights
+            )
         )
         
-        # プロンプトを組み立て
-        prompt = f"""{EvaluationPrompts.ROLE_SETTING}
+        print(f"  LLMにプロンプト送信中... (文字数: {len(segments.full_text)})")
+        response = await self.prompt_assembler.generate_async(
+            segments, label=self.name, generation_config=json_generation_config(EVALUATION_SCHEMA)
+        )
+        print(f"  LLMから応答受信")
+        
+        # デバッグモードの場合、生の応答を表示
+        if os.getenv('DEBUG_MODE'):
+            print(f"  LLM応答（最初の500文字）:")
+            print(f"    {response.text[:500]}")
+            print("    ...")
+        
+        evaluation = EvaluationParser.parse_evaluation(response.text, self.evaluation_decoder)
+        print(f"  評価結果パース完了")
+        
+        # 状態を更新
+        state.current_evaluation = evaluation
+        self.state = "completed"
+        
+        return state
+    
+    def _build_candidate_segment(self, state: ResearchState, candidate_info: str,
+                                 structured_resume_data_text: str, rag_insights_text: str,
+                                 guard_insights: str) -> str:
+        """候補者ごとのプロンプトセグメントをトークン予算内で組み立てる"""
+        budget = PromptBudgetBuilder(self.candidate_token_budget, label=f"{self.name}:候補者")
+        budget.add("header", "# 候補者データ", priority=100)
+        budget.add("resume", f"## 候補者レジュメ（原文）\n{state.resume}", priority=100,
+                   min_tokens=self.candidate_token_budget // 2)
+        budget.add("candidate_info", f"## 候補者情報\n{candidate_info}", priority=95)
+        budget.add("structured_resume", structured_resume_data_text, priority=70)
+        EvaluationFormatters.add_context_sections(budget, state.search_results, state.evaluation_history)
+        budget.add("rag_insights", rag_insights_text, priority=55)
+        budget.add("guard_insights", guard_insights, priority=80)
+        budget.add("instruction", EvaluationPrompts.CANDIDATE_INSTRUCTION, priority=100)
+        return budget.build()
+    
+    def _build_static_prefix(self) -> str:
+        """全候補者・全求人で共通のプロンプト部分（評価ルール・配点基準・出力形式）"""
+        return f"""{EvaluationPrompts.ROLE_SETTING}
 
 {EvaluationPrompts.EVALUATION_RULES}
 
-{input_data_section}
-
 {RequirementRules.REQUIREMENT_DISTINCTION}
 
 {EvaluationPrompts.SEMANTIC_UNDERSTANDING}
@@ -131,25 +176,6 @@ class EvaluatorNode(BaseNode):
 {ScoringCriteria.SUMMARY_FORMAT}
 
 {RequirementRules.EVALUATION_NOTES}"""
-        
-        print(f"  LLMにプロンプト送信中... (文字数: {len(prompt)})")
-        response = self.model.generate_content(prompt)
-        print(f"  LLMから応答受信")
-        
-        # デバッグモードの場合、生の応答を表示
-        if os.getenv('DEBUG_MODE'):
-            print(f"  LLM応答（最初の500文字）:")
-            print(f"    {response.text[:500]}")
-            print("    ...")
-        
-        evaluation = EvaluationParser.parse_evaluation(response.text)
-        print(f"  評価結果パース完了")
-        
-        # 状態を更新
-        state.current_evaluation = evaluation
-        self.state = "completed"
-        
-        return state
     
     def _apply_semantic_guards(self, state: ResearchState) -> str:
         """セマンティックガードレールを適用して洞察を生成"""
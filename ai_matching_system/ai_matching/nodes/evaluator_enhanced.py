@@ -4,7 +4,7 @@
 
 import os
 import re
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import google.generativeai as genai
 from supabase import create_client, Client
 from dotenv import load_dotenv
@@ -14,17 +14,103 @@ from ..utils.dynamic_weight_adjuster import DynamicWeightAdjuster, WeightProfile
 from ..utils.uncertainty_quantifier import UncertaintyQuantifier
 from ..utils.contradiction_resolver import ContradictionResolver
 from ..utils.meta_learner import MetaLearner
-from ..utils.career_continuity_analyzer_v2 import CareerContinuityAnalyzerV2
-from ..utils.age_experience_analyzer import AgeExperienceAnalyzer
+from ..utils.career_continuity_analyzer_v2 import CareerContinuityAnalyzerV2, ContinuityAssessmentV2
+from ..utils.age_experience_analyzer import AgeExperienceAnalyzer, AgeExperienceAssessment
+from ..utils.analysis_memo import AnalysisMemoStore, ANALYSIS_MEMO_VERSION
+from ..utils.resume_parser import career_timeline_from_structured
+from ..utils.prompt_assembler import PromptAssembler, PromptSegments
+from ..utils.prompt_budget import PromptBudgetBuilder, estimate_tokens
+from ..utils.evaluation_formatters import EvaluationFormatters
+from ..utils.evaluation_parser import EvaluationParser
+from ..utils.structured_output import StructuredOutputDecoder, json_generation_config, EVALUATION_SCHEMA
+from ..utils.model_router import get_model_router
+from ..utils.fingerprint import fingerprint
 
 
 class EnhancedEvaluatorNode(BaseNode):
     """説明可能性を強化した評価ノード"""
     
+    # 全候補者・全求人で共通の静的プレフィックス（コンテキストキャッシュの対象）
+    STATIC_PROMPT_PREFIX = """あなたは経験豊富な採用コンサルタントです。
+クライアント企業の採用成功のため、候補者を適切に評価してください。
+
+# 評価方針（厳格基準）
+1. 必須要件は厳格に検証し、不明確な場合は低評価とする
+2. 直接経験のみを評価対象とし、類似経験は限定的にのみ認める
+3. レジュメに記載された事実・経歴のみを評価（推測・期待・可能性は一切考慮しない）
+4. 歓迎要件の充足は明確な加点要素として評価する
+5. 求人メモから読み取れる「本当に求める人材像」を重視する
+
+# 評価基準（配点は求人ごとに動的調整、求人データの「評価基準の配点」を参照）
+## 必須要件
+- 求人票の「求める経験・スキル」「必須」項目
+- 直接的な経験が明確に確認できる場合：満点
+- 類似経験での代替：最大50%の得点
+- 経験が不明確・推測が必要な場合：最大30%の得点
+- 完全に欠如している場合：0点
+
+## 実務遂行能力
+- 業務を遂行できる実質的な能力
+- 過去の実績・成果から判断
+- 具体的な数値や成果があれば加点
+
+## 歓迎要件
+- 求人票の「歓迎する経験・スキル」「尚可」項目
+- 1つ充足ごとに加点
+
+## 組織適合性
+- 過去の所属企業と求人企業の類似性
+- 実際の転職実績
+
+## 突出した経歴・実績
+- 必須要件の不足を補う「尖った経歴」
+- 求人に関連する分野での業界注目度
+
+# キャリア継続性の評価指針（転職市場の実態に基づく）
+1. 直近3ヶ月以内のブランク：正常な転職活動期間（減点なし）
+2. 4-6ヶ月のブランク：許容範囲内（5%減点）
+3. 7-12ヶ月のブランク：説明が必要（10%減点）
+4. 13-24ヶ月のブランク：要確認（15%減点）
+5. 25ヶ月以上のブランク：詳細な確認必要（20%減点）
+6. キャリアチェンジ：転用可能スキルに応じて0-15%減点（スキル保持率が高ければ軽減）
+7. 部署異動：3%減点（軽微な影響）
+
+※転用可能スキル（コミュニケーション、問題解決、リーダーシップ等）が高い場合は減点を軽減
+
+# 年齢・経験社数の評価指針
+1. 転職頻度が「適切」の場合：標準評価
+2. 転職頻度が「やや多い」の場合：軽微な減点（5%）
+3. 転職頻度が「多すぎる」の場合：大幅減点（20%）、定着性への懸念を明記
+4. 転職頻度が「少なすぎる」の場合：軽微な減点（10%）、適応力への懸念を明記
+5. 平均在籍年数が2年未満の場合：短期離職リスクとして追加減点
+6. 安定性スコアが50%未満の場合：人事リスクとして慎重評価を推奨
+
+# 出力フォーマット（詳細版）
+以下のキーを持つJSONのみを出力すること（前後に説明文を付けない）
+- score: 適合度スコア（0-100の整数）
+- confidence: 確信度（"低" / "中" / "高"）
+- score_breakdown: スコア内訳の配列。カテゴリごとに以下を記載
+  - category: "required_skills"（必須要件） / "practical_ability"（実務遂行能力） / "preferred_skills"（歓迎要件） /
+    "organizational_fit"（組織適合性） / "outstanding_career"（突出した経歴）
+  - max_score: 満点（必須要件45・実務遂行能力25・歓迎要件15・組織適合性10・突出した経歴5）
+  - subtotal: 実際の点数
+  - items: 評価項目の配列（name: 項目名, score: 点数, max_score: 配点, evidence: 根拠となるレジュメの記載・実績）
+    - 組織適合性は「企業規模適応」（5点、過去の所属企業と求人企業の比較）と「文化適合」（5点）
+- strengths: 主な強み（必須要件との合致点を優先し、歓迎要件の充足・突出した経歴・実績があれば明記）
+- concerns: 主な懸念点（必須要件の不足を最優先で記載し、それによる業務遂行上のリスク、その他の懸念を事実ベースで記載）
+- summary: 評価サマリー（総合評価と推薦判断を含む詳細な評価結果）"""
+    
     def __init__(self, api_key: str, supabase_url: Optional[str] = None, supabase_key: Optional[str] = None):
         super().__init__("EnhancedEvaluator")
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.model = get_model_router().model_for(self.name)
+        self.prompt_assembler = PromptAssembler(self.model)
+        self.evaluation_decoder = StructuredOutputDecoder(self.name, EVALUATION_SCHEMA)
+        # 候補者セグメントのトークン予算（超過時は古い履歴・信頼度の低い検索結果から削る）
+        self.candidate_token_budget = int(os.getenv('EVALUATOR_CANDIDATE_TOKEN_BUDGET', '8000'))
+        # サイクル2以降の差分再評価（追加情報がこのトークン数を超える場合は全量評価）
+        self.incremental_evaluation = os.getenv('EVALUATOR_INCREMENTAL', 'true').lower() == 'true'
+        self.delta_max_tokens = int(os.getenv('EVALUATOR_DELTA_MAX_TOKENS', '3000'))
         
         # Supabaseクライアントの初期化
         self.supabase_client = None
@@ -48,9 +134,35 @@ class EnhancedEvaluatorNode(BaseNode):
         
         # 年齢・経験社数分析器の初期化
         self.age_experience_analyzer = AgeExperienceAnalyzer()
+        
+        # サイクル不変の分析結果の永続メモ（ANALYSIS_MEMO_PATH設定時のみ、ジョブ再実行間で共有）
+        self.memo_store = None
+        if os.getenv('ANALYSIS_MEMO_PATH'):
+            try:
+                self.memo_store = AnalysisMemoStore()
+            except Exception as e:
+                print(f"  分析メモストアの初期化に失敗: {e}")
+    
+    def _parse_evaluation(self, text: str, weight_profile: Optional[WeightProfile] = None) -> EvaluationResult:
+        """LLMの出力を評価結果に変換（JSON出力を優先し、デコードできない場合のみテキストとしてパース）"""
+        data = self.evaluation_decoder.decode(text)
+        if data is None:
+            evaluation = self._parse_evaluation_enhanced(text, weight_profile)
+            self.evaluation_decoder.record_fallback_result(bool(evaluation.score or evaluation.score_breakdown))
+            return evaluation
+        
+        evaluation = EvaluationParser.evaluation_from_json(data, text)
+        # テキストパーサーと同じデフォルト値
+        if not evaluation.strengths:
+            evaluation.strengths = ["候補者の具体的な強みを評価中"]
+        if not evaluation.concerns:
+            evaluation.concerns = ["特筆すべき懸念点なし"]
+        if not evaluation.summary:
+            evaluation.summary = "総合的な評価を実施中"
+        return evaluation
     
     def _parse_evaluation_enhanced(self, text: str, weight_profile: Optional[WeightProfile] = None) -> EvaluationResult:
-        """LLMの出力を詳細な評価結果にパース"""
+        """LLMの出力（テキスト形式）を詳細な評価結果にパース"""
         lines = text.strip().split('\n')
         
         score = 0
@@ -274,53 +386,23 @@ class EnhancedEvaluatorNode(BaseNode):
         
         print(f"  候補者評価を開始（強化版・サイクル{state.current_cycle}）")
         
-        # 追加情報のフォーマット
-        additional_info = self._format_additional_info(state.search_results)
-        if additional_info:
+        # 追加情報・評価履歴は1件ずつトークン予算の管理対象として候補者セグメントに追加する
+        if state.search_results:
             print(f"  追加情報を含めて評価: {len(state.search_results)}件の検索結果")
         
-        # 評価履歴のフォーマット
-        history_text = self._format_history(state.evaluation_history)
         if state.evaluation_history:
             print(f"  過去の評価履歴を考慮: {len(state.evaluation_history)}サイクル分")
         
         # 候補者情報を取得
         candidate_info = await self._get_candidate_info(state)
         
-        # 動的重み付けを計算
-        job_data = {
-            'title': state.job_description[:100] if state.job_description else '',
-            'job_description': state.job_description,
-            'memo': state.job_memo
-        }
-        weight_profile = self.weight_adjuster.adjust_weights(job_data, state.structured_job_data)
-        
-        # メタ学習による重み調整
-        job_category = self._extract_job_category(job_data, state.structured_job_data)
-        if job_category:
-            meta_weights = self.meta_learner.get_adjusted_weights(job_category)
-            # メタ学習の重みを反映（50%の影響度）
-            for feature in ['required_skills', 'practical_ability', 'preferred_skills', 'organizational_fit', 'outstanding_career']:
-                if feature in meta_weights:
-                    original = getattr(weight_profile, feature)
-                    adjusted = original * 0.5 + meta_weights.get(feature, original) * 0.5
-                    setattr(weight_profile, feature, adjusted)
-            weight_profile.normalize()
-            print(f"  メタ学習による重み調整を適用")
-        
-        weight_explanation = self.weight_adjuster.get_weight_explanation(weight_profile)
+        # サイクル不変の分析（重み付け・必須スキル・キャリア継続性）はメモから取得
+        analyses = await self._get_invariant_analyses(state)
+        weight_profile = analyses['weight_profile']
+        weight_explanation = analyses['weight_explanation']
+        career_assessment = analyses['career_assessment']
         print(f"  動的重み付け適用: {weight_explanation}")
         
-        # キャリア継続性分析
-        required_skills = self._extract_required_skills(state)
-        required_experience = state.job_description if state.job_description else state.job_memo
-        
-        career_assessment = await self.career_analyzer.analyze_career_continuity(
-            resume_text=state.resume,
-            required_skills=required_skills,
-            required_experience=required_experience
-        )
-        
         print(f"  キャリア継続性分析完了:")
         print(f"    直近の関連経験: {'あり' if career_assessment.has_recent_relevant_experience else 'なし'}")
         if career_assessment.months_since_relevant_experience is not None:
@@ -333,11 +415,7 @@ class EnhancedEvaluatorNode(BaseNode):
             print(f"    ⚠️ 部署異動が検出されました")
         
         # 年齢・経験社数分析
-        age_experience_assessment = self.age_experience_analyzer.analyze_age_experience_fit(
-            candidate_age=state.candidate_age,
-            total_companies=state.enrolled_company_count or 1,
-            resume_text=state.resume
-        )
+        age_experience_assessment = analyses['age_experience_assessment']
         
         print(f"  年齢・経験社数分析完了:")
         if age_experience_assessment.candidate_age:
@@ -352,155 +430,49 @@ class EnhancedEvaluatorNode(BaseNode):
         if age_experience_assessment.risk_factors:
             print(f"    ⚠️ リスク要因: {', '.join(age_experience_assessment.risk_factors[:2])}")
         
-        # 強化されたプロンプト（詳細なスコア内訳を要求）
-        prompt = f"""あなたは経験豊富な採用コンサルタントです。
-クライアント企業の採用成功のため、候補者を適切に評価してください。
-
-# 入力データ
-## 候補者レジュメ
-{state.resume}
-
-## 候補者情報
-{candidate_info}
-
-## 求人要件
-{state.job_description}
-
-## 追加情報
-{state.job_memo}
-
-{self._format_structured_job_data(state) if hasattr(state, 'structured_job_data') and state.structured_job_data else ''}
-{additional_info}
-{history_text}
-
-# 評価方針（厳格基準）
-1. 必須要件は厳格に検証し、不明確な場合は低評価とする
-2. 直接経験のみを評価対象とし、類似経験は限定的にのみ認める
-3. レジュメに記載された事実・経歴のみを評価（推測・期待・可能性は一切考慮しない）
-4. 歓迎要件の充足は明確な加点要素として評価する
-5. 求人メモから読み取れる「本当に求める人材像」を重視する
-
-# 評価基準と配点（動的調整済み）
-## 必須要件（{weight_profile.required_skills:.0%}）
-- 求人票の「求める経験・スキル」「必須」項目
-- 直接的な経験が明確に確認できる場合：満点
-- 類似経験での代替：最大50%の得点
-- 経験が不明確・推測が必要な場合：最大30%の得点
-- 完全に欠如している場合：0点
-
-## 実務遂行能力（{weight_profile.practical_ability:.0%}）
-- 業務を遂行できる実質的な能力
-- 過去の実績・成果から判断
-- 具体的な数値や成果があれば加点
-
-## 歓迎要件（{weight_profile.preferred_skills:.0%}）
-- 求人票の「歓迎する経験・スキル」「尚可」項目
-- 1つ充足ごとに加点
-
-## 組織適合性（{weight_profile.organizational_fit:.0%}）
-- 過去の所属企業と求人企業の類似性
-- 実際の転職実績
-
-## 突出した経歴・実績（{weight_profile.outstanding_career:.0%}）
-- 必須要件の不足を補う「尖った経歴」
-- 求人に関連する分野での業界注目度
-
-# 重み付けの理由
-{weight_explanation}
-
-# キャリア継続性分析結果
-## 経験の継続性
-- 直近の関連経験: {'あり' if career_assessment.has_recent_relevant_experience else 'なし'}
-- 経験ブランク: {career_assessment.months_since_relevant_experience or '計測不可'}ヶ月
-- キャリアチェンジ: {'検出' if career_assessment.career_change_detected else 'なし'}
-- 部署異動: {'検出' if career_assessment.department_change_detected else 'なし'}
-- スキル保持率: {career_assessment.skill_retention_score:.0%}
-- 推奨減点率: {career_assessment.penalty_score:.0%}
-
-## キャリア継続性の評価指針（転職市場の実態に基づく）
-1. 直近3ヶ月以内のブランク：正常な転職活動期間（減点なし）
-2. 4-6ヶ月のブランク：許容範囲内（5%減点）
-3. 7-12ヶ月のブランク：説明が必要（10%減点）
-4. 13-24ヶ月のブランク：要確認（15%減点）
-5. 25ヶ月以上のブランク：詳細な確認必要（20%減点）
-6. キャリアチェンジ：転用可能スキルに応じて0-15%減点（スキル保持率が高ければ軽減）
-7. 部署異動：3%減点（軽微な影響）
-
-※転用可能スキル（コミュニケーション、問題解決、リーダーシップ等）が高い場合は減点を軽減
-
-# 年齢・経験社数分析結果
-## 基本情報
-- 年齢: {age_experience_assessment.candidate_age or '不明'}歳
-- 経験社数: {age_experience_assessment.total_companies}社
-- 推定キャリア年数: {age_experience_assessment.career_years or '不明'}年
-- 平均在籍年数: {age_experience_assessment.average_tenure or '不明'}年
-
-## 適合性評価
-- 転職頻度: {age_experience_assessment.job_change_frequency}
-- 安定性スコア: {age_experience_assessment.stability_score:.0%}
-- 評価調整係数: {age_experience_assessment.adjustment_factor:.2f}
-
-## 年齢・経験社数の評価指針
-1. 転職頻度が「適切」の場合：標準評価
-2. 転職頻度が「やや多い」の場合：軽微な減点（5%）
-3. 転職頻度が「多すぎる」の場合：大幅減点（20%）、定着性への懸念を明記
-4. 転職頻度が「少なすぎる」の場合：軽微な減点（10%）、適応力への懸念を明記
-5. 平均在籍年数が2年未満の場合：短期離職リスクとして追加減点
-6. 安定性スコアが50%未満の場合：人事リスクとして慎重評価を推奨
-
-## リスク要因
-{', '.join(age_experience_assessment.risk_factors) if age_experience_assessment.risk_factors else 'なし'}
-
-# 出力フォーマット（詳細版）
-適合度スコア: [0-100の整数]
-確信度: [低/中/高]
-
-## スコア内訳
-### 必須要件（45点満点）
-- [各必須要件項目]: [点数]/[配点] - [根拠となるレジュメの記載]
-- 小計: [実際の点数]/45点
-
-### 実務遂行能力（25点満点）
-- [評価項目]: [点数]/[配点] - [根拠となる実績・経験]
-- 小計: [実際の点数]/25点
-
-### 歓迎要件（15点満点）
-- [各歓迎要件項目]: [点数]/[配点] - [該当する経験]
-- 小計: [実際の点数]/15点
-
-### 組織適合性（10点満点）
-- 企業規模適応: [点数]/5点 - [過去の所属企業と求人企業の比較]
-- 文化適合: [点数]/5点 - [根拠]
-- 小計: [実際の点数]/10点
-
-### 突出した経歴（5点満点）
-- [特筆すべき実績]: [点数]/5点
-- 小計: [実際の点数]/5点
-
-主な強み:
-- [必須要件との合致点を優先的に記載]
-- [歓迎要件の充足があれば明記]
-- [突出した経歴・実績があれば強調]
-
-主な懸念点:
-- [必須要件の不足を最優先で記載]
-- [必須要件不足による具体的な業務遂行上のリスク]
-- [その他の懸念事項を事実ベースで記載]
-
-評価サマリー:
-[総合評価と推薦判断を含む詳細な評価結果]"""
-        
-        print(f"  LLMにプロンプト送信中... (文字数: {len(prompt)})")
-        response = self.model.generate_content(prompt)
-        print(f"  LLMから応答受信")
-        
-        # デバッグモードの場合、生の応答を表示
-        if os.getenv('DEBUG_MODE'):
-            print(f"  LLM応答（最初の500文字）:")
-            print(f"    {response.text[:500]}")
-            print("    ...")
-        
-        evaluation = self._parse_evaluation_enhanced(response.text, weight_profile)
+        # 静的プレフィックス・求人セグメントはコンテキストキャッシュで求人単位に再利用する
+        job_segment = self._build_job_segment(state, weight_profile, weight_explanation)
+        response_text = None
+        evaluation = None
+        evaluated_summaries = None
+        
+        # サイクル2以降は前回の評価結果と、前回の評価に反映していない検索結果の差分のみで再評価
+        delta_results = self._get_delta_search_results(state)
+        if delta_results is not None:
+            previous = state.evaluation_history[-1].evaluation
+            evaluated_summaries = {
+                **previous.evaluated_search_summaries,
+                **{key: result.summary for key, result in delta_results.items()}
+            }
+            if not delta_results:
+                print(f"  新たな追加情報がないため前回の評価を再利用")
+                response_text = previous.raw_response
+            else:
+                segments = PromptSegments(
+                    static_prefix=self.STATIC_PROMPT_PREFIX,
+                    job_segment=job_segment,
+                    candidate_segment=self._build_delta_segment(state, delta_results)
+                )
+                print(f"  差分再評価モード: 新規検索結果{len(delta_results)}件 (文字数: {len(segments.full_text)})")
+                response_text = await self._generate_text(segments)
+            evaluation = self._parse_evaluation(response_text, weight_profile)
+            if evaluation.score == 0 and not evaluation.score_breakdown:
+                print(f"  差分再評価の応答をパースできないため全量評価に切り替え")
+                evaluation = None
+        
+        if evaluation is None:
+            # 強化されたプロンプト（詳細なスコア内訳を要求）
+            candidate_segment, evaluated_summaries = self._build_candidate_segment(
+                state, candidate_info, career_assessment, age_experience_assessment
+            )
+            segments = PromptSegments(
+                static_prefix=self.STATIC_PROMPT_PREFIX,
+                job_segment=job_segment,
+                candidate_segment=candidate_segment
+            )
+            print(f"  LLMにプロンプト送信中... (文字数: {len(segments.full_text)})")
+            response_text = await self._generate_text(segments)
+            evaluation = self._parse_evaluation(response_text, weight_profile)
         
         # キャリア継続性の減点を適用
         original_score = evaluation.score
@@ -527,6 +499,7 @@ class EnhancedEvaluatorNode(BaseNode):
             print(f"  年齢・経験社数による{adjustment_type}: {age_exp_adjustment:+d}点 ({age_exp_adjusted_score-age_exp_adjustment}→{evaluation.score})")
         
         # 分析結果を評価結果に追加
+        evaluation.evaluated_search_summaries = evaluated_summaries
         evaluation.career_assessment = career_assessment
         evaluation.age_experience_assessment = age_experience_assessment
         
@@ -545,7 +518,7 @@ class EnhancedEvaluatorNode(BaseNode):
         
         # 不確実性を定量化
         uncertainty_report = self.uncertainty_quantifier.quantify_uncertainty(
-            evaluation_text=response.text,
+            evaluation_text=response_text,
             resume_text=state.resume,
             job_requirements=state.job_description if state.job_description else "",
             search_results=state.search_results
@@ -556,9 +529,12 @@ class EnhancedEvaluatorNode(BaseNode):
         if state.search_results:
             print(f"  矛盾検出・解決を開始...")
             contradictions = self.contradiction_resolver.detect_contradictions(
-                resume_data={'text': state.resume},
+                resume_data={
+                    'text': state.resume,
+                    'career_timeline': career_timeline_from_structured(state.structured_resume_data)
+                },
                 search_results=state.search_results,
-                evaluation_text=response.text
+                evaluation_text=response_text
             )
             
             if contradictions:
@@ -596,35 +572,249 @@ class EnhancedEvaluatorNode(BaseNode):
         
         return state
     
-    def _format_additional_info(self, search_results: Dict) -> str:
-        """検索結果をフォーマット"""
-        if not search_results:
-            return ""
+    async def _generate_text(self, segments: PromptSegments) -> str:
+        """セグメント化したプロンプトでLLMを呼び出し、応答テキストを返す"""
+        response = await self.prompt_assembler.generate_async(
+            segments, label=self.name, generation_config=json_generation_config(EVALUATION_SCHEMA)
+        )
+        print(f"  LLMから応答受信")
         
-        text = "\n### Web検索による追加情報"
+        # デバッグモードの場合、生の応答を表示
+        if os.getenv('DEBUG_MODE'):
+            print(f"  LLM応答（最初の500文字）:")
+            print(f"    {response.text[:500]}")
+            print("    ...")
+        
+        return response.text
+    
+    def _get_delta_search_results(self, state: ResearchState) -> Optional[Dict]:
+        """
+        前回の評価に反映していない（未反映・要約が更新された）検索結果を取得
+        
+        サイクルの検索結果は検索ノードの実行後に記録されるため、CycleResult.search_resultsではなく
+        前回の評価が実際に参照した検索結果（evaluated_search_summaries）と比較する
+        
+        Returns:
+            差分の検索結果（差分再評価を行わない場合はNone）
+        """
+        if not self.incremental_evaluation or not state.evaluation_history:
+            return None
+        
+        previous = state.evaluation_history[-1].evaluation
+        if not previous or not previous.raw_response or previous.evaluated_search_summaries is None:
+            return None
+        
+        evaluated = previous.evaluated_search_summaries
+        delta_results = {
+            key: result for key, result in state.search_results.items()
+            if evaluated.get(key) != result.summary
+        }
         
-        for key, result in search_results.items():
-            text += f"\n\n**{key}**"
-            text += f"\n{result.summary}"
-            if result.sources:
-                text += f"\n情報源: {', '.join(result.sources[:2])}"
+        delta_tokens = estimate_tokens(EvaluationFormatters.format_additional_info(delta_results))
+        if delta_tokens > self.delta_max_tokens:
+            print(f"  追加情報が大きいため全量評価を実行（推定{delta_tokens}トークン > {self.delta_max_tokens}）")
+            return None
         
-        return text
+        return delta_results
     
-    def _format_history(self, history: List) -> str:
-        """評価履歴をフォーマット"""
-        if not history:
-            return ""
+    def _build_delta_segment(self, state: ResearchState, delta_results: Dict) -> str:
+        """前回の評価結果と新たな検索結果のみからなる差分再評価用のセグメント"""
+        previous_cycle = state.evaluation_history[-1]
+        return f"""# 候補者データ（差分再評価）
+この候補者は前回のサイクルで評価済みです。レジュメ・候補者情報・キャリア分析は前回の評価に反映済みのため、
+前回の評価結果と、その後に新たに得られた情報のみを示します。
+
+## 前回の評価結果（サイクル{previous_cycle.cycle_number}）
+{previous_cycle.evaluation.raw_response}
+
+## 新たに得られた情報
+{EvaluationFormatters.format_additional_info(delta_results)}
+
+新たな情報を踏まえて前回の評価を見直し、上記の出力フォーマットに従って評価全体（スコア・内訳・強み・懸念点・サマリー）を改めて出力してください。
+新たな情報によって変わらない項目は前回の評価を維持してください。"""
+    
+    def _get_analysis_fingerprint(self, state: ResearchState) -> str:
+        """サイクル不変の分析の入力フィンガープリント"""
+        return fingerprint(
+            ANALYSIS_MEMO_VERSION,
+            state.resume,
+            state.job_description or '',
+            state.job_memo or '',
+            state.structured_job_data or {},
+            state.candidate_age,
+            state.enrolled_company_count,
+            career_timeline_from_structured(state.structured_resume_data)
+        )
+    
+    async def _get_invariant_analyses(self, state: ResearchState) -> Dict:
+        """
+        レジュメと求人要件のみに依存する分析を取得（同一入力ではサイクルをまたいで1回だけ実行）
+        
+        Returns:
+            weight_profile, weight_explanation, required_skills,
+            career_assessment, age_experience_assessment を含む辞書
+        """
+        input_fp = self._get_analysis_fingerprint(state)
+        memo = state.analysis_memo.get(input_fp)
+        if memo is not None:
+            print(f"  サイクル不変の分析結果を再利用")
+            return memo
+        
+        # 動的重み付けを計算
+        job_data = {
+            'title': state.job_description[:100] if state.job_description else '',
+            'job_description': state.job_description,
+            'memo': state.job_memo
+        }
+        weight_profile = self.weight_adjuster.adjust_weights(job_data, state.structured_job_data)
         
-        text = "\n### 過去の評価推移"
-        for cycle in history:
-            text += f"\n\n**サイクル{cycle.cycle_number}**"
-            text += f"\n- スコア: {cycle.evaluation.score}点（確信度: {cycle.evaluation.confidence}）"
-            text += f"\n- 主な懸念: {cycle.evaluation.concerns[0] if cycle.evaluation.concerns else 'なし'}"
-            if len(cycle.search_results) > 0:
-                text += f"\n- 収集情報: {len(cycle.search_results)}件"
+        # メタ学習による重み調整
+        job_category = self._extract_job_category(job_data, state.structured_job_data)
+        if job_category:
+            meta_weights = self.meta_learner.get_adjusted_weights(job_category)
+            # メタ学習の重みを反映（50%の影響度）
+            for feature in ['required_skills', 'practical_ability', 'preferred_skills', 'organizational_fit', 'outstanding_career']:
+                if feature in meta_weights:
+                    original = getattr(weight_profile, feature)
+                    adjusted = original * 0.5 + meta_weights.get(feature, original) * 0.5
+                    setattr(weight_profile, feature, adjusted)
+            weight_profile.normalize()
+            print(f"  メタ学習による重み調整を適用")
         
-        return text
+        # キャリア継続性分析（LLM呼び出しを含むため永続メモも参照）
+        required_skills = self._extract_required_skills(state)
+        required_experience = state.job_description if state.job_description else state.job_memo
+        
+        # ResumeParserで抽出済みの職歴タイムラインを各分析で共有（未抽出の場合は空）
+        career_timeline = career_timeline_from_structured(state.structured_resume_data)
+        
+        career_assessment = self._load_persisted(input_fp, 'career_assessment', ContinuityAssessmentV2)
+        if career_assessment is None:
+            career_assessment = await self.career_analyzer.analyze_career_continuity(
+                resume_text=state.resume,
+                required_skills=required_skills,
+                required_experience=required_experience,
+                career_timeline=career_timeline
+            )
+            self._persist(input_fp, 'career_assessment', career_assessment)
+        
+        # 年齢・経験社数分析
+        age_experience_assessment = self._load_persisted(input_fp, 'age_experience_assessment', AgeExperienceAssessment)
+        if age_experience_assessment is None:
+            age_experience_assessment = self.age_experience_analyzer.analyze_age_experience_fit(
+                candidate_age=state.candidate_age,
+                total_companies=state.enrolled_company_count or 1,
+                resume_text=state.resume,
+                career_timeline=career_timeline
+            )
+            self._persist(input_fp, 'age_experience_assessment', age_experience_assessment)
+        
+        memo = {
+            'weight_profile': weight_profile,
+            'weight_explanation': self.weight_adjuster.get_weight_explanation(weight_profile),
+            'required_skills': required_skills,
+            'career_assessment': career_assessment,
+            'age_experience_assessment': age_experience_assessment
+        }
+        # フォールバックの評価結果は次のサイクルで再分析する
+        if not career_assessment.is_fallback:
+            state.analysis_memo[input_fp] = memo
+        return memo
+    
+    def _load_persisted(self, input_fp: str, name: str, result_class):
+        """永続メモから分析結果を復元"""
+        if not self.memo_store:
+            return None
+        try:
+            data = self.memo_store.get(input_fp, name)
+            if data is not None:
+                print(f"  保存済みの分析結果を使用: {name}")
+                return result_class(**data)
+        except Exception as e:
+            print(f"  分析メモの読み込みエラー（{name}）: {e}")
+        return None
+    
+    def _persist(self, input_fp: str, name: str, result) -> None:
+        """分析結果を永続メモに保存（既定値・簡易評価へのフォールバックは保存しない）"""
+        if not self.memo_store or getattr(result, 'is_fallback', False):
+            return
+        try:
+            self.memo_store.put(input_fp, name, result)
+        except Exception as e:
+            print(f"  分析メモの保存エラー（{name}）: {e}")
+    
+    def _build_candidate_segment(self, state: ResearchState, candidate_info: str,
+                                 career_assessment: ContinuityAssessmentV2,
+                                 age_experience_assessment: AgeExperienceAssessment) -> Tuple[str, Dict[str, str]]:
+        """
+        候補者ごとのプロンプトセグメントをトークン予算内で組み立てる
+        
+        Returns:
+            (セグメント, 予算内に残った検索結果のキー -> 要約)
+        """
+        analysis_text = f"""# キャリア継続性分析結果
+## 経験の継続性
+- 直近の関連経験: {'あり' if career_assessment.has_recent_relevant_experience else 'なし'}
+- 経験ブランク: {career_assessment.months_since_relevant_experience or '計測不可'}ヶ月
+- キャリアチェンジ: {'検出' if career_assessment.career_change_detected else 'なし'}
+- 部署異動: {'検出' if career_assessment.department_change_detected else 'なし'}
+- スキル保持率: {career_assessment.skill_retention_score:.0%}
+- 推奨減点率: {career_assessment.penalty_score:.0%}
+
+# 年齢・経験社数分析結果
+## 基本情報
+- 年齢: {age_experience_assessment.candidate_age or '不明'}歳
+- 経験社数: {age_experience_assessment.total_companies}社
+- 推定キャリア年数: {age_experience_assessment.career_years or '不明'}年
+- 平均在籍年数: {age_experience_assessment.average_tenure or '不明'}年
+
+## 適合性評価
+- 転職頻度: {age_experience_assessment.job_change_frequency}
+- 安定性スコア: {age_experience_assessment.stability_score:.0%}
+- 評価調整係数: {age_experience_assessment.adjustment_factor:.2f}
+
+## リスク要因
+{', '.join(age_experience_assessment.risk_factors) if age_experience_assessment.risk_factors else 'なし'}"""
+        
+        budget = PromptBudgetBuilder(self.candidate_token_budget, label=f"{self.name}:候補者")
+        budget.add("header", "# 候補者データ", priority=100)
+        budget.add("resume", f"## 候補者レジュメ\n{state.resume}", priority=100,
+                   min_tokens=self.candidate_token_budget // 2)
+        budget.add("candidate_info", f"## 候補者情報\n{candidate_info}", priority=95)
+        EvaluationFormatters.add_context_sections(budget, state.search_results, state.evaluation_history)
+        budget.add("analysis", analysis_text, priority=90)
+        budget.add("instruction", "上記の評価方針・配点・出力フォーマットに従って、この候補者を評価してください。", priority=100)
+        segment = budget.build()
+        
+        # 予算超過で削除された検索結果は次サイクルの差分再評価で改めて渡す
+        usage = budget.get_usage()
+        evaluated_summaries = {
+            key: result.summary for key, result in state.search_results.items()
+            if usage.get(f"search:{key}", {}).get("final")
+        }
+        return segment, evaluated_summaries
+    
+    def _build_job_segment(self, state: ResearchState, weight_profile: WeightProfile, weight_explanation: str) -> str:
+        """求人単位で共通のプロンプトセグメント（同一求人の候補者間でキャッシュを共有）"""
+        structured_job_data = self._format_structured_job_data(state) if state.structured_job_data else ''
+        return f"""# 求人データ
+## 求人要件
+{state.job_description}
+
+## 追加情報
+{state.job_memo}
+
+{structured_job_data}
+
+# 評価基準の配点（動的調整済み）
+- 必須要件: {weight_profile.required_skills:.0%}
+- 実務遂行能力: {weight_profile.practical_ability:.0%}
+- 歓迎要件: {weight_profile.preferred_skills:.0%}
+- 組織適合性: {weight_profile.organizational_fit:.0%}
+- 突出した経歴・実績: {weight_profile.outstanding_career:.0%}
+
+# 重み付けの理由
+{weight_explanation}"""
     
     async def _get_candidate_info(self, state: ResearchState) -> str:
         """候補者基本情報を取得（stateから直接取得）"""
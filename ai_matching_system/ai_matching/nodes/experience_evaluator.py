@@ -8,6 +8,7 @@ import google.generativeai as genai
 from .base import BaseNode, ResearchState, ScoreDetail
 from ..utils.evaluation_formatters import EvaluationFormatters
 from ..utils.evaluation_parser import EvaluationParser
+from ..utils.model_router import get_model_router
 
 
 class ExperienceEvaluatorNode(BaseNode):
@@ -16,7 +17,7 @@ class ExperienceEvaluatorNode(BaseNode):
     def __init__(self, api_key: str):
         super().__init__("ExperienceEvaluator")
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.model = get_model_router().model_for(self.name)
     
     async def process(self, state: ResearchState) -> ResearchState:
         """実務経験の評価を実行"""
@@ -94,7 +95,7 @@ class ExperienceEvaluatorNode(BaseNode):
 - 実務面での強み: [箇条書き]"""
 
         print(f"  LLMに実務経験評価プロンプト送信中...")
-        response = self.model.generate_content(prompt)
+        response = await self.model.generate_content_async(prompt)
         
         # 評価結果をパース
         experience_score = self._parse_experience_score(response.text)
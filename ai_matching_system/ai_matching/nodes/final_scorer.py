@@ -8,6 +8,8 @@ import google.generativeai as genai
 from .base import BaseNode, ResearchState, EvaluationResult, ScoreDetail
 from ..utils.evaluation_formatters import EvaluationFormatters
 from ..utils.semantic_guards import SemanticGuards
+from ..utils.model_router import get_model_router
+from ..utils.structured_output import StructuredOutputDecoder, json_generation_config, EVALUATION_SUMMARY_SCHEMA
 from ..prompts.scoring_criteria import ScoringCriteria, WeightProfile
 from ..prompts.requirement_rules import RequirementRules
 
@@ -18,7 +20,8 @@ class FinalScorerNode(BaseNode):
     def __init__(self, api_key: str):
         super().__init__("FinalScorer")
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+        self.model = get_model_router().model_for(self.name)
+        self.summary_decoder = StructuredOutputDecoder(self.name, EVALUATION_SUMMARY_SCHEMA)
     
     async def process(self, state: ResearchState) -> ResearchState:
         """最終スコアの計算とサマリー生成"""
@@ -68,19 +71,16 @@ class FinalScorerNode(BaseNode):
 {ScoringCriteria.SUMMARY_FORMAT}
 
 # 出力フォーマット
-確信度: [低/中/高]
-
-主な強み:
-[必須要件との合致点を優先的に記載]
-
-主な懸念点:
-[必須要件の不足のみを記載]
-
-評価サマリー:
-[総合的な評価を記載]"""
+以下のキーを持つJSONのみを出力すること（前後に説明文を付けない）
+- confidence: 確信度（"低" / "中" / "高"）
+- strengths: 主な強み（必須要件との合致点を優先的に記載）
+- concerns: 主な懸念点（必須要件の不足のみを記載）
+- summary: 評価サマリー（総合的な評価を記載）"""
 
         print(f"  LLMに最終評価サマリー生成プロンプト送信中...")
-        response = self.model.generate_content(prompt)
+        response = await self.model.generate_content_async(
+            prompt, generation_config=json_generation_config(EVALUATION_SUMMARY_SCHEMA)
+        )
         
         # 評価結果を構築
         evaluation = self._build_evaluation_result(
@@ -185,16 +185,24 @@ class FinalScorerNode(BaseNode):
         """評価結果オブジェクトを構築"""
         import re
         
-        # 確信度の抽出
-        confidence_match = re.search(r'確信度:\s*([低中高])', response_text)
-        confidence = confidence_match.group(1) if confidence_match else '中'
-        
-        # 強みと懸念点の抽出
-        strengths = self._extract_list_section(response_text, "主な強み")
-        concerns = self._extract_list_section(response_text, "主な懸念点")
-        
-        # サマリーの抽出
-        summary = self._extract_summary(response_text)
+        data = self.summary_decoder.decode(response_text)
+        if data is not None:
+            confidence = data['confidence']
+            strengths = [item.strip() for item in data['strengths'] if item.strip()]
+            concerns = [item.strip() for item in data['concerns'] if item.strip()]
+            summary = data['summary'].strip()
+        else:
+            # 確信度の抽出
+            confidence_match = re.search(r'確信度:\s*([低中高])', response_text)
+            confidence = confidence_match.group(1) if confidence_match else '中'
+            
+            # 強みと懸念点の抽出
+            strengths = self._extract_list_section(response_text, "主な強み")
+            concerns = self._extract_list_section(response_text, "主な懸念点")
+            
+            # サマリーの抽出
+            summary = self._extract_summary(response_text)
+            self.summary_decoder.record_fallback_result(bool(strengths or concerns or summary))
         
         # スコア内訳の構築
         score_breakdown = {}
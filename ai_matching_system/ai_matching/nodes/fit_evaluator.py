@@ -8,6 +8,7 @@ import google.generativeai as genai
 from .base import BaseNode, ResearchState, ScoreDetail
 from ..utils.evaluation_formatters import EvaluationFormatters
 from ..utils.evaluation_parser import EvaluationParser
+from ..utils.model_router import get_model_router
 
 
 class FitEvaluatorNode(BaseNode):
@@ -16,7 +17,7 @@ class FitEvaluatorNode(BaseNode):
     def __init__(self, api_key: str):
         super().__init__("FitEvaluator")
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.model = get_model_router().model_for(self.name)
     
     async def process(self, state: ResearchState) -> ResearchState:
         """組織適合性と突出した経歴の評価を実行"""
@@ -106,7 +107,7 @@ class FitEvaluatorNode(BaseNode):
 - 突出要素による付加価値: [ある/なし]"""
 
         print(f"  LLMに組織適合性評価プロンプト送信中...")
-        response = self.model.generate_content(prompt)
+        response = await self.model.generate_content_async(prompt)
         
         # 評価結果をパース
         fit_scores = self._parse_fit_scores(response.text)
@@ -9,8 +9,21 @@ from datetime import datetime
 
 from .base import BaseNode, ResearchState, InformationGap
 from .score_based_strategy import ScoreBasedSearchStrategy
+from .speculative_searcher import discard_speculative_searches
+from ..utils.search_cache import normalize_query
 from ..utils.query_templates import QueryTemplates
 from ..utils.contradiction_resolver import ContradictionResolver
+from ..utils.resume_parser import career_timeline_from_structured
+from ..utils.model_router import get_model_router
+from ..utils.structured_output import StructuredOutputDecoder, json_generation_config, GAP_ANALYSIS_SCHEMA
+
+
+_LEGAL_ENTITY_PATTERN = re.compile(r"株式会社|有限会社|合同会社|\(株\)|（株）")
+
+
+def _company_key(company: str) -> str:
+    """企業名の比較用キー（法人格の有無・表記揺れを吸収）"""
+    return normalize_query(_LEGAL_ENTITY_PATTERN.sub(" ", company or ""))
 
 
 class GapAnalyzerNode(BaseNode):
@@ -19,7 +32,8 @@ class GapAnalyzerNode(BaseNode):
     def __init__(self, api_key: str):
         super().__init__("GapAnalyzer")
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.model = get_model_router().model_for(self.name)
+        self.gap_decoder = StructuredOutputDecoder(self.name, GAP_ANALYSIS_SCHEMA)
         self.search_strategy = ScoreBasedSearchStrategy()
         self.contradiction_resolver = ContradictionResolver()
     
@@ -31,6 +45,7 @@ class GapAnalyzerNode(BaseNode):
         if not state.current_evaluation:
             print("  警告: 評価結果がありません")
             state.information_gaps = []
+            discard_speculative_searches(state)
             self.state = "completed"
             return state
         
@@ -90,12 +105,15 @@ class GapAnalyzerNode(BaseNode):
 - 最低1つ、できれば2-3つの情報ギャップを特定してください
 - 単に「追加情報不要」とせず、採用判断の確信度を高めるための具体的な情報を提案してください
 
-情報1:
-種類: [環境適応性ギャップ/実務遂行能力ギャップ/役割期待値ギャップ/市場競争力ギャップ]
-説明: [レジュメから読み取れない具体的な情報ギャップ]
-検索クエリ: [具体的な企業名・数値・年号を含む実行可能なクエリ]
-重要度: [高/中/低]
-理由: [この情報が採用判断にどう影響するか]
+# 出力フォーマット
+以下のキーを持つJSONのみを出力すること（前後に説明文を付けない）
+- no_additional_info_needed: 分析終了条件に該当し追加情報不要の場合はtrue
+- gaps: 情報ギャップの配列（優先度順、最大3つ。追加情報不要の場合は空配列）
+  - info_type: "環境適応性ギャップ" / "実務遂行能力ギャップ" / "役割期待値ギャップ" / "市場競争力ギャップ"
+  - description: レジュメから読み取れない具体的な情報ギャップ
+  - search_query: 具体的な企業名・数値・年号を含む実行可能なクエリ
+  - importance: "高" / "中" / "低"
+  - rationale: この情報が採用判断にどう影響するか
 
 # 検索クエリの具体例
 環境適応性: "[候補者企業] 従業員数 売上規模 組織文化 働き方"
@@ -111,20 +129,25 @@ class GapAnalyzerNode(BaseNode):
 - 個人情報や推測に基づくクエリは避ける"""
         
         print(f"  LLMに情報ギャップ分析を依頼中...")
-        response = self.model.generate_content(prompt)
+        response = await self.model.generate_content_async(
+            prompt, generation_config=json_generation_config(GAP_ANALYSIS_SCHEMA)
+        )
         print(f"  LLMから応答受信")
         
         # 現在のスコアを一時的に保存（デフォルトギャップ生成用）
         self._current_eval_score = eval_result.score
         
-        gaps = self._parse_gaps(response.text)
+        gaps = self._decode_gaps(response.text)
         print(f"  情報ギャップ分析完了: {len(gaps)}件の不足情報を特定")
         
         # 既存の検索結果に矛盾がある場合は検出
         if state.search_results:
             print(f"  矛盾検出を開始...")
             contradictions = self.contradiction_resolver.detect_contradictions(
-                resume_data={'text': state.resume},
+                resume_data={
+                    'text': state.resume,
+                    'career_timeline': career_timeline_from_structured(state.structured_resume_data)
+                },
                 search_results=state.search_results,
                 evaluation_text=eval_result.raw_response if eval_result.raw_response else ""
             )
@@ -143,6 +166,21 @@ class GapAnalyzerNode(BaseNode):
         # 状態を更新
         state.information_gaps = gaps
         
+        # 先読み検索の結果は特定したギャップと同じクエリ、または同じ種類で同じ企業を対象とするものを、
+        # ギャップの種類をキーにして検索ノードに渡す（以降の動的戦略ノードによるクエリの調整に関わらず使用する）
+        if state.speculative_searches:
+            speculated = len(state.speculative_searches)
+            consumed = {}
+            for gap in gaps:
+                prefetched = state.speculative_searches.pop(normalize_query(gap.search_query), None)
+                if prefetched is None:
+                    prefetched = self._take_matching_prefetch(state, gap)
+                if prefetched:
+                    consumed[gap.info_type] = prefetched
+            discard_speculative_searches(state)
+            state.speculative_searches = consumed
+            print(f"  先読み検索の結果: {speculated}件中{len(consumed)}件を使用")
+        
         # 継続判定（厳格化した基準に対応）
         should_stop = False
         stop_reason = ""
@@ -183,8 +221,36 @@ class GapAnalyzerNode(BaseNode):
         self.state = "completed"
         return state
     
+    def _decode_gaps(self, text: str) -> List[InformationGap]:
+        """LLMの出力をJSONとしてデコード（デコードできない場合のみテキストとしてパース）"""
+        data = self.gap_decoder.decode(text)
+        if data is None:
+            gaps = self._parse_gaps(text)
+            self.gap_decoder.record_fallback_result(bool(gaps) or "追加情報不要" in text)
+            return gaps
+        
+        if data['no_additional_info_needed'] or not data['gaps']:
+            # スコアが中間範囲の場合はデフォルトギャップを生成
+            if hasattr(self, '_current_eval_score') and 45 <= self._current_eval_score <= 80:
+                print("  中間スコアのためデフォルトギャップを生成")
+                return self._generate_default_gaps()
+            return []
+        
+        gaps = []
+        for item in data['gaps'][:3]:
+            gap_context = {'type': item['info_type']}
+            gaps.append(InformationGap(
+                info_type=item['info_type'],
+                description=item['description'],
+                # テンプレートを使用してクエリを改善
+                search_query=self._enhance_query(item['search_query'], gap_context),
+                importance=item['importance'],
+                rationale=item['rationale']
+            ))
+        return gaps
+    
     def _parse_gaps(self, text: str) -> List[InformationGap]:
-        """LLMの出力を情報ギャップにパース"""
+        """LLMの出力（テキスト形式）を情報ギャップにパース"""
         gaps = []
         
         if "追加情報不要" in text:
@@ -240,6 +306,44 @@ class GapAnalyzerNode(BaseNode):
         # 最大3つに制限
         return gaps[:3]
     
+    def predict_gaps(self, state: ResearchState) -> List[InformationGap]:
+        """
+        評価前の入力だけから予測できる情報ギャップ（先読み検索用）
+        
+        候補者の所属企業が求人企業と異なる場合の企業規模・文化の確認のみ。
+        ギャップ分析のプロンプトは環境適応性の確認を最初に含めるよう指示しており、info_typeの列挙値で
+        出力される種類とクエリ（_enhance_queryと同じテンプレート）に揃える。
+        デフォルトギャップはLLMがギャップを返さない場合にしか使われず、クエリも汎用的なため予測しない
+        """
+        gaps = []
+        client_company = ((state.structured_job_data or {}).get('basic_info') or {}).get('company') or ''
+        candidate_company = state.candidate_company or ''
+        if candidate_company and _company_key(candidate_company) != _company_key(client_company):
+            gaps.append(InformationGap(
+                info_type="環境適応性ギャップ",
+                description=f"{candidate_company}の企業規模・組織文化",
+                search_query=QueryTemplates.generate_company_query(candidate_company, "企業文化"),
+                importance="高",
+                rationale="組織規模や文化の違いは採用後の定着率に大きく影響するため"
+            ))
+        return gaps
+    
+    def _take_matching_prefetch(self, state: ResearchState, gap: InformationGap):
+        """
+        クエリが一致しない場合に、同じ種類で候補者の所属企業を対象とするギャップの先読み結果を取り出す
+        （LLMが同じ確認内容を別の言い回しのクエリで出力した場合）
+        """
+        company_key = _company_key(state.candidate_company or '')
+        if not company_key:
+            return None
+        gap_text = normalize_query(f"{gap.search_query} {gap.description}")
+        if company_key not in gap_text:
+            return None
+        for key, prefetched in list(state.speculative_searches.items()):
+            if prefetched.gap.info_type == gap.info_type:
+                return state.speculative_searches.pop(key)
+        return None
+    
     def _generate_default_gaps(self) -> List[InformationGap]:
         """中間スコアの場合のデフォルトギャップを生成"""
         # コンテキストから企業名やスキルを抽出
@@ -0,0 +1,166 @@
+"""
+ノードグラフ
+各ノードが読み書きする状態フィールドを宣言し、依存関係が満たされたノードから並行実行する
+"""
+
+import asyncio
+import copy
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from .base import BaseNode, ResearchState
+
+
+@dataclass
+class GraphNode:
+    """
+    グラフ上のノード定義
+
+    reads / writes にはResearchStateのフィールド名を指定する。
+    辞書フィールドの特定のキーだけを書き込む場合は "partial_scores.skills" のようにドットで区切る
+    """
+    node: BaseNode
+    reads: Tuple[str, ...] = ()
+    writes: Tuple[str, ...] = ()
+    condition: Optional[Callable[[ResearchState], bool]] = None  # Falseの場合は実行をスキップ
+    name: Optional[str] = None  # 省略時はnode.name
+
+    def __post_init__(self):
+        self.name = self.name or self.node.name
+        self.reads = tuple(self.reads)
+        self.writes = tuple(self.writes)
+
+
+def _overlaps(path_a: str, path_b: str) -> bool:
+    """フィールドパスが重なるか（同一、または一方が他方の親）"""
+    return path_a == path_b or path_a.startswith(path_b + ".") or path_b.startswith(path_a + ".")
+
+
+def _any_overlap(paths_a: Tuple[str, ...], paths_b: Tuple[str, ...]) -> bool:
+    return any(_overlaps(a, b) for a in paths_a for b in paths_b)
+
+
+class NodeGraph:
+    """
+    宣言順を逐次実行時の意味とするノードグラフ
+
+    後に宣言されたノードは、先に宣言されたノードと読み書きが衝突する場合
+    （書き込み→読み込み、読み込み→書き込み、書き込み→書き込み）にのみそのノードの完了を待つ。
+    衝突のないノードは並行実行し、各ノードには状態のコピーを渡して宣言されたフィールドだけを書き戻すため、
+    実行順序によらず結果は逐次実行と同じになる
+    """
+
+    def __init__(self, name: str, nodes: List[GraphNode]):
+        names = [graph_node.name for graph_node in nodes]
+        duplicates = {name for name in names if names.count(name) > 1}
+        if duplicates:
+            raise ValueError(f"ノード名が重複しています: {', '.join(sorted(duplicates))}")
+
+        self.name = name
+        self.nodes = nodes
+        # ノード名 -> 完了を待つノード名
+        self.dependencies: Dict[str, Set[str]] = {}
+        for i, later in enumerate(nodes):
+            self.dependencies[later.name] = {
+                earlier.name for earlier in nodes[:i]
+                if _any_overlap(earlier.writes, later.reads)
+                or _any_overlap(earlier.reads, later.writes)
+                or _any_overlap(earlier.writes, later.writes)
+            }
+
+    async def run(self, state: ResearchState) -> Tuple[ResearchState, Dict[str, float]]:
+        """
+        グラフを実行
+
+        Returns:
+            (更新された状態, ノード名 -> 処理時間（秒）。スキップしたノードは含まない)
+        """
+        graph_start = time.time()
+        timings: Dict[str, float] = {}
+        done: Set[str] = set()
+        pending = list(self.nodes)
+        running: Dict[asyncio.Task, GraphNode] = {}
+
+        try:
+            while pending or running:
+                # 依存ノードが完了したノードを起動（条件を満たさないノードはスキップ）
+                for graph_node in list(pending):
+                    if not self.dependencies[graph_node.name] <= done:
+                        continue
+                    pending.remove(graph_node)
+                    if graph_node.condition and not graph_node.condition(state):
+                        print(f"  [NodeGraph:{self.name}] {graph_node.name}: スキップ")
+                        done.add(graph_node.name)
+                        continue
+                    task = asyncio.create_task(self._run_node(graph_node, state))
+                    running[task] = graph_node
+
+                if not running:
+                    continue
+
+                finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                # 同時に完了したノードは宣言順に書き戻す
+                for task in sorted(finished, key=lambda t: self.nodes.index(running[t])):
+                    graph_node = running.pop(task)
+                    node_state, baseline, duration = task.result()
+                    self._merge(graph_node, node_state, baseline, state)
+                    timings[graph_node.name] = duration
+                    done.add(graph_node.name)
+        finally:
+            for task in running:
+                task.cancel()
+
+        timings = {graph_node.name: timings[graph_node.name] for graph_node in self.nodes if graph_node.name in timings}
+        total = time.time() - graph_start
+        node_total = sum(timings.values())
+        print(f"  [NodeGraph:{self.name}] 処理時間: {total:.2f}秒（ノード合計{node_total:.2f}秒）")
+        for name, duration in timings.items():
+            print(f"    - {name}: {duration:.2f}秒")
+        return state, timings
+
+    async def _run_node(self, graph_node: GraphNode, state: ResearchState) -> Tuple[ResearchState, Dict, float]:
+        """
+        状態のコピーに対してノードを実行
+
+        Returns:
+            (ノードが返した状態, 実行前の属性, 処理時間（秒）)
+        """
+        node_state = self._snapshot(graph_node, state)
+        baseline = dict(vars(node_state))
+        node_start = time.time()
+        result = await graph_node.node.process(node_state)
+        return result if result is not None else node_state, baseline, time.time() - node_start
+
+    def _snapshot(self, graph_node: GraphNode, state: ResearchState) -> ResearchState:
+        """ノードに渡す状態のコピー（書き込み対象のコンテナはノード側での直接変更に備えて複製）"""
+        node_state = copy.copy(state)
+        for field_name in {path.split(".", 1)[0] for path in graph_node.writes}:
+            value = getattr(node_state, field_name, None)
+            if isinstance(value, (dict, list, set)):
+                setattr(node_state, field_name, copy.copy(value))
+        return node_state
+
+    def _merge(self, graph_node: GraphNode, node_state: ResearchState, baseline: Dict,
+               state: ResearchState) -> None:
+        """宣言されたフィールドを書き戻す"""
+        for path in graph_node.writes:
+            field_name, _, key = path.partition(".")
+            if not hasattr(node_state, field_name):
+                continue
+            value = getattr(node_state, field_name)
+            if not key:
+                setattr(state, field_name, value)
+            elif isinstance(value, dict) and key in value:
+                if not isinstance(getattr(state, field_name, None), dict):
+                    setattr(state, field_name, {})
+                getattr(state, field_name)[key] = value[key]
+
+        # 宣言漏れの書き込みは警告したうえで反映（結果を失わないため）
+        declared = {path.split(".", 1)[0] for path in graph_node.writes}
+        for field_name, value in vars(node_state).items():
+            if field_name in declared:
+                continue
+            if field_name not in baseline or baseline[field_name] is not value:
+                print(f"  [NodeGraph:{self.name}] 警告: {graph_node.name}が未宣言のフィールドに書き込みました: {field_name}")
+                setattr(state, field_name, value)
@@ -312,7 +312,7 @@ class HybridEvaluatorNode(EvaluatorNode):
 """
         
         # LLMで評価
-        response = self.model.generate_content(prompt)
+        response = await self.model.generate_content_async(prompt)
         return self._parse_evaluation(response.text)
     
     def _log_evaluation_reasoning(self, state: ResearchState, confidence_analysis: Dict, 
@@ -3,10 +3,10 @@
 複数の専門ノードを使用して候補者を評価
 """
 
-from typing import Dict, Optional, List
-import asyncio
+from typing import Dict, Optional
 
-from .base import BaseNode, ResearchState, EvaluationResult
+from .base import BaseNode, ResearchState
+from .graph import GraphNode, NodeGraph
 from .skill_evaluator import SkillEvaluatorNode
 from .experience_evaluator import ExperienceEvaluatorNode
 from .fit_evaluator import FitEvaluatorNode
@@ -25,6 +25,23 @@ class ModularEvaluatorNode(BaseNode):
         self.fit_evaluator = FitEvaluatorNode(api_key)
         self.final_scorer = FinalScorerNode(api_key)
         
+        # スキル評価 ∥ 実務経験評価 → 組織適合性評価 → 最終スコア統合
+        self.graph = NodeGraph("ModularEvaluator", [
+            GraphNode(self.skill_evaluator,
+                      reads=("resume", "job_description", "structured_job_data", "structured_resume_data"),
+                      writes=("partial_scores.skills",)),
+            GraphNode(self.experience_evaluator,
+                      reads=("resume", "job_description", "job_memo", "structured_job_data", "search_results"),
+                      writes=("partial_scores.experience",)),
+            GraphNode(self.fit_evaluator,
+                      reads=("resume", "job_description", "structured_job_data"),
+                      writes=("partial_scores",)),
+            GraphNode(self.final_scorer,
+                      reads=("partial_scores", "resume", "job_description", "structured_job_data",
+                             "structured_resume_data", "evaluation_history"),
+                      writes=("current_evaluation",))
+        ])
+        
         # Supabase設定（元のEvaluatorNodeとの互換性のため保持）
         self.supabase_url = supabase_url
         self.supabase_key = supabase_key
@@ -36,26 +53,7 @@ class ModularEvaluatorNode(BaseNode):
         print(f"\n=== モジュール評価開始（サイクル{state.current_cycle}） ===")
         
         try:
-            # 並列実行可能な評価を同時実行
-            print("  並列評価フェーズを開始...")
-            
-            # スキル評価と実務経験評価を並列実行
-            skill_task = asyncio.create_task(self.skill_evaluator.process(state))
-            experience_task = asyncio.create_task(self.experience_evaluator.process(state))
-            
-            # 並列実行の完了を待つ
-            await asyncio.gather(skill_task, experience_task)
-            
-            # 状態を更新（並列実行の結果をマージ）
-            state = await self._merge_states([skill_task.result(), experience_task.result()], state)
-            
-            print("  組織適合性評価を開始...")
-            # 組織適合性評価（前の評価結果を参照する可能性があるため順次実行）
-            state = await self.fit_evaluator.process(state)
-            
-            print("  最終スコア統合を開始...")
-            # 最終スコア統合
-            state = await self.final_scorer.process(state)
+            state, _ = await self.graph.run(state)
             
             print(f"\n=== モジュール評価完了 ===")
             print(f"  最終スコア: {state.current_evaluation.score}")
@@ -69,20 +67,6 @@ class ModularEvaluatorNode(BaseNode):
             self.state = "failed"
             raise
     
-    async def _merge_states(self, states: List[ResearchState], original_state: ResearchState) -> ResearchState:
-        """並列実行された状態をマージ"""
-        # partial_scoresをマージ
-        merged_partial_scores = {}
-        
-        for state in states:
-            if hasattr(state, 'partial_scores'):
-                merged_partial_scores.update(state.partial_scores)
-        
-        # 元の状態に部分スコアを設定
-        original_state.partial_scores = merged_partial_scores
-        
-        return original_state
-    
     def get_evaluation_summary(self, state: ResearchState) -> Dict:
         """評価結果のサマリーを取得"""
         if not hasattr(state, 'current_evaluation') or not state.current_evaluation:
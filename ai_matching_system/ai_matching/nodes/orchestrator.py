@@ -20,7 +20,13 @@ from .searcher import TavilySearcherNode
 from .reporter import ReportGeneratorNode
 from .rag_searcher import RAGSearcherNode
 from .adaptive_search_strategy import AdaptiveSearchStrategyNode
-from ..utils.parallel_executor import ParallelExecutor
+from .speculative_searcher import SpeculativeSearchNode, discard_speculative_searches, get_speculation_stats
+from .graph import GraphNode, NodeGraph
+from ..utils.structured_output import get_parse_stats
+from ..utils.model_router import get_model_router, get_model_usage_stats
+from ..utils.resilience import get_resilience_stats
+from ..utils.research_checkpoint import ResearchCheckpointStore, CHECKPOINT_VERSION
+from ..utils.fingerprint import fingerprint
 
 
 class DeepResearchOrchestrator:
@@ -61,14 +67,49 @@ class DeepResearchOrchestrator:
         self.gap_analyzer = GapAnalyzerNode(gemini_api_key)
         self.adaptive_strategy = AdaptiveSearchStrategyNode()
         self.searcher = TavilySearcherNode(gemini_api_key, tavily_api_key)
+        self.speculative_searcher = SpeculativeSearchNode(self.searcher, self.gap_analyzer)
         self.reporter = ReportGeneratorNode(gemini_api_key)
         
-        # ノードのリスト（処理順）
+        # ノードグラフ（宣言順が処理順。読み書きが衝突しないノードは並行実行される）
         # RAG検索は最初に実行
-        self.initial_nodes = [self.rag_searcher]
-        # 動的戦略ノードをgap_analyzerの後に追加
-        self.cycle_nodes = [self.evaluator, self.gap_analyzer, self.adaptive_strategy, self.searcher]
+        self.initial_graph = NodeGraph("Initial", [
+            GraphNode(self.rag_searcher,
+                      reads=("resume", "job_description", "job_memo", "current_evaluation"),
+                      writes=("similar_cases", "rag_insights"))
+        ])
+        # 動的戦略ノードはgap_analyzerが特定したギャップを調整するため、その完了を待つ
+        # 先読み検索は評価ノードと並行して実行し、gap_analyzerが使う結果を選ぶ
+        self.cycle_graph = NodeGraph("Cycle", [
+            GraphNode(self.evaluator,
+                      reads=("resume", "job_description", "job_memo", "structured_job_data",
+                             "structured_resume_data", "search_results", "evaluation_history",
+                             "rag_insights", "current_cycle"),
+                      writes=("current_evaluation", "analysis_memo", "partial_scores")),
+            GraphNode(self.speculative_searcher,
+                      reads=("candidate_company", "structured_job_data", "search_results", "current_cycle"),
+                      writes=("speculative_searches",),
+                      condition=self.speculative_searcher.should_run),
+            GraphNode(self.gap_analyzer,
+                      reads=("current_evaluation", "information_gaps", "search_results", "resume",
+                             "job_description", "job_memo", "structured_resume_data", "current_cycle"),
+                      writes=("information_gaps", "should_continue", "speculative_searches")),
+            GraphNode(self.adaptive_strategy,
+                      reads=("current_evaluation", "information_gaps"),
+                      writes=("information_gaps",)),
+            GraphNode(self.searcher,
+                      reads=("information_gaps",),
+                      writes=("search_results", "speculative_searches"),
+                      condition=lambda state: bool(state.information_gaps))
+        ])
         self.final_node = self.reporter
+        
+        # サイクル単位のチェックポイント（RESEARCH_CHECKPOINT_PATH設定時のみ。中断された候補者を途中から再開）
+        self.checkpoint_store = None
+        if os.getenv('RESEARCH_CHECKPOINT_PATH'):
+            try:
+                self.checkpoint_store = ResearchCheckpointStore()
+            except Exception as e:
+                print(f"[Orchestrator] チェックポイントストアの初期化に失敗: {e}")
     
     async def run(
         self,
@@ -131,34 +172,38 @@ class DeepResearchOrchestrator:
         
         print("-" * 70)
         
-        # 初期処理（RAG検索）を実行
-        print("\n--- 初期処理: 類似ケース検索 ---")
-        for node in self.initial_nodes:
-            node_start = time.time()
-            state = await node.process(state)
-            node_duration = time.time() - node_start
-            print(f"  処理時間: {node_duration:.2f}秒")
-            
-            # RAG検索結果を表示
-            if hasattr(state, 'rag_insights') and state.rag_insights:
-                insights = state.rag_insights
-                print(f"  類似ケース数: {insights.get('total_cases', 0)}")
-                if insights.get('client_tendency'):
-                    print(f"  最頻出評価: {insights['client_tendency']['most_common_evaluation']} ({insights['client_tendency']['percentage']:.1f}%)")
-                if insights.get('risk_factors'):
-                    print(f"  リスク要因: {len(insights['risk_factors'])}件検出")
+        # ノードごとの累計処理時間
+        node_timings: Dict[str, float] = {}
+        
+        # 前回中断された評価があれば最後に完了したサイクルから再開
+        checkpoint_key = self._checkpoint_key(state)
+        restored = self._load_checkpoint(checkpoint_key)
+        if restored:
+            state = restored
+            print(f"\n--- チェックポイントから再開: サイクル{state.current_cycle}完了時点 ---")
+        else:
+            # 初期処理（RAG検索）を実行
+            print("\n--- 初期処理: 類似ケース検索 ---")
+            state, timings = await self.initial_graph.run(state)
+            self._add_timings(node_timings, timings)
+        
+        # RAG検索結果を表示
+        if hasattr(state, 'rag_insights') and state.rag_insights:
+            insights = state.rag_insights
+            print(f"  類似ケース数: {insights.get('total_cases', 0)}")
+            if insights.get('client_tendency'):
+                print(f"  最頻出評価: {insights['client_tendency']['most_common_evaluation']} ({insights['client_tendency']['percentage']:.1f}%)")
+            if insights.get('risk_factors'):
+                print(f"  リスク要因: {len(insights['risk_factors'])}件検出")
         
         # 評価サイクルを実行
         while state.should_continue and state.current_cycle < state.max_cycles:
             cycle_start = time.time()
             print(f"\n--- サイクル {state.current_cycle + 1} ---")
             
-            # 並列実行可能なノードをグループ化
-            # 評価は必須、その後のgap_analyzerとadaptive_strategyを並列実行
-            evaluator_start = time.time()
-            state = await self.evaluator.process(state)
-            evaluator_duration = time.time() - evaluator_start
-            print(f"  評価ノード処理時間: {evaluator_duration:.2f}秒")
+            searches_before = len(state.search_results)
+            state, timings = await self.cycle_graph.run(state)
+            self._add_timings(node_timings, timings)
             
             # 評価結果を表示
             if state.current_evaluation:
@@ -171,70 +216,14 @@ class DeepResearchOrchestrator:
                 for concern in state.current_evaluation.concerns[:2]:
                     print(f"    - {concern}")
             
-            # gap_analyzerとadaptive_strategyを並列実行
-            parallel_executor = ParallelExecutor(max_workers=2)
-            parallel_tasks = [
-                ("GapAnalyzer", self.gap_analyzer.process, {"state": state}),
-                ("AdaptiveStrategy", self.adaptive_strategy.process, {"state": state})
-            ]
-            
-            print(f"\n  ギャップ分析と適応戦略を並列実行...")
-            parallel_start = time.time()
-            report = await parallel_executor.execute_parallel_async(parallel_tasks)
-            parallel_duration = time.time() - parallel_start
-            
-            # 並列実行結果を反映
-            for task_result in report.task_results:
-                if task_result.success and task_result.result:
-                    state = task_result.result
-            
-            print(f"  並列処理完了: {parallel_duration:.2f}秒 (効率: {report.parallel_efficiency:.1f}x)")
-            
             # ギャップ分析結果を表示
             print(f"  情報ギャップ: {len(state.information_gaps)}件")
             if state.information_gaps:
                 for i, gap in enumerate(state.information_gaps[:3], 1):
                     print(f"    {i}. {gap.info_type} (重要度: {gap.importance})")
-            
-            # 検索を実行
-            if state.information_gaps:
-                searcher_start = time.time()
-                state = await self.searcher.process(state)
-                searcher_duration = time.time() - searcher_start
-                print(f"  検索ノード処理時間: {searcher_duration:.2f}秒")
                 
-                new_searches = len(state.search_results) - sum(len(c.search_results) for c in state.evaluation_history)
-                print(f"  新規検索実行: {new_searches}件")
+                print(f"  新規検索実行: {len(state.search_results) - searches_before}件")
                 print(f"  累計検索結果: {len(state.search_results)}件")
-                
-                # 各ノードの結果を詳細表示
-                if node.name == "Evaluator" and state.current_evaluation:
-                    print(f"  評価スコア: {state.current_evaluation.score}/100")
-                    print(f"  確信度: {state.current_evaluation.confidence}")
-                    print(f"  強み:")
-                    for strength in state.current_evaluation.strengths[:2]:
-                        print(f"    - {strength}")
-                    print(f"  懸念:")
-                    for concern in state.current_evaluation.concerns[:2]:
-                        print(f"    - {concern}")
-                    print(f"  サマリー: {state.current_evaluation.summary[:100]}...")
-                    
-                elif node.name == "GapAnalyzer":
-                    print(f"  情報ギャップ: {len(state.information_gaps)}件")
-                    if state.information_gaps:
-                        for i, gap in enumerate(state.information_gaps[:3], 1):
-                            print(f"    {i}. {gap.info_type} (重要度: {gap.importance})")
-                            print(f"       検索クエリ: {gap.search_query}")
-                    else:
-                        print("  → 追加情報不要（十分な確信度）")
-                        
-                elif node.name == "TavilySearcher":
-                    new_searches = len(state.search_results) - sum(len(c.search_results) for c in state.evaluation_history)
-                    print(f"  新規検索実行: {new_searches}件")
-                    print(f"  累計検索結果: {len(state.search_results)}件")
-                    for key in list(state.search_results.keys())[-new_searches:]:
-                        result = state.search_results[key]
-                        print(f"    - {key}: {result.summary[:80]}...")
             
             # サイクル結果を記録
             cycle_duration = time.time() - cycle_start
@@ -251,6 +240,7 @@ class DeepResearchOrchestrator:
             print(f"\nサイクル{state.current_cycle}完了:")
             print(f"  処理時間: {cycle_duration:.2f}秒")
             print(f"  評価履歴数: {len(state.evaluation_history)}件")
+            self._save_checkpoint(checkpoint_key, state)
             
             # 継続判定（gap_analyzerが設定）
             if not state.should_continue:
@@ -259,15 +249,118 @@ class DeepResearchOrchestrator:
             elif state.current_cycle >= state.max_cycles:
                 print("\n→ 最大サイクル数に到達しました")
         
+        # 使われなかった先読み結果を破棄
+        discard_speculative_searches(state)
+        
         # 最終レポート生成
         print("\n--- 最終レポート生成 ---")
         report_start = time.time()
         state = await self.final_node.process(state)
         report_duration = time.time() - report_start
         print(f"レポート生成時間: {report_duration:.2f}秒")
+        node_timings[self.final_node.name] = report_duration
+        
+        # 構造化出力のデコード失敗（テキストパーサーへのフォールバック）の累計
+        parse_failures = {name: stats for name, stats in get_parse_stats().items() if stats['failed']}
+        if parse_failures:
+            print("構造化出力のデコード失敗（累計）: " + ", ".join(
+                f"{name}={stats['failed']}/{stats['calls']}件（推定{stats['wasted_output_tokens']}トークン）"
+                for name, stats in parse_failures.items()
+            ))
         
         # 結果を整形して返す
-        return self._format_final_result(state)
+        result = self._format_final_result(state)
+        result['node_timings'] = {name: round(duration, 2) for name, duration in node_timings.items()}
+        if self.searcher.search_cache:
+            result['search_cache'] = self._search_cache_stats(state)
+        speculation_stats = get_speculation_stats()
+        if speculation_stats:
+            result['speculative_search'] = speculation_stats
+            print("先読み検索（累計）: " + ", ".join(
+                f"{info_type}={stats['consumed']}/{stats['speculated']}件使用（破棄{stats['wasted']}件）"
+                for info_type, stats in speculation_stats.items()
+            ))
+        model_usage = get_model_usage_stats()
+        if model_usage:
+            result['model_usage'] = model_usage
+            print("モデル別の呼び出し（累計）: " + ", ".join(
+                f"{node_name}/{model_name}={stats['calls']}件（平均{stats['avg_seconds']}秒、"
+                f"入力{stats['prompt_tokens']}/出力{stats['output_tokens']}トークン）"
+                for node_name, models in model_usage.items() for model_name, stats in models.items()
+            ))
+        resilience_stats = get_resilience_stats()
+        if resilience_stats:
+            result['resilience'] = resilience_stats
+            troubled = {
+                call_class: stats for call_class, stats in resilience_stats.items()
+                if stats.get('retries') or stats.get('hedges') or stats.get('breaker_trips') or stats.get('rejected')
+            }
+            if troubled:
+                print("外部呼び出しのリトライ・ヘッジ・遮断（累計）: " + ", ".join(
+                    f"{call_class}=リトライ{stats['retries']}件/ヘッジ{stats['hedges']}件"
+                    f"/遮断{stats['breaker_trips']}回（即時失敗{stats['rejected']}件）"
+                    for call_class, stats in troubled.items()
+                ))
+        if self.checkpoint_store:
+            self.checkpoint_store.delete(checkpoint_key)
+        return result
+    
+    def _search_cache_stats(self, state: ResearchState) -> Dict:
+        """この候補者の検索でのキャッシュヒット数と、キャッシュ全体の統計"""
+        searches = [result for result in state.search_results.values() if result.sources != ['シミュレーション検索']]
+        hits = sum(1 for result in searches if result.from_cache)
+        cache_stats = self.searcher.search_cache.get_stats()
+        print(f"検索結果キャッシュ: {hits}/{len(searches)}件ヒット（累計ヒット率{cache_stats['hit_rate']:.0%}）")
+        return {
+            'hits': hits,
+            'misses': len(searches) - hits,
+            'total_hit_rate': round(cache_stats['hit_rate'], 3),
+            'stored_entries': cache_stats['stored_entries']
+        }
+    
+    def _checkpoint_key(self, state: ResearchState) -> str:
+        """入力が同じ評価だけを再開するためのキー"""
+        return fingerprint(
+            CHECKPOINT_VERSION,
+            type(self.evaluator).__name__,
+            state.candidate_id,
+            state.resume,
+            state.job_description or '',
+            state.job_memo or '',
+            state.max_cycles,
+            state.candidate_age,
+            state.candidate_gender,
+            state.candidate_company,
+            state.enrolled_company_count,
+            state.structured_job_data or {},
+            state.structured_resume_data or {}
+        )
+    
+    def _load_checkpoint(self, checkpoint_key: str) -> Optional[ResearchState]:
+        """チェックポイントを読み込む（無効時・読み込みエラー時はNone）"""
+        if not self.checkpoint_store:
+            return None
+        try:
+            return self.checkpoint_store.load(checkpoint_key)
+        except Exception as e:
+            print(f"[Orchestrator] チェックポイントの読み込みエラー: {e}")
+            return None
+    
+    def _save_checkpoint(self, checkpoint_key: str, state: ResearchState) -> None:
+        """完了したサイクルまでの状態を保存（失敗しても評価は続行）"""
+        if not self.checkpoint_store:
+            return
+        try:
+            size = self.checkpoint_store.save(checkpoint_key, state)
+            print(f"  チェックポイント保存: {size / 1024:.1f}KB")
+        except Exception as e:
+            print(f"[Orchestrator] チェックポイントの保存エラー: {e}")
+    
+    @staticmethod
+    def _add_timings(total: Dict[str, float], timings: Dict[str, float]) -> None:
+        """ノードごとの処理時間を累計に加算"""
+        for name, duration in timings.items():
+            total[name] = total.get(name, 0.0) + duration
     
     async def _display_candidate_info(self, state: ResearchState) -> None:
         """候補者情報を表示"""
@@ -313,7 +406,7 @@ class DeepResearchOrchestrator:
             'total_searches': sum(len(cycle.search_results) for cycle in state.evaluation_history),
             'final_score': state.current_evaluation.score if state.current_evaluation else None,
             'final_confidence': state.current_evaluation.confidence if state.current_evaluation else None,
-            'model_version': 'gemini-2.0-flash'  # モデルバージョンを追加
+            'model_version': get_model_router().resolve(self.evaluator.name)[1]  # 評価ノードが使うモデル
         }
 
 
@@ -395,7 +488,7 @@ class SeparatedDeepResearchMatcher:
                 
         return None
     
-    def match_candidate_direct(
+    async def match_candidate_direct_async(
         self,
         resume_text: str,
         job_description_text: str,
@@ -410,7 +503,9 @@ class SeparatedDeepResearchMatcher:
         structured_resume_data: Optional[Dict] = None
     ) -> Dict:
         """
-        テキストを直接渡してマッチングを実行
+        テキストを直接渡してマッチングを実行（非同期版）
+        
+        呼び出し元のイベントループ上で実行するため、Webサービスなどから直接awaitできる
         
         Args:
             resume_text: レジュメテキスト
@@ -453,12 +548,46 @@ class SeparatedDeepResearchMatcher:
         else:
             print(f"  候補者ID: {candidate_id}")
         
+        return await self.orchestrator.run(
+            resume=resume_text,
+            job_description=job_description_text,
+            job_memo=job_memo_text,
+            max_cycles=max_cycles,
+            candidate_id=candidate_id,
+            candidate_age=candidate_age,
+            candidate_gender=candidate_gender,
+            candidate_company=candidate_company,
+            enrolled_company_count=enrolled_company_count,
+            structured_job_data=structured_job_data,
+            structured_resume_data=structured_resume_data
+        )
+    
+    def match_candidate_direct(
+        self,
+        resume_text: str,
+        job_description_text: str,
+        job_memo_text: str,
+        max_cycles: int = 3,
+        candidate_id: Optional[str] = None,
+        candidate_age: Optional[int] = None,
+        candidate_gender: Optional[str] = None,
+        candidate_company: Optional[str] = None,
+        enrolled_company_count: Optional[int] = None,
+        structured_job_data: Optional[Dict] = None,
+        structured_resume_data: Optional[Dict] = None
+    ) -> Dict:
+        """
+        テキストを直接渡してマッチングを実行（CLIスクリプト向けの同期版）
+        
+        引数と戻り値はmatch_candidate_direct_asyncと同じ。
+        イベントループ内からはmatch_candidate_direct_asyncをawaitすること
+        """
         # 非同期処理を同期的に実行
         return asyncio.run(
-            self.orchestrator.run(
-                resume=resume_text,
-                job_description=job_description_text,
-                job_memo=job_memo_text,
+            self.match_candidate_direct_async(
+                resume_text=resume_text,
+                job_description_text=job_description_text,
+                job_memo_text=job_memo_text,
                 max_cycles=max_cycles,
                 candidate_id=candidate_id,
                 candidate_age=candidate_age,
@@ -468,4 +597,4 @@ class SeparatedDeepResearchMatcher:
                 structured_job_data=structured_job_data,
                 structured_resume_data=structured_resume_data
             )
-        )
\ No newline at end of file
+        )
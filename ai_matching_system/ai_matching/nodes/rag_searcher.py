@@ -2,8 +2,11 @@
 RAG検索ノード - 過去の類似ケースを検索して評価に活用
 """
 
+import asyncio
+import math
 import os
-from typing import Dict, List, Optional
+import time
+from typing import Dict, List, Optional, Tuple
 import google.generativeai as genai
 try:
     from pinecone import Pinecone  # 新しいバージョン
@@ -12,11 +15,26 @@ except ImportError:
     Pinecone = None
 
 from .base import BaseNode, ResearchState
+from ..rag.case_store import CaseStore
+from ..rag.lexical_backfill import fetch_case_vectors, get_lexical_index
+from ..rag.lexical_index import reciprocal_rank_fusion
+from ..rag.retrieval_cache import RetrievalCache
+from ..utils.fingerprint import fingerprint
+from ..utils.resilience import call_blocking
 
 
 class RAGSearcherNode(BaseNode):
     """過去の類似ケースを検索するノード"""
     
+    # ケースストアから補完するペイロードフィールド（_analyze_similar_casesで参照）
+    PAYLOAD_FIELDS = ['client_comment', 'reasoning']
+    
+    # 類似ケースとして採用するコサイン類似度の閾値（語彙検索のみのヒットにも適用）
+    SIMILARITY_THRESHOLD = 0.7
+    
+    # インデックスバージョン（ベクトル数・同期ウォーターマーク）の再取得間隔（秒）
+    INDEX_VERSION_TTL = 60
+    
     def __init__(self, gemini_api_key: str, pinecone_api_key: str = None):
         super().__init__("RAGSearcher")
         
@@ -38,12 +56,25 @@ class RAGSearcherNode(BaseNode):
                     self.index_name = "recruitment-matching"
                     self.namespace = "historical-cases"
                     self.index = pinecone.Index(self.index_name)
+                self.case_store = self._create_case_store()
+                self.lexical_index = get_lexical_index(self.namespace)
+                self.retrieval_cache = RetrievalCache()
+                self._index_version = None
+                self._index_version_checked_at = 0.0
                 self.pinecone_enabled = True
                 print("  RAGSearcher: Pinecone接続成功")
             except Exception as e:
                 print(f"  RAGSearcher: Pinecone接続失敗 - {e}")
                 print("  類似ケース検索は無効化されます")
     
+    def _create_case_store(self) -> Optional[CaseStore]:
+        """共有ケースストアに接続（接続できない場合はペイロードを補完せずに検索する）"""
+        try:
+            return CaseStore()
+        except Exception as e:
+            print(f"  RAGSearcher: ケースストア接続失敗（コメント・理由は補完されません） - {e}")
+            return None
+    
     async def process(self, state: ResearchState) -> ResearchState:
         """類似ケースを検索して状態を更新"""
         self.state = "processing"
@@ -53,20 +84,38 @@ class RAGSearcherNode(BaseNode):
             self.state = "completed"
             return state
         
-        print(f"  過去の類似ケースを検索中...")
-        
-        # クエリテキストの生成
-        query_text = self._create_query_text(state)
+        # 求人・候補者・インデックスの状態が前回と同じならキャッシュを使用
+        requirement_fp, candidate_fp = self._get_fingerprints(state)
+        index_version = await self._get_index_version()
+        cached = None
+        if index_version:
+            cached = self.retrieval_cache.get(requirement_fp, candidate_fp, index_version)
         
-        # 類似ケース検索
-        similar_cases = self._search_similar_cases(query_text)
+        if cached:
+            similar_cases, insights = cached
+            print(f"  類似ケース検索キャッシュを使用（{len(similar_cases)}件）")
+        else:
+            print(f"  過去の類似ケースを検索中...")
+            
+            # クエリテキストの生成
+            query_text = self._create_query_text(state)
+            
+            # 類似ケース検索（Pinecone・埋め込みAPIは同期呼び出しのため期限付きでスレッドで実行）
+            similar_cases = await self._search_similar_cases(query_text)
+            search_failed = similar_cases is None
+            similar_cases = similar_cases or []
+            insights = self._analyze_similar_cases(similar_cases) if similar_cases else None
+            
+            # 検索エラー時の空結果はキャッシュしない
+            if index_version and not search_failed:
+                self.retrieval_cache.put(
+                    requirement_fp, candidate_fp, index_version,
+                    similar_cases, insights or {}
+                )
         
         if similar_cases:
             print(f"  {len(similar_cases)}件の類似ケースを発見")
             
-            # 分析結果を生成
-            insights = self._analyze_similar_cases(similar_cases)
-            
             # 状態に追加
             state.similar_cases = similar_cases
             state.rag_insights = insights
@@ -82,6 +131,56 @@ class RAGSearcherNode(BaseNode):
         self.state = "completed"
         return state
     
+    def _get_fingerprints(self, state: ResearchState) -> Tuple[str, str]:
+        """求人側・候補者側のフィンガープリントを生成"""
+        requirement_fp = fingerprint(state.job_description or "", state.job_memo or "")
+        
+        # クエリには現在の評価も含まれるため候補者側に含める
+        evaluation_parts = []
+        if state.current_evaluation:
+            evaluation_parts = [
+                state.current_evaluation.score,
+                state.current_evaluation.strengths[:2],
+                state.current_evaluation.concerns[:2]
+            ]
+        candidate_fp = fingerprint(state.resume or "", evaluation_parts)
+        
+        return requirement_fp, candidate_fp
+    
+    async def _get_index_version(self) -> Optional[str]:
+        """
+        名前空間のベクトル数・同期ウォーターマーク・語彙インデックスの件数からインデックスバージョンを生成
+        （再同期で件数が変わらなくてもケースストアの最終更新日時が進めば別バージョンになる）
+        取得に失敗した場合はNone（キャッシュを使用しない）
+        統計取得・ウォーターマーク取得・語彙インデックスの再読み込みはいずれも同期I/Oのためスレッドで実行する
+        """
+        now = time.time()
+        if self._index_version and now - self._index_version_checked_at < self.INDEX_VERSION_TTL:
+            return self._index_version
+        
+        try:
+            stats = await call_blocking("pinecone", self.index.describe_index_stats)
+            namespaces = stats.namespaces if hasattr(stats, 'namespaces') else stats.get('namespaces', {})
+            namespace_stats = namespaces.get(self.namespace, {}) if namespaces else {}
+            if isinstance(namespace_stats, dict):
+                vector_count = namespace_stats.get('vector_count', 0)
+            else:
+                vector_count = getattr(namespace_stats, 'vector_count', 0)
+            
+            # 同期バッチ・追加時に更新されるケースストアの最終更新日時
+            watermark = await asyncio.to_thread(self.case_store.get_watermark) if self.case_store is not None else None
+            
+            # 同期バッチ・バックフィルで更新された語彙インデックスを取り込む
+            await asyncio.to_thread(self.lexical_index.reload_if_changed)
+            
+            self._index_version = f"{vector_count}:{watermark or ''}:{len(self.lexical_index)}"
+            self._index_version_checked_at = now
+        except Exception as e:
+            print(f"  インデックス統計の取得に失敗（キャッシュ無効）: {e}")
+            self._index_version = None
+        
+        return self._index_version
+    
     def _create_query_text(self, state: ResearchState) -> str:
         """検索用のクエリテキストを生成"""
         # 現在の評価情報を含めたクエリ
@@ -102,11 +201,13 @@ class RAGSearcherNode(BaseNode):
 """
         return query
     
-    def _search_similar_cases(self, query_text: str, top_k: int = 10) -> List[Dict]:
-        """Pineconeから類似ケースを検索"""
+    async def _search_similar_cases(self, query_text: str, top_k: int = 10) -> Optional[List[Dict]]:
+        """Pineconeから類似ケースを検索（エラー・サーキットブレーカー遮断中はNone）"""
         try:
             # ベクトル生成
-            result = genai.embed_content(
+            result = await call_blocking(
+                "gemini",
+                genai.embed_content,
                 model=self.embedding_model,
                 content=query_text,
                 task_type="retrieval_query"
@@ -114,7 +215,9 @@ class RAGSearcherNode(BaseNode):
             query_embedding = result['embedding']
             
             # 検索実行
-            results = self.index.query(
+            results = await call_blocking(
+                "pinecone",
+                self.index.query,
                 vector=query_embedding,
                 top_k=top_k,
                 namespace=self.namespace,
@@ -122,26 +225,91 @@ class RAGSearcherNode(BaseNode):
                 include_metadata=True
             )
             
+            # 閾値を超えたケースのみ採用
+            matches = [
+                {'score': match['score'], 'metadata': dict(match['metadata'] or {})}
+                for match in results['matches']
+                if match['score'] > self.SIMILARITY_THRESHOLD
+            ]
+            
+            # 語彙検索の結果とRRFで統合（ポジション名・企業名・希少スキルの完全一致を拾う）
+            matches = await self._fuse_with_lexical(query_text, query_embedding, matches, top_k)
+            
+            # 分析で使うペイロードだけを共有ケースストアから補完
+            if self.case_store is not None:
+                try:
+                    await asyncio.to_thread(self.case_store.hydrate, matches, fields=self.PAYLOAD_FIELDS)
+                except Exception as e:
+                    print(f"  ケースストアからの補完に失敗（コメント・理由なしで続行）: {e}")
+            
             # 結果の整形
             similar_cases = []
-            for match in results['matches']:
-                if match['score'] > 0.7:  # 類似度閾値
-                    case = {
-                        'score': match['score'],
-                        'case_id': match['metadata'].get('case_id', ''),
-                        'ai_recommendation': match['metadata'].get('ai_recommendation', ''),
-                        'client_evaluation': match['metadata'].get('client_evaluation', ''),
-                        'client_comment': match['metadata'].get('client_comment', ''),
-                        'reasoning': match['metadata'].get('reasoning', ''),
-                        'evaluation_match': match['metadata'].get('evaluation_match', False)
-                    }
-                    similar_cases.append(case)
+            for match in matches:
+                case = {
+                    'score': match['score'],
+                    'case_id': match['metadata'].get('case_id', ''),
+                    'ai_recommendation': match['metadata'].get('ai_recommendation', ''),
+                    'client_evaluation': match['metadata'].get('client_evaluation', ''),
+                    'client_comment': match['metadata'].get('client_comment', ''),
+                    'reasoning': match['metadata'].get('reasoning', ''),
+                    'evaluation_match': match['metadata'].get('evaluation_match', False),
+                    'fusion_score': match.get('fusion_score')
+                }
+                similar_cases.append(case)
             
             return similar_cases
             
         except Exception as e:
             print(f"  類似ケース検索エラー: {e}")
-            return []
+            return None
+    
+    async def _fuse_with_lexical(
+        self,
+        query_text: str,
+        query_embedding: List[float],
+        vector_matches: List[Dict],
+        top_k: int
+    ) -> List[Dict]:
+        """
+        語彙検索の結果とベクトル検索の結果をReciprocal Rank Fusionで統合
+        語彙検索のみでヒットした事例はPineconeからベクトルを取得してクエリとのコサイン類似度を計算し、
+        ベクトル検索と同じ閾値を満たすものだけを採用する（scoreは常にコサイン類似度）
+        """
+        if len(self.lexical_index) == 0:
+            return vector_matches
+        
+        lexical_matches = await asyncio.to_thread(self.lexical_index.search, query_text, top_k)
+        if not lexical_matches:
+            return vector_matches
+        
+        fused_scores = reciprocal_rank_fusion([vector_matches, lexical_matches])
+        
+        candidates: Dict[str, Dict] = {}
+        for match in vector_matches:
+            candidates.setdefault(match['metadata'].get('case_id', ''), match)
+        
+        lexical_only = [r for r in lexical_matches if r['metadata']['case_id'] not in candidates]
+        if lexical_only:
+            fetched = await asyncio.to_thread(
+                fetch_case_vectors,
+                self.index,
+                self.namespace,
+                [r['metadata']['case_id'] for r in lexical_only]
+            )
+            for result in lexical_only:
+                case_id = result['metadata']['case_id']
+                # Pineconeから削除済みの事例は除外
+                if case_id not in fetched:
+                    continue
+                similarity = _cosine_similarity(query_embedding, fetched[case_id]['values'])
+                if similarity > self.SIMILARITY_THRESHOLD:
+                    candidates[case_id] = {'score': similarity, 'metadata': fetched[case_id]['metadata']}
+        
+        fused = []
+        for case_id, match in candidates.items():
+            fused.append({**match, 'fusion_score': fused_scores.get(case_id, 0.0)})
+        fused.sort(key=lambda m: m['fusion_score'], reverse=True)
+        return fused[:top_k]
     
     def _analyze_similar_cases(self, similar_cases: List[Dict]) -> Dict:
         """類似ケースを分析して洞察を生成"""
@@ -190,4 +358,13 @@ class RAGSearcherNode(BaseNode):
                 'similarity': success['score']
             })
         
-        return insights
\ No newline at end of file
+        return insights
+
+
+def _cosine_similarity(a: List[float], b: List[float]) -> float:
+    """コサイン類似度（インデックスのmetric=cosineと同じ尺度）"""
+    if not a or not b or len(a) != len(b):
+        return 0.0
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
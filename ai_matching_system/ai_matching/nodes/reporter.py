@@ -6,6 +6,8 @@ from typing import Dict, List
 import google.generativeai as genai
 
 from .base import BaseNode, ResearchState, CycleResult
+from ..utils.structured_output import StructuredOutputDecoder, json_generation_config, FINAL_JUDGMENT_SCHEMA
+from ..utils.model_router import get_model_router
 
 
 class ReportGeneratorNode(BaseNode):
@@ -14,7 +16,8 @@ class ReportGeneratorNode(BaseNode):
     def __init__(self, api_key: str):
         super().__init__("ReportGenerator")
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+        self.model = get_model_router().model_for(self.name)
+        self.judgment_decoder = StructuredOutputDecoder(self.name, FINAL_JUDGMENT_SCHEMA)
     
     async def process(self, state: ResearchState) -> ResearchState:
         """最終判定レポートを生成"""
@@ -84,31 +87,25 @@ class ReportGeneratorNode(BaseNode):
 - 推薦度はA/B/C/Dの記号で示すため、文章での推薦表現は不要
 
 # 出力フォーマット
-推奨度: [A/B/C/D]
-
-判定理由: [候補者の具体的な経験を2行で記載。技術名・システム名・数値を含む実績のみ。評価コメントは含めない]
-
-強み:
-- [強み1：具体的実績]
-- [強み2：定量的成果]
-- [強み3：付加価値]
-
-懸念点:
-- [懸念1：必須要件不足の場合はその業務上の重大性を明記]
-- [懸念2：無理な楽観視は避け、事実のみ記載]
-
-総合評価: [必ず3-4文で最終判断を記載。空欄にしないこと。以下を必ず含める：
-1. 必須要件の充足度（○個中○個を明確に充足、不足の場合はその項目を具体的に）
-2. 必須要件不足がある場合、その業務遂行上の重大な影響
-3. 主要な強みと実績（具体的数値を含む）
-4. 主要な懸念点（必須要件不足を最優先で記載）
-5. 最終的な推薦判断（必須要件不足がある場合は原則非推奨）]"""
+以下のキーを持つJSONのみを出力すること（前後に説明文を付けない）
+- recommendation: 推奨度（"A" / "B" / "C" / "D"）
+- reason: 判定理由（候補者の具体的な経験を2行で記載。技術名・システム名・数値を含む実績のみ。評価コメントは含めない）
+- strengths: 強み3つ（具体的実績 / 定量的成果 / 付加価値）
+- concerns: 懸念点2つ（必須要件不足の場合はその業務上の重大性を明記。無理な楽観視は避け、事実のみ記載）
+- overall_assessment: 総合評価（必ず3-4文で最終判断を記載。空欄にしないこと。以下を必ず含める：
+  1. 必須要件の充足度（○個中○個を明確に充足、不足の場合はその項目を具体的に）
+  2. 必須要件不足がある場合、その業務遂行上の重大な影響
+  3. 主要な強みと実績（具体的数値を含む）
+  4. 主要な懸念点（必須要件不足を最優先で記載）
+  5. 最終的な推薦判断（必須要件不足がある場合は原則非推奨））"""
         
         print(f"LLMに最終判定を依頼中...")
-        response = self.model.generate_content(prompt)
+        response = await self.model.generate_content_async(
+            prompt, generation_config=json_generation_config(FINAL_JUDGMENT_SCHEMA)
+        )
         print(f"LLMから応答受信")
         
-        final_judgment = self._parse_final_judgment(response.text)
+        final_judgment = self._decode_final_judgment(response.text)
         print(f"最終判定パース完了: 推奨度{final_judgment['recommendation']}")
         
         # 状態を更新
@@ -162,8 +159,26 @@ class ReportGeneratorNode(BaseNode):
         
         return text
     
+    def _decode_final_judgment(self, text: str) -> Dict:
+        """最終判定をJSONとしてデコード（デコードできない場合のみテキストとしてパース）"""
+        data = self.judgment_decoder.decode(text)
+        if data is None:
+            judgment = self._parse_final_judgment(text)
+            self.judgment_decoder.record_fallback_result(bool(judgment['reason'] or judgment['overall_assessment']))
+            return self._fill_judgment_defaults(judgment)
+        
+        judgment = {
+            'recommendation': data['recommendation'],
+            'reason': data['reason'].strip(),
+            'strengths': [item.strip() for item in data['strengths'] if item.strip()][:3],
+            'concerns': [item.strip() for item in data['concerns'] if item.strip()][:3],
+            'overall_assessment': data['overall_assessment'].strip()
+        }
+        print(f"  判定デコード完了(JSON): 推奨度={judgment['recommendation']}")
+        return self._fill_judgment_defaults(judgment)
+    
     def _parse_final_judgment(self, text: str) -> Dict:
-        """最終判定をパース"""
+        """最終判定（テキスト形式）をパース"""
         print(f"  判定パース開始（文字数: {len(text)}）")
         
         # デフォルト値
@@ -240,6 +255,10 @@ class ReportGeneratorNode(BaseNode):
             judgment['overall_assessment'] = ' '.join(overall_lines).strip()
             print(f"    総合評価検出: {len(judgment['overall_assessment'])}文字")
         
+        return judgment
+    
+    def _fill_judgment_defaults(self, judgment: Dict) -> Dict:
+        """欠けている項目にデフォルト値を設定"""
         # デフォルト値の設定
         if not judgment['strengths']:
             judgment['strengths'] = ['詳細な強みは評価中']
@@ -2,14 +2,20 @@
 Tavily Web検索ノード
 """
 
+import asyncio
 import os
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 import google.generativeai as genai
 
-from .base import BaseNode, ResearchState, SearchResult, InformationGap
+from .base import BaseNode, ResearchState, SearchResult, InformationGap, PrefetchedSearch
 from ..utils.reliability_scorer import ReliabilityScorer
 from ..utils.parallel_executor import ParallelSearchExecutor
+from ..utils.search_cache import SearchResultCache, classify_query
+from ..utils.model_router import get_model_router
+from ..utils.resilience import call_blocking
+from .speculative_searcher import record_speculation, discard_speculative_searches
+from ..utils.structured_output import StructuredOutputDecoder, json_generation_config, SEARCH_SUMMARY_SCHEMA
 
 
 class TavilySearcherNode(BaseNode):
@@ -18,7 +24,8 @@ class TavilySearcherNode(BaseNode):
     def __init__(self, api_key: str, tavily_api_key: str = None):
         super().__init__("TavilySearcher")
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+        self.model = get_model_router().model_for(self.name)
+        self.summary_decoder = StructuredOutputDecoder(self.name, SEARCH_SUMMARY_SCHEMA)
         
         # Tavily APIキー（環境変数からも取得可能）
         self.tavily_api_key = tavily_api_key or os.getenv('TAVILY_API_KEY')
@@ -32,6 +39,14 @@ class TavilySearcherNode(BaseNode):
         except ImportError:
             print("警告: Tavilyライブラリがインストールされていません。")
             print("pip install tavily-python でインストールしてください。")
+        
+        # 検索結果キャッシュ（候補者をまたいで同じクエリの検索結果を再利用）
+        self.search_cache = None
+        if self.tavily_client and os.getenv("TAVILY_CACHE_ENABLED", "true").lower() == "true":
+            try:
+                self.search_cache = SearchResultCache()
+            except Exception as e:
+                print(f"  検索結果キャッシュの初期化に失敗: {e}")
     
     async def process(self, state: ResearchState) -> ResearchState:
         """情報ギャップに基づいて検索を実行"""
@@ -40,6 +55,7 @@ class TavilySearcherNode(BaseNode):
         # 検索対象がない場合
         if not state.information_gaps:
             print("  検索対象なし（情報ギャップが特定されていません）")
+            discard_speculative_searches(state)
             self.state = "completed"
             return state
         
@@ -60,8 +76,18 @@ class TavilySearcherNode(BaseNode):
         # 検索クエリを準備
         search_queries = {gap.info_type: gap for gap in gaps_to_search}
         
+        # 先読み済みのギャップはその結果を使い、検索しなかった先読み結果は破棄
+        prefetched = {}
+        for gap_type in search_queries:
+            if gap_type in state.speculative_searches:
+                prefetched[gap_type] = state.speculative_searches.pop(gap_type)
+                record_speculation(prefetched[gap_type].gap.info_type, consumed=1)
+        discard_speculative_searches(state)
+        if prefetched:
+            print(f"  先読み検索の結果を使用: {', '.join(prefetched)}")
+        
         print(f"\n  並列検索を開始...")
-        search_results = await self._parallel_search_gaps(parallel_executor, search_queries)
+        search_results = await self._parallel_search_gaps(parallel_executor, search_queries, prefetched)
         
         # 結果を状態に追加
         for gap_type, search_result in search_results.items():
@@ -75,93 +101,230 @@ class TavilySearcherNode(BaseNode):
         return state
     
     async def _parallel_search_gaps(self, executor: ParallelSearchExecutor, 
-                                   gaps: Dict[str, InformationGap]) -> Dict[str, SearchResult]:
-        """複数の情報ギャップを並列検索"""
+                                   gaps: Dict[str, InformationGap],
+                                   prefetched: Optional[Dict[str, PrefetchedSearch]] = None) -> Dict[str, SearchResult]:
+        """複数の情報ギャップを並列検索し（先読み済みのものを除く）、検索結果をまとめて要約"""
+        prefetched = prefetched or {}
+        fetched = {
+            gap_type: (item.results, item.from_cache, False)
+            for gap_type, item in prefetched.items()
+        }
+        
         # タスクリストを作成
         tasks = [
             (gap_type, self._search_information, {"gap": gap})
             for gap_type, gap in gaps.items()
+            if gap_type not in prefetched
         ]
         
-        # 並列実行
-        report = await executor.executor.execute_parallel_async(tasks, timeout=30)
-        
-        # 結果をマッピング
-        results = {}
-        for task_result in report.task_results:
-            if task_result.success and task_result.result:
-                results[task_result.task_id] = task_result.result
+        if tasks:
+            # 並列実行（期限・リトライは検索1件ごとにcall_blockingで適用）
+            report = await executor.executor.execute_parallel_async(tasks)
+            
+            # 結果をマッピング
+            for task_result in report.task_results:
+                if task_result.success and task_result.result:
+                    fetched[task_result.task_id] = task_result.result
+            
+            # 実行レポートを出力
+            print(f"\n  並列検索完了:")
+            print(f"    成功: {report.successful_tasks}/{report.total_tasks}")
+            print(f"    実行時間: {report.total_duration:.1f}秒")
+            print(f"    並列効率: {report.parallel_efficiency:.1f}x")
         
-        # 実行レポートを出力
-        print(f"\n  並列検索完了:")
-        print(f"    成功: {report.successful_tasks}/{report.total_tasks}")
-        print(f"    実行時間: {report.total_duration:.1f}秒")
-        print(f"    並列効率: {report.parallel_efficiency:.1f}x")
+        summaries = await self._summarize_gaps({gap_type: (gaps[gap_type], item) for gap_type, item in fetched.items()})
         
+        results = {}
+        for gap_type, (results_list, from_cache, simulated) in fetched.items():
+            gap = gaps[gap_type]
+            summary = summaries.get(gap_type)
+            if summary is None:
+                # シミュレーション検索の要約に失敗したギャップは結果なし
+                continue
+            if simulated:
+                results[gap_type] = SearchResult(
+                    query=gap.search_query,
+                    results=[{
+                        'title': f'シミュレーション: {gap.info_type}',
+                        'content': summary,
+                        'url': 'simulated',
+                        'score': 1.0
+                    }],
+                    summary=summary,
+                    sources=['シミュレーション検索'],
+                    timestamp=datetime.now().isoformat()
+                )
+            else:
+                results[gap_type] = SearchResult(
+                    query=gap.search_query,
+                    results=results_list,
+                    summary=summary,
+                    sources=[result['url'] for result in results_list][:3],  # 上位3つのソース
+                    timestamp=datetime.now().isoformat(),
+                    from_cache=from_cache
+                )
         return results
     
-    async def _search_information(self, gap: InformationGap) -> SearchResult:
-        """個別の情報を検索"""
+    async def _search_information(self, gap: InformationGap) -> Tuple[List[Dict[str, Any]], bool, bool]:
+        """
+        個別の情報を検索（要約は_summarize_gapsでまとめて行う）
         
+        Returns:
+            (信頼性の高い順の検索結果, キャッシュから取得したか, シミュレーション検索で代替するか)
+        """
         if self.tavily_client:
             # 実際のTavily検索
             try:
-                print(f"    Tavily APIで検索中...")
-                search_response = self.tavily_client.search(
-                    query=gap.search_query,
-                    search_depth="advanced",
-                    max_results=5
-                )
-                print(f"    Tavily検索完了")
-                
-                # 結果を整形し、信頼性を評価
-                results = []
-                sources = []
-                
-                for result in search_response.get('results', []):
-                    # 信頼性スコアを計算
-                    reliability_info = ReliabilityScorer.score_source(
-                        result.get('url', ''),
-                        result.get('content', ''),
-                        result.get('published_date')
-                    )
-                    
-                    results.append({
-                        'title': result.get('title', ''),
-                        'content': result.get('content', ''),
-                        'url': result.get('url', ''),
-                        'score': result.get('score', 0),
-                        'reliability': reliability_info['reliability_score'],
-                        'reliability_warnings': reliability_info['warnings']
-                    })
-                    sources.append(result.get('url', ''))
-                
-                # 信頼性の高い順にソート
-                results.sort(key=lambda x: x.get('reliability', 0), reverse=True)
-                
-                # 結果を要約
-                summary = await self._summarize_search_results(results, gap)
-                
-                return SearchResult(
-                    query=gap.search_query,
-                    results=results,
-                    summary=summary,
-                    sources=sources[:3],  # 上位3つのソース
-                    timestamp=datetime.now().isoformat()
-                )
-                
+                results, from_cache = await self.fetch_results(gap)
+                return results, from_cache, False
             except Exception as e:
                 print(f"Tavily検索エラー: {e}")
-                # フォールバックとしてシミュレーション検索を実行
-                return await self._simulate_search(gap)
-        else:
-            # Tavilyが利用できない場合はシミュレーション
-            return await self._simulate_search(gap)
+                # フォールバックとしてシミュレーション検索を実行（サーキットブレーカー遮断中は待たずに切り替わる）
+                return [], False, True
+        # Tavilyが利用できない場合はシミュレーション
+        return [], False, True
+    
+    async def fetch_results(self, gap: InformationGap) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Tavilyで検索し、信頼性スコアを付けた結果を取得（キャッシュにあればそれを使用）
+        
+        Returns:
+            (信頼性の高い順の検索結果, キャッシュから取得したか)
+        """
+        search_params = {"search_depth": "advanced", "max_results": 5}
+        cache_key = None
+        if self.search_cache:
+            try:
+                cache_key = self.search_cache.cache_key(gap.search_query, **search_params)
+                cached = self.search_cache.get(cache_key)
+                if cached is not None:
+                    print(f"    検索結果キャッシュを使用（{len(cached)}件）")
+                    return cached, True
+            except Exception as e:
+                print(f"    検索結果キャッシュの読み込みエラー: {e}")
+        
+        print(f"    Tavily APIで検索中...")
+        search_response = await call_blocking(
+            "tavily",
+            self.tavily_client.search,
+            query=gap.search_query,
+            **search_params
+        )
+        print(f"    Tavily検索完了")
+        
+        # 結果を整形し、信頼性を評価
+        results = []
+        for result in search_response.get('results', []):
+            # 信頼性スコアを計算
+            reliability_info = ReliabilityScorer.score_source(
+                result.get('url', ''),
+                result.get('content', ''),
+                result.get('published_date')
+            )
+            
+            results.append({
+                'title': result.get('title', ''),
+                'content': result.get('content', ''),
+                'url': result.get('url', ''),
+                'score': result.get('score', 0),
+                'reliability': reliability_info['reliability_score'],
+                'reliability_warnings': reliability_info['warnings']
+            })
+        
+        # 信頼性の高い順にソート
+        results.sort(key=lambda x: x.get('reliability', 0), reverse=True)
+        
+        if cache_key and results:
+            try:
+                self.search_cache.put(cache_key, gap.search_query, classify_query(gap.search_query, gap.info_type), results)
+            except Exception as e:
+                print(f"    検索結果キャッシュの保存エラー: {e}")
+        return results, False
+    
+    async def _summarize_gaps(self, items: Dict[str, Tuple[InformationGap, Tuple]]) -> Dict[str, str]:
+        """
+        サイクル内の全ギャップの検索結果を1回のLLM呼び出しで要約
+        
+        Args:
+            items: ギャップ種類 -> (情報ギャップ, _search_informationの戻り値)
+        
+        Returns:
+            ギャップ種類 -> 要約（一括要約に含まれなかったギャップはギャップごとに並列で要約。
+            要約に失敗したシミュレーション検索のギャップは含めない）
+        """
+        summaries = {}
+        sections = {}
+        for gap_type, (gap, (results, _, simulated)) in items.items():
+            if simulated:
+                print(f"    {gap_type}: シミュレーション検索を実行中...")
+                sections[gap_type] = self._simulation_section(gap)
+                continue
+            section = self._summary_section(results, gap)
+            if section is None:
+                summaries[gap_type] = "関連する情報が見つかりませんでした。"
+            else:
+                sections[gap_type] = section
+        
+        if len(sections) > 1:
+            summaries.update(await self._summarize_batch(sections))
+        
+        # 一括要約に含まれなかったギャップ（1件のみ・デコード失敗）はギャップごとに並列で要約
+        remaining = [gap_type for gap_type in sections if gap_type not in summaries]
+        responses = await asyncio.gather(
+            *(self.model.generate_content_async("\n\n".join(sections[gap_type])) for gap_type in remaining),
+            return_exceptions=True
+        )
+        for gap_type, response in zip(remaining, responses):
+            if not isinstance(response, Exception):
+                summaries[gap_type] = response.text.strip()
+                continue
+            # 失敗はそのギャップだけに留め、サイクル全体は止めない
+            print(f"    {gap_type}: 要約エラー: {response}")
+            _, (_, _, simulated) = items[gap_type]
+            if not simulated:
+                summaries[gap_type] = "関連する情報が見つかりませんでした。"
+        return summaries
     
-    async def _summarize_search_results(self, results: list, gap: InformationGap) -> str:
-        """検索結果を要約（信頼性を考慮）"""
+    async def _summarize_batch(self, sections: Dict[str, Tuple[str, str]]) -> Dict[str, str]:
+        """複数ギャップの要約を1回の構造化出力で生成（デコードできなかったギャップは含めない）"""
+        gap_ids = {str(i): gap_type for i, gap_type in enumerate(sections, 1)}
+        prompt = "複数の情報ニーズについて、それぞれ採用判断に必要な情報を要約します。\n"
+        prompt += "各情報ニーズの指示に従って要約し、gap_idごとに出力してください。\n"
+        for gap_id, gap_type in gap_ids.items():
+            title, body = sections[gap_type]
+            prompt += f"\n## gap_id: {gap_id}（{title}）\n{body}\n"
+        
+        print(f"    {len(sections)}件の検索結果を一括要約中...")
+        try:
+            response = await self.model.generate_content_async(
+                prompt, generation_config=json_generation_config(SEARCH_SUMMARY_SCHEMA)
+            )
+            data = self.summary_decoder.decode(response.text)
+        except Exception as e:
+            print(f"    一括要約エラー（ギャップごとに要約します）: {e}")
+            return {}
+        if data is None:
+            return {}
+        
+        summaries = {
+            gap_ids[item['gap_id']]: item['summary'].strip()
+            for item in data['summaries']
+            if item['gap_id'] in gap_ids and item['summary'].strip()
+        }
+        missing = len(sections) - len(summaries)
+        if missing:
+            print(f"    一括要約に含まれなかった{missing}件はギャップごとに要約します")
+        return summaries
+    
+    def _summary_section(self, results: list, gap: InformationGap) -> Optional[Tuple[str, str]]:
+        """
+        検索結果の要約指示（信頼性を考慮）
+        
+        Returns:
+            (指示の見出し, 本文)。結果がない場合はNone
+        """
         if not results:
-            return "関連する情報が見つかりませんでした。"
+            return None
         
         # 信頼性の高い上位3件の内容を結合
         contents = []
@@ -187,9 +350,7 @@ class TavilySearcherNode(BaseNode):
         
         # 企業規模比較の場合は特別な処理
         if gap.info_type == "企業規模比較":
-            prompt = f"""検索結果から企業規模情報を抽出し、規模差の影響を分析します。
-
-# 情報ニーズ
+            return "検索結果から企業規模情報を抽出し、規模差の影響を分析します。", f"""# 情報ニーズ
 - 種類: {gap.info_type}
 - 質問: {gap.description}
 - 影響: {gap.rationale}
@@ -209,11 +370,9 @@ class TavilySearcherNode(BaseNode):
 3. 適応に関する推奨事項
 
 ※規模差が2段階以上（例：大企業→中小企業）の場合は要注意として明記。"""
-        else:
-            # 通常の検索結果要約
-            prompt = f"""検索結果から採用判断に必要な情報を抽出します。
-
-# 情報ニーズ
+        
+        # 通常の検索結果要約
+        return "検索結果から採用判断に必要な情報を抽出します。", f"""# 情報ニーズ
 - 種類: {gap.info_type}
 - 質問: {gap.description}
 - 影響: {gap.rationale}
@@ -227,17 +386,11 @@ class TavilySearcherNode(BaseNode):
 3. 追加確認事項（1文・任意）
 
 専門用語は最小限にし、採用担当者向けに簡潔に記述。"""
-        
-        response = self.model.generate_content(prompt)
-        return response.text.strip()
     
-    async def _simulate_search(self, gap: InformationGap) -> SearchResult:
-        """Tavilyが利用できない場合のシミュレーション検索"""
-        print(f"    シミュレーション検索を実行中...")
+    def _simulation_section(self, gap: InformationGap) -> Tuple[str, str]:
+        """Tavilyが利用できない場合のシミュレーション検索の指示（見出し, 本文）"""
         # 最適化されたシミュレーションプロンプト
-        prompt = f"""採用評価専門家として情報を提供します。
-
-# 情報ニーズ
+        return "採用評価専門家として情報を提供します。", f"""# 情報ニーズ
 - クエリ: {gap.search_query}
 - タイプ: {gap.info_type}
 - 質問: {gap.description}
@@ -248,19 +401,3 @@ class TavilySearcherNode(BaseNode):
 3. 確認ポイント（1文）
 
 客観的・信頼性の高い情報として記述。"""
-        
-        response = self.model.generate_content(prompt)
-        summary = response.text.strip()
-        
-        return SearchResult(
-            query=gap.search_query,
-            results=[{
-                'title': f'シミュレーション: {gap.info_type}',
-                'content': summary,
-                'url': 'simulated',
-                'score': 1.0
-            }],
-            summary=summary,
-            sources=['シミュレーション検索'],
-            timestamp=datetime.now().isoformat()
-        )
\ No newline at end of file
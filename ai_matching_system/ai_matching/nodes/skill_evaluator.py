@@ -8,6 +8,7 @@ import google.generativeai as genai
 from .base import BaseNode, ResearchState, ScoreDetail
 from ..utils.evaluation_formatters import EvaluationFormatters
 from ..utils.evaluation_parser import EvaluationParser
+from ..utils.model_router import get_model_router
 from ..prompts.scoring_criteria import ScoringCriteria, WeightProfile
 
 
@@ -17,7 +18,7 @@ class SkillEvaluatorNode(BaseNode):
     def __init__(self, api_key: str):
         super().__init__("SkillEvaluator")
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.model = get_model_router().model_for(self.name)
     
     async def process(self, state: ResearchState) -> ResearchState:
         """スキルの評価を実行"""
@@ -86,7 +87,7 @@ class SkillEvaluatorNode(BaseNode):
 - スキル面での懸念点: [必須要件の不足のみ記載]"""
 
         print(f"  LLMにスキル評価プロンプト送信中...")
-        response = self.model.generate_content(prompt)
+        response = await self.model.generate_content_async(prompt)
         
         # 評価結果をパース
         skill_scores = self._parse_skill_scores(response.text)
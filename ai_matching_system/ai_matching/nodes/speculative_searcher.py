@@ -0,0 +1,97 @@
+"""
+先読み検索ノード
+入力だけから予測できる情報ギャップ（候補者の所属企業の規模・文化）の
+Web検索を評価ノードと並行して開始し、Tavilyの待ち時間を評価のLLM呼び出しの裏に隠す。
+ギャップ分析で実際に特定されたギャップの検索結果だけが検索ノードで使われ、残りは破棄される
+"""
+
+import asyncio
+import os
+import threading
+from typing import Dict, Optional
+
+from .base import BaseNode, ResearchState, InformationGap, PrefetchedSearch
+from ..utils.search_cache import normalize_query
+
+
+# 予測したギャップの種類 -> 先読み統計（予測方針の調整用）
+_speculation_stats: Dict[str, Dict[str, int]] = {}
+_stats_lock = threading.Lock()
+
+
+def record_speculation(info_type: str, **counts: int) -> None:
+    """先読み検索の結果を記録（speculated / consumed / wasted）"""
+    with _stats_lock:
+        stats = _speculation_stats.setdefault(info_type, {"speculated": 0, "consumed": 0, "wasted": 0})
+        for key, value in counts.items():
+            stats[key] += value
+
+
+def get_speculation_stats() -> Dict[str, Dict[str, int]]:
+    """予測したギャップの種類別の先読み統計を取得"""
+    with _stats_lock:
+        return {info_type: dict(stats) for info_type, stats in _speculation_stats.items()}
+
+
+def discard_speculative_searches(state: ResearchState) -> None:
+    """使われなかった先読み結果を破棄して記録"""
+    for prefetched in state.speculative_searches.values():
+        record_speculation(prefetched.gap.info_type, wasted=1)
+    state.speculative_searches = {}
+
+
+class SpeculativeSearchNode(BaseNode):
+    """予測可能な情報ギャップを評価と並行して検索するノード"""
+
+    def __init__(self, searcher, gap_analyzer, max_searches: Optional[int] = None, timeout: float = 20.0):
+        """
+        Args:
+            searcher: TavilySearcherNode（検索とキャッシュを共有）
+            gap_analyzer: GapAnalyzerNode（ギャップの予測に使用）
+            max_searches: 先読みする最大件数（省略時はSPECULATIVE_SEARCH_MAX、デフォルト3）
+            timeout: 1件あたりの検索のタイムアウト秒数
+        """
+        super().__init__("SpeculativeSearcher")
+        self.searcher = searcher
+        self.gap_analyzer = gap_analyzer
+        self.max_searches = max_searches or int(os.getenv("SPECULATIVE_SEARCH_MAX", "3"))
+        self.timeout = timeout
+        self.enabled = os.getenv("SPECULATIVE_SEARCH_ENABLED", "true").lower() == "true"
+
+    def should_run(self, state: ResearchState) -> bool:
+        """初回サイクルでTavilyが利用できる場合のみ先読みする"""
+        return self.enabled and state.current_cycle == 0 and self.searcher.tavily_client is not None
+
+    async def process(self, state: ResearchState) -> ResearchState:
+        """予測したギャップを並行して検索"""
+        self.state = "processing"
+
+        searched = {normalize_query(result.query) for result in state.search_results.values()}
+        gaps: Dict[str, InformationGap] = {}
+        for gap in self.gap_analyzer.predict_gaps(state):
+            key = normalize_query(gap.search_query)
+            if key not in searched and key not in gaps:
+                gaps[key] = gap
+        gaps = dict(list(gaps.items())[:self.max_searches])
+        if not gaps:
+            self.state = "completed"
+            return state
+
+        print(f"  先読み検索: {len(gaps)}件（{', '.join(gap.info_type for gap in gaps.values())}）")
+        fetched = await asyncio.gather(
+            *(asyncio.wait_for(self.searcher.fetch_results(gap), self.timeout) for gap in gaps.values()),
+            return_exceptions=True
+        )
+
+        prefetched = {}
+        for (key, gap), outcome in zip(gaps.items(), fetched):
+            if isinstance(outcome, BaseException):
+                print(f"    {gap.info_type}: 先読み検索エラー: {outcome!r}")
+                continue
+            results, from_cache = outcome
+            prefetched[key] = PrefetchedSearch(gap=gap, results=results, from_cache=from_cache)
+            record_speculation(gap.info_type, speculated=1)
+        state.speculative_searches = prefetched
+
+        self.state = "completed"
+        return state
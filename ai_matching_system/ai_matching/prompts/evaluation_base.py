@@ -55,6 +55,8 @@ class EvaluationPrompts:
    - 類似経験で評価した場合はその旨を明記
    - 減点理由は具体的に説明"""
     
+    CANDIDATE_INSTRUCTION = "上記の評価ルール・配点・出力フォーマットに従って、この候補者を評価してください。"
+    
     @staticmethod
     def build_input_data_section(
         resume: str,
@@ -90,4 +92,21 @@ class EvaluationPrompts:
 {additional_info}
 {history_text}
 {rag_insights_text}
-{guard_insights}"""
\ No newline at end of file
+{guard_insights}"""
+    
+    @staticmethod
+    def build_job_section(
+        structured_job_data: str,
+        job_description: str,
+        job_memo: str
+    ) -> str:
+        """求人単位で共通の入力データセクションを構築（コンテキストキャッシュ用）"""
+        return f"""# 求人データ
+{structured_job_data}
+
+## 求人票（自由記述）
+※構造化データで判断できない項目の参照用
+{job_description}
+
+## 追加情報
+{job_memo}"""
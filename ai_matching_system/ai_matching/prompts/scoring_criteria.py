@@ -73,32 +73,20 @@ class ScoringCriteria:
 ※重要：突出した経歴（5%）は本当に希少な場合のみ加点。通常は必須要件と実務能力で評価"""
     
     OUTPUT_FORMAT = """# 出力フォーマット
-適合度スコア: [0-100の整数]
-確信度: [低/中/高]
-
-## スコア内訳
-### 必須要件（45点満点）
-- [構造化データの各必須スキル項目]: [点数]/[配点] - [根拠となるレジュメの記載]
-- ※構造化データがない場合は求人票から抽出した必須要件を記載
-- 小計: [実際の点数]/45点
-
-### 実務遂行能力（25点満点）
-- [評価項目]: [点数]/[配点] - [根拠となる実績・経験]
-- 小計: [実際の点数]/25点
-
-### 歓迎要件（15点満点）
-- [構造化データの各歓迎スキル項目]: [点数]/[配点] - [該当する経験]
-- ※構造化データがない場合は求人票から抽出した歓迎要件を記載
-- 小計: [実際の点数]/15点
-
-### 組織適合性（10点満点）
-- 企業規模適応: [点数]/5点 - [過去の所属企業と求人企業の比較]
-- 文化適合: [点数]/5点 - [根拠]
-- 小計: [実際の点数]/10点
-
-### 突出した経歴（5点満点）
-- [特筆すべき実績]: [点数]/5点
-- 小計: [実際の点数]/5点"""
+以下のキーを持つJSONのみを出力すること（前後に説明文を付けない）
+- score: 適合度スコア（0-100の整数）
+- confidence: 確信度（"低" / "中" / "高"）
+- score_breakdown: スコア内訳の配列。カテゴリごとに以下を記載
+  - category: "required_skills"（必須要件・45点満点） / "practical_ability"（実務遂行能力・25点満点） /
+    "preferred_skills"（歓迎要件・15点満点） / "organizational_fit"（組織適合性・10点満点） / "outstanding_career"（突出した経歴・5点満点）
+  - max_score: 満点
+  - subtotal: 実際の点数
+  - items: 評価項目の配列（name: 項目名, score: 点数, max_score: 配点, evidence: 根拠となるレジュメの記載）
+    - 必須要件・歓迎要件は構造化データの各スキル項目（構造化データがない場合は求人票から抽出した要件）
+    - 組織適合性は「企業規模適応」（5点）と「文化適合」（5点）
+- strengths: 主な強み（下記「主な強み」の記載方針に従う）
+- concerns: 主な懸念点（下記「主な懸念点」のルールに従う）
+- summary: 評価サマリー（下記「評価サマリー」の記載方針に従う）"""
     
     SUMMARY_FORMAT = """評価サマリー:
 [以下を含む総合評価]
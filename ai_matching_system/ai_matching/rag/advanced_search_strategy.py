@@ -8,17 +8,22 @@ from datetime import datetime, timedelta
 import numpy as np
 from collections import defaultdict
 
+from .lexical_index import LexicalIndex, reciprocal_rank_fusion
+
 
 class AdvancedSearchStrategy:
     """高度な検索戦略を実装"""
     
-    def __init__(self, vector_db):
+    def __init__(self, vector_db, lexical_index: Optional[LexicalIndex] = None):
         """
         Args:
             vector_db: UnifiedPineconeDBインスタンス
+            lexical_index: 語彙検索用の転置インデックス（省略時はvector_dbのものを使用）
         """
         self.vector_db = vector_db
+        self.lexical_index = lexical_index or getattr(vector_db, "lexical_index", None)
         self.search_stages = [
+            "lexical_match",
             "exact_position_match",
             "similar_position",
             "high_quality_cases",
@@ -52,6 +57,14 @@ class AdvancedSearchStrategy:
             }
         }
         
+        # Stage 0: 語彙検索（ポジション名・企業名・希少スキルの完全一致に強い）
+        if self.lexical_index is not None and len(self.lexical_index) > 0:
+            all_results["stages"]["lexical_match"] = self._search_lexical(
+                job_info,
+                candidate_info,
+                limit=20
+            )
+        
         # Stage 1: 完全一致ポジション検索
         stage1_results = self._search_exact_position(
             job_info.get("position", ""),
@@ -96,6 +109,9 @@ class AdvancedSearchStrategy:
             )
             all_results["stages"]["cross_domain_insights"] = stage5_results
         
+        # 語彙検索とベクトル検索の融合
+        self._fuse_lexical_and_vector(all_results["stages"])
+        
         # 結果の統合と再ランキング
         all_results["combined_results"] = self._combine_and_rerank_results(
             all_results["stages"],
@@ -111,6 +127,49 @@ class AdvancedSearchStrategy:
         
         return all_results
         
+    def _search_lexical(self, job_info: Dict, candidate_info: Dict, limit: int) -> List[Dict]:
+        """転置インデックスによる語彙検索"""
+        query_parts = [
+            job_info.get("position", ""),
+            job_info.get("company", ""),
+            " ".join(job_info.get("required_skills", [])),
+            " ".join(candidate_info.get("skills", []))
+        ]
+        query_text = " ".join(part for part in query_parts if part)
+        if not query_text:
+            return []
+        
+        results = self.lexical_index.search(query_text, top_k=limit)
+        return self._enrich_results(results, "lexical")
+        
+    def _fuse_lexical_and_vector(self, staged_results: Dict) -> None:
+        """
+        Reciprocal Rank Fusionで語彙検索とベクトル検索の順位を統合し、
+        両方で上位に出現した事例のadjusted_scoreを引き上げる
+        """
+        lexical_results = staged_results.get("lexical_match")
+        if not lexical_results:
+            return
+        
+        vector_results = [
+            result
+            for stage, results in staged_results.items()
+            if stage != "lexical_match"
+            for result in results
+        ]
+        vector_results.sort(key=lambda x: x.get("adjusted_score", x["score"]), reverse=True)
+        
+        fused_scores = reciprocal_rank_fusion([vector_results, lexical_results])
+        if not fused_scores:
+            return
+        max_fused = max(fused_scores.values())
+        
+        for results in staged_results.values():
+            for result in results:
+                fused = fused_scores.get(result["metadata"]["case_id"], 0) / max_fused
+                result["fusion_score"] = fused
+                result["adjusted_score"] = result.get("adjusted_score", result["score"]) * (1 + fused * 0.2)
+        
     def _search_exact_position(self, position: str, job_info: Dict, limit: int) -> List[Dict]:
         """完全一致ポジション検索"""
         filters = {
@@ -296,6 +355,7 @@ class AdvancedSearchStrategy:
         """統合スコアの計算"""
         # ステージごとの重み
         stage_weights = {
+            "lexical_match": 1.7,
             "exact_position_match": 2.0,
             "similar_position": 1.5,
             "high_quality_cases": 1.8,
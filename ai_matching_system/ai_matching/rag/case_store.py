@@ -0,0 +1,223 @@
+"""
+過去事例のペイロードストア
+Pineconeのベクトルにはフィルタ用の軽量メタデータのみを載せ、
+コメント・理由・プレビュー等の大きなフィールドはcase_id単位でSupabaseのrag_case_payloadsテーブルに保持する
+（同期バッチ・Webアプリ・ワーカーの全ホストから参照できる共有ストア）
+"""
+
+import os
+import re
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..utils.resilience import call_sync
+
+
+# ベクトルのメタデータに残すフィールド（フィルタ・ランキング・RAG分析で参照される小さな値のみ）
+FILTERABLE_FIELDS = frozenset([
+    "case_id",
+    "vector_type",
+    "created_at",
+    "position",
+    "company",
+    "department",
+    "job_type",
+    "job_id",
+    "candidate_id",
+    "ai_score",
+    "ai_grade",
+    "ai_recommendation",
+    "human_score",
+    "human_grade",
+    "client_evaluation",
+    "evaluation_match",
+    "score_category",
+    "has_client_feedback",
+    "has_human_review",
+    "has_detailed_feedback",
+    "is_successful",
+    "is_high_quality",
+    "evaluation_period",
+    "sync_version",
+])
+
+
+def split_metadata(metadata: Dict) -> Tuple[Dict, Dict]:
+    """
+    メタデータをベクトル用（フィルタ可能）とペイロード用に分割
+
+    Args:
+        metadata: 元のメタデータ
+
+    Returns:
+        (compact_metadata, payload)
+    """
+    compact = {}
+    payload = {}
+    for key, value in metadata.items():
+        if key in FILTERABLE_FIELDS:
+            compact[key] = value
+        else:
+            payload[key] = value
+    return compact, payload
+
+
+# JSONの射影に使えるフィールド名（PostgRESTのselectに埋め込むため英数字とアンダースコアのみ）
+_FIELD_NAME_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def _projection(fields: Optional[Iterable[str]]) -> Tuple[str, Optional[List[str]]]:
+    """
+    selectに渡す列指定を生成
+
+    Returns:
+        (列指定, 射影するフィールド。Noneの場合はペイロード全体)
+    """
+    if fields is None:
+        return "case_id, payload", None
+    wanted = [field for field in dict.fromkeys(fields) if _FIELD_NAME_PATTERN.match(field)]
+    return ", ".join(["case_id"] + [f"{field}:payload->{field}" for field in wanted]), wanted
+
+
+def _row_payload(row: Dict, wanted: Optional[List[str]]) -> Dict:
+    """取得した行からペイロードを取り出す"""
+    if wanted is None:
+        return row.get("payload") or {}
+    return {field: row[field] for field in wanted if row.get(field) is not None}
+
+
+class CaseStore:
+    """case_idをキーにした事例ペイロードのストア（Supabaseのrag_case_payloadsテーブル）"""
+
+    TABLE = "rag_case_payloads"
+
+    def __init__(self, client=None):
+        """
+        Args:
+            client: Supabaseクライアント（省略時はSUPABASE_URLとSUPABASE_SERVICE_KEY/SUPABASE_ANON_KEYから生成）
+        """
+        if client is None:
+            url = os.getenv("SUPABASE_URL")
+            key = os.getenv("SUPABASE_SERVICE_KEY") or os.getenv("SUPABASE_ANON_KEY")
+            if not url or not key:
+                raise ValueError("Supabase credentials not found in environment")
+            from supabase import create_client
+            client = create_client(url, key)
+        self.client = client
+
+    def put(self, case_id: str, payload: Dict) -> None:
+        """ペイロードを保存（既存の場合はマージ）"""
+        self.put_many([(case_id, payload)])
+
+    def put_many(self, items: Iterable[Tuple[str, Dict]]) -> int:
+        """
+        複数のペイロードをまとめて保存
+
+        Args:
+            items: [(case_id, payload), ...]
+
+        Returns:
+            保存件数
+        """
+        merged: Dict[str, Dict] = {}
+        for case_id, payload in items:
+            merged[case_id] = {**merged.get(case_id, {}), **payload}
+        if not merged:
+            return 0
+
+        existing = self.get_many(list(merged))
+        now = datetime.now(timezone.utc).isoformat()
+        rows = [
+            {"case_id": case_id, "payload": {**existing.get(case_id, {}), **payload}, "updated_at": now}
+            for case_id, payload in merged.items()
+        ]
+        call_sync("supabase", lambda: self.client.table(self.TABLE).upsert(rows).execute())
+        return len(rows)
+
+    def get_many(self, case_ids: List[str], fields: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        """
+        複数ケースのペイロードを取得
+
+        Args:
+            case_ids: 取得するcase_id
+            fields: 取得するフィールド（Noneの場合は全フィールド。指定時はDB側で射影し必要な値だけを転送）
+
+        Returns:
+            {case_id: payload}
+        """
+        case_ids = list(dict.fromkeys(case_ids))
+        if not case_ids:
+            return {}
+
+        columns, wanted = _projection(fields)
+        if wanted == []:
+            return {}
+
+        response = call_sync(
+            "supabase",
+            lambda: self.client.table(self.TABLE).select(columns).in_("case_id", case_ids).execute()
+        )
+
+        return {row["case_id"]: _row_payload(row, wanted) for row in response.data or []}
+
+    def hydrate(self, results: List[Dict], fields: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        検索結果のmetadataにペイロードを補完（ベクトル側の値を優先）
+
+        Args:
+            results: {"metadata": {"case_id": ...}} を含む検索結果
+            fields: 補完するフィールド（Noneの場合は全フィールド、空の場合は何もしない）
+
+        Returns:
+            補完済みの検索結果（同じリスト）
+        """
+        if fields is not None and not fields:
+            return results
+
+        case_ids = [r.get("metadata", {}).get("case_id") for r in results]
+        payloads = self.get_many([c for c in case_ids if c], fields)
+
+        for result, case_id in zip(results, case_ids):
+            payload = payloads.get(case_id)
+            if payload:
+                result["metadata"] = {**payload, **(result.get("metadata") or {})}
+        return results
+
+    def iter_payloads(self, fields: Optional[Iterable[str]] = None, page_size: int = 500):
+        """
+        全ケースのペイロードをページ単位で列挙（語彙インデックスのバックフィル用）
+
+        Yields:
+            (case_id, payload)
+        """
+        columns, wanted = _projection(fields)
+        offset = 0
+        while True:
+            response = call_sync(
+                "supabase",
+                lambda: self.client.table(self.TABLE).select(columns)
+                    .order("case_id").range(offset, offset + page_size - 1).execute()
+            )
+            rows = response.data or []
+            for row in rows:
+                yield row["case_id"], _row_payload(row, wanted)
+            if len(rows) < page_size:
+                return
+            offset += page_size
+
+    def delete(self, case_id: str) -> None:
+        """ペイロードを削除"""
+        call_sync(
+            "supabase",
+            lambda: self.client.table(self.TABLE).delete().eq("case_id", case_id).execute()
+        )
+
+    def get_watermark(self) -> Optional[str]:
+        """最終更新日時（同期ウォーターマーク）を取得"""
+        response = call_sync(
+            "supabase",
+            lambda: self.client.table(self.TABLE).select("updated_at")
+                .order("updated_at", desc=True).limit(1).execute()
+        )
+        rows = response.data or []
+        return rows[0]["updated_at"] if rows else None
@@ -0,0 +1,162 @@
+"""
+語彙インデックスのバックフィル
+Pineconeに登録済みの過去事例を、同期時と同じ統合テキスト（ケースストアのsearch_text）で転置インデックスに登録する
+"""
+
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..utils.resilience import call_sync
+from .case_store import CaseStore
+from .lexical_index import LexicalIndex
+
+
+# ケースストアのペイロードに保存する語彙検索用テキスト（combinedベクトルの埋め込み元と同じ統合テキスト）
+SEARCH_TEXT_FIELD = "search_text"
+
+# 語彙インデックスの検索結果に付与する軽量メタデータ
+LEXICAL_METADATA_FIELDS = ("position", "company", "created_at", "is_high_quality", "has_human_review")
+
+COMBINED_SUFFIX = "_combined"
+
+_lexical_indexes: Dict[str, LexicalIndex] = {}
+
+
+def get_lexical_index(namespace: str = "historical-cases") -> LexicalIndex:
+    """
+    名前空間ごとの語彙インデックスを取得（保存先はRAG_LEXICAL_INDEX_PATHまたは./lexical_index_data）
+    """
+    if namespace not in _lexical_indexes:
+        base_path = os.getenv("RAG_LEXICAL_INDEX_PATH", "./lexical_index_data")
+        _lexical_indexes[namespace] = LexicalIndex(storage_path=os.path.join(base_path, namespace))
+    return _lexical_indexes[namespace]
+
+
+def lexical_metadata(metadata: Dict) -> Dict:
+    """語彙インデックスに保持する軽量メタデータを抽出"""
+    return {key: metadata[key] for key in LEXICAL_METADATA_FIELDS if key in metadata}
+
+
+def backfill_lexical_index(
+    lexical_index: LexicalIndex,
+    pinecone_index,
+    namespace: str,
+    batch_size: int = 100,
+    rebuild: bool = False,
+    case_store: Optional[CaseStore] = None
+) -> int:
+    """
+    Pineconeの既存事例を語彙インデックスに登録
+
+    Args:
+        lexical_index: 登録先の語彙インデックス
+        pinecone_index: Pineconeのインデックス
+        namespace: 対象の名前空間
+        batch_size: 1回のfetchで取得するベクトル数
+        rebuild: Trueの場合は登録済みの事例も再登録
+        case_store: 統合テキストの取得元（省略時はSupabaseのCaseStore）
+
+    Returns:
+        登録した事例数
+    """
+    case_store = case_store or CaseStore()
+    added = 0
+    missing = 0
+    pending: List[str] = []
+
+    for ids in _list_vector_ids(pinecone_index, namespace):
+        for vector_id in ids:
+            if not vector_id.endswith(COMBINED_SUFFIX):
+                continue
+            case_id = vector_id[:-len(COMBINED_SUFFIX)]
+            if rebuild or case_id not in lexical_index:
+                pending.append(vector_id)
+
+        while len(pending) >= batch_size:
+            indexed, skipped = _index_batch(lexical_index, pinecone_index, namespace, case_store, pending[:batch_size])
+            added += indexed
+            missing += skipped
+            pending = pending[batch_size:]
+
+    if pending:
+        indexed, skipped = _index_batch(lexical_index, pinecone_index, namespace, case_store, pending)
+        added += indexed
+        missing += skipped
+
+    print(f"語彙インデックスのバックフィル完了: {added}件登録（合計{len(lexical_index)}件）")
+    if missing:
+        print(f"  統合テキスト未保存のため{missing}件をスキップしました（sync_version 3.3より前の事例は再同期が必要です）")
+    return added
+
+
+def _list_vector_ids(pinecone_index, namespace: str) -> Iterable[List[str]]:
+    """名前空間のベクトルIDをページ単位で列挙"""
+    for page in pinecone_index.list(namespace=namespace):
+        # クライアントのバージョンによってIDのリストまたはレスポンスオブジェクトが返る
+        if hasattr(page, "vectors"):
+            yield [getattr(v, "id", v) for v in page.vectors]
+        else:
+            yield list(page)
+
+
+def _index_batch(
+    lexical_index: LexicalIndex,
+    pinecone_index,
+    namespace: str,
+    case_store: CaseStore,
+    vector_ids: List[str]
+) -> Tuple[int, int]:
+    """
+    combinedベクトルのメタデータとケースストアの統合テキストを取得して語彙インデックスに登録
+
+    Returns:
+        (登録数, 統合テキストがなくスキップした数)
+    """
+    metadata_by_case = _fetch_metadata(pinecone_index, namespace, vector_ids)
+    payloads = case_store.get_many(list(metadata_by_case), fields=[SEARCH_TEXT_FIELD])
+
+    documents = []
+    for case_id, metadata in metadata_by_case.items():
+        text = payloads.get(case_id, {}).get(SEARCH_TEXT_FIELD)
+        if text:
+            documents.append((case_id, text, lexical_metadata(metadata)))
+
+    return lexical_index.add_documents(documents), len(metadata_by_case) - len(documents)
+
+
+def fetch_case_vectors(pinecone_index, namespace: str, case_ids: List[str]) -> Dict[str, Dict]:
+    """
+    case_idに対応するcombinedベクトルを取得（語彙検索のみでヒットした事例の類似度計算・補完用）
+
+    Returns:
+        {case_id: {"values": [...], "metadata": {...}}}
+    """
+    if not case_ids:
+        return {}
+    return _fetch_vectors(pinecone_index, namespace, [f"{case_id}{COMBINED_SUFFIX}" for case_id in case_ids])
+
+
+def _fetch_metadata(pinecone_index, namespace: str, vector_ids: List[str]) -> Dict[str, Dict]:
+    """combinedベクトルのメタデータをcase_id単位で取得"""
+    return {
+        case_id: vector["metadata"]
+        for case_id, vector in _fetch_vectors(pinecone_index, namespace, vector_ids).items()
+    }
+
+
+def _fetch_vectors(pinecone_index, namespace: str, vector_ids: List[str]) -> Dict[str, Dict]:
+    """combinedベクトルの値とメタデータをcase_id単位で取得"""
+    response = call_sync("pinecone", pinecone_index.fetch, ids=vector_ids, namespace=namespace)
+    vectors = response.vectors if hasattr(response, "vectors") else response.get("vectors", {})
+
+    vectors_by_case: Dict[str, Dict] = {}
+    for vector_id, vector in vectors.items():
+        # dictの場合はvaluesがメソッドと衝突するためキーで取り出す
+        if isinstance(vector, dict):
+            metadata, values = vector.get("metadata"), vector.get("values")
+        else:
+            metadata, values = vector.metadata, vector.values
+        metadata = dict(metadata or {})
+        case_id = metadata.get("case_id") or vector_id[:-len(COMBINED_SUFFIX)]
+        vectors_by_case[case_id] = {"values": list(values or []), "metadata": metadata}
+    return vectors_by_case
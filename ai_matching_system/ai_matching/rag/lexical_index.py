@@ -0,0 +1,391 @@
+"""
+日本語向け文字n-gram転置インデックス
+過去事例テキストをBM25でスコアリングし、ベクトル検索と融合するための語彙検索を提供
+"""
+
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+# 英数字の連続はそのまま1トークンとして扱い、それ以外（日本語）は文字n-gramに分割する
+_ASCII_WORD_PATTERN = re.compile(r'[a-z0-9][a-z0-9+#._-]*')
+_SEGMENT_PATTERN = re.compile(r'[a-z0-9][a-z0-9+#._-]*|[^\sa-z0-9、。，．・/（）()「」【】\[\]:：,.!?！？]+')
+
+
+class LexicalIndex:
+    """文字n-gram + BM25 による過去事例の転置インデックス"""
+
+    def __init__(self, ngram_sizes: Tuple[int, ...] = (2, 3), k1: float = 1.5, b: float = 0.75,
+                 storage_path: Optional[str] = None):
+        """
+        Args:
+            ngram_sizes: 日本語部分に適用する文字n-gramの長さ
+            k1: BM25の語頻度飽和パラメータ
+            b: BM25の文書長正規化パラメータ
+            storage_path: インデックスの保存先ディレクトリ（Noneの場合はメモリのみ）
+        """
+        self.ngram_sizes = tuple(ngram_sizes)
+        self.k1 = k1
+        self.b = b
+        self.storage_path = storage_path
+        self.db_path = os.path.join(storage_path, "lexical_index.db") if storage_path else None
+        self._loaded_revision = None
+
+        # 検索スレッドと再読み込み・追加が同時に走っても転置リストと文書長の整合が崩れないように保護
+        self._lock = threading.RLock()
+
+        # 転置リスト: token -> {doc_id: term_frequency}
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.doc_lengths: Dict[str, int] = {}
+        self.doc_terms: Dict[str, List[str]] = {}
+        self.doc_metadata: Dict[str, Dict] = {}
+        self.total_length = 0
+
+        if storage_path:
+            os.makedirs(storage_path, exist_ok=True)
+            self._init_database()
+            self._load()
+
+    @contextmanager
+    def _get_db(self):
+        """データベース接続を取得"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _init_database(self):
+        """テーブルを初期化"""
+        with self._get_db() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS lexical_documents (
+                    doc_id TEXT PRIMARY KEY,
+                    term_freqs TEXT NOT NULL,
+                    metadata TEXT NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS lexical_index_state (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+            """)
+            conn.execute(
+                "INSERT OR IGNORE INTO lexical_index_state (key, value) VALUES ('ngram_sizes', ?)",
+                (json.dumps(list(self.ngram_sizes)),)
+            )
+            conn.execute("INSERT OR IGNORE INTO lexical_index_state (key, value) VALUES ('revision', '0')")
+
+            stored = conn.execute(
+                "SELECT value FROM lexical_index_state WHERE key = 'ngram_sizes'"
+            ).fetchone()[0]
+            if tuple(json.loads(stored)) != self.ngram_sizes:
+                # n-gram設定が異なるとトークンの互換性がないため破棄して作り直す
+                print("語彙インデックスのn-gram設定が異なるため破棄しました（再構築が必要です）")
+                conn.execute("DELETE FROM lexical_documents")
+                conn.execute(
+                    "UPDATE lexical_index_state SET value = ? WHERE key = 'ngram_sizes'",
+                    (json.dumps(list(self.ngram_sizes)),)
+                )
+                conn.execute(
+                    "UPDATE lexical_index_state SET value = CAST(value AS INTEGER) + 1 WHERE key = 'revision'"
+                )
+
+    def tokenize(self, text: str) -> List[str]:
+        """テキストをトークン列に変換（英単語 + 日本語文字n-gram）"""
+        if not text:
+            return []
+
+        normalized = unicodedata.normalize('NFKC', text).lower()
+        tokens = []
+
+        for segment in _SEGMENT_PATTERN.findall(normalized):
+            if _ASCII_WORD_PATTERN.fullmatch(segment):
+                tokens.append(segment)
+                continue
+
+            # 1文字の語（例: 「営」単独）はユニグラムとして保持
+            if len(segment) < min(self.ngram_sizes):
+                tokens.append(segment)
+                continue
+
+            for n in self.ngram_sizes:
+                for i in range(len(segment) - n + 1):
+                    tokens.append(segment[i:i + n])
+
+        return tokens
+
+    def add_document(self, doc_id: str, text: str, metadata: Optional[Dict] = None) -> None:
+        """
+        文書をインデックスに追加（既存IDの場合は置き換え）
+
+        Args:
+            doc_id: 文書ID（case_id）
+            text: インデックス対象テキスト
+            metadata: 検索結果に付与する軽量メタデータ
+        """
+        self.add_documents([(doc_id, text, metadata)])
+
+    def add_documents(self, documents: Iterable[Tuple[str, str, Optional[Dict]]]) -> int:
+        """
+        複数文書をまとめて追加（保存は1トランザクション）
+
+        Args:
+            documents: [(doc_id, text, metadata), ...]
+
+        Returns:
+            追加した文書数
+        """
+        rows = []
+        for doc_id, text, metadata in documents:
+            term_freqs = dict(Counter(self.tokenize(text)))
+            rows.append((doc_id, term_freqs, {"case_id": doc_id, **(metadata or {})}))
+
+        if not rows:
+            return 0
+
+        with self._lock:
+            for doc_id, term_freqs, metadata in rows:
+                self._add(doc_id, term_freqs, metadata)
+
+            if self.db_path:
+                self._persist(
+                    "INSERT OR REPLACE INTO lexical_documents (doc_id, term_freqs, metadata) VALUES (?, ?, ?)",
+                    [
+                        (doc_id, json.dumps(term_freqs, ensure_ascii=False), json.dumps(metadata, ensure_ascii=False, default=str))
+                        for doc_id, term_freqs, metadata in rows
+                    ]
+                )
+        return len(rows)
+
+    def remove_document(self, doc_id: str) -> bool:
+        """文書をインデックスから削除"""
+        with self._lock:
+            removed = doc_id in self.doc_lengths
+            self._remove(doc_id)
+            # 他プロセスが追加した未読み込みの文書も削除できるよう、保存先には常に反映する
+            if self.db_path:
+                removed = self._persist("DELETE FROM lexical_documents WHERE doc_id = ?", [(doc_id,)]) > 0 or removed
+            return removed
+
+    def _persist(self, sql: str, params: List[Tuple]) -> int:
+        """
+        文書単位の変更をデータベースに書き込み、リビジョンを進める
+        ファイル全体を書き換えないため、別プロセスの書き込みと上書きし合わない
+
+        Returns:
+            変更された行数
+        """
+        with self._get_db() as conn:
+            changed = conn.executemany(sql, params).rowcount
+            conn.execute(
+                "UPDATE lexical_index_state SET value = CAST(value AS INTEGER) + 1 WHERE key = 'revision'"
+            )
+            revision = int(conn.execute(
+                "SELECT value FROM lexical_index_state WHERE key = 'revision'"
+            ).fetchone()[0])
+
+        # 他プロセスの変更が挟まっていなければメモリ上の状態は最新のまま
+        if self._loaded_revision is not None and revision == self._loaded_revision + 1:
+            self._loaded_revision = revision
+        return changed
+
+    def _add(self, doc_id: str, term_freqs: Dict[str, int], metadata: Dict) -> None:
+        """転置リストに文書を登録"""
+        if doc_id in self.doc_lengths:
+            self._remove(doc_id)
+
+        for token, tf in term_freqs.items():
+            self.postings[token][doc_id] = tf
+
+        length = sum(term_freqs.values())
+        self.doc_lengths[doc_id] = length
+        self.doc_terms[doc_id] = list(term_freqs.keys())
+        self.doc_metadata[doc_id] = metadata
+        self.total_length += length
+
+    def _remove(self, doc_id: str) -> None:
+        """転置リストから文書を取り除く"""
+        for token in self.doc_terms.pop(doc_id, []):
+            docs = self.postings.get(token)
+            if docs is None:
+                continue
+            docs.pop(doc_id, None)
+            if not docs:
+                del self.postings[token]
+
+        self.total_length -= self.doc_lengths.pop(doc_id, 0)
+        self.doc_metadata.pop(doc_id, None)
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.doc_lengths
+
+    def search(
+        self,
+        query_text: str,
+        top_k: int = 10,
+        exclude_ids: Optional[Iterable[str]] = None,
+        metadata_filter: Optional[Callable[[Dict], bool]] = None
+    ) -> List[Dict]:
+        """
+        BM25で文書を検索
+
+        Args:
+            query_text: 検索クエリ
+            top_k: 返す結果数
+            exclude_ids: 除外するcase_id
+            metadata_filter: メタデータを受け取り採否を返す関数
+
+        Returns:
+            ベクトル検索と同じ形式の結果リスト
+            （score は最上位を1.0とした正規化済みBM25、bm25_score に生スコア）
+        """
+        query_tokens = Counter(self.tokenize(query_text))
+        excluded = set(exclude_ids or [])
+
+        with self._lock:
+            if not self.doc_lengths:
+                return []
+
+            doc_count = len(self.doc_lengths)
+            avg_length = self.total_length / doc_count if doc_count else 0
+
+            scores: Dict[str, float] = defaultdict(float)
+            for token, query_tf in query_tokens.items():
+                docs = self.postings.get(token)
+                if not docs:
+                    continue
+
+                df = len(docs)
+                idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+
+                for doc_id, tf in docs.items():
+                    if doc_id in excluded:
+                        continue
+                    length_norm = 1 - self.b + self.b * (self.doc_lengths[doc_id] / avg_length if avg_length else 0)
+                    scores[doc_id] += query_tf * idf * (tf * (self.k1 + 1)) / (tf + self.k1 * length_norm)
+
+            ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+            metadata_by_id = {doc_id: self.doc_metadata.get(doc_id, {"case_id": doc_id}) for doc_id, _ in ranked}
+
+        results = []
+        max_score = ranked[0][1] if ranked else 0
+        for doc_id, score in ranked:
+            metadata = metadata_by_id[doc_id]
+            if metadata_filter and not metadata_filter(metadata):
+                continue
+            results.append({
+                "id": doc_id,
+                "score": score / max_score if max_score > 0 else 0,
+                "bm25_score": score,
+                "metadata": metadata
+            })
+            if len(results) >= top_k:
+                break
+
+        return results
+
+    def reload_if_changed(self) -> bool:
+        """
+        別プロセス（同期バッチ・バックフィル）が書き込んだ変更を再読み込み
+
+        Returns:
+            再読み込みした場合True
+        """
+        if not self.db_path:
+            return False
+
+        try:
+            with self._get_db() as conn:
+                revision = int(conn.execute(
+                    "SELECT value FROM lexical_index_state WHERE key = 'revision'"
+                ).fetchone()[0])
+        except sqlite3.Error as e:
+            print(f"語彙インデックスのリビジョン取得に失敗しました: {e}")
+            return False
+
+        if revision == self._loaded_revision:
+            return False
+        self._load()
+        return True
+
+    def _load(self) -> None:
+        """保存済みインデックスを読み込み（読み込み中も検索は旧データで継続し、完了後に差し替える）"""
+        try:
+            with self._get_db() as conn:
+                revision = int(conn.execute(
+                    "SELECT value FROM lexical_index_state WHERE key = 'revision'"
+                ).fetchone()[0])
+                rows = conn.execute("SELECT doc_id, term_freqs, metadata FROM lexical_documents").fetchall()
+        except (sqlite3.Error, ValueError) as e:
+            print(f"語彙インデックスの読み込みに失敗しました: {e}")
+            return
+
+        postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        doc_lengths: Dict[str, int] = {}
+        doc_terms: Dict[str, List[str]] = {}
+        doc_metadata: Dict[str, Dict] = {}
+        for doc_id, term_freqs_json, metadata_json in rows:
+            term_freqs = json.loads(term_freqs_json)
+            for token, tf in term_freqs.items():
+                postings[token][doc_id] = tf
+            doc_lengths[doc_id] = sum(term_freqs.values())
+            doc_terms[doc_id] = list(term_freqs.keys())
+            doc_metadata[doc_id] = json.loads(metadata_json)
+
+        with self._lock:
+            self.postings = postings
+            self.doc_lengths = doc_lengths
+            self.doc_terms = doc_terms
+            self.doc_metadata = doc_metadata
+            self.total_length = sum(doc_lengths.values())
+            self._loaded_revision = revision
+
+
+def reciprocal_rank_fusion(
+    ranked_lists: List[List[Dict]],
+    k: int = 60,
+    id_getter: Optional[Callable[[Dict], str]] = None
+) -> Dict[str, float]:
+    """
+    Reciprocal Rank Fusion で複数のランキングを統合
+    同じランキング内で重複するIDは最上位の出現のみを数え、順位も重複除去後で数える
+
+    Args:
+        ranked_lists: スコア降順に並んだ結果リストのリスト
+        k: 順位の平滑化定数
+        id_getter: 結果から同一性判定用のIDを取り出す関数（デフォルトはmetadata.case_id）
+
+    Returns:
+        {id: fused_score}
+    """
+    if id_getter is None:
+        id_getter = lambda r: r["metadata"]["case_id"]
+
+    fused: Dict[str, float] = defaultdict(float)
+    for results in ranked_lists:
+        seen = set()
+        rank = 0
+        for result in results:
+            doc_id = id_getter(result)
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
+            rank += 1
+            fused[doc_id] += 1.0 / (k + rank)
+
+    return dict(fused)
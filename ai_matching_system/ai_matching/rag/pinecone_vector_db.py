@@ -12,18 +12,26 @@ from pinecone import Pinecone, ServerlessSpec
 import time
 
 from ..embeddings.gemini_embedder import GeminiEmbedder
+from ..utils.resilience import call_sync
+from .lexical_index import LexicalIndex
+from .lexical_backfill import SEARCH_TEXT_FIELD, backfill_lexical_index, lexical_metadata
+from .case_store import CaseStore, split_metadata
 
 
 class UnifiedPineconeDB:
     """統一されたPineconeベクトルデータベース"""
     
-    def __init__(self, index_name: str = "recruitment-matching", namespace: str = "historical-cases"):
+    def __init__(self, index_name: str = "recruitment-matching", namespace: str = "historical-cases",
+                 lexical_index_path: Optional[str] = "./lexical_index_data",
+                 case_store: Optional[CaseStore] = None):
         """
         初期化
         
         Args:
             index_name: Pineconeインデックス名
             namespace: 名前空間（用途別に分離）
+            lexical_index_path: 語彙検索用転置インデックスの保存先（Noneの場合はメモリのみ）
+            case_store: 事例ペイロードの共有ストア（省略時はSupabaseのCaseStore）
         """
         # Pinecone初期化
         api_key = os.getenv("PINECONE_API_KEY")
@@ -38,6 +46,14 @@ class UnifiedPineconeDB:
         self.embedder = GeminiEmbedder()
         self.dimension = 768
         
+        # 語彙検索用の転置インデックス（ケース追加時に逐次更新）
+        self.lexical_index = LexicalIndex(
+            storage_path=os.path.join(lexical_index_path, namespace) if lexical_index_path else None
+        )
+        
+        # コメント・プレビュー等の大きなフィールドはベクトルに載せず共有ケースストアに保持
+        self.case_store = case_store or CaseStore()
+        
         # インデックスの初期化
         self._initialize_index()
         
@@ -78,28 +94,46 @@ class UnifiedPineconeDB:
             
         doc_id = evaluation_data["id"]
         
-        # 3種類のベクトルを生成
-        vectors = self._prepare_vectors(evaluation_data)
+        # 3種類のベクトルを生成（ペイロードはケースストアへ）
+        vectors, payload = self._prepare_vectors(evaluation_data)
+        self.case_store.put(doc_id, payload)
         
         # Pineconeにアップサート
-        self.index.upsert(
+        call_sync(
+            "pinecone",
+            self.index.upsert,
             vectors=vectors,
             namespace=self.namespace
         )
         
+        # 語彙インデックスにも追加（combinedベクトルと同じ統合テキスト）
+        self.lexical_index.add_document(
+            doc_id,
+            payload[SEARCH_TEXT_FIELD],
+            lexical_metadata(vectors[0]["metadata"])
+        )
+        
         print(f"Added evaluation {doc_id} with {len(vectors)} vectors")
         return doc_id
         
-    def _prepare_vectors(self, evaluation_data: Dict) -> List[Dict]:
-        """評価データから3種類のベクトルを準備"""
+    def _prepare_vectors(self, evaluation_data: Dict) -> Tuple[List[Dict], Dict]:
+        """
+        評価データから3種類のベクトルを準備
+        
+        Returns:
+            (vectors, payload) - ベクトルにはフィルタ用メタデータのみを載せ、
+            それ以外はケースストア用のペイロードとして返す
+        """
         vectors = []
         case_id = evaluation_data.get("id", self._generate_id())
         
-        # メタデータの準備（拡張版）
-        metadata_base = self._create_enhanced_metadata(evaluation_data)
+        # メタデータの準備（拡張版）をフィルタ用とペイロードに分割
+        metadata_base, payload = split_metadata(self._create_enhanced_metadata(evaluation_data))
         
         # 1. Combined vector (統合ベクトル)
         combined_text = self._create_combined_text(evaluation_data)
+        payload["text_preview"] = combined_text[:500]  # デバッグ用
+        payload[SEARCH_TEXT_FIELD] = combined_text  # 語彙インデックスのバックフィル用
         combined_embedding = self.embedder.embed_text(
             combined_text, 
             text_type="general",
@@ -111,8 +145,7 @@ class UnifiedPineconeDB:
             "values": combined_embedding,
             "metadata": {
                 **metadata_base,
-                "vector_type": "combined",
-                "text_preview": combined_text[:500]  # デバッグ用
+                "vector_type": "combined"
             }
         })
         
@@ -150,7 +183,13 @@ class UnifiedPineconeDB:
             }
         })
         
-        return vectors
+        return vectors, payload
+        
+    def backfill_lexical_index(self, rebuild: bool = False) -> int:
+        """Pineconeに登録済みの事例を語彙インデックスに登録"""
+        return backfill_lexical_index(
+            self.lexical_index, self.index, self.namespace, rebuild=rebuild, case_store=self.case_store
+        )
         
     def _create_enhanced_metadata(self, evaluation_data: Dict) -> Dict:
         """拡張されたメタデータ構造"""
@@ -310,7 +349,8 @@ class UnifiedPineconeDB:
         query_text: str,
         filters: Optional[Dict] = None,
         top_k: int = 10,
-        vector_type: str = "combined"
+        vector_type: str = "combined",
+        include_fields: Optional[List[str]] = None
     ) -> List[Dict]:
         """
         類似ケースを検索
@@ -320,6 +360,8 @@ class UnifiedPineconeDB:
             filters: メタデータフィルタ
             top_k: 返す結果数
             vector_type: 検索対象のベクトルタイプ
+            include_fields: ケースストアから補完するペイロードフィールド
+                （Noneの場合はフィルタ用メタデータのみ）
             
         Returns:
             検索結果のリスト
@@ -337,7 +379,9 @@ class UnifiedPineconeDB:
         filters["vector_type"] = vector_type
         
         # Pineconeで検索
-        results = self.index.query(
+        results = call_sync(
+            "pinecone",
+            self.index.query,
             vector=query_vector,
             filter=filters,
             top_k=top_k,
@@ -351,8 +395,11 @@ class UnifiedPineconeDB:
             formatted_results.append({
                 "id": match.id,
                 "score": match.score,
-                "metadata": match.metadata
+                "metadata": dict(match.metadata or {})
             })
+        
+        if include_fields:
+            self.case_store.hydrate(formatted_results, include_fields)
             
         return formatted_results
         
@@ -422,6 +469,8 @@ class UnifiedPineconeDB:
                 filters=where,
                 top_k=n_results
             )
+            # ChromaDB互換のため全ペイロードを補完
+            self.case_store.hydrate(results)
             all_results.append(results)
             
         return {
@@ -0,0 +1,115 @@
+"""
+類似ケース検索結果のキャッシュ
+求人・候補者・インデックスの状態が変わらない限り、埋め込み生成とPinecone検索を再実行しない
+"""
+
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+
+class RetrievalCache:
+    """(求人フィンガープリント, 候補者ハッシュ, インデックスバージョン) をキーとするSQLiteキャッシュ"""
+
+    def __init__(self, storage_path: Optional[str] = None, ttl_hours: Optional[float] = None):
+        """
+        Args:
+            storage_path: 保存先ディレクトリ（省略時はRAG_RETRIEVAL_CACHE_PATHまたは./retrieval_cache_data）
+            ttl_hours: エントリの保持時間（省略時はRAG_RETRIEVAL_CACHE_TTL_HOURS、デフォルト168時間）
+        """
+        self.storage_path = storage_path or os.getenv("RAG_RETRIEVAL_CACHE_PATH", "./retrieval_cache_data")
+        self.ttl = timedelta(hours=ttl_hours or float(os.getenv("RAG_RETRIEVAL_CACHE_TTL_HOURS", "168")))
+        os.makedirs(self.storage_path, exist_ok=True)
+        self.db_path = os.path.join(self.storage_path, "retrieval_cache.db")
+        self.hits = 0
+        self.misses = 0
+        self._init_database()
+
+    @contextmanager
+    def _get_db(self):
+        """データベース接続を取得"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _init_database(self):
+        """テーブルを初期化"""
+        with self._get_db() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS retrieval_cache (
+                    requirement_fp TEXT NOT NULL,
+                    candidate_fp TEXT NOT NULL,
+                    index_version TEXT NOT NULL,
+                    similar_cases TEXT NOT NULL,
+                    rag_insights TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    PRIMARY KEY (requirement_fp, candidate_fp, index_version)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_retrieval_cache_created ON retrieval_cache(created_at)")
+
+    def get(self, requirement_fp: str, candidate_fp: str, index_version: str) -> Optional[Tuple[list, Dict]]:
+        """
+        キャッシュを取得
+
+        Returns:
+            (similar_cases, rag_insights)、存在しないか期限切れの場合はNone
+        """
+        with self._get_db() as conn:
+            row = conn.execute(
+                """SELECT similar_cases, rag_insights FROM retrieval_cache
+                   WHERE requirement_fp = ? AND candidate_fp = ? AND index_version = ? AND created_at >= ?""",
+                (requirement_fp, candidate_fp, index_version, (datetime.now() - self.ttl).isoformat())
+            ).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return json.loads(row[0]), json.loads(row[1])
+
+    def put(self, requirement_fp: str, candidate_fp: str, index_version: str,
+            similar_cases: list, rag_insights: Dict) -> None:
+        """
+        キャッシュを保存（保持時間を過ぎたエントリは削除）
+
+        インデックスバージョンは複数のプロセス・ホストで切り替わる時期がずれるため、
+        他のバージョンのエントリは削除せず保持時間で期限切れにする
+        """
+        with self._get_db() as conn:
+            conn.execute(
+                "DELETE FROM retrieval_cache WHERE created_at < ?",
+                ((datetime.now() - self.ttl).isoformat(),)
+            )
+            conn.execute(
+                """INSERT OR REPLACE INTO retrieval_cache
+                   (requirement_fp, candidate_fp, index_version, similar_cases, rag_insights, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (
+                    requirement_fp,
+                    candidate_fp,
+                    index_version,
+                    json.dumps(similar_cases, ensure_ascii=False, default=str),
+                    json.dumps(rag_insights, ensure_ascii=False, default=str),
+                    datetime.now().isoformat()
+                )
+            )
+
+    def clear(self) -> None:
+        """キャッシュをクリア"""
+        with self._get_db() as conn:
+            conn.execute("DELETE FROM retrieval_cache")
+
+    def get_stats(self) -> Dict[str, int]:
+        """キャッシュ統計を取得"""
+        with self._get_db() as conn:
+            size = conn.execute("SELECT COUNT(*) FROM retrieval_cache").fetchone()[0]
+        return {"cache_size": size, "hits": self.hits, "misses": self.misses}
@@ -1,9 +1,13 @@
 """
 ベクトル検索品質のモニタリングとレポート生成
+検索ログはSQLite（WAL）に保存し、日別・メトリクス別のロールアップを書き込み時に更新する
 """
 
 import os
 import json
+import math
+import sqlite3
+from contextlib import contextmanager
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from collections import defaultdict
@@ -12,16 +16,32 @@ import pandas as pd
 from pathlib import Path
 
 
+# 問題ありとみなすメトリクス値の閾値
+LOW_SCORE_THRESHOLD = 0.6
+# パーセンタイル近似用のヒストグラム分割数（0〜1を等幅に分割）
+HISTOGRAM_BUCKETS = 20
+
+
+def _to_number(value) -> Optional[float]:
+    """ログの値を数値に変換（旧形式ログの文字列・欠損・NaNなど変換できない値はNone）"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
 class SearchQualityMonitor:
     """検索品質をモニタリングし、改善のためのインサイトを提供"""
     
     def __init__(self, log_dir: str = "./search_logs"):
         """
         Args:
-            log_dir: 検索ログを保存するディレクトリ
+            log_dir: 検索ログ（search_quality.db）とレポートを保存するディレクトリ
         """
         self.log_dir = Path(log_dir)
-        self.log_dir.mkdir(exist_ok=True)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.log_dir / "search_quality.db"
         
         # メトリクスの定義
         self.quality_metrics = {
@@ -32,6 +52,106 @@ class SearchQualityMonitor:
             "user_satisfaction": "ユーザー満足度"
         }
         
+        self._init_database()
+        self._import_legacy_logs()
+        
+    @contextmanager
+    def _get_db(self):
+        """データベース接続を取得"""
+        conn = sqlite3.connect(str(self.db_path), timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+            
+    def _init_database(self):
+        """テーブルを初期化"""
+        with self._get_db() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            # 生ログ（個別セッションの参照用）
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS search_sessions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT,
+                    day TEXT NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    query TEXT,
+                    results TEXT,
+                    metrics TEXT,
+                    user_feedback TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_day ON search_sessions(day)")
+            # 日別のセッション集計
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS daily_session_rollups (
+                    day TEXT PRIMARY KEY,
+                    session_count INTEGER NOT NULL DEFAULT 0,
+                    feedback_count INTEGER NOT NULL DEFAULT 0,
+                    satisfaction_sum REAL NOT NULL DEFAULT 0
+                )
+            """)
+            # 日別・メトリクス別の集計
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS daily_metric_rollups (
+                    day TEXT NOT NULL,
+                    metric TEXT NOT NULL,
+                    count INTEGER NOT NULL DEFAULT 0,
+                    value_sum REAL NOT NULL DEFAULT 0,
+                    value_sq_sum REAL NOT NULL DEFAULT 0,
+                    min_value REAL,
+                    max_value REAL,
+                    low_count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (day, metric)
+                )
+            """)
+            # 日別・メトリクス別のヒストグラム（パーセンタイル近似用）
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS daily_metric_histograms (
+                    day TEXT NOT NULL,
+                    metric TEXT NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (day, metric, bucket)
+                )
+            """)
+            # 日別・検索ステージ別の集計
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS daily_stage_rollups (
+                    day TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    count INTEGER NOT NULL DEFAULT 0,
+                    result_sum INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (day, stage)
+                )
+            """)
+            
+    def _import_legacy_logs(self):
+        """旧形式の日別JSONLログを取り込む（取り込み済みファイルは.importedにリネーム）"""
+        for log_file in sorted(self.log_dir.glob("search_log_*.jsonl")):
+            # 先にリネームして、同時に起動した他のワーカーと二重に取り込まないようにする
+            imported_file = log_file.with_suffix(".jsonl.imported")
+            try:
+                log_file.rename(imported_file)
+            except OSError:
+                continue
+                
+            entries = []
+            with open(imported_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    # 日付を特定できないエントリは集計できないため読み飛ばす
+                    if isinstance(entry, dict) and isinstance(entry.get("timestamp"), str):
+                        entries.append(entry)
+                        
+            with self._get_db() as conn:
+                for entry in entries:
+                    self._write_entry(conn, entry)
+            
     def log_search_session(
         self,
         session_id: str,
@@ -57,12 +177,100 @@ class SearchQualityMonitor:
             "user_feedback": user_feedback
         }
         
-        # 日付ごとのログファイルに保存
-        log_file = self.log_dir / f"search_log_{datetime.now().strftime('%Y%m%d')}.jsonl"
+        # 生ログとロールアップを同一トランザクションで更新
+        with self._get_db() as conn:
+            self._write_entry(conn, log_entry)
+            
+    def _write_entry(self, conn: sqlite3.Connection, log_entry: Dict):
+        """ログエントリを保存し、日別ロールアップに加算"""
+        day = log_entry["timestamp"][:10]  # YYYY-MM-DD
+        metrics = {
+            metric: number
+            for metric, number in (
+                (metric, _to_number(value)) for metric, value in (log_entry.get("metrics") or {}).items()
+            )
+            if number is not None
+        }
+        stages_summary = {
+            stage: int(count)
+            for stage, count in (
+                (stage, _to_number(value)) for stage, value in
+                ((log_entry.get("results") or {}).get("stages_summary") or {}).items()
+            )
+            if count is not None
+        }
+        satisfaction = _to_number((log_entry.get("user_feedback") or {}).get("satisfaction"))
+        
+        conn.execute(
+            """
+            INSERT INTO search_sessions (session_id, day, timestamp, query, results, metrics, user_feedback)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                log_entry.get("session_id"),
+                day,
+                log_entry["timestamp"],
+                json.dumps(log_entry.get("query"), ensure_ascii=False, default=str),
+                json.dumps(log_entry.get("results"), ensure_ascii=False, default=str),
+                json.dumps(metrics),
+                json.dumps(log_entry.get("user_feedback"), ensure_ascii=False, default=str)
+            )
+        )
+        
+        conn.execute(
+            """
+            INSERT INTO daily_session_rollups (day, session_count, feedback_count, satisfaction_sum)
+            VALUES (?, 1, ?, ?)
+            ON CONFLICT(day) DO UPDATE SET
+                session_count = session_count + 1,
+                feedback_count = feedback_count + excluded.feedback_count,
+                satisfaction_sum = satisfaction_sum + excluded.satisfaction_sum
+            """,
+            (day, 1 if satisfaction is not None else 0, satisfaction or 0.0)
+        )
         
-        with open(log_file, 'a', encoding='utf-8') as f:
-            json.dump(log_entry, f, ensure_ascii=False)
-            f.write('\n')
+        for metric, value in metrics.items():
+            conn.execute(
+                """
+                INSERT INTO daily_metric_rollups
+                    (day, metric, count, value_sum, value_sq_sum, min_value, max_value, low_count)
+                VALUES (?, ?, 1, ?, ?, ?, ?, ?)
+                ON CONFLICT(day, metric) DO UPDATE SET
+                    count = count + 1,
+                    value_sum = value_sum + excluded.value_sum,
+                    value_sq_sum = value_sq_sum + excluded.value_sq_sum,
+                    min_value = MIN(min_value, excluded.min_value),
+                    max_value = MAX(max_value, excluded.max_value),
+                    low_count = low_count + excluded.low_count
+                """,
+                (day, metric, value, value * value, value, value, 1 if value < LOW_SCORE_THRESHOLD else 0)
+            )
+            conn.execute(
+                """
+                INSERT INTO daily_metric_histograms (day, metric, bucket, count)
+                VALUES (?, ?, ?, 1)
+                ON CONFLICT(day, metric, bucket) DO UPDATE SET count = count + 1
+                """,
+                (day, metric, self._histogram_bucket(value))
+            )
+            
+        for stage, count in stages_summary.items():
+            conn.execute(
+                """
+                INSERT INTO daily_stage_rollups (day, stage, count, result_sum)
+                VALUES (?, ?, 1, ?)
+                ON CONFLICT(day, stage) DO UPDATE SET
+                    count = count + 1,
+                    result_sum = result_sum + excluded.result_sum
+                """,
+                (day, stage, count)
+            )
+            
+    @staticmethod
+    def _histogram_bucket(value: float) -> int:
+        """メトリクス値をヒストグラムのバケット番号に変換"""
+        clamped = min(max(value, 0.0), 1.0)
+        return min(int(clamped * HISTOGRAM_BUCKETS), HISTOGRAM_BUCKETS - 1)
             
     def generate_quality_report(self, days: int = 7) -> Dict:
         """
@@ -74,10 +282,10 @@ class SearchQualityMonitor:
         Returns:
             品質レポート
         """
-        # ログデータを収集
-        logs = self._collect_logs(days)
+        # 日別ロールアップを集計（生ログは読まない）
+        rollups = self._collect_rollups(days)
         
-        if not logs:
+        if not rollups["total_searches"]:
             return {
                 "status": "no_data",
                 "message": f"過去{days}日間のデータがありません"
@@ -89,11 +297,11 @@ class SearchQualityMonitor:
                 "end": datetime.now().date().isoformat(),
                 "days": days
             },
-            "summary": self._calculate_summary_statistics(logs),
-            "quality_trends": self._analyze_quality_trends(logs),
-            "problem_areas": self._identify_problem_areas(logs),
-            "recommendations": self._generate_recommendations(logs),
-            "detailed_metrics": self._calculate_detailed_metrics(logs)
+            "summary": self._calculate_summary_statistics(rollups),
+            "quality_trends": self._analyze_quality_trends(rollups),
+            "problem_areas": self._identify_problem_areas(rollups),
+            "recommendations": self._generate_recommendations(rollups),
+            "detailed_metrics": self._calculate_detailed_metrics(rollups)
         }
         
         return report
@@ -303,93 +511,125 @@ class SearchQualityMonitor:
             "confidence": self._calculate_confidence_score(search_results)
         }
         
-    def _collect_logs(self, days: int) -> List[Dict]:
-        """指定期間のログを収集"""
-        logs = []
-        
-        for i in range(days):
-            date = datetime.now() - timedelta(days=i)
-            log_file = self.log_dir / f"search_log_{date.strftime('%Y%m%d')}.jsonl"
+    def _start_day(self, days: int) -> str:
+        """集計対象期間の開始日（今日を含むdays日間）"""
+        return (datetime.now() - timedelta(days=days - 1)).strftime('%Y-%m-%d')
+        
+    def _collect_rollups(self, days: int) -> Dict:
+        """指定期間の日別ロールアップを収集"""
+        start_day = self._start_day(days)
+        
+        with self._get_db() as conn:
+            session_rows = conn.execute(
+                """
+                SELECT day, session_count, feedback_count, satisfaction_sum
+                FROM daily_session_rollups WHERE day >= ?
+                """,
+                (start_day,)
+            ).fetchall()
+            metric_rows = conn.execute(
+                """
+                SELECT day, metric, count, value_sum, value_sq_sum, min_value, max_value, low_count
+                FROM daily_metric_rollups WHERE day >= ?
+                """,
+                (start_day,)
+            ).fetchall()
+            histogram_rows = conn.execute(
+                """
+                SELECT metric, bucket, SUM(count)
+                FROM daily_metric_histograms WHERE day >= ?
+                GROUP BY metric, bucket
+                """,
+                (start_day,)
+            ).fetchall()
+            stage_rows = conn.execute(
+                """
+                SELECT stage, SUM(count), SUM(result_sum)
+                FROM daily_stage_rollups WHERE day >= ?
+                GROUP BY stage
+                """,
+                (start_day,)
+            ).fetchall()
+            
+        # 日別の値と期間全体の値を両方保持
+        daily_metrics = defaultdict(dict)
+        metric_totals = {}
+        for day, metric, count, value_sum, value_sq_sum, min_value, max_value, low_count in metric_rows:
+            daily_metrics[day][metric] = {"count": count, "sum": value_sum}
+            
+            total = metric_totals.setdefault(metric, {
+                "count": 0, "sum": 0.0, "sq_sum": 0.0,
+                "min": min_value, "max": max_value, "low_count": 0
+            })
+            total["count"] += count
+            total["sum"] += value_sum
+            total["sq_sum"] += value_sq_sum
+            total["min"] = min(total["min"], min_value)
+            total["max"] = max(total["max"], max_value)
+            total["low_count"] += low_count
+            
+        histograms = defaultdict(lambda: [0] * HISTOGRAM_BUCKETS)
+        for metric, bucket, count in histogram_rows:
+            histograms[metric][bucket] = count
             
-            if log_file.exists():
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        try:
-                            logs.append(json.loads(line))
-                        except:
-                            continue
-                            
-        return logs
-        
-    def _calculate_summary_statistics(self, logs: List[Dict]) -> Dict:
+        return {
+            "total_searches": sum(row[1] for row in session_rows),
+            "feedback_count": sum(row[2] for row in session_rows),
+            "satisfaction_sum": sum(row[3] for row in session_rows),
+            "daily_metrics": dict(daily_metrics),
+            "metric_totals": metric_totals,
+            "histograms": dict(histograms),
+            "stage_totals": {
+                stage: {"count": count, "result_sum": result_sum}
+                for stage, count, result_sum in stage_rows
+            }
+        }
+        
+    def _calculate_summary_statistics(self, rollups: Dict) -> Dict:
         """サマリー統計を計算"""
-        total_searches = len(logs)
-        
-        # メトリクスの集計
-        all_metrics = defaultdict(list)
-        for log in logs:
-            metrics = log.get("metrics", {})
-            for metric, value in metrics.items():
-                all_metrics[metric].append(value)
-                
+        total_searches = rollups["total_searches"]
+        
         # 平均スコアの計算
         avg_metrics = {
-            metric: np.mean(values) for metric, values in all_metrics.items()
+            metric: total["sum"] / total["count"]
+            for metric, total in rollups["metric_totals"].items()
+            if total["count"]
         }
         
         # ユーザー満足度（フィードバックがある場合）
-        satisfaction_scores = [
-            log["user_feedback"]["satisfaction"]
-            for log in logs
-            if log.get("user_feedback", {}).get("satisfaction") is not None
-        ]
+        feedback_count = rollups["feedback_count"]
         
         return {
             "total_searches": total_searches,
             "avg_metrics": avg_metrics,
-            "user_satisfaction": np.mean(satisfaction_scores) if satisfaction_scores else None,
-            "feedback_rate": len(satisfaction_scores) / total_searches if total_searches > 0 else 0
+            "user_satisfaction": rollups["satisfaction_sum"] / feedback_count if feedback_count else None,
+            "feedback_rate": feedback_count / total_searches if total_searches > 0 else 0
         }
         
-    def _analyze_quality_trends(self, logs: List[Dict]) -> Dict:
+    def _analyze_quality_trends(self, rollups: Dict) -> Dict:
         """品質トレンドを分析"""
-        # 日別のメトリクスを集計
-        daily_metrics = defaultdict(lambda: defaultdict(list))
-        
-        for log in logs:
-            date = log["timestamp"][:10]  # YYYY-MM-DD
-            metrics = log.get("metrics", {})
-            
-            for metric, value in metrics.items():
-                daily_metrics[date][metric].append(value)
-                
         # 日別平均を計算
         trends = {}
-        for date, metrics in sorted(daily_metrics.items()):
+        for date, metrics in sorted(rollups["daily_metrics"].items()):
             trends[date] = {
-                metric: np.mean(values) for metric, values in metrics.items()
+                metric: values["sum"] / values["count"]
+                for metric, values in metrics.items()
+                if values["count"]
             }
             
         return trends
         
-    def _identify_problem_areas(self, logs: List[Dict]) -> List[Dict]:
+    def _identify_problem_areas(self, rollups: Dict) -> List[Dict]:
         """問題のある領域を特定"""
         problems = []
         
-        # 低スコアのメトリクスを集計
-        low_score_counts = defaultdict(int)
-        
-        for log in logs:
-            metrics = log.get("metrics", {})
-            for metric, value in metrics.items():
-                if value < 0.6:
-                    low_score_counts[metric] += 1
-                    
         # 問題の多いメトリクスを特定
-        total_searches = len(logs)
+        total_searches = rollups["total_searches"]
         
-        for metric, count in low_score_counts.items():
-            problem_rate = count / total_searches
+        for metric, total in rollups["metric_totals"].items():
+            if not total["low_count"]:
+                continue
+            problem_rate = total["low_count"] / total_searches
             if problem_rate > 0.3:  # 30%以上で問題あり
                 problems.append({
                     "metric": metric,
@@ -400,12 +640,12 @@ class SearchQualityMonitor:
                 
         return sorted(problems, key=lambda x: x["problem_rate"], reverse=True)
         
-    def _generate_recommendations(self, logs: List[Dict]) -> List[Dict]:
+    def _generate_recommendations(self, rollups: Dict) -> List[Dict]:
         """改善推奨事項を生成"""
         recommendations = []
         
         # サマリー統計を取得
-        summary = self._calculate_summary_statistics(logs)
+        summary = self._calculate_summary_statistics(rollups)
         avg_metrics = summary.get("avg_metrics", {})
         
         # 各メトリクスに基づく推奨事項
@@ -443,53 +683,65 @@ class SearchQualityMonitor:
             
         return recommendations
         
-    def _calculate_detailed_metrics(self, logs: List[Dict]) -> Dict:
+    def _calculate_detailed_metrics(self, rollups: Dict) -> Dict:
         """詳細メトリクスを計算"""
         # 検索ステージ別の統計
-        stage_stats = defaultdict(lambda: {"count": 0, "avg_results": []})
-        
-        for log in logs:
-            stages_summary = log.get("results", {}).get("stages_summary", {})
-            for stage, count in stages_summary.items():
-                stage_stats[stage]["count"] += 1
-                stage_stats[stage]["avg_results"].append(count)
-                
-        # 平均を計算
-        for stage, stats in stage_stats.items():
-            stats["avg_results"] = np.mean(stats["avg_results"]) if stats["avg_results"] else 0
+        stage_stats = {
+            stage: {
+                "count": totals["count"],
+                "avg_results": totals["result_sum"] / totals["count"] if totals["count"] else 0
+            }
+            for stage, totals in rollups["stage_totals"].items()
+        }
             
         return {
-            "stage_statistics": dict(stage_stats),
-            "metric_distributions": self._calculate_metric_distributions(logs)
+            "stage_statistics": stage_stats,
+            "metric_distributions": self._calculate_metric_distributions(rollups)
         }
         
-    def _calculate_metric_distributions(self, logs: List[Dict]) -> Dict:
-        """メトリクスの分布を計算"""
-        distributions = defaultdict(list)
-        
-        for log in logs:
-            metrics = log.get("metrics", {})
-            for metric, value in metrics.items():
-                distributions[metric].append(value)
-                
-        # 分布統計を計算
+    def _calculate_metric_distributions(self, rollups: Dict) -> Dict:
+        """メトリクスの分布を計算（パーセンタイルはヒストグラムからの近似値）"""
         distribution_stats = {}
-        for metric, values in distributions.items():
-            if values:
-                distribution_stats[metric] = {
-                    "mean": np.mean(values),
-                    "std": np.std(values),
-                    "min": np.min(values),
-                    "max": np.max(values),
-                    "percentiles": {
-                        "25": np.percentile(values, 25),
-                        "50": np.percentile(values, 50),
-                        "75": np.percentile(values, 75)
-                    }
+        for metric, total in rollups["metric_totals"].items():
+            count = total["count"]
+            if not count:
+                continue
+                
+            mean = total["sum"] / count
+            variance = max(total["sq_sum"] / count - mean * mean, 0.0)
+            histogram = rollups["histograms"].get(metric, [0] * HISTOGRAM_BUCKETS)
+            
+            distribution_stats[metric] = {
+                "mean": mean,
+                "std": float(np.sqrt(variance)),
+                "min": total["min"],
+                "max": total["max"],
+                "percentiles": {
+                    str(q): self._histogram_percentile(histogram, q, total["min"], total["max"])
+                    for q in (25, 50, 75)
                 }
+            }
                 
         return distribution_stats
         
+    @staticmethod
+    def _histogram_percentile(histogram: List[int], q: float, min_value: float, max_value: float) -> float:
+        """ヒストグラムからパーセンタイルを線形補間で近似"""
+        total = sum(histogram)
+        if not total:
+            return 0.0
+            
+        target = total * q / 100
+        cumulative = 0
+        width = 1.0 / HISTOGRAM_BUCKETS
+        for bucket, count in enumerate(histogram):
+            if count and cumulative + count >= target:
+                value = (bucket + (target - cumulative) / count) * width
+                return min(max(value, min_value), max_value)
+            cumulative += count
+            
+        return max_value
+        
     def _get_metric_description(self, metric: str, score: float) -> str:
         """メトリクスの説明を取得"""
         descriptions = {
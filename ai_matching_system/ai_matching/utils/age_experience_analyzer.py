@@ -5,9 +5,14 @@
 
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
+from datetime import datetime
 import re
 
 
+# 在籍期間の開始年月（「2015年4月～」など）
+_PERIOD_START_PATTERN = re.compile(r'(\d{4})年?(\d{1,2})?月?\s*[～〜\-–—]')
+
+
 @dataclass
 class AgeExperienceAssessment:
     """年齢・経験社数評価"""
@@ -61,8 +66,14 @@ class AgeExperienceAnalyzer:
                                  candidate_age: Optional[int],
                                  total_companies: int,
                                  resume_text: str = "",
-                                 current_position_years: Optional[float] = None) -> AgeExperienceAssessment:
-        """年齢と経験社数の適合性を分析"""
+                                 current_position_years: Optional[float] = None,
+                                 career_timeline: Optional[List[Dict]] = None) -> AgeExperienceAssessment:
+        """
+        年齢と経験社数の適合性を分析
+        
+        career_timeline（ResumeParserの抽出結果）がある場合は、就職年と現職の在籍年数を
+        レジュメの正規表現ではなくタイムラインから取得する
+        """
         
         # 年齢を整数に変換（文字列で渡された場合の対応）
         if candidate_age is not None:
@@ -78,7 +89,11 @@ class AgeExperienceAnalyzer:
             total_companies = 1  # デフォルト値として1社を設定
         
         # キャリア年数を推定
-        career_years = self._estimate_career_years(candidate_age, resume_text)
+        career_years = self._estimate_career_years(candidate_age, resume_text, career_timeline)
+        
+        # 現職の在籍年数をタイムラインから補完
+        if current_position_years is None and career_timeline:
+            current_position_years = self._current_position_years(career_timeline)
         
         # 平均在籍年数を計算
         average_tenure = self._calculate_average_tenure(
@@ -129,7 +144,8 @@ class AgeExperienceAnalyzer:
             risk_factors=risk_factors
         )
     
-    def _estimate_career_years(self, age: Optional[int], resume_text: str) -> Optional[int]:
+    def _estimate_career_years(self, age: Optional[int], resume_text: str,
+                              career_timeline: Optional[List[Dict]] = None) -> Optional[int]:
         """キャリア年数を推定"""
         if not age:
             return None
@@ -144,7 +160,7 @@ class AgeExperienceAnalyzer:
         standard_career_start = 22  # 大卒想定
         
         # レジュメから最初の就職年を抽出を試行
-        first_job_year = self._extract_first_job_year(resume_text)
+        first_job_year = self._extract_first_job_year(resume_text, career_timeline)
         if first_job_year:
             current_year = 2024  # 現在年
             career_years = current_year - first_job_year
@@ -154,13 +170,21 @@ class AgeExperienceAnalyzer:
         estimated_years = max(0, age - standard_career_start)
         return estimated_years
     
-    def _extract_first_job_year(self, resume_text: str) -> Optional[int]:
+    def _extract_first_job_year(self, resume_text: str,
+                                career_timeline: Optional[List[Dict]] = None) -> Optional[int]:
         """レジュメから最初の就職年を抽出"""
+        # 抽出済みタイムラインがあれば最も古い開始年を使用
+        if career_timeline:
+            years = [
+                int(str(job['start_date'])[:4])
+                for job in career_timeline
+                if job.get('start_date') and str(job['start_date'])[:4].isdigit()
+            ]
+            if years:
+                return min(years)
+        
         # 年月パターンを全て抽出
-        date_patterns = re.findall(
-            r'(\d{4})年?(\d{1,2})?月?\s*[～〜\-–—]',
-            resume_text
-        )
+        date_patterns = _PERIOD_START_PATTERN.findall(resume_text)
         
         if date_patterns:
             # 最も古い年を取得
@@ -170,6 +194,18 @@ class AgeExperienceAnalyzer:
         
         return None
     
+    def _current_position_years(self, career_timeline: List[Dict]) -> Optional[float]:
+        """タイムラインから現職（終了日なし）の在籍年数を計算"""
+        for job in career_timeline:
+            if job.get('end_date') or not job.get('start_date'):
+                continue
+            try:
+                start = datetime.strptime(str(job['start_date'])[:7], "%Y-%m")
+            except ValueError:
+                continue
+            return round((datetime.now() - start).days / 365, 1)
+        return None
+    
     def _calculate_average_tenure(self,
                                 career_years: Optional[int],
                                 total_companies: int,
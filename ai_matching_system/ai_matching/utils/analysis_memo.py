@@ -0,0 +1,91 @@
+"""
+サイクル不変の分析結果のメモ
+レジュメと求人要件のみに依存する分析（キャリア継続性・年齢経験社数など）を
+入力フィンガープリント単位で保存し、ジョブの再実行時にも再利用する
+"""
+
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import asdict, is_dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+
+# 分析ロジックやプロンプトを変更した場合は更新して古いメモを無効化する
+ANALYSIS_MEMO_VERSION = "2"
+
+
+class AnalysisMemoStore:
+    """(入力フィンガープリント, 分析名) をキーとするSQLiteストア"""
+
+    def __init__(self, storage_path: Optional[str] = None, ttl_hours: Optional[float] = None):
+        """
+        Args:
+            storage_path: 保存先ディレクトリ（省略時はANALYSIS_MEMO_PATHまたは./analysis_memo_data）
+            ttl_hours: 分析結果の保持時間（省略時はANALYSIS_MEMO_TTL_HOURS、デフォルト720時間）
+        """
+        self.storage_path = storage_path or os.getenv("ANALYSIS_MEMO_PATH", "./analysis_memo_data")
+        self.ttl = timedelta(hours=ttl_hours or float(os.getenv("ANALYSIS_MEMO_TTL_HOURS", "720")))
+        os.makedirs(self.storage_path, exist_ok=True)
+        self.db_path = os.path.join(self.storage_path, "analysis_memo.db")
+        self._init_database()
+
+    @contextmanager
+    def _get_db(self):
+        """データベース接続を取得"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _init_database(self):
+        """テーブルを初期化"""
+        with self._get_db() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS analysis_memo (
+                    input_fp TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    PRIMARY KEY (input_fp, name)
+                )
+            """)
+            # 期限切れのメモを掃除
+            conn.execute(
+                "DELETE FROM analysis_memo WHERE created_at < ?",
+                ((datetime.now() - self.ttl).isoformat(),)
+            )
+
+    def get(self, input_fp: str, name: str) -> Optional[Dict]:
+        """
+        保存済みの分析結果を取得
+
+        Returns:
+            分析結果の辞書、存在しないか期限切れの場合はNone
+        """
+        with self._get_db() as conn:
+            row = conn.execute(
+                "SELECT value FROM analysis_memo WHERE input_fp = ? AND name = ? AND created_at >= ?",
+                (input_fp, name, (datetime.now() - self.ttl).isoformat())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, input_fp: str, name: str, value: Any) -> None:
+        """分析結果を保存（dataclassは辞書に変換）"""
+        if is_dataclass(value):
+            value = asdict(value)
+        with self._get_db() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO analysis_memo (input_fp, name, value, created_at) VALUES (?, ?, ?, ?)",
+                (input_fp, name, json.dumps(value, ensure_ascii=False, default=str), datetime.now().isoformat())
+            )
+
+    def clear(self) -> None:
+        """全メモを削除"""
+        with self._get_db() as conn:
+            conn.execute("DELETE FROM analysis_memo")
@@ -0,0 +1,186 @@
+"""
+複数候補のバッチ評価
+同じ要件に対する複数の候補（候補者・職歴期間など）を1回のLLMリクエストにまとめ、
+固定スキーマの配列で結果を受け取る。項目単位で検証し、解釈・検証に失敗した項目だけを分割して再試行する
+（クォータ超過・サーキット遮断・タイムアウト等のプロバイダエラーは分割しても回復しないため即座に失敗とする）
+"""
+
+import json
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from .structured_output import json_generation_config, parse_json_text, validate
+
+
+@dataclass
+class BatchItem:
+    """バッチ評価の対象"""
+    item_id: str
+    content: str  # プロンプトに埋め込む候補ごとの情報
+
+
+@dataclass
+class BatchItemResult:
+    """項目ごとの評価結果"""
+    item_id: str
+    data: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.data is not None
+
+
+def batch_response_schema(item_schema: Dict) -> Dict:
+    """項目スキーマにitem_idを加えた配列スキーマ"""
+    return {
+        "type": "ARRAY",
+        "items": {
+            "type": "OBJECT",
+            "properties": {"item_id": {"type": "STRING"}, **item_schema.get("properties", {})},
+            "required": ["item_id"] + list(item_schema.get("required", []))
+        }
+    }
+
+
+class BatchEvaluator:
+    """共通の要件プロンプトに複数の候補を詰めて評価するLLMバッチ評価器"""
+
+    def __init__(self, model, name: str, item_schema: Dict, max_batch_size: int = 8):
+        """
+        Args:
+            model: generate_content_asyncを持つモデル（genai.GenerativeModelまたはRoutedModel）
+            name: ログ・統計用の名前
+            item_schema: 1項目分のレスポンススキーマ（OBJECT）
+            max_batch_size: 1リクエストに含める最大項目数
+        """
+        self.model = model
+        self.name = name
+        self.item_schema = item_schema
+        self.max_batch_size = max(max_batch_size, 1)
+        self.response_schema = batch_response_schema(item_schema)
+        self._validation_schema = self.response_schema["items"]
+
+        self.stats = {"requests": 0, "items": 0, "succeeded": 0, "failed": 0, "splits": 0, "retried_items": 0}
+        self._stats_lock = threading.Lock()
+
+    async def evaluate(self, shared_prompt: str, items: List[BatchItem]) -> Dict[str, BatchItemResult]:
+        """
+        項目をバッチに分けて評価
+
+        Args:
+            shared_prompt: 全項目で共通の指示・要件（求人コンテキストなど）
+            items: 評価対象（item_idは一意であること）
+
+        Returns:
+            item_id -> BatchItemResult（失敗した項目はerrorを持つ）
+        """
+        results: Dict[str, BatchItemResult] = {}
+        if not items:
+            return results
+
+        self._record(items=len(items))
+        chunks = [items[i:i + self.max_batch_size] for i in range(0, len(items), self.max_batch_size)]
+        for chunk in chunks:
+            results.update(await self._evaluate_chunk(shared_prompt, chunk))
+
+        succeeded = sum(1 for r in results.values() if r.ok)
+        self._record(succeeded=succeeded, failed=len(results) - succeeded)
+        print(f"  [BatchEvaluator] {self.name}: {len(items)}件を評価（成功{succeeded}件 / 失敗{len(results) - succeeded}件）")
+        return results
+
+    async def _evaluate_chunk(self, shared_prompt: str, chunk: List[BatchItem]) -> Dict[str, BatchItemResult]:
+        """1リクエスト分を評価し、解釈・検証に失敗した項目は分割して再試行"""
+        parsed, error, splittable = await self._request(shared_prompt, chunk)
+
+        results: Dict[str, BatchItemResult] = {}
+        for item in chunk:
+            if item.item_id in parsed:
+                results[item.item_id] = BatchItemResult(item_id=item.item_id, data=parsed[item.item_id])
+
+        missing = [item for item in chunk if item.item_id not in results]
+        if not missing:
+            return results
+
+        if not splittable:
+            # プロバイダエラー: 分割するとリクエスト数が増えるだけなのでチャンク全体を失敗とする
+            for item in missing:
+                results[item.item_id] = BatchItemResult(item_id=item.item_id, error=error)
+        elif len(missing) < len(chunk):
+            # 一部の項目だけ欠落・不正: 残りの項目だけで再試行
+            self._record(retried_items=len(missing))
+            results.update(await self._evaluate_chunk(shared_prompt, missing))
+        elif len(chunk) > 1:
+            # 応答全体を解釈できない: 半分に分割して再試行
+            self._record(splits=1)
+            middle = len(chunk) // 2
+            for part in (chunk[:middle], chunk[middle:]):
+                results.update(await self._evaluate_chunk(shared_prompt, part))
+        else:
+            item = chunk[0]
+            results[item.item_id] = BatchItemResult(item_id=item.item_id, error=error or "評価結果がありません")
+        return results
+
+    async def _request(self, shared_prompt: str, chunk: List[BatchItem]) -> tuple:
+        """
+        LLMに1回問い合わせる
+
+        Returns:
+            (item_id -> 検証済みの項目データ, エラーメッセージ, 分割して再試行する価値があるか)
+        """
+        self._record(requests=1)
+        prompt = self._build_prompt(shared_prompt, chunk)
+        try:
+            response = await self.model.generate_content_async(
+                prompt, generation_config=json_generation_config(self.response_schema)
+            )
+        except Exception as e:
+            print(f"  [BatchEvaluator] {self.name}: リクエストエラー（{len(chunk)}件）: {e}")
+            return {}, f"エラー: {e}", False
+
+        try:
+            data = parse_json_text(response.text)
+        except json.JSONDecodeError as e:
+            return {}, f"JSONとして解釈できません: {e}", True
+        except ValueError as e:
+            # 安全性フィルタ等で本文がない応答（項目を減らすと通る場合がある）
+            return {}, f"応答本文を取得できません: {e}", True
+
+        if not isinstance(data, list):
+            return {}, "配列ではありません", True
+
+        # 項目単位で検証（不正な項目があっても他の項目は採用する）
+        expected_ids = {item.item_id for item in chunk}
+        parsed = {}
+        for entry in data:
+            if validate(entry, self._validation_schema):
+                continue
+            item_id = str(entry["item_id"])
+            if item_id in expected_ids and item_id not in parsed:
+                parsed[item_id] = entry
+        return parsed, None if parsed else "有効な評価結果がありません", True
+
+    def _build_prompt(self, shared_prompt: str, chunk: List[BatchItem]) -> str:
+        """共通プロンプトの後に評価対象を列挙"""
+        item_sections = "\n\n".join(f"## item_id: {item.item_id}\n{item.content}" for item in chunk)
+        return f"""{shared_prompt}
+
+# 評価対象（{len(chunk)}件）
+{item_sections}
+
+# 出力
+各評価対象について1要素ずつ、item_idを付けてJSON配列で出力してください。
+評価対象同士を比較せず、それぞれ独立に評価してください。"""
+
+    def _record(self, **counts: int) -> None:
+        with self._stats_lock:
+            for key, value in counts.items():
+                self.stats[key] += value
+
+    def get_stats(self) -> Dict[str, Any]:
+        """リクエスト数と1リクエストあたりの項目数"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats["items_per_request"] = stats["items"] / stats["requests"] if stats["requests"] else 0.0
+        return stats
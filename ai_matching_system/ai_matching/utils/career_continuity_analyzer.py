@@ -89,10 +89,22 @@ class CareerContinuityAnalyzer:
         # 職歴を抽出
         career_timeline = self._extract_career_timeline(resume_text)
         
+        # 全期間のスキルを1回のリクエストでまとめて評価
+        skill_results_by_period = {}
+        if self.use_llm and self.skill_matcher and required_skills and career_timeline:
+            try:
+                skill_results_by_period = await self.skill_matcher.match_skills_multi(
+                    required_skills,
+                    {str(i): period.skills for i, period in enumerate(career_timeline)}
+                )
+            except Exception as e:
+                print(f"    スキル一括評価エラー: {e}")
+        
         # 求める経験との関連性を評価
-        for period in career_timeline:
+        for i, period in enumerate(career_timeline):
             period.is_relevant = await self._is_experience_relevant(
-                period, required_skills, required_experience
+                period, required_skills, required_experience,
+                skill_results=skill_results_by_period.get(str(i))
             )
         
         # 最新の関連経験を特定
@@ -220,17 +232,23 @@ class CareerContinuityAnalyzer:
     async def _is_experience_relevant(self,
                                     period: CareerPeriod,
                                     required_skills: List[str],
-                                    required_experience: str) -> bool:
-        """経験が求めるものと関連しているか判定"""
+                                    required_experience: str,
+                                    skill_results: Optional[List[SkillMatchResult]] = None) -> bool:
+        """
+        経験が求めるものと関連しているか判定
+        
+        skill_results（複数期間の一括評価結果）がある場合はスキルマッチングを再実行しない
+        """
         
         if self.use_llm and self.skill_matcher:
             # LLMベースの評価
             try:
                 # スキルマッチングをバッチで実行
-                skill_results = await self.skill_matcher.match_skills_batch(
-                    required_skills, 
-                    period.skills
-                )
+                if skill_results is None:
+                    skill_results = await self.skill_matcher.match_skills_batch(
+                        required_skills, 
+                        period.skills
+                    )
                 
                 # 役職関連性を評価
                 # 業務内容の説明を作成（期間のスキルから）
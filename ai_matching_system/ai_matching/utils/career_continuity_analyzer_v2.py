@@ -25,6 +25,7 @@ class ContinuityAssessmentV2:
     explanation: str
     recommendations: List[str]
     career_timeline: List[Dict]  # 職歴タイムライン
+    is_fallback: bool = False  # LLM評価に失敗した既定値・簡易評価（永続メモには保存しない）
 
 
 class CareerContinuityAnalyzerV2:
@@ -59,10 +60,20 @@ class CareerContinuityAnalyzerV2:
     async def analyze_career_continuity(self,
                                       resume_text: str,
                                       required_skills: List[str],
-                                      required_experience: str) -> ContinuityAssessmentV2:
-        """キャリアの継続性を分析（一括評価版）"""
+                                      required_experience: str,
+                                      career_timeline: Optional[List[Dict]] = None) -> ContinuityAssessmentV2:
+        """
+        キャリアの継続性を分析（一括評価版）
+        
+        career_timeline（ResumeParserの抽出結果）がある場合は、レジュメ全文ではなく
+        タイムラインに対する関連性判定のみをLLMに依頼する
+        """
         
         if self.use_llm and self.skill_matcher:
+            if career_timeline:
+                return await self._analyze_timeline_with_llm(
+                    career_timeline, required_skills, required_experience
+                )
             # LLMで一括評価
             return await self._analyze_with_llm(
                 resume_text, required_skills, required_experience
@@ -151,7 +162,7 @@ class CareerContinuityAnalyzerV2:
 """
         
         try:
-            response = self.skill_matcher.model.generate_content(prompt)
+            response = await self.skill_matcher.model.generate_content_async(prompt)
             response_text = response.text
             
             # JSONを抽出
@@ -159,27 +170,7 @@ class CareerContinuityAnalyzerV2:
             if json_match:
                 json_text = json_match.group(1)
                 data = json.loads(json_text)
-                
-                # ペナルティスコアを計算
-                months_gap = data.get('months_since_relevant_experience')
-                penalty = self._calculate_penalty(
-                    months_gap,
-                    data.get('career_change_detected', False),
-                    data.get('department_change_detected', False),
-                    data.get('skill_retention_score', 0.5)
-                )
-                
-                return ContinuityAssessmentV2(
-                    has_recent_relevant_experience=data.get('has_recent_relevant_experience', False),
-                    months_since_relevant_experience=months_gap,
-                    career_change_detected=data.get('career_change_detected', False),
-                    department_change_detected=data.get('department_change_detected', False),
-                    skill_retention_score=data.get('skill_retention_score', 0.5),
-                    penalty_score=penalty,
-                    explanation=data.get('overall_assessment', ''),
-                    recommendations=data.get('recommendations', []),
-                    career_timeline=data.get('career_timeline', [])
-                )
+                return self._build_assessment(data, data.get('career_timeline', []))
             else:
                 # JSON抽出失敗時のフォールバック
                 return self._create_default_assessment()
@@ -188,6 +179,121 @@ class CareerContinuityAnalyzerV2:
             print(f"[CareerContinuityAnalyzerV2] LLM評価エラー: {e}")
             return self._create_default_assessment()
     
+    async def _analyze_timeline_with_llm(self,
+                                       career_timeline: List[Dict],
+                                       required_skills: List[str],
+                                       required_experience: str) -> ContinuityAssessmentV2:
+        """抽出済みの職歴タイムラインに対して求人との関連性のみをLLMで判定"""
+        
+        timeline_lines = []
+        for i, job in enumerate(career_timeline):
+            period = f"{job.get('start_date') or '不明'} - {job.get('end_date') or '現在'}"
+            responsibilities = ' / '.join(job.get('responsibilities', [])[:5])
+            timeline_lines.append(
+                f"[{i}] {period}: {job.get('company') or '不明'} {job.get('department') or ''} "
+                f"{job.get('role') or ''} | {responsibilities}"
+            )
+        
+        prompt = f"""あなたは経験豊富な採用コンサルタントです。
+抽出済みの職歴タイムラインをもとに、候補者のキャリア継続性を分析してください。
+
+# 重要な前提
+- 転職活動期間は平均3ヶ月、3-6ヶ月のブランクは一般的で問題ない
+- 転用可能スキル（Transferable Skills）を重視する
+- キャリアチェンジは必ずしもネガティブではない（スキルの転用可能性を評価）
+
+# 職歴タイムライン（新しい順、[番号] 期間: 会社 部署 役職 | 主な業務）
+{chr(10).join(timeline_lines)}
+
+# 求められる要件
+## 必須スキル
+{', '.join(required_skills)}
+
+## 求められる経験
+{required_experience}
+
+# 出力形式
+各職歴の関連性（直接的な関連性だけでなく転用可能なスキルも考慮）と、キャリア全体の評価をJSONで出力してください。
+```json
+{{
+  "relevance": [
+    {{"index": 番号, "is_relevant": true/false, "relevance_reason": "関連性の理由"}}
+  ],
+  "has_recent_relevant_experience": true/false,
+  "career_change_detected": true/false,
+  "career_change_details": "詳細（ある場合）",
+  "department_change_detected": true/false,
+  "skill_retention_score": 0.0-1.0,
+  "skill_retention_reason": "スコアの根拠",
+  "recommendations": ["推奨1", "推奨2"],
+  "overall_assessment": "総合評価"
+}}
+```
+"""
+        
+        try:
+            response = await self.skill_matcher.model.generate_content_async(prompt)
+            json_match = re.search(r'```json\s*([\s\S]*?)\s*```', response.text)
+            if not json_match:
+                return self._create_default_assessment()
+            data = json.loads(json_match.group(1))
+            
+            # 関連性判定をタイムラインに反映
+            timeline = [dict(job) for job in career_timeline]
+            for item in data.get('relevance', []):
+                index = item.get('index')
+                if isinstance(index, int) and 0 <= index < len(timeline):
+                    timeline[index]['is_relevant'] = bool(item.get('is_relevant'))
+                    timeline[index]['relevance_reason'] = item.get('relevance_reason', '')
+            
+            # ブランク期間は抽出済みの日付から計算
+            data['months_since_relevant_experience'] = self._months_since_relevant(timeline)
+            return self._build_assessment(data, timeline)
+            
+        except Exception as e:
+            print(f"[CareerContinuityAnalyzerV2] LLM評価エラー: {e}")
+            return self._create_default_assessment()
+    
+    def _months_since_relevant(self, timeline: List[Dict]) -> Optional[int]:
+        """関連する職歴のうち最も新しいものの終了からの経過月数（在籍中は0）"""
+        now = datetime.now()
+        months_list = []
+        for job in timeline:
+            if not job.get('is_relevant'):
+                continue
+            end_date = job.get('end_date')
+            if not end_date:
+                return 0
+            try:
+                end = datetime.strptime(str(end_date)[:7], "%Y-%m")
+            except ValueError:
+                continue
+            months_list.append(max(0, (now.year - end.year) * 12 + now.month - end.month))
+        return min(months_list) if months_list else None
+    
+    def _build_assessment(self, data: Dict, career_timeline: List[Dict]) -> ContinuityAssessmentV2:
+        """LLMの分析結果から評価を構築"""
+        # ペナルティスコアを計算
+        months_gap = data.get('months_since_relevant_experience')
+        penalty = self._calculate_penalty(
+            months_gap,
+            data.get('career_change_detected', False),
+            data.get('department_change_detected', False),
+            data.get('skill_retention_score', 0.5)
+        )
+        
+        return ContinuityAssessmentV2(
+            has_recent_relevant_experience=data.get('has_recent_relevant_experience', False),
+            months_since_relevant_experience=months_gap,
+            career_change_detected=data.get('career_change_detected', False),
+            department_change_detected=data.get('department_change_detected', False),
+            skill_retention_score=data.get('skill_retention_score', 0.5),
+            penalty_score=penalty,
+            explanation=data.get('overall_assessment', ''),
+            recommendations=data.get('recommendations', []),
+            career_timeline=career_timeline
+        )
+    
     def _analyze_simple(self,
                        resume_text: str,
                        required_skills: List[str],
@@ -216,7 +322,8 @@ class CareerContinuityAnalyzerV2:
             penalty_score=0.0 if has_relevant else 0.2,
             explanation="簡易評価モードで実行",
             recommendations=["詳細な職歴確認が必要"],
-            career_timeline=[]
+            career_timeline=[],
+            is_fallback=True
         )
     
     def _calculate_penalty(self,
@@ -270,7 +377,8 @@ class CareerContinuityAnalyzerV2:
             penalty_score=0.2,
             explanation="評価を完了できませんでした",
             recommendations=["職歴の詳細確認が必要"],
-            career_timeline=[]
+            career_timeline=[],
+            is_fallback=True
         )
     
     def format_continuity_report(self, assessment: ContinuityAssessmentV2) -> str:
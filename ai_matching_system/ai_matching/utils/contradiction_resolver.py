@@ -10,6 +10,48 @@ import re
 from collections import defaultdict
 
 
+# 評価文のスコア・確信度（テキスト形式・JSON形式の両方に対応）
+_SCORE_PATTERN = re.compile(r'(?:適合度スコア[：:]|"score"\s*:)\s*(\d+)')
+_CONFIDENCE_PATTERN = re.compile(r'(?:確信度[：:]|"confidence"\s*:)\s*"?([高中低])')
+_NEGATIVE_PATTERN = re.compile(r'不足|欠如|ない|難しい|懸念|リスク|低い|弱い')
+_POSITIVE_PATTERN = re.compile(r'優秀|豊富|高い|強い|適合|マッチ|期待できる')
+_UNCERTAINTY_PATTERN = re.compile(r'可能性|思われる|かもしれない|推測|不明|曖昧')
+
+# 経験年数（先に定義したパターンを優先）
+_EXPERIENCE_YEARS_PATTERNS = [
+    re.compile(r'(\d+)年以上の経験', re.IGNORECASE),
+    re.compile(r'経験(\d+)年', re.IGNORECASE),
+    re.compile(r'(\d+)年間', re.IGNORECASE),
+    re.compile(r'(\d+)years?', re.IGNORECASE)
+]
+
+# スキル（プログラミング言語・フレームワーク）
+_LANGUAGE_PATTERN = re.compile(r'\b(Python|Java|JavaScript|TypeScript|Go|Ruby|PHP|C\+\+|C#|Swift)\b', re.IGNORECASE)
+_FRAMEWORK_PATTERN = re.compile(r'\b(React|Vue|Angular|Django|Flask|Spring|Rails|Laravel)\b', re.IGNORECASE)
+
+# 企業規模・役職（先に定義したものを優先）
+_COMPANY_SIZE_PATTERNS = [
+    (re.compile(r'大企業|大手'), '大企業'),
+    (re.compile(r'中堅企業|中規模'), '中堅企業'),
+    (re.compile(r'ベンチャー|スタートアップ'), 'ベンチャー'),
+    (re.compile(r'中小企業|小規模'), '中小企業')
+]
+_EMPLOYEE_COUNT_PATTERN = re.compile(r'(\d+)人?(?:名|人)(?:以上|規模)')
+_ROLE_PATTERNS = [
+    (re.compile(r'CEO|代表取締役|社長'), 'CEO'),
+    (re.compile(r'CTO|技術責任者'), 'CTO'),
+    (re.compile(r'部長|ディレクター'), '部長'),
+    (re.compile(r'課長|マネージャー'), '課長'),
+    (re.compile(r'リーダー|主任'), 'リーダー'),
+    (re.compile(r'エンジニア|開発者'), 'エンジニア'),
+    (re.compile(r'アナリスト|分析'), 'アナリスト')
+]
+
+# 職歴の年月
+_CAREER_SECTION_SPLIT = re.compile(r'\n(?=\d{4}年)')
+_CAREER_DATE_PATTERN = re.compile(r'(\d{4})年?(\d{1,2})?月?')
+
+
 @dataclass
 class Contradiction:
     """矛盾情報の構造"""
@@ -221,20 +263,14 @@ class ContradictionResolver:
         """評価内の矛盾を検出"""
         contradictions = []
         
-        # 評価スコアと評価文の矛盾
-        score_match = re.search(r'適合度スコア[：:]\s*(\d+)', evaluation_text)
+        # 評価スコアと評価文の矛盾（テキスト形式・JSON形式の両方に対応）
+        score_match = _SCORE_PATTERN.search(evaluation_text)
         if score_match:
             score = int(score_match.group(1))
             
             # 高スコアなのに否定的な表現が多い場合
-            negative_count = len(re.findall(
-                r'(不足|欠如|ない|難しい|懸念|リスク|低い|弱い)', 
-                evaluation_text
-            ))
-            positive_count = len(re.findall(
-                r'(優秀|豊富|高い|強い|適合|マッチ|期待できる)', 
-                evaluation_text
-            ))
+            negative_count = len(_NEGATIVE_PATTERN.findall(evaluation_text))
+            positive_count = len(_POSITIVE_PATTERN.findall(evaluation_text))
             
             if score >= 70 and negative_count > positive_count * 2:
                 contradictions.append(Contradiction(
@@ -254,13 +290,10 @@ class ContradictionResolver:
                 ))
         
         # 確信度と不確実性表現の矛盾
-        confidence_match = re.search(r'確信度[：:]\s*([高中低])', evaluation_text)
+        confidence_match = _CONFIDENCE_PATTERN.search(evaluation_text)
         if confidence_match:
             confidence = confidence_match.group(1)
-            uncertainty_expressions = len(re.findall(
-                r'(可能性|思われる|かもしれない|推測|不明|曖昧)',
-                evaluation_text
-            ))
+            uncertainty_expressions = len(_UNCERTAINTY_PATTERN.findall(evaluation_text))
             
             if confidence == "高" and uncertainty_expressions > 3:
                 contradictions.append(Contradiction(
@@ -279,8 +312,11 @@ class ContradictionResolver:
         """時系列の矛盾を検出"""
         contradictions = []
         
-        # 職歴の時系列をチェック
-        timeline = self._extract_career_timeline(resume_data.get('text', ''))
+        # 職歴の時系列をチェック（抽出済みタイムラインがあればそれを使用）
+        if resume_data.get('career_timeline'):
+            timeline = self._timeline_from_structured(resume_data['career_timeline'])
+        else:
+            timeline = self._extract_career_timeline(resume_data.get('text', ''))
         
         for i in range(len(timeline) - 1):
             current = timeline[i]
@@ -541,15 +577,8 @@ class ContradictionResolver:
     # ヘルパーメソッド
     def _extract_experience_years(self, text: str) -> Optional[int]:
         """テキストから経験年数を抽出"""
-        patterns = [
-            r'(\d+)年以上の経験',
-            r'経験(\d+)年',
-            r'(\d+)年間',
-            r'(\d+)years?'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in _EXPERIENCE_YEARS_PATTERNS:
+            match = pattern.search(text)
             if match:
                 return int(match.group(1))
         
@@ -561,18 +590,10 @@ class ContradictionResolver:
         skills = []
         
         # プログラミング言語
-        languages = re.findall(
-            r'\b(Python|Java|JavaScript|TypeScript|Go|Ruby|PHP|C\+\+|C#|Swift)\b',
-            text, re.IGNORECASE
-        )
-        skills.extend(languages)
+        skills.extend(_LANGUAGE_PATTERN.findall(text))
         
         # フレームワーク
-        frameworks = re.findall(
-            r'\b(React|Vue|Angular|Django|Flask|Spring|Rails|Laravel)\b',
-            text, re.IGNORECASE
-        )
-        skills.extend(frameworks)
+        skills.extend(_FRAMEWORK_PATTERN.findall(text))
         
         return list(set(skills))
     
@@ -600,19 +621,12 @@ class ContradictionResolver:
     
     def _extract_company_size(self, text: str) -> Optional[str]:
         """企業規模を抽出"""
-        size_patterns = {
-            r'大企業|大手': '大企業',
-            r'中堅企業|中規模': '中堅企業',
-            r'ベンチャー|スタートアップ': 'ベンチャー',
-            r'中小企業|小規模': '中小企業'
-        }
-        
-        for pattern, size in size_patterns.items():
-            if re.search(pattern, text):
+        for pattern, size in _COMPANY_SIZE_PATTERNS:
+            if pattern.search(text):
                 return size
         
         # 従業員数から推定
-        emp_match = re.search(r'(\d+)人?(?:名|人)(?:以上|規模)', text)
+        emp_match = _EMPLOYEE_COUNT_PATTERN.search(text)
         if emp_match:
             employees = int(emp_match.group(1))
             if employees >= 1000:
@@ -639,18 +653,8 @@ class ContradictionResolver:
     
     def _extract_role(self, text: str) -> Optional[str]:
         """役職を抽出"""
-        roles = {
-            r'CEO|代表取締役|社長': 'CEO',
-            r'CTO|技術責任者': 'CTO',
-            r'部長|ディレクター': '部長',
-            r'課長|マネージャー': '課長',
-            r'リーダー|主任': 'リーダー',
-            r'エンジニア|開発者': 'エンジニア',
-            r'アナリスト|分析': 'アナリスト'
-        }
-        
-        for pattern, role in roles.items():
-            if re.search(pattern, text):
+        for pattern, role in _ROLE_PATTERNS:
+            if pattern.search(text):
                 return role
         
         return None
@@ -659,14 +663,9 @@ class ContradictionResolver:
         """職歴のタイムラインを抽出"""
         timeline = []
         
-        # 年月のパターン
-        date_pattern = r'(\d{4})年?(\d{1,2})?月?'
-        
         # 職歴セクションを探す
-        career_sections = re.split(r'\n(?=\d{4}年)', text)
-        
-        for section in career_sections:
-            dates = re.findall(date_pattern, section)
+        for section in _CAREER_SECTION_SPLIT.split(text):
+            dates = _CAREER_DATE_PATTERN.findall(section)
             if len(dates) >= 1:
                 start_date = self._parse_date(dates[0])
                 end_date = self._parse_date(dates[1]) if len(dates) >= 2 else None
@@ -682,6 +681,30 @@ class ContradictionResolver:
         
         return timeline
     
+    def _timeline_from_structured(self, career_timeline: List[Dict]) -> List[Dict]:
+        """ResumeParserのタイムラインを時系列チェック用の形式に変換"""
+        timeline = []
+        for job in career_timeline:
+            timeline.append({
+                'start_date': self._parse_year_month(job.get('start_date')),
+                'end_date': self._parse_year_month(job.get('end_date')),
+                'text': f"{job.get('company') or ''} {job.get('role') or ''}".strip()
+            })
+        
+        # 時系列順にソート
+        timeline.sort(key=lambda x: x['start_date'] if x['start_date'] else datetime.min)
+        
+        return timeline
+    
+    def _parse_year_month(self, value: Optional[str]) -> Optional[datetime]:
+        """YYYY-MM形式の文字列をdatetimeオブジェクトに変換"""
+        if not value:
+            return None
+        try:
+            return datetime.strptime(str(value)[:7], "%Y-%m")
+        except ValueError:
+            return None
+    
     def _parse_date(self, date_tuple: Tuple[str, str]) -> Optional[datetime]:
         """日付タプルをdatetimeオブジェクトに変換"""
         try:
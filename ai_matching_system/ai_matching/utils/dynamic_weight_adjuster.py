@@ -7,6 +7,8 @@ from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 import re
 
+from .pattern_engine import KeywordMatcher
+
 
 @dataclass
 class WeightProfile:
@@ -30,6 +32,32 @@ class WeightProfile:
             self.outstanding_career /= total
 
 
+# 業界キーワード（より具体的な業界を先に定義）
+INDUSTRY_KEYWORDS = {
+    "金融・銀行": ["金融", "銀行", "証券", "保険", "ファイナンス", "投資", "資産運用"],
+    "製造業": ["製造", "メーカー", "工場", "生産", "品質管理", "製品開発", "量産"],
+    "コンサルティング": ["コンサル", "戦略立案", "アドバイザリー", "経営支援", "業務改善"],
+    "スタートアップ": ["スタートアップ", "ベンチャー", "創業", "急成長", "新規事業"],
+    "小売・流通": ["小売", "流通", "販売", "店舗", "EC", "リテール"],
+    "医療・ヘルスケア": ["医療", "病院", "クリニック", "製薬", "ヘルスケア", "医薬品"],
+    "不動産": ["不動産", "建設", "ゼネコン", "デベロッパー", "賃貸", "売買"],
+    "IT・テクノロジー": ["ソフトウェア開発", "プログラミング", "エンジニア", "IT企業", "テック企業", "SaaS", "AI", "機械学習"]
+}
+
+# 職種キーワード（定義順に判定）
+ROLE_KEYWORDS = {
+    "エンジニア": ["エンジニア", "開発", "プログラマ", "Developer"],
+    "マネージャー": ["マネージャー", "管理", "リーダー", "課長", "部長"],
+    "経営幹部": ["執行役員", "取締役", "CTO", "CFO", "COO", "経営"],
+    "営業": ["営業", "セールス", "Sales", "アカウント"],
+    "企画": ["企画", "プランナー", "ストラテジスト", "マーケティング"]
+}
+
+_INDUSTRY_MATCHER = KeywordMatcher(INDUSTRY_KEYWORDS)
+_ROLE_MATCHER = KeywordMatcher(ROLE_KEYWORDS)
+_EXPERIENCE_YEARS_PATTERN = re.compile(r'(\d+)年以上')
+
+
 class DynamicWeightAdjuster:
     """動的重み付け調整器"""
     
@@ -126,6 +154,7 @@ class DynamicWeightAdjuster:
                 "preferred_skills": 1.2
             }
         }
+        self._adjustment_matcher = KeywordMatcher(list(self.keyword_adjustments))
     
     def adjust_weights(self, job_data: Dict, structured_data: Optional[Dict] = None) -> WeightProfile:
         """求人データに基づいて重みを調整"""
@@ -150,9 +179,9 @@ class DynamicWeightAdjuster:
                 print(f"  [WeightAdjuster] 職種調整適用: {role}")
         
         # 3. キーワードに基づく調整
-        keywords = self._extract_keywords(job_data, structured_data)
+        keyword_hits = self._adjustment_matcher.hits(self._extract_keywords(job_data, structured_data))
         for keyword, adjustments in self.keyword_adjustments.items():
-            if keyword in keywords:
+            if keyword in keyword_hits:
                 profile = self._apply_adjustments(profile, adjustments)
                 print(f"  [WeightAdjuster] キーワード調整適用: {keyword}")
         
@@ -182,25 +211,10 @@ class DynamicWeightAdjuster:
         # job_descriptionから抽出
         text = job_data.get('job_description', '') + ' ' + job_data.get('title', '')
         
-        # より具体的な業界キーワードを優先的にチェック（順序を変更）
-        industries = {
-            "金融・銀行": ["金融", "銀行", "証券", "保険", "ファイナンス", "投資", "資産運用"],
-            "製造業": ["製造", "メーカー", "工場", "生産", "品質管理", "製品開発", "量産"],
-            "コンサルティング": ["コンサル", "戦略立案", "アドバイザリー", "経営支援", "業務改善"],
-            "スタートアップ": ["スタートアップ", "ベンチャー", "創業", "急成長", "新規事業"],
-            "小売・流通": ["小売", "流通", "販売", "店舗", "EC", "リテール"],
-            "医療・ヘルスケア": ["医療", "病院", "クリニック", "製薬", "ヘルスケア", "医薬品"],
-            "不動産": ["不動産", "建設", "ゼネコン", "デベロッパー", "賃貸", "売買"],
-            "IT・テクノロジー": ["ソフトウェア開発", "プログラミング", "エンジニア", "IT企業", "テック企業", "SaaS", "AI", "機械学習"]
-        }
-        
-        # デバッグ: どのキーワードがマッチしたか記録
-        matched_industries = []
-        for industry, keywords in industries.items():
-            matched_keywords = [kw for kw in keywords if kw in text]
-            if matched_keywords:
-                matched_industries.append((industry, matched_keywords))
-                print(f"    [WeightAdjuster] {industry}のキーワードがマッチ: {matched_keywords}")
+        # 全業界のキーワードを1回の走査で判定（定義順 = より具体的な業界を優先）
+        matched_industries = list(_INDUSTRY_MATCHER.scan(text).items())
+        for industry, matched_keywords in matched_industries:
+            print(f"    [WeightAdjuster] {industry}のキーワードがマッチ: {matched_keywords}")
         
         # 最も多くのキーワードがマッチした業界を選択
         if matched_industries:
@@ -216,17 +230,9 @@ class DynamicWeightAdjuster:
         title = job_data.get('title', '')
         
         # 職種キーワードをチェック
-        roles = {
-            "エンジニア": ["エンジニア", "開発", "プログラマ", "Developer"],
-            "マネージャー": ["マネージャー", "管理", "リーダー", "課長", "部長"],
-            "経営幹部": ["執行役員", "取締役", "CTO", "CFO", "COO", "経営"],
-            "営業": ["営業", "セールス", "Sales", "アカウント"],
-            "企画": ["企画", "プランナー", "ストラテジスト", "マーケティング"]
-        }
-        
-        for role, keywords in roles.items():
-            if any(kw in title for kw in keywords):
-                return role
+        role = _ROLE_MATCHER.first_group(title)
+        if role:
+            return role
         
         return ""
     
@@ -245,7 +251,7 @@ class DynamicWeightAdjuster:
         
         # テキストから抽出
         text = job_data.get('job_description', '')
-        match = re.search(r'(\d+)年以上', text)
+        match = _EXPERIENCE_YEARS_PATTERN.search(text)
         if match:
             return int(match.group(1))
         
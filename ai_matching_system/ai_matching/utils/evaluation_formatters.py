@@ -125,24 +125,42 @@ class EvaluationFormatters:
         text = "\n### Web検索による追加情報"
         
         # 企業規模比較を優先的に表示
+        for key in EvaluationFormatters._ordered_search_keys(search_results):
+            text += "\n\n" + EvaluationFormatters.format_search_result(key, search_results[key])
+        
+        return text
+    
+    @staticmethod
+    def _ordered_search_keys(search_results: Dict) -> List[str]:
+        """企業規模比較を先頭にした検索結果のキー順"""
+        keys = [key for key in search_results if key != "企業規模比較"]
         if "企業規模比較" in search_results:
-            result = search_results["企業規模比較"]
-            text += f"\n\n**企業規模比較（重要）**"
+            keys.insert(0, "企業規模比較")
+        return keys
+    
+    @staticmethod
+    def format_search_result(key: str, result: Any) -> str:
+        """検索結果1件をフォーマット"""
+        if key == "企業規模比較":
+            text = f"**企業規模比較（重要）**"
             text += f"\n{result.summary}"
             text += f"\n※規模差が大きい場合は適応リスクとして評価に反映すること"
-            if result.sources:
-                text += f"\n情報源: {', '.join(result.sources[:2])}"
-        
-        # その他の検索結果
-        for key, result in search_results.items():
-            if key != "企業規模比較":
-                text += f"\n\n**{key}**"
-                text += f"\n{result.summary}"
-                if result.sources:
-                    text += f"\n情報源: {', '.join(result.sources[:2])}"
-        
+        else:
+            text = f"**{key}**"
+            text += f"\n{result.summary}"
+        if result.sources:
+            text += f"\n情報源: {', '.join(result.sources[:2])}"
         return text
     
+    @staticmethod
+    def search_result_priority(key: str, result: Any) -> int:
+        """検索結果の優先度（信頼度が高いほど高く、企業規模比較は最優先）"""
+        if key == "企業規模比較":
+            return 60
+        reliabilities = [r.get('reliability', 0.5) for r in (result.results or []) if isinstance(r, dict)]
+        reliability = max(reliabilities) if reliabilities else 0.5
+        return 30 + int(reliability * 20)
+    
     @staticmethod
     def format_history(history: List) -> str:
         """評価履歴をフォーマット"""
@@ -151,14 +169,52 @@ class EvaluationFormatters:
         
         text = "\n### 過去の評価推移"
         for cycle in history:
-            text += f"\n\n**サイクル{cycle.cycle_number}**"
-            text += f"\n- スコア: {cycle.evaluation.score}点（確信度: {cycle.evaluation.confidence}）"
-            text += f"\n- 主な懸念: {cycle.evaluation.concerns[0] if cycle.evaluation.concerns else 'なし'}"
-            if len(cycle.search_results) > 0:
-                text += f"\n- 収集情報: {len(cycle.search_results)}件"
+            text += "\n\n" + EvaluationFormatters.format_history_cycle(cycle)
         
         return text
     
+    @staticmethod
+    def format_history_cycle(cycle: Any) -> str:
+        """評価履歴1サイクル分をフォーマット"""
+        text = f"**サイクル{cycle.cycle_number}**"
+        text += f"\n- スコア: {cycle.evaluation.score}点（確信度: {cycle.evaluation.confidence}）"
+        text += f"\n- 主な懸念: {cycle.evaluation.concerns[0] if cycle.evaluation.concerns else 'なし'}"
+        if len(cycle.search_results) > 0:
+            text += f"\n- 収集情報: {len(cycle.search_results)}件"
+        return text
+    
+    @staticmethod
+    def add_context_sections(builder: Any, search_results: Dict, history: List) -> None:
+        """
+        検索結果と評価履歴を1件ずつトークン予算の管理対象として追加
+        （古い履歴・信頼度の低い検索結果から圧縮・削除される）
+        
+        Args:
+            builder: PromptBudgetBuilder
+            search_results: 検索結果
+            history: 評価履歴
+        """
+        if search_results:
+            keys = EvaluationFormatters._ordered_search_keys(search_results)
+            priorities = {key: EvaluationFormatters.search_result_priority(key, search_results[key]) for key in keys}
+            builder.add("search_header", "### Web検索による追加情報", priority=max(priorities.values()))
+            for key in keys:
+                builder.add(
+                    f"search:{key}",
+                    EvaluationFormatters.format_search_result(key, search_results[key]),
+                    priority=priorities[key]
+                )
+        
+        if history:
+            builder.add("history_header", "### 過去の評価推移", priority=10 + len(history))
+            for i, cycle in enumerate(history):
+                # 新しいサイクルほど優先度を高くする
+                builder.add(
+                    f"history:{cycle.cycle_number}",
+                    EvaluationFormatters.format_history_cycle(cycle),
+                    priority=10 + i
+                )
+    
     @staticmethod
     async def get_candidate_info(state: ResearchState) -> str:
         """候補者基本情報を取得（Supabase連携を含む）"""
@@ -6,6 +6,17 @@ LLMの出力を構造化された評価結果に変換
 import re
 from typing import Dict, List, Optional, Any
 from ..nodes.base import EvaluationResult, ScoreDetail
+from .structured_output import StructuredOutputDecoder, EVALUATION_SCHEMA
+
+
+# スコア内訳のカテゴリキー -> 表示名
+CATEGORY_NAMES = {
+    "required_skills": "必須要件",
+    "practical_ability": "実務遂行能力",
+    "preferred_skills": "歓迎要件",
+    "organizational_fit": "組織適合性",
+    "outstanding_career": "突出した経歴"
+}
 
 
 class EvaluationParser:
@@ -195,10 +206,68 @@ class EvaluationParser:
         return breakdown
     
     @staticmethod
-    def parse_evaluation(text: str) -> EvaluationResult:
-        """LLMの出力を評価結果にパース"""
+    def evaluation_from_json(data: Dict[str, Any], raw_text: str) -> EvaluationResult:
+        """
+        検証済みのJSON出力（EVALUATION_SCHEMA）から評価結果を構築
+        
+        Args:
+            data: StructuredOutputDecoderでデコードした辞書
+            raw_text: LLMの生の応答
+        """
+        score_breakdown = {}
+        evidence_map = {}
+        for category in data.get("score_breakdown") or []:
+            items = []
+            for item in category.get("items") or []:
+                evidence = item.get("evidence") or ""
+                items.append({
+                    "name": item["name"],
+                    "score": float(item["score"]),
+                    "max_score": float(item["max_score"]),
+                    "evidence": evidence
+                })
+                if evidence:
+                    evidence_map.setdefault(item["name"], []).append(evidence)
+            
+            key = category["category"]
+            score_breakdown[key] = ScoreDetail(
+                category=CATEGORY_NAMES.get(key, key),
+                max_score=float(category["max_score"]),
+                actual_score=float(category["subtotal"]),
+                items=items,
+                reasoning=" / ".join(f"{i['name']}: {i['evidence']}" for i in items if i["evidence"])
+            )
+        
+        return EvaluationResult(
+            score=max(0, min(100, int(data["score"]))),
+            confidence=data["confidence"],
+            strengths=list(data.get("strengths") or []),
+            concerns=list(data.get("concerns") or []),
+            summary=data.get("summary") or "",
+            interview_points=list(data.get("interview_points") or []) or None,
+            raw_response=raw_text,
+            score_breakdown=score_breakdown or None,
+            evidence_map=evidence_map or None
+        )
+    
+    @staticmethod
+    def parse_evaluation(text: str, decoder: Optional[StructuredOutputDecoder] = None) -> EvaluationResult:
+        """
+        LLMの出力を評価結果にパース
+        
+        Args:
+            text: LLMの応答
+            decoder: JSON出力用のデコーダー（指定時はJSONとして解釈し、失敗時のみテキストとしてパース）
+        """
         print(f"  パース開始（応答文字数: {len(text)}）")
         
+        if decoder is not None:
+            data = decoder.decode(text)
+            if data is not None:
+                evaluation = EvaluationParser.evaluation_from_json(data, text)
+                print(f"    パース結果(JSON): スコア={evaluation.score}, 確信度={evaluation.confidence}")
+                return evaluation
+        
         # 基本情報のパース
         score = EvaluationParser.parse_score(text)
         confidence = EvaluationParser.parse_confidence(text)
@@ -232,6 +301,8 @@ class EvaluationParser:
         
         print(f"    パース結果: スコア={score}, 確信度={confidence}")
         print(f"    強み={len(strengths)}件, 懸念={len(concerns)}件")
+        if decoder is not None:
+            decoder.record_fallback_result(bool(strengths or concerns or summary))
         
         return EvaluationResult(
             score=score,
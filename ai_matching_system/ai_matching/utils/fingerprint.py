@@ -0,0 +1,19 @@
+"""
+入力値のフィンガープリント
+キャッシュ・メモのキーとして、任意の値（文字列・辞書・リストなど）の組み合わせから安定したハッシュを生成する
+"""
+
+import hashlib
+import json
+from typing import Any
+
+
+def fingerprint(*parts: Any) -> str:
+    """入力値からフィンガープリントを生成"""
+    hasher = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, str):
+            part = json.dumps(part, ensure_ascii=False, sort_keys=True, default=str)
+        hasher.update(part.encode("utf-8"))
+        hasher.update(b"\x1f")
+    return hasher.hexdigest()
@@ -0,0 +1,300 @@
+"""
+Geminiモデルのレジストリとルーター
+ノードごとにモデルの階層（fast: 軽量・低コスト / deep: 主評価用 / pro: 高精度）を割り当て、
+クォータ超過やレイテンシSLO超過が起きたモデルは一定時間、一段速い階層に切り替える。
+ノード・モデル別のレイテンシとトークン使用量を記録して階層の調整に使う
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import google.generativeai as genai
+
+from .resilience import CircuitOpenError, call_async, call_sync, get_policy, is_retryable
+
+
+# 階層 -> モデル名（GEMINI_MODEL_TIERS（JSON）で上書き）
+DEFAULT_MODEL_TIERS = {
+    "pro": "gemini-2.5-pro",
+    "deep": "gemini-2.5-flash",
+    "fast": "gemini-2.0-flash"
+}
+
+# 重い順。フォールバックは右隣の階層へ
+TIER_ORDER = ["pro", "deep", "fast"]
+
+# ノード名 -> 階層（GEMINI_NODE_TIERS（JSON）で上書き）。未登録のノードはDEFAULT_TIER
+DEFAULT_NODE_TIERS = {
+    # 候補者評価の本体
+    "Evaluator": "deep",
+    "EnhancedEvaluator": "deep",
+    "SkillEvaluator": "deep",
+    "ExperienceEvaluator": "deep",
+    "FitEvaluator": "deep",
+    # 短い判定・要約
+    "GapAnalyzer": "fast",
+    "TavilySearcher": "fast",
+    "FinalScorer": "fast",
+    "ReportGenerator": "fast",
+    "SemanticSkillMatcher": "fast",
+    "DeepResearchMatcher": "fast",
+    "ModularDeepResearchMatcher": "fast",
+    # レジュメの構造化（抽出漏れが後段の全評価に響くため）
+    "ResumeParser": "pro"
+}
+DEFAULT_TIER = "deep"
+
+# 階層 -> 直近の呼び出しのp90レイテンシの上限（秒）（GEMINI_TIER_LATENCY_SLO（JSON）で上書き）
+DEFAULT_LATENCY_SLO_SECONDS = {
+    "pro": 90.0,
+    "deep": 60.0,
+    "fast": 30.0
+}
+
+
+# (ノード名, モデル名) -> 呼び出し統計
+_usage_stats: Dict[Tuple[str, str], Dict[str, float]] = {}
+_stats_lock = threading.Lock()
+
+
+def record_model_call(node_name: str, model_name: str, latency: float, response: Any = None,
+                      failed: bool = False, fallback: bool = False) -> None:
+    """1回の呼び出しのレイテンシとトークン使用量を記録"""
+    usage = getattr(response, "usage_metadata", None)
+    with _stats_lock:
+        stats = _usage_stats.setdefault((node_name, model_name), {
+            "calls": 0, "failed": 0, "fallback": 0, "total_seconds": 0.0, "max_seconds": 0.0,
+            "prompt_tokens": 0, "output_tokens": 0
+        })
+        stats["calls"] += 1
+        stats["failed"] += int(failed)
+        stats["fallback"] += int(fallback)
+        stats["total_seconds"] += latency
+        stats["max_seconds"] = max(stats["max_seconds"], latency)
+        stats["prompt_tokens"] += getattr(usage, "prompt_token_count", 0) or 0
+        stats["output_tokens"] += getattr(usage, "candidates_token_count", 0) or 0
+
+
+def get_model_usage_stats() -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """ノード・モデル別の呼び出し数、平均/最大レイテンシ、トークン使用量を取得"""
+    with _stats_lock:
+        result: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for (node_name, model_name), stats in _usage_stats.items():
+            result.setdefault(node_name, {})[model_name] = {
+                "calls": stats["calls"],
+                "failed": stats["failed"],
+                "fallback": stats["fallback"],
+                "avg_seconds": round(stats["total_seconds"] / stats["calls"], 2) if stats["calls"] else 0.0,
+                "max_seconds": round(stats["max_seconds"], 2),
+                "prompt_tokens": stats["prompt_tokens"],
+                "output_tokens": stats["output_tokens"]
+            }
+        return result
+
+
+def is_quota_error(error: BaseException) -> bool:
+    """クォータ超過・レート制限（429）のエラーか"""
+    return type(error).__name__ in ("ResourceExhausted", "TooManyRequests") or "429" in str(error)
+
+
+def _retry_in_same_tier(error: BaseException) -> bool:
+    """同じモデルでリトライするエラーか（クォータ超過は速い階層への切り替えに任せる）"""
+    return is_retryable(error) and not is_quota_error(error)
+
+
+def _load_json_env(name: str) -> Dict[str, Any]:
+    """JSON形式の環境変数を読み込む（解釈できない場合は空）"""
+    try:
+        value = json.loads(os.getenv(name, "{}"))
+    except json.JSONDecodeError as e:
+        print(f"[ModelRouter] {name}を解釈できません（デフォルト値を使用）: {e}")
+        return {}
+    return value if isinstance(value, dict) else {}
+
+
+class ModelRouter:
+    """ノードへの階層の割り当てと、劣化したモデルから速い階層へのフォールバック"""
+
+    def __init__(self, model_tiers: Optional[Dict[str, str]] = None, node_tiers: Optional[Dict[str, str]] = None,
+                 latency_slo: Optional[Dict[str, float]] = None, cooldown_seconds: Optional[float] = None,
+                 window: int = 20, min_samples: int = 5):
+        """
+        Args:
+            model_tiers: 階層 -> モデル名（省略時はGEMINI_MODEL_TIERSでDEFAULT_MODEL_TIERSを上書き）
+            node_tiers: ノード名 -> 階層（省略時はGEMINI_NODE_TIERSでDEFAULT_NODE_TIERSを上書き）
+            latency_slo: 階層 -> p90レイテンシの上限秒数（省略時はGEMINI_TIER_LATENCY_SLOで上書き）
+            cooldown_seconds: 劣化と判定したモデルを避ける秒数（省略時はGEMINI_TIER_COOLDOWN_SECONDS、デフォルト120）
+            window: レイテンシSLOの判定に使う直近の呼び出し数
+            min_samples: レイテンシSLOを判定する最小の呼び出し数
+        """
+        self.model_tiers = {**DEFAULT_MODEL_TIERS, **(model_tiers or _load_json_env("GEMINI_MODEL_TIERS"))}
+        self.node_tiers = {**DEFAULT_NODE_TIERS, **(node_tiers or _load_json_env("GEMINI_NODE_TIERS"))}
+        self.latency_slo = {
+            **DEFAULT_LATENCY_SLO_SECONDS,
+            **{k: float(v) for k, v in (latency_slo or _load_json_env("GEMINI_TIER_LATENCY_SLO")).items()}
+        }
+        self.cooldown_seconds = cooldown_seconds or float(os.getenv("GEMINI_TIER_COOLDOWN_SECONDS", "120"))
+        self.fallback_enabled = os.getenv("GEMINI_TIER_FALLBACK", "true").lower() == "true"
+        self.window = window
+        self.min_samples = min_samples
+
+        self._models: Dict[str, Any] = {}
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._degraded_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def tier_for(self, node_name: str) -> str:
+        """ノードに割り当てた階層（未知の階層が設定されている場合はDEFAULT_TIER）"""
+        tier = self.node_tiers.get(node_name, DEFAULT_TIER)
+        if tier not in self.model_tiers:
+            print(f"[ModelRouter] {node_name}の階層{tier}は未登録のため{DEFAULT_TIER}を使用")
+            return DEFAULT_TIER
+        return tier
+
+    def model_for(self, node_name: str) -> "RoutedModel":
+        """ノード用のモデル（GenerativeModelと同じ呼び出し方で使える）"""
+        return RoutedModel(self, node_name)
+
+    def resolve(self, node_name: str) -> Tuple[str, str]:
+        """
+        今回の呼び出しに使う階層とモデル名
+
+        割り当てた階層のモデルが劣化中なら、劣化していない一段速い階層を使う
+        （すべて劣化中なら割り当て通り）
+        """
+        tier = self.tier_for(node_name)
+        if self.fallback_enabled:
+            for candidate in self._fallback_chain(tier):
+                if not self._is_degraded(self.model_tiers[candidate]):
+                    return candidate, self.model_tiers[candidate]
+        return tier, self.model_tiers[tier]
+
+    def _fallback_chain(self, tier: str) -> List[str]:
+        """指定した階層から速い順にたどる階層の一覧"""
+        if tier not in TIER_ORDER:
+            return [tier]
+        return [t for t in TIER_ORDER[TIER_ORDER.index(tier):] if t in self.model_tiers]
+
+    def _is_degraded(self, model_name: str) -> bool:
+        with self._lock:
+            return self._degraded_until.get(model_name, 0) > time.time()
+
+    def generative_model(self, model_name: str) -> Any:
+        """モデル名ごとのGenerativeModel（プロセス内で共有）"""
+        with self._lock:
+            if model_name not in self._models:
+                self._models[model_name] = genai.GenerativeModel(model_name)
+            return self._models[model_name]
+
+    def degrade(self, model_name: str, reason: str) -> None:
+        """モデルを一定時間フォールバック対象にする"""
+        with self._lock:
+            self._degraded_until[model_name] = time.time() + self.cooldown_seconds
+            # 復帰後は新しい呼び出しだけでSLOを判定し直す
+            self._latencies.pop(model_name, None)
+        print(f"[ModelRouter] {model_name}: {reason}のため{self.cooldown_seconds:.0f}秒間速い階層に切り替え")
+
+    def observe_latency(self, tier: str, model_name: str, latency: float) -> None:
+        """レイテンシを記録し、直近のp90がSLOを超えたモデルを劣化扱いにする"""
+        slo = self.latency_slo.get(tier)
+        with self._lock:
+            samples = self._latencies.setdefault(model_name, deque(maxlen=self.window))
+            samples.append(latency)
+            if slo is None or len(samples) < self.min_samples:
+                return
+            p90 = sorted(samples)[int(len(samples) * 0.9) - 1]
+        if p90 > slo:
+            self.degrade(model_name, f"p90レイテンシ{p90:.1f}秒がSLO{slo:.0f}秒を超過")
+
+
+class RoutedModel:
+    """ノードに割り当てた階層で呼び出すモデル（generate_content / generate_content_asyncを提供）"""
+
+    def __init__(self, router: ModelRouter, node_name: str):
+        self.router = router
+        self.node_name = node_name
+
+    @property
+    def model_name(self) -> str:
+        """次の呼び出しで使うモデル名"""
+        return self.router.resolve(self.node_name)[1]
+
+    def resolve(self) -> Tuple[str, str]:
+        """次の呼び出しで使う階層とモデル名"""
+        return self.router.resolve(self.node_name)
+
+    def record(self, tier: str, model_name: str, started: float, response: Any = None) -> None:
+        """成功した呼び出しを記録（ルーターを経由しない呼び出しの記録にも使う）"""
+        latency = time.time() - started
+        record_model_call(self.node_name, model_name, latency, response,
+                          fallback=tier != self.router.tier_for(self.node_name))
+        self.router.observe_latency(tier, model_name, latency)
+
+    def _next_after_error(self, tier: str, model_name: str, started: float,
+                          error: Exception) -> Optional[Tuple[str, str]]:
+        """失敗を記録し、クォータ超過・サーキットブレーカー遮断中なら切り替え先の階層とモデル名を返す"""
+        record_model_call(self.node_name, model_name, time.time() - started, failed=True)
+        circuit_open = isinstance(error, CircuitOpenError)
+        if not (self.router.fallback_enabled and (circuit_open or is_quota_error(error))):
+            return None
+        self.router.degrade(model_name, "サーキットブレーカー遮断中" if circuit_open else "クォータ超過")
+        next_tier, next_model = self.router.resolve(self.node_name)
+        if next_model == model_name:
+            return None
+        print(f"  [ModelRouter] {self.node_name}: {model_name} -> {next_model}で再実行")
+        return next_tier, next_model
+
+    async def generate_content_async(self, *args, **kwargs) -> Any:
+        # 期限はクライアント側のタイムアウトにも設定し、期限切れのリクエストを打ち切る
+        kwargs.setdefault("request_options", {"timeout": get_policy("gemini").deadline})
+        tier, model_name = self.resolve()
+        while True:
+            started = time.time()
+            model = self.router.generative_model(model_name)
+            try:
+                response = await call_async(
+                    "gemini", lambda: model.generate_content_async(*args, **kwargs),
+                    key=model_name, retryable=_retry_in_same_tier
+                )
+            except Exception as e:
+                fallback = self._next_after_error(tier, model_name, started, e)
+                if fallback is None:
+                    raise
+                tier, model_name = fallback
+                continue
+            self.record(tier, model_name, started, response)
+            return response
+
+    def generate_content(self, *args, **kwargs) -> Any:
+        kwargs.setdefault("request_options", {"timeout": get_policy("gemini").deadline})
+        tier, model_name = self.resolve()
+        while True:
+            started = time.time()
+            try:
+                response = call_sync(
+                    "gemini", self.router.generative_model(model_name).generate_content, *args,
+                    key=model_name, retryable=_retry_in_same_tier, **kwargs
+                )
+            except Exception as e:
+                fallback = self._next_after_error(tier, model_name, started, e)
+                if fallback is None:
+                    raise
+                tier, model_name = fallback
+                continue
+            self.record(tier, model_name, started, response)
+            return response
+
+
+_model_router_instance = None
+
+
+def get_model_router() -> ModelRouter:
+    """シングルトンインスタンスを取得"""
+    global _model_router_instance
+    if _model_router_instance is None:
+        _model_router_instance = ModelRouter()
+    return _model_router_instance
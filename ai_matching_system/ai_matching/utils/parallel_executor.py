@@ -349,6 +349,7 @@ class ParallelSearchExecutor:
     async def search_parallel(self,
                             search_queries: Dict[str, str],
                             search_func: Callable,
+                            timeout: Optional[float] = 30,
                             **search_kwargs) -> Dict[str, Any]:
         """
         複数の検索クエリを並列実行
@@ -356,6 +357,8 @@ class ParallelSearchExecutor:
         Args:
             search_queries: {search_id: query}
             search_func: 検索関数
+            timeout: 1件あたりのタイムアウト秒数（検索関数がresilience.call_blocking等で
+                     期限・リトライを適用している場合はNone）
             search_kwargs: 検索関数への追加引数
             
         Returns:
@@ -368,7 +371,7 @@ class ParallelSearchExecutor:
         ]
         
         # 並列実行
-        report = await self.executor.execute_parallel_async(tasks, timeout=30)
+        report = await self.executor.execute_parallel_async(tasks, timeout=timeout)
         
         # 結果をマッピング
         results = {}
@@ -0,0 +1,100 @@
+"""
+ルールベース分析器向けの事前コンパイル済みパターンエンジン
+キーワード群を1つの選択パターン（長い順）にまとめ、テキストを1回走査するだけで全ヒットを取得する
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Pattern, Set, Union
+
+
+def compile_alternation(patterns: Iterable[str], flags: int = 0) -> Pattern:
+    """
+    正規表現のリストを1つの選択パターンにコンパイル
+
+    Args:
+        patterns: 正規表現（エスケープしない）
+        flags: reのフラグ
+    """
+    return re.compile("|".join(f"(?:{p})" for p in patterns), flags)
+
+
+class KeywordMatcher:
+    """
+    キーワード（またはグループ別キーワード）の一括マッチャー
+
+    部分文字列判定（`keyword in text`）をキーワード数だけ繰り返す代わりに、
+    長い順に並べた選択パターンで1回だけ走査する。長いキーワードにマッチした場合は、
+    それに含まれる短いキーワードもヒットとして扱う。
+    ※包含関係にないキーワード同士がテキスト上で重なる場合（例: 「A営業」と「営業B」に対する「A営業B」）は
+      先に現れた方のみがヒットする
+    """
+
+    def __init__(self, keywords: Union[Iterable[str], Dict[str, Iterable[str]]], ignore_case: bool = False):
+        """
+        Args:
+            keywords: キーワードのリスト、またはグループ名 -> キーワードのリスト
+            ignore_case: 大文字小文字を区別しないか
+        """
+        if isinstance(keywords, dict):
+            self.groups: Dict[str, List[str]] = {group: list(words) for group, words in keywords.items()}
+        else:
+            self.groups = {"": list(keywords)}
+        self.ignore_case = ignore_case
+
+        unique = {self._normalize(word) for words in self.groups.values() for word in words if word}
+        # 長い順に並べて最長一致を優先する
+        ordered = sorted(unique, key=lambda word: (-len(word), word))
+        self._pattern = None
+        if ordered:
+            self._pattern = re.compile("|".join(re.escape(word) for word in ordered), re.IGNORECASE if ignore_case else 0)
+        # キーワード -> そのキーワードに含まれる他のキーワード
+        self._contained = {
+            word: [other for other in ordered if other != word and other in word]
+            for word in ordered
+        }
+
+    def _normalize(self, word: str) -> str:
+        return word.lower() if self.ignore_case else word
+
+    def hits(self, text: str) -> Set[str]:
+        """テキストに含まれるキーワードの集合（正規化済み）"""
+        if not text or self._pattern is None:
+            return set()
+        found: Set[str] = set()
+        for match in self._pattern.findall(text):
+            word = self._normalize(match)
+            if word not in found:
+                found.add(word)
+                found.update(self._contained[word])
+        return found
+
+    def scan(self, text: str) -> Dict[str, List[str]]:
+        """
+        グループ別のヒットキーワード（定義順）
+
+        Returns:
+            グループ名 -> ヒットしたキーワードのリスト（ヒットのないグループは含まない）
+        """
+        found = self.hits(text)
+        result = {}
+        for group, words in self.groups.items():
+            matched = [word for word in words if self._normalize(word) in found]
+            if matched:
+                result[group] = matched
+        return result
+
+    def matched(self, text: str) -> List[str]:
+        """ヒットしたキーワードのリスト（定義順、グループを区別しない）"""
+        return [word for words in self.scan(text).values() for word in words]
+
+    def contains_any(self, text: str) -> bool:
+        """いずれかのキーワードを含むか"""
+        return bool(text) and self._pattern is not None and self._pattern.search(text) is not None
+
+    def first_group(self, text: str) -> Optional[str]:
+        """キーワードがヒットした最初のグループ（定義順）"""
+        found = self.hits(text)
+        for group, words in self.groups.items():
+            if any(self._normalize(word) in found for word in words):
+                return group
+        return None
@@ -0,0 +1,286 @@
+"""
+プロンプト組み立てとコンテキストキャッシュ
+プロンプトを「静的プレフィックス」「求人単位」「候補者単位」の3セグメントに分け、
+前2つをGeminiのコンテキストキャッシュに求人単位で登録して再利用する
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+import google.generativeai as genai
+
+from .model_router import RoutedModel
+from .resilience import call_async, call_sync, get_policy, is_retryable
+
+try:
+    from google.generativeai import caching
+except ImportError:
+    caching = None
+
+
+# キャッシュ登録が恒久的に拒否されたことを示すエラー（最小トークン数未満・コンテキストキャッシュ未対応モデル）
+_PERMANENT_CACHE_ERROR_PATTERN = re.compile(
+    r"min_total_token_count|too small|minimum|does not support|not supported|unsupported",
+    re.IGNORECASE
+)
+
+
+def _is_permanent_cache_error(error: BaseException) -> bool:
+    """同じ内容で作り直しても成功しないエラーか（一時的な障害・遮断中・タイムアウトは含まない）"""
+    if is_retryable(error):
+        return False
+    return bool(_PERMANENT_CACHE_ERROR_PATTERN.search(str(error)))
+
+
+@dataclass
+class PromptSegments:
+    """3層に分割したプロンプト"""
+    static_prefix: str  # 全呼び出しで共通（評価方針・配点基準・出力形式など）
+    job_segment: str  # 同一求人の候補者間で共通（求人票・求人メモ・重み付けなど）
+    candidate_segment: str  # 候補者・サイクルごとに変わる部分
+
+    @property
+    def cacheable_text(self) -> str:
+        """キャッシュ対象（静的プレフィックス + 求人セグメント）"""
+        return f"{self.static_prefix}\n\n{self.job_segment}"
+
+    @property
+    def full_text(self) -> str:
+        """キャッシュを使わない場合の完全なプロンプト（共通部分を先頭に置く）"""
+        return f"{self.cacheable_text}\n\n{self.candidate_segment}"
+
+
+class PromptAssembler:
+    """セグメント化したプロンプトでGeminiを呼び出し、キャッシュ済み/新規トークン数を記録"""
+
+    def __init__(self, model: RoutedModel, cache_ttl_seconds: int = 3600, use_context_cache: Optional[bool] = None,
+                 max_cache_entries: Optional[int] = None):
+        """
+        Args:
+            model: ノードに割り当てたモデル（ModelRouter.model_forで取得。キャッシュは呼び出し時のモデルごとに作成）
+            cache_ttl_seconds: コンテキストキャッシュの有効期間（秒）
+            use_context_cache: 明示的なコンテキストキャッシュを使うか
+                               （省略時はPROMPT_CONTEXT_CACHE環境変数、デフォルト有効）
+            max_cache_entries: 保持するキャッシュ・登録不可キーの上限（LRU。省略時はPROMPT_CONTEXT_CACHE_MAX_ENTRIES、デフォルト128）
+        """
+        self.model = model
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.max_cache_entries = max(1, max_cache_entries or int(os.getenv("PROMPT_CONTEXT_CACHE_MAX_ENTRIES", "128")))
+
+        if use_context_cache is None:
+            use_context_cache = os.getenv("PROMPT_CONTEXT_CACHE", "true").lower() == "true"
+        self.use_context_cache = use_context_cache and caching is not None
+
+        # キャッシュキー -> (CachedContent, 有効期限のUNIX時刻)（LRU順）
+        self._caches: "OrderedDict[str, tuple]" = OrderedDict()
+        # 最小トークン数未満などでキャッシュ登録できなかったキー -> 再試行を許可するUNIX時刻（LRU順）
+        self._uncacheable: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # ラベル別のトークン使用量
+        self.usage_stats: Dict[str, Dict[str, int]] = {}
+
+    def _cache_key(self, segments: PromptSegments, model_name: str) -> str:
+        """モデルとキャッシュ対象テキストからキーを生成"""
+        return hashlib.sha256(f"{model_name}\x1f{segments.cacheable_text}".encode("utf-8")).hexdigest()
+
+    def _get_cached_model(self, segments: PromptSegments, model_name: str):
+        """求人単位のキャッシュを参照するモデルを取得（作成できない場合はNone）"""
+        if not self.use_context_cache:
+            return None
+
+        key = self._cache_key(segments, model_name)
+        with self._lock:
+            self._expire_locked(time.time())
+            if key in self._uncacheable:
+                self._uncacheable.move_to_end(key)
+                return None
+            entry = self._caches.get(key)
+            if entry is not None:
+                self._caches.move_to_end(key)
+
+        # 期限切れ間際のキャッシュは作り直す（作成はネットワーク呼び出しのためロックの外で行う）
+        if entry is None or entry[1] - 60 < time.time():
+            try:
+                # 作成は冪等でない（タイムアウト後の再試行で重複したキャッシュが課金される）ためリトライしない
+                cached_content = call_sync(
+                    "gemini",
+                    caching.CachedContent.create,
+                    key=model_name,
+                    idempotent=False,
+                    model=f"models/{model_name}",
+                    display_name=f"prompt-{key[:16]}",
+                    contents=[segments.cacheable_text],
+                    ttl=timedelta(seconds=self.cache_ttl_seconds)
+                )
+            except Exception as e:
+                if _is_permanent_cache_error(e):
+                    # 最小トークン数未満・未対応モデル。キャッシュの有効期間中は暗黙キャッシュ（共通プレフィックス）に任せる
+                    print(f"  [PromptCache] コンテキストキャッシュを作成できません: {e}")
+                    with self._lock:
+                        self._uncacheable[key] = time.time() + self.cache_ttl_seconds
+                        self._uncacheable.move_to_end(key)
+                        while len(self._uncacheable) > self.max_cache_entries:
+                            self._uncacheable.popitem(last=False)
+                else:
+                    # 一時的な障害・遮断中。この呼び出しだけ通常呼び出しにし、次回は作成を再試行する
+                    print(f"  [PromptCache] コンテキストキャッシュの作成に失敗（今回は通常呼び出し）: {e}")
+                return None
+            evicted: List[Any] = []
+            with self._lock:
+                current = self._caches.get(key)
+                # 並行して作成された新しいキャッシュがあればそちらを使う
+                superseded = current is not None and current[1] - 60 >= time.time()
+                if superseded:
+                    entry = current
+                    evicted.append(cached_content)
+                else:
+                    entry = (cached_content, time.time() + self.cache_ttl_seconds)
+                    self._caches[key] = entry
+                    self._caches.move_to_end(key)
+                    while len(self._caches) > self.max_cache_entries:
+                        evicted.append(self._caches.popitem(last=False)[1][0])
+            if not superseded:
+                print(f"  [PromptCache] コンテキストキャッシュを登録: {key[:16]}")
+            self._delete_contents(evicted)
+
+        return genai.GenerativeModel.from_cached_content(cached_content=entry[0])
+
+    def _expire_locked(self, now: float) -> None:
+        """有効期限を過ぎたキャッシュ・登録不可キーを取り除く（ロック取得済みで呼ぶ。期限切れのキャッシュはサーバー側で削除済み）"""
+        for key in [key for key, (_, expires_at) in self._caches.items() if expires_at < now]:
+            del self._caches[key]
+        for key in [key for key, retry_at in self._uncacheable.items() if retry_at < now]:
+            del self._uncacheable[key]
+
+    def _delete_contents(self, contents: List[Any]) -> None:
+        """使わなくなったキャッシュを削除（失敗しても有効期限で削除される）"""
+        for cached_content in contents:
+            try:
+                cached_content.delete()
+            except Exception as e:
+                print(f"  [PromptCache] 不要なキャッシュを削除できません（期限切れで削除されます）: {e}")
+
+    def generate(self, segments: PromptSegments, label: str = "default", **kwargs) -> Any:
+        """
+        セグメント化したプロンプトで生成
+
+        Args:
+            segments: 分割済みプロンプト
+            label: 使用量集計用のラベル（ノード名など）
+            **kwargs: generate_contentに渡す追加引数
+
+        Returns:
+            generate_contentのレスポンス
+        """
+        # 期限はクライアント側のタイムアウトにも設定し、期限切れのリクエストを打ち切る
+        kwargs.setdefault("request_options", {"timeout": get_policy("gemini").deadline})
+        tier, model_name = self.model.resolve()
+        cached_model = self._get_cached_model(segments, model_name)
+        if cached_model is not None:
+            started = time.time()
+            try:
+                response = call_sync(
+                    "gemini", cached_model.generate_content, segments.candidate_segment, key=model_name, **kwargs
+                )
+                self.model.record(tier, model_name, started, response)
+                self._record_usage(label, response, segments)
+                return response
+            except Exception as e:
+                # キャッシュ失効等。このキーは破棄して通常呼び出し（階層のフォールバックあり）に切り替え
+                print(f"  [PromptCache] キャッシュ参照に失敗したため通常呼び出しに切り替え: {e}")
+                with self._lock:
+                    self._caches.pop(self._cache_key(segments, model_name), None)
+
+        response = self.model.generate_content(segments.full_text, **kwargs)
+        self._record_usage(label, response, segments)
+        return response
+
+    async def generate_async(self, segments: PromptSegments, label: str = "default", **kwargs) -> Any:
+        """
+        generateの非同期版（呼び出し元のイベントループをブロックしない）
+
+        Args:
+            segments: 分割済みプロンプト
+            label: 使用量集計用のラベル（ノード名など）
+            **kwargs: generate_content_asyncに渡す追加引数
+
+        Returns:
+            generate_content_asyncのレスポンス
+        """
+        kwargs.setdefault("request_options", {"timeout": get_policy("gemini").deadline})
+        # キャッシュの作成は同期APIのためスレッドで実行
+        tier, model_name = self.model.resolve()
+        cached_model = await asyncio.to_thread(self._get_cached_model, segments, model_name)
+        if cached_model is not None:
+            started = time.time()
+            try:
+                response = await call_async(
+                    "gemini", lambda: cached_model.generate_content_async(segments.candidate_segment, **kwargs),
+                    key=model_name
+                )
+                self.model.record(tier, model_name, started, response)
+                self._record_usage(label, response, segments)
+                return response
+            except Exception as e:
+                # キャッシュ失効等。このキーは破棄して通常呼び出し（階層のフォールバックあり）に切り替え
+                print(f"  [PromptCache] キャッシュ参照に失敗したため通常呼び出しに切り替え: {e}")
+                with self._lock:
+                    self._caches.pop(self._cache_key(segments, model_name), None)
+
+        response = await self.model.generate_content_async(segments.full_text, **kwargs)
+        self._record_usage(label, response, segments)
+        return response
+
+    def _record_usage(self, label: str, response: Any, segments: PromptSegments) -> None:
+        """キャッシュ済み/新規の入力トークン数を記録・出力"""
+        usage = getattr(response, "usage_metadata", None)
+        prompt_tokens = getattr(usage, "prompt_token_count", 0) or 0
+        cached_tokens = getattr(usage, "cached_content_token_count", 0) or 0
+        output_tokens = getattr(usage, "candidates_token_count", 0) or 0
+        fresh_tokens = max(prompt_tokens - cached_tokens, 0)
+
+        with self._lock:
+            stats = self.usage_stats.setdefault(label, {
+                "calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "fresh_tokens": 0, "output_tokens": 0
+            })
+            stats["calls"] += 1
+            stats["prompt_tokens"] += prompt_tokens
+            stats["cached_tokens"] += cached_tokens
+            stats["fresh_tokens"] += fresh_tokens
+            stats["output_tokens"] += output_tokens
+
+        print(
+            f"  [PromptCache] {label}: 入力{prompt_tokens}トークン"
+            f"（キャッシュ{cached_tokens} / 新規{fresh_tokens}）出力{output_tokens}トークン"
+            f" [文字数 共通{len(segments.static_prefix)} / 求人{len(segments.job_segment)}"
+            f" / 候補者{len(segments.candidate_segment)}]"
+        )
+
+    def get_usage_stats(self) -> Dict[str, Dict[str, Any]]:
+        """ラベル別のトークン使用量とキャッシュ率を取得"""
+        with self._lock:
+            return {
+                label: {
+                    **stats,
+                    "cache_ratio": stats["cached_tokens"] / stats["prompt_tokens"] if stats["prompt_tokens"] else 0.0
+                }
+                for label, stats in self.usage_stats.items()
+            }
+
+    def clear_caches(self) -> None:
+        """登録済みのコンテキストキャッシュを削除"""
+        with self._lock:
+            entries = list(self._caches.values())
+            self._caches.clear()
+            self._uncacheable.clear()
+
+        self._delete_contents([cached_content for cached_content, _ in entries])
@@ -0,0 +1,157 @@
+"""
+トークン予算付きプロンプトビルダー
+セクションごとにトークン数を見積もり、予算を超える場合は優先度の低いセクションから
+圧縮・削除してプロンプトを予算内に収める
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+
+# 日本語（全角記号・ひらがな・カタカナ・漢字）は約2文字、それ以外は約4文字で1トークン
+_JAPANESE_PATTERN = re.compile(r'[\u3000-\u9fff]')
+_JAPANESE_TOKEN_COST = 0.5
+_OTHER_TOKEN_COST = 0.25
+
+
+def estimate_tokens(text: str) -> int:
+    """トークン数の推定（日本語を考慮した高速な近似）"""
+    if not text:
+        return 0
+    japanese_chars = len(_JAPANESE_PATTERN.findall(text))
+    return int(japanese_chars * _JAPANESE_TOKEN_COST + (len(text) - japanese_chars) * _OTHER_TOKEN_COST)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, suffix: str = "...") -> str:
+    """
+    推定トークン数が上限に収まるよう末尾を切り詰める
+
+    Args:
+        text: 対象テキスト
+        max_tokens: 最大トークン数
+        suffix: 切り詰めた場合に付与する文字列
+
+    Returns:
+        切り詰めたテキスト（上限内の場合はそのまま）
+    """
+    if not text or max_tokens <= 0:
+        return ""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    budget = max_tokens - estimate_tokens(suffix)
+    used = 0.0
+    for i, char in enumerate(text):
+        used += _JAPANESE_TOKEN_COST if '\u3000' <= char <= '\u9fff' else _OTHER_TOKEN_COST
+        if used > budget:
+            return text[:i] + suffix
+    return text
+
+
+@dataclass
+class PromptSection:
+    """プロンプトのセクション"""
+    name: str
+    text: str
+    priority: int  # 大きいほど重要（予算超過時は小さいものから圧縮・削除）
+    min_tokens: int = 0  # 圧縮時に残す最小トークン数（0の場合は削除可能）
+    compactor: Optional[Callable[[str, int], str]] = None  # (text, max_tokens) -> 圧縮テキスト
+    tokens: int = 0
+    original_tokens: int = 0
+
+
+class PromptBudgetBuilder:
+    """セクション単位でトークンを管理し、予算内のプロンプトを組み立てる"""
+
+    def __init__(self, budget_tokens: int, label: str = "prompt", separator: str = "\n\n", verbose: bool = True):
+        """
+        Args:
+            budget_tokens: プロンプト全体のトークン予算
+            label: ログ出力用のラベル
+            separator: セクション間の区切り
+            verbose: セクション別のトークン使用量を出力するか
+        """
+        self.budget_tokens = budget_tokens
+        self.label = label
+        self.separator = separator
+        self.verbose = verbose
+        self.sections: List[PromptSection] = []
+
+    def add(self, name: str, text: str, priority: int = 50, min_tokens: int = 0,
+            compactor: Optional[Callable[[str, int], str]] = None) -> "PromptBudgetBuilder":
+        """
+        セクションを追加（追加順がプロンプト内の順序になる）
+
+        Args:
+            name: セクション名
+            text: セクション本文
+            priority: 優先度（大きいほど重要）
+            min_tokens: 圧縮時に残す最小トークン数（0の場合は削除可能）
+            compactor: 圧縮関数（省略時は末尾の切り詰め）
+        """
+        if text:
+            tokens = estimate_tokens(text)
+            self.sections.append(PromptSection(
+                name=name, text=text, priority=priority, min_tokens=min_tokens,
+                compactor=compactor, tokens=tokens, original_tokens=tokens
+            ))
+        return self
+
+    def build(self) -> str:
+        """予算内に収めたプロンプトを組み立てる"""
+        self._fit_to_budget()
+        text = self.separator.join(s.text for s in self.sections if s.text)
+        if self.verbose:
+            self._log_usage()
+        return text
+
+    def total_tokens(self) -> int:
+        """現在の推定トークン数"""
+        return sum(s.tokens for s in self.sections)
+
+    def _fit_to_budget(self) -> None:
+        """優先度の低いセクション（同順位なら後ろのもの）から圧縮・削除"""
+        # セクション間の区切りの分も予算から差し引く
+        separator_tokens = estimate_tokens(self.separator) * max(len(self.sections) - 1, 0)
+        overflow = self.total_tokens() + separator_tokens - self.budget_tokens
+        if overflow <= 0:
+            return
+
+        order = sorted(range(len(self.sections)), key=lambda i: (self.sections[i].priority, -i))
+        for index in order:
+            if overflow <= 0:
+                break
+            section = self.sections[index]
+            target = max(section.min_tokens, section.tokens - overflow)
+            if target >= section.tokens:
+                continue
+
+            if target <= 0:
+                section.text = ""
+            else:
+                compactor = section.compactor or truncate_to_tokens
+                section.text = compactor(section.text, target)
+
+            new_tokens = estimate_tokens(section.text)
+            overflow -= section.tokens - new_tokens
+            section.tokens = new_tokens
+
+    def get_usage(self) -> Dict[str, Dict[str, int]]:
+        """セクション別のトークン使用量（original: 圧縮前, final: 圧縮後）"""
+        return {
+            s.name: {"original": s.original_tokens, "final": s.tokens, "priority": s.priority}
+            for s in self.sections
+        }
+
+    def _log_usage(self) -> None:
+        """セクション別のトークン使用量を出力"""
+        details = []
+        for s in self.sections:
+            if s.tokens == s.original_tokens:
+                details.append(f"{s.name}={s.tokens}")
+            elif s.tokens == 0:
+                details.append(f"{s.name}=削除({s.original_tokens})")
+            else:
+                details.append(f"{s.name}={s.original_tokens}→{s.tokens}")
+        print(f"  [PromptBudget] {self.label}: {self.total_tokens()}/{self.budget_tokens}トークン | {', '.join(details)}")
@@ -7,6 +7,8 @@ from typing import Dict, List, Optional
 from datetime import datetime
 import re
 
+from .skill_taxonomy import seed_aliases
+
 
 class QueryTemplates:
     """検索クエリテンプレートの定義と生成"""
@@ -143,7 +145,12 @@ class QueryTemplates:
             "営業": "営業 セールス ビジネス開発"
         }
         
-        return skill_map.get(skill, skill)
+        if skill in skill_map:
+            return skill_map[skill]
+        
+        # スキル体系の別名で補完
+        aliases = seed_aliases(skill)
+        return " ".join([skill, *aliases[:2]]) if aliases else skill
     
     @classmethod
     def create_contextual_queries(cls, gap_type: str, context: Dict[str, any]) -> List[str]:
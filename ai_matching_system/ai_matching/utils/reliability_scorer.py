@@ -8,6 +8,30 @@ from datetime import datetime, timedelta
 import re
 from urllib.parse import urlparse
 
+from .pattern_engine import KeywordMatcher
+
+
+# 本文中の日付（(パターン, 月/日/年の順か)）
+_DATE_PATTERNS = [
+    (re.compile(r'(\d{4})[年/-](\d{1,2})[月/-](\d{1,2})'), False),
+    (re.compile(r'(\d{4})\.(\d{1,2})\.(\d{1,2})'), False),
+    (re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})'), True)
+]
+_NUMBER_PATTERN = re.compile(r'\d+(?:\.\d+)?[%％]?')
+_DIGIT_PATTERN = re.compile(r'\d+')
+_EMPLOYEE_PATTERN = re.compile(r'従業員[数]?\s*[:：]?\s*(\d+(?:,\d+)?)\s*[人名]')
+_REVENUE_PATTERN = re.compile(r'売上[高]?\s*[:：]?\s*(\d+(?:\.\d+)?)\s*[億万]')
+
+# 引用・出典を示す表現
+_CITATION_MATCHER = KeywordMatcher(['出典', '引用', 'ソース', '参考', '参照', 'による', '発表'])
+# 広告・宣伝文句
+_AD_MATCHER = KeywordMatcher(['PR', '広告', 'スポンサー', '今すぐ', '無料', 'クリック'])
+# 矛盾・不確実性を示唆する表現
+_CONTRADICTION_MATCHER = KeywordMatcher([
+    'しかし', 'ただし', '一方で', '異なる', '矛盾',
+    '不確実', '不明', '推測', '可能性', 'かもしれない'
+])
+
 
 class ReliabilityScorer:
     """情報ソースの信頼性を評価"""
@@ -140,19 +164,14 @@ class ReliabilityScorer:
     @classmethod
     def _score_freshness(cls, published_date: Optional[str], content: str) -> float:
         """情報の鮮度をスコアリング"""
-        # 日付を抽出する試み
-        date_patterns = [
-            r'(\d{4})[年/-](\d{1,2})[月/-](\d{1,2})',
-            r'(\d{4})\.(\d{1,2})\.(\d{1,2})',
-            r'(\d{1,2})/(\d{1,2})/(\d{4})'
-        ]
-        
+        # 日付を抽出する試み（最初の500文字をチェック）
+        head = content[:500]
         extracted_date = None
-        for pattern in date_patterns:
-            match = re.search(pattern, content[:500])  # 最初の500文字をチェック
+        for pattern, month_first in _DATE_PATTERNS:
+            match = pattern.search(head)
             if match:
                 try:
-                    if pattern == date_patterns[2]:  # MM/DD/YYYY format
+                    if month_first:  # MM/DD/YYYY format
                         extracted_date = datetime(int(match.group(3)), int(match.group(1)), int(match.group(2)))
                     else:
                         extracted_date = datetime(int(match.group(1)), int(match.group(2)), int(match.group(3)))
@@ -194,18 +213,16 @@ class ReliabilityScorer:
             score -= 0.2
         
         # 数字やデータの存在
-        numbers = re.findall(r'\d+(?:\.\d+)?[%％]?', content)
+        numbers = _NUMBER_PATTERN.findall(content)
         if len(numbers) > 2:
             score += 0.1
         
         # 引用や出典の存在
-        citation_patterns = ['出典', '引用', 'ソース', '参考', '参照', 'による', '発表']
-        if any(pattern in content for pattern in citation_patterns):
+        if _CITATION_MATCHER.contains_any(content):
             score += 0.1
         
         # 広告や宣伝文句の存在
-        ad_patterns = ['PR', '広告', 'スポンサー', '今すぐ', '無料', 'クリック']
-        if any(pattern in content for pattern in ad_patterns):
+        if _AD_MATCHER.contains_any(content):
             score -= 0.2
         
         return max(0.0, min(1.0, score))
@@ -213,16 +230,8 @@ class ReliabilityScorer:
     @classmethod
     def _score_consistency(cls, content: str) -> float:
         """情報の一貫性をスコアリング"""
-        # 矛盾を示唆する表現
-        contradiction_patterns = [
-            'しかし', 'ただし', '一方で', '異なる', '矛盾',
-            '不確実', '不明', '推測', '可能性', 'かもしれない'
-        ]
-        
-        contradiction_count = sum(
-            1 for pattern in contradiction_patterns 
-            if pattern in content
-        )
+        # 矛盾を示唆する表現（出現した表現の種類数）
+        contradiction_count = len(_CONTRADICTION_MATCHER.hits(content))
         
         # 矛盾が多いほどスコアを下げる
         return max(0.3, 1.0 - (contradiction_count * 0.1))
@@ -285,8 +294,7 @@ class ReliabilityScorer:
             url = result.get('url', '')
             
             # 従業員数
-            emp_pattern = r'従業員[数]?\s*[:：]?\s*(\d+(?:,\d+)?)\s*[人名]'
-            emp_matches = re.findall(emp_pattern, content)
+            emp_matches = _EMPLOYEE_PATTERN.findall(content)
             if emp_matches:
                 if '従業員数' not in numeric_data:
                     numeric_data['従業員数'] = []
@@ -295,8 +303,7 @@ class ReliabilityScorer:
                     numeric_data['従業員数'].append((num, url))
             
             # 売上高
-            revenue_pattern = r'売上[高]?\s*[:：]?\s*(\d+(?:\.\d+)?)\s*[億万]'
-            revenue_matches = re.findall(revenue_pattern, content)
+            revenue_matches = _REVENUE_PATTERN.findall(content)
             if revenue_matches:
                 if '売上高' not in numeric_data:
                     numeric_data['売上高'] = []
@@ -365,7 +372,7 @@ class ReliabilityScorer:
         # 数値を含む文を優先
         sentences = content.split('。')
         for sentence in sentences:
-            if re.search(r'\d+', sentence) and len(sentence) > 20:
+            if len(sentence) > 20 and _DIGIT_PATTERN.search(sentence):
                 facts.append(sentence.strip())
         
         return facts[:5]  # 最大5つの事実
\ No newline at end of file
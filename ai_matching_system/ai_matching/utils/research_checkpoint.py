@@ -0,0 +1,110 @@
+"""
+DeepResearchのチェックポイント
+サイクル完了ごとにResearchStateを圧縮して保存し、プロセスの再起動後は
+最後に完了したサイクルから候補者の評価を再開する
+"""
+
+import json
+import os
+import sqlite3
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from ..nodes.base import ResearchState
+
+
+# ResearchStateや評価ノードの構造を変更した場合は更新して古いチェックポイントを無効化する
+CHECKPOINT_VERSION = "1"
+
+
+class ResearchCheckpointStore:
+    """チェックポイントキー（入力フィンガープリント）をキーとするSQLiteストア"""
+
+    def __init__(self, storage_path: Optional[str] = None, ttl_hours: Optional[float] = None):
+        """
+        Args:
+            storage_path: 保存先ディレクトリ（省略時はRESEARCH_CHECKPOINT_PATHまたは./research_checkpoint_data）
+            ttl_hours: 再開されないまま残ったチェックポイントの保持時間（省略時はRESEARCH_CHECKPOINT_TTL_HOURS、デフォルト72時間）
+        """
+        self.storage_path = storage_path or os.getenv("RESEARCH_CHECKPOINT_PATH", "./research_checkpoint_data")
+        os.makedirs(self.storage_path, exist_ok=True)
+        self.db_path = os.path.join(self.storage_path, "research_checkpoint.db")
+        self.ttl_seconds = (ttl_hours or float(os.getenv("RESEARCH_CHECKPOINT_TTL_HOURS", "72"))) * 3600
+        self._init_database()
+
+    @contextmanager
+    def _get_db(self):
+        """データベース接続を取得"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _init_database(self):
+        """テーブルを初期化し、期限切れのチェックポイントを削除"""
+        with self._get_db() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS research_checkpoints (
+                    checkpoint_key TEXT PRIMARY KEY,
+                    candidate_id TEXT,
+                    cycle INTEGER NOT NULL,
+                    state BLOB NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("DELETE FROM research_checkpoints WHERE updated_at < ?", (time.time() - self.ttl_seconds,))
+
+    def save(self, checkpoint_key: str, state: ResearchState) -> int:
+        """
+        状態を保存（同じキーのチェックポイントは上書き）
+
+        Returns:
+            保存したバイト数
+        """
+        data = zlib.compress(json.dumps(state.to_dict(), ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        with self._get_db() as conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO research_checkpoints (checkpoint_key, candidate_id, cycle, state, updated_at)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (checkpoint_key, state.candidate_id, state.current_cycle, data, time.time())
+            )
+        return len(data)
+
+    def load(self, checkpoint_key: str) -> Optional[ResearchState]:
+        """
+        保存済みの状態を復元
+
+        Returns:
+            ResearchState、存在しないか期限切れ・復元できない場合はNone
+        """
+        with self._get_db() as conn:
+            row = conn.execute(
+                "SELECT state, updated_at FROM research_checkpoints WHERE checkpoint_key = ?",
+                (checkpoint_key,)
+            ).fetchone()
+        if not row or row[1] < time.time() - self.ttl_seconds:
+            return None
+        try:
+            return ResearchState.from_dict(json.loads(zlib.decompress(row[0]).decode("utf-8")))
+        except Exception as e:
+            print(f"[ResearchCheckpoint] チェックポイントを復元できないため破棄します: {e}")
+            self.delete(checkpoint_key)
+            return None
+
+    def delete(self, checkpoint_key: str) -> None:
+        """チェックポイントを削除"""
+        with self._get_db() as conn:
+            conn.execute("DELETE FROM research_checkpoints WHERE checkpoint_key = ?", (checkpoint_key,))
+
+    def get_stats(self) -> Dict[str, int]:
+        """保存中のチェックポイントの統計"""
+        with self._get_db() as conn:
+            count, total_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(state)), 0) FROM research_checkpoints"
+            ).fetchone()
+        return {"checkpoints": count, "total_bytes": total_bytes}
@@ -0,0 +1,365 @@
+"""
+外部呼び出しの耐障害性
+Gemini・Tavily・Pinecone・Supabaseの呼び出しに、呼び出し種別ごとの期限、再試行可能なエラーの
+指数バックオフ付きリトライ、p95レイテンシを超えた呼び出しのヘッジ（重複リクエスト）、
+障害が続くプロバイダーを一定時間遮断するサーキットブレーカーを適用する。
+遮断中はCircuitOpenErrorで即座に失敗するため、呼び出し側は待たずにフォールバックできる
+冪等でない書き込み（idempotent=False）はリトライ・ヘッジしない
+"""
+
+import asyncio
+import concurrent.futures
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, fields, replace
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+
+@dataclass
+class CallPolicy:
+    """呼び出し種別ごとの期限・リトライ・ヘッジ・遮断の設定"""
+    deadline: float  # 1回の呼び出しの期限（秒）
+    max_attempts: int = 3
+    base_delay: float = 0.5  # リトライ間隔の初期値（秒）。試行ごとに倍にする
+    max_delay: float = 8.0
+    hedge: bool = False  # p95レイテンシを超えたら重複リクエストを送る（冪等な呼び出しのみ）
+    failure_threshold: int = 5  # サーキットブレーカーを開く連続失敗数
+    open_seconds: float = 30.0  # サーキットブレーカーを開いておく秒数
+
+
+# 呼び出し種別 -> 設定（RESILIENCE_POLICIES（JSON）で項目単位に上書き）
+DEFAULT_POLICIES = {
+    "gemini": CallPolicy(deadline=120.0, base_delay=1.0),
+    "tavily": CallPolicy(deadline=20.0, max_attempts=2, hedge=True),
+    "pinecone": CallPolicy(deadline=10.0, hedge=True),
+    "supabase": CallPolicy(deadline=15.0)
+}
+
+# ヘッジの判定に使うレイテンシの件数
+_LATENCY_WINDOW = 100
+_MIN_HEDGE_SAMPLES = 20
+
+_RETRYABLE_ERROR_NAMES = {
+    "ServiceUnavailable", "DeadlineExceeded", "InternalServerError", "TooManyRequests", "ResourceExhausted",
+    "BadGateway", "GatewayTimeout", "ConnectError", "ConnectTimeout", "ReadTimeout", "RemoteDisconnected"
+}
+_RETRYABLE_STATUS_PATTERN = re.compile(r"\b(429|500|502|503|504)\b")
+
+# call_syncで期限を適用するための実行スレッド（期限切れの呼び出しはスレッド上で完了まで残る）
+_sync_executor = concurrent.futures.ThreadPoolExecutor(max_workers=32, thread_name_prefix="resilience")
+
+
+class CircuitOpenError(Exception):
+    """サーキットブレーカーが開いているため呼び出さなかった"""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """一時的な障害（タイムアウト・接続エラー・429/5xx）か"""
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    return type(error).__name__ in _RETRYABLE_ERROR_NAMES or bool(_RETRYABLE_STATUS_PATTERN.search(str(error)))
+
+
+def _load_policies() -> Dict[str, CallPolicy]:
+    """DEFAULT_POLICIESにRESILIENCE_POLICIESの上書きを適用"""
+    try:
+        overrides = json.loads(os.getenv("RESILIENCE_POLICIES", "{}"))
+    except json.JSONDecodeError as e:
+        print(f"[Resilience] RESILIENCE_POLICIESを解釈できません（デフォルト値を使用）: {e}")
+        overrides = {}
+
+    known = {f.name for f in fields(CallPolicy)}
+    policies = dict(DEFAULT_POLICIES)
+    for call_class, values in overrides.items():
+        base = policies.get(call_class, CallPolicy(deadline=30.0))
+        policies[call_class] = replace(base, **{k: v for k, v in values.items() if k in known})
+    return policies
+
+
+class CircuitBreaker:
+    """連続失敗で開き、一定時間後に1件だけ試行して閉じるか判断するブレーカー"""
+
+    def __init__(self, name: str, failure_threshold: int, open_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.state = "closed"  # closed / open / half_open
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """呼び出してよいか（半開状態では試行中の1件以外を拒否）"""
+        with self._lock:
+            if self.state == "open" and time.time() - self.opened_at >= self.open_seconds:
+                self.state = "half_open"
+                self._probing = False
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def release_probe(self) -> None:
+        """試行中の呼び出しが結果不明のまま終わった（キャンセル等）場合に、次の呼び出しで再試行できるようにする"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self) -> bool:
+        """
+        一時的な障害を記録
+
+        Returns:
+            この失敗でブレーカーが開いたか
+        """
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+                self.state = "open"
+                self.opened_at = time.time()
+                return True
+            return False
+
+
+_policies: Optional[Dict[str, CallPolicy]] = None
+_breakers: Dict[str, CircuitBreaker] = {}
+_latencies: Dict[str, Deque[float]] = {}
+# 呼び出し種別 -> 呼び出し統計
+_counters: Dict[str, Dict[str, int]] = {}
+_lock = threading.Lock()
+
+
+def get_policy(call_class: str) -> CallPolicy:
+    """呼び出し種別の設定を取得"""
+    global _policies
+    with _lock:
+        if _policies is None:
+            _policies = _load_policies()
+        return _policies.get(call_class) or _policies.setdefault(call_class, CallPolicy(deadline=30.0))
+
+
+def _get_breaker(call_class: str, key: Optional[str], policy: CallPolicy) -> CircuitBreaker:
+    name = f"{call_class}:{key}" if key else call_class
+    with _lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, policy.failure_threshold, policy.open_seconds)
+        return _breakers[name]
+
+
+def _count(call_class: str, **counts: int) -> None:
+    with _lock:
+        stats = _counters.setdefault(call_class, {
+            "calls": 0, "failures": 0, "retries": 0, "timeouts": 0,
+            "hedges": 0, "hedge_wins": 0, "breaker_trips": 0, "rejected": 0
+        })
+        for name, value in counts.items():
+            stats[name] += value
+
+
+def _observe_latency(call_class: str, latency: float) -> None:
+    with _lock:
+        _latencies.setdefault(call_class, deque(maxlen=_LATENCY_WINDOW)).append(latency)
+
+
+def _hedge_delay(call_class: str) -> Optional[float]:
+    """直近の成功した呼び出しのp95レイテンシ（件数が足りない場合はNone）"""
+    with _lock:
+        samples = sorted(_latencies.get(call_class, ()))
+    if len(samples) < _MIN_HEDGE_SAMPLES:
+        return None
+    return samples[int(len(samples) * 0.95) - 1]
+
+
+def _record_failure(call_class: str, breaker: CircuitBreaker, error: BaseException) -> None:
+    """失敗を集計し、一時的な障害ならブレーカーに記録（入力エラー等はプロバイダーが応答しているため正常扱い）"""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        _count(call_class, timeouts=1)
+    if not is_retryable(error):
+        breaker.record_success()
+    elif breaker.record_failure():
+        _count(call_class, breaker_trips=1)
+        print(f"[Resilience] {breaker.name}: 障害が続いているため{breaker.open_seconds:.0f}秒間呼び出しを遮断")
+
+
+def _backoff(policy: CallPolicy, attempt: int) -> float:
+    """指数バックオフ（ジッター付き）の待機秒数"""
+    return min(policy.base_delay * 2 ** (attempt - 1), policy.max_delay) * random.uniform(0.5, 1.0)
+
+
+async def _hedged(call_class: str, factory: Callable[[], Awaitable[Any]], hedge_after: float) -> Any:
+    """hedge_after秒以内に終わらなければ重複リクエストを送り、先に成功した方を使う"""
+    tasks = [asyncio.ensure_future(factory())]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if not done:
+            _count(call_class, hedges=1)
+            tasks.append(asyncio.ensure_future(factory()))
+
+        error: Optional[BaseException] = None
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is not tasks[0]:
+                        _count(call_class, hedge_wins=1)
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def call_async(call_class: str, factory: Callable[[], Awaitable[Any]], key: Optional[str] = None,
+                     retryable: Callable[[BaseException], bool] = is_retryable, idempotent: bool = True) -> Any:
+    """
+    期限・リトライ・ヘッジ・サーキットブレーカー付きで非同期呼び出しを実行
+
+    Args:
+        call_class: 呼び出し種別（gemini / tavily / pinecone / supabase）
+        factory: 呼び出しを開始するコルーチンを返す関数（リトライ・ヘッジのたびに呼ぶ）
+        key: ブレーカーを分ける単位（モデル名など。省略時は呼び出し種別ごと）
+        retryable: リトライするエラーか（ブレーカーにはis_retryableで判定した一時的な障害を記録）
+        idempotent: 繰り返し実行してよいか（Falseの場合、タイムアウト後に書き込みが反映されている
+            可能性があるためリトライ・ヘッジしない）
+
+    Raises:
+        CircuitOpenError: ブレーカーが開いている
+    """
+    policy = get_policy(call_class)
+    breaker = _get_breaker(call_class, key, policy)
+    _count(call_class, calls=1)
+
+    attempt = 1
+    while True:
+        if not breaker.allow():
+            _count(call_class, rejected=1)
+            raise CircuitOpenError(f"{breaker.name}: サーキットブレーカーが開いているため呼び出しません")
+
+        started = time.time()
+        hedge_after = _hedge_delay(call_class) if policy.hedge and idempotent else None
+        try:
+            if hedge_after is not None and hedge_after < policy.deadline:
+                result = await asyncio.wait_for(_hedged(call_class, factory, hedge_after), policy.deadline)
+            else:
+                result = await asyncio.wait_for(factory(), policy.deadline)
+        except Exception as e:
+            _record_failure(call_class, breaker, e)
+            if attempt >= policy.max_attempts or not idempotent or not retryable(e):
+                _count(call_class, failures=1)
+                raise
+            delay = _backoff(policy, attempt)
+            _count(call_class, retries=1)
+            print(f"  [Resilience] {call_class}: {e!r}（{attempt}/{policy.max_attempts}回目）。{delay:.1f}秒後に再試行")
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+        except BaseException:
+            # キャンセル（wait_forの期限切れ・NodeGraphの停止など）は成否不明のため試行枠だけ解放する
+            breaker.release_probe()
+            raise
+
+        breaker.record_success()
+        _observe_latency(call_class, time.time() - started)
+        return result
+
+
+async def call_blocking(call_class: str, fn: Callable[..., Any], *args, idempotent: bool = True, **kwargs) -> Any:
+    """
+    同期APIをスレッドで呼び出す（call_asyncの期限・リトライ・ヘッジ・ブレーカーを適用）
+
+    期限を過ぎると呼び出し元には制御が戻るが、実行中のスレッド自体は止められない
+    （クライアント側のタイムアウトを設定できるAPIではそちらも併用する）。
+    挿入など冪等でない書き込みはidempotent=Falseで呼び出す
+    """
+    return await call_async(call_class, lambda: asyncio.to_thread(fn, *args, **kwargs), idempotent=idempotent)
+
+
+def _on_event_loop() -> bool:
+    """現在のスレッドでイベントループが実行中か"""
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+def _call_with_deadline(fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any], deadline: float) -> Any:
+    """同期呼び出しを実行スレッドで行い、期限を過ぎたらTimeoutErrorで呼び出し元に戻る"""
+    future = _sync_executor.submit(fn, *args, **kwargs)
+    try:
+        return future.result(timeout=deadline)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise TimeoutError(f"{deadline:g}秒の期限を超えました") from None
+
+
+def call_sync(call_class: str, fn: Callable[..., Any], *args, key: Optional[str] = None,
+              retryable: Callable[[BaseException], bool] = is_retryable, idempotent: bool = True, **kwargs) -> Any:
+    """
+    同期呼び出しに期限・リトライ・サーキットブレーカーを適用
+
+    呼び出しは実行スレッドで行い、期限を過ぎると呼び出し元に戻る（実行中の呼び出し自体は止められないため、
+    クライアント側のタイムアウト（Geminiのrequest_optionsなど）も併用する）。ヘッジは行わない。
+    イベントループ上から呼ばれた場合は、バックオフの待機でループを止めないようリトライしない
+    """
+    policy = get_policy(call_class)
+    breaker = _get_breaker(call_class, key, policy)
+    _count(call_class, calls=1)
+
+    attempt = 1
+    while True:
+        if not breaker.allow():
+            _count(call_class, rejected=1)
+            raise CircuitOpenError(f"{breaker.name}: サーキットブレーカーが開いているため呼び出しません")
+
+        started = time.time()
+        try:
+            result = _call_with_deadline(fn, args, kwargs, policy.deadline)
+        except Exception as e:
+            _record_failure(call_class, breaker, e)
+            if attempt >= policy.max_attempts or not idempotent or not retryable(e) or _on_event_loop():
+                _count(call_class, failures=1)
+                raise
+            delay = _backoff(policy, attempt)
+            _count(call_class, retries=1)
+            print(f"  [Resilience] {call_class}: {e!r}（{attempt}/{policy.max_attempts}回目）。{delay:.1f}秒後に再試行")
+            time.sleep(delay)
+            attempt += 1
+            continue
+        except BaseException:
+            breaker.release_probe()
+            raise
+
+        breaker.record_success()
+        _observe_latency(call_class, time.time() - started)
+        return result
+
+
+def get_resilience_stats() -> Dict[str, Dict[str, Any]]:
+    """呼び出し種別ごとのリトライ・ヘッジ・ブレーカー遮断の累計と、ブレーカーの状態を取得"""
+    with _lock:
+        stats = {call_class: dict(counts) for call_class, counts in _counters.items()}
+        breakers = list(_breakers.values())
+    for breaker in breakers:
+        call_class = breaker.name.split(":", 1)[0]
+        stats.setdefault(call_class, {}).setdefault("breakers", {})[breaker.name] = breaker.state
+    return stats
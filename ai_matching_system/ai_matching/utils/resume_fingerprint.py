@@ -0,0 +1,306 @@
+"""
+レジュメの近似重複検出
+文字シングルのMinHash署名とLSHバケットで、同一人物の再スクレイピング等による
+ほぼ同一のレジュメを検出する
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import unicodedata
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# 2^61 - 1（メルセンヌ素数）を法とするユニバーサルハッシュ
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+@dataclass
+class DuplicateGroup:
+    """近似重複グループ"""
+    representative_id: str
+    duplicate_ids: List[str]
+    similarities: Dict[str, float]  # duplicate_id -> 代表との推定Jaccard類似度
+
+
+class ResumeFingerprintIndex:
+    """MinHash + LSH によるレジュメ指紋インデックス"""
+
+    def __init__(self, storage_path: Optional[str] = None, num_perm: int = 64, bands: int = 16,
+                 shingle_size: int = 5, threshold: float = 0.85):
+        """
+        Args:
+            storage_path: 保存先ディレクトリ（省略時はRESUME_FINGERPRINT_PATHまたは./resume_fingerprint_data）
+            num_perm: MinHashの置換数
+            bands: LSHのバンド数（num_permを割り切れること）
+            shingle_size: 文字シングルの長さ
+            threshold: 重複とみなす推定Jaccard類似度
+        """
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+
+        # 置換ごとのハッシュ係数（固定シードで決定的に生成）
+        self._coefficients = [
+            (self._seeded(i, 1) % (_MERSENNE_PRIME - 1) + 1, self._seeded(i, 2) % _MERSENNE_PRIME)
+            for i in range(num_perm)
+        ]
+
+        self.storage_path = storage_path or os.getenv("RESUME_FINGERPRINT_PATH", "./resume_fingerprint_data")
+        os.makedirs(self.storage_path, exist_ok=True)
+        self.db_path = os.path.join(self.storage_path, "resume_fingerprints.db")
+        self._init_database()
+
+    @staticmethod
+    def _seeded(index: int, salt: int) -> int:
+        """決定的な疑似乱数を生成"""
+        return zlib.crc32(f"minhash-{index}-{salt}".encode()) * 2654435761 + index
+
+    @contextmanager
+    def _get_db(self):
+        """データベース接続を取得"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _init_database(self):
+        """テーブルを初期化"""
+        with self._get_db() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS resume_signatures (
+                    candidate_key TEXT PRIMARY KEY,
+                    signature TEXT NOT NULL,
+                    text_hash TEXT,
+                    updated_at TEXT NOT NULL
+                )
+            """)
+            # 既存のデータベースにレジュメ内容のハッシュ列を追加
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(resume_signatures)")}
+            if "text_hash" not in columns:
+                conn.execute("ALTER TABLE resume_signatures ADD COLUMN text_hash TEXT")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS lsh_buckets (
+                    band INTEGER NOT NULL,
+                    bucket TEXT NOT NULL,
+                    candidate_key TEXT NOT NULL,
+                    PRIMARY KEY (band, bucket, candidate_key)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_lsh_candidate ON lsh_buckets(candidate_key)")
+
+    def _shingles(self, text: str) -> set:
+        """正規化したテキストから文字シングルのハッシュ集合を生成"""
+        normalized = _WHITESPACE_PATTERN.sub('', unicodedata.normalize('NFKC', text or '').lower())
+        if len(normalized) <= self.shingle_size:
+            return {zlib.crc32(normalized.encode())} if normalized else set()
+        return {
+            zlib.crc32(normalized[i:i + self.shingle_size].encode())
+            for i in range(len(normalized) - self.shingle_size + 1)
+        }
+
+    def compute_signature(self, text: str) -> List[int]:
+        """MinHash署名を計算"""
+        shingles = self._shingles(text)
+        if not shingles:
+            return [_MAX_HASH] * self.num_perm
+
+        return [
+            min(((a * s + b) % _MERSENNE_PRIME) & _MAX_HASH for s in shingles)
+            for a, b in self._coefficients
+        ]
+
+    def _text_hash(self, text: str) -> str:
+        """署名の計算対象（レジュメ内容と署名パラメータ）のハッシュ"""
+        return hashlib.sha256(f"{self.num_perm}:{self.shingle_size}:{text}".encode("utf-8")).hexdigest()
+
+    def _band_buckets(self, signature: List[int]) -> List[Tuple[int, str]]:
+        """署名をLSHバンドのバケットキーに変換"""
+        return [
+            (band, "-".join(str(v) for v in signature[band * self.rows:(band + 1) * self.rows]))
+            for band in range(self.bands)
+        ]
+
+    @staticmethod
+    def estimate_similarity(sig1: List[int], sig2: List[int]) -> float:
+        """署名から推定Jaccard類似度を計算"""
+        if not sig1 or not sig2:
+            return 0.0
+        return sum(1 for a, b in zip(sig1, sig2) if a == b) / len(sig1)
+
+    def add(self, candidate_key: str, resume_text: str) -> List[int]:
+        """
+        レジュメを登録（取り込み時に呼び出す）
+
+        Args:
+            candidate_key: 候補者の一意キー（candidates.id）
+            resume_text: レジュメテキスト
+
+        Returns:
+            MinHash署名
+        """
+        return self.add_many([(candidate_key, resume_text)])[candidate_key]
+
+    def add_many(self, items: Iterable[Tuple[str, str]]) -> Dict[str, List[int]]:
+        """複数のレジュメをまとめて登録"""
+        texts = {key: text for key, text in items if key and text}
+        signatures = {key: self.compute_signature(text) for key, text in texts.items()}
+        if not signatures:
+            return {}
+
+        now = datetime.now().isoformat()
+        with self._get_db() as conn:
+            for key, signature in signatures.items():
+                conn.execute("DELETE FROM lsh_buckets WHERE candidate_key = ?", (key,))
+                conn.execute(
+                    """INSERT OR REPLACE INTO resume_signatures (candidate_key, signature, text_hash, updated_at)
+                       VALUES (?, ?, ?, ?)""",
+                    (key, json.dumps(signature), self._text_hash(texts[key]), now)
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO lsh_buckets (band, bucket, candidate_key) VALUES (?, ?, ?)",
+                    [(band, bucket, key) for band, bucket in self._band_buckets(signature)]
+                )
+        return signatures
+
+    def get_signatures(self, candidate_keys: List[str]) -> Dict[str, List[int]]:
+        """登録済みの署名を取得"""
+        if not candidate_keys:
+            return {}
+        placeholders = ",".join("?" for _ in candidate_keys)
+        with self._get_db() as conn:
+            rows = conn.execute(
+                f"SELECT candidate_key, signature FROM resume_signatures WHERE candidate_key IN ({placeholders})",
+                candidate_keys
+            ).fetchall()
+        return {key: json.loads(signature) for key, signature in rows}
+
+    def _get_current_signatures(self, items: List[Tuple[str, str]]) -> Dict[str, List[int]]:
+        """
+        現在のレジュメ内容に対応する署名を取得
+
+        未登録のレジュメや、登録後に内容（または署名パラメータ）が変わったレジュメは計算し直して登録する
+        """
+        keys = [key for key, _ in items]
+        stored = {}
+        if keys:
+            placeholders = ",".join("?" for _ in keys)
+            with self._get_db() as conn:
+                rows = conn.execute(
+                    f"SELECT candidate_key, signature, text_hash FROM resume_signatures WHERE candidate_key IN ({placeholders})",
+                    keys
+                ).fetchall()
+            stored = {key: (json.loads(signature), text_hash) for key, signature, text_hash in rows}
+
+        signatures = {}
+        stale = []
+        for key, text in items:
+            if not text:
+                continue
+            signature, text_hash = stored.get(key, (None, None))
+            if signature is not None and text_hash == self._text_hash(text):
+                signatures[key] = signature
+            else:
+                stale.append((key, text))
+        if stale:
+            signatures.update(self.add_many(stale))
+        return signatures
+
+    def find_duplicates(self, resume_text: str, exclude_key: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        登録済みレジュメから近似重複を検索
+
+        Returns:
+            [(candidate_key, similarity), ...]（類似度降順）
+        """
+        signature = self.compute_signature(resume_text)
+        buckets = self._band_buckets(signature)
+
+        with self._get_db() as conn:
+            keys = set()
+            for band, bucket in buckets:
+                rows = conn.execute(
+                    "SELECT candidate_key FROM lsh_buckets WHERE band = ? AND bucket = ?",
+                    (band, bucket)
+                ).fetchall()
+                keys.update(row[0] for row in rows)
+        keys.discard(exclude_key)
+
+        matches = []
+        for key, other in self.get_signatures(list(keys)).items():
+            similarity = self.estimate_similarity(signature, other)
+            if similarity >= self.threshold:
+                matches.append((key, similarity))
+        return sorted(matches, key=lambda x: x[1], reverse=True)
+
+    def group_near_duplicates(self, items: List[Tuple[str, str]]) -> List[DuplicateGroup]:
+        """
+        候補者リストを近似重複グループにまとめる
+
+        推定類似度は推移的ではないため、グループの各メンバーは代表との類似度が閾値以上であることを条件とする
+        （A≈B、B≈Cでも、AとCが閾値未満ならCはAのグループに入らない）
+
+        Args:
+            items: [(candidate_key, resume_text), ...]（先頭ほど代表に選ばれやすい）
+
+        Returns:
+            DuplicateGroupのリスト（重複のない候補者も1件のグループとして含む）
+        """
+        keys = list(dict.fromkeys(key for key, _ in items))
+        signatures = self._get_current_signatures(items)
+
+        # LSHバケットで候補ペアを絞り込み
+        bucket_members: Dict[Tuple[int, str], List[str]] = {}
+        for key in keys:
+            if key not in signatures:
+                continue
+            for band_bucket in self._band_buckets(signatures[key]):
+                bucket_members.setdefault(band_bucket, []).append(key)
+        neighbors: Dict[str, set] = {key: set() for key in keys}
+        for members in bucket_members.values():
+            for key in members:
+                neighbors[key].update(members)
+
+        # 入力順で未割り当ての候補者を代表とし、代表と閾値以上の候補者のみをグループに加える
+        assigned = set()
+        result = []
+        for representative in keys:
+            if representative in assigned:
+                continue
+            assigned.add(representative)
+            similarities = {}
+            for key in keys:
+                if key in assigned or key not in neighbors[representative]:
+                    continue
+                similarity = self.estimate_similarity(signatures[representative], signatures[key])
+                if similarity >= self.threshold:
+                    similarities[key] = similarity
+                    assigned.add(key)
+            result.append(DuplicateGroup(
+                representative_id=representative,
+                duplicate_ids=list(similarities),
+                similarities=similarities
+            ))
+        return result
+
+    def remove(self, candidate_key: str) -> None:
+        """登録を削除"""
+        with self._get_db() as conn:
+            conn.execute("DELETE FROM lsh_buckets WHERE candidate_key = ?", (candidate_key,))
+            conn.execute("DELETE FROM resume_signatures WHERE candidate_key = ?", (candidate_key,))
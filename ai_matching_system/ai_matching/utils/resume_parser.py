@@ -3,15 +3,19 @@
 Gemini 2.0 Proを使用してレジュメを構造化データに変換
 """
 
+import asyncio
 import os
 import json
 import re
 import time
+import hashlib
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
 from datetime import datetime
 import google.generativeai as genai
 
+from .model_router import get_model_router
+
 
 @dataclass
 class CareerHistory:
@@ -50,6 +54,35 @@ class StructuredResume:
     metadata: Dict[str, Any]
 
 
+def career_timeline_from_structured(structured_resume_data: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    構造化レジュメから職歴タイムラインを取り出す（各分析器が共有する正規形式）
+    
+    Args:
+        structured_resume_data: StructuredResumeを辞書化したもの（raw_data.career_historyを参照）
+        
+    Returns:
+        [{"company", "role", "department", "start_date": "YYYY-MM", "end_date": "YYYY-MM" or None,
+          "responsibilities": [...]}, ...]（新しい順、抽出できない場合は空リスト）
+    """
+    if not structured_resume_data:
+        return []
+    
+    career_history = (structured_resume_data.get("raw_data") or {}).get("career_history") or []
+    timeline = []
+    for job in career_history:
+        period = job.get("period") or {}
+        timeline.append({
+            "company": job.get("company"),
+            "role": job.get("role"),
+            "department": job.get("department"),
+            "start_date": period.get("start"),
+            "end_date": period.get("end"),
+            "responsibilities": job.get("responsibilities") or []
+        })
+    return timeline
+
+
 class ResumeParser:
     """レジュメ構造化パーサー"""
     
@@ -61,15 +94,23 @@ class ResumeParser:
             raise ValueError("Gemini APIキーが設定されていません")
         
         genai.configure(api_key=api_key)
-        # Gemini 2.5 Pro を使用
-        self.model = genai.GenerativeModel('gemini-2.5-pro')
+        # pro階層（Gemini 2.5 Pro）を使用。クォータ超過時はルーターがdeep階層に切り替える
+        self.model = get_model_router().model_for("ResumeParser")
         # Gemini 2.5 Pro: 5 RPM = 12秒間隔が必要
         # マッチング判断の処理時間（約5秒）を考慮して7秒の遅延
         self.rate_limit_delay = 7  # レート制限対策の遅延（秒）
         self.last_request_time = None  # 最後のリクエスト時刻を記録
+        # 同一レジュメの再抽出を避けるためのキャッシュ（レジュメのハッシュ -> 構造化結果）
+        self._cache: Dict[str, StructuredResume] = {}
+        self.max_cache_size = 256
     
     async def parse_resume(self, resume_text: str) -> StructuredResume:
-        """レジュメを構造化データに変換"""
+        """レジュメを構造化データに変換（同一レジュメは1回だけ抽出）"""
+        
+        cache_key = hashlib.sha256(resume_text.encode("utf-8")).hexdigest()
+        if cache_key in self._cache:
+            print("[ResumeParser] 構造化済みのレジュメを再利用")
+            return self._cache[cache_key]
         
         print("[ResumeParser] レジュメの構造化を開始...")
         
@@ -80,7 +121,7 @@ class ResumeParser:
             if elapsed < required_interval:
                 wait_time = required_interval - elapsed
                 print(f"[ResumeParser] レート制限対策として{wait_time:.1f}秒待機...")
-                time.sleep(wait_time)
+                await asyncio.sleep(wait_time)
         
         # プロンプトを作成
         prompt = self._create_parsing_prompt(resume_text)
@@ -90,7 +131,7 @@ class ResumeParser:
             self.last_request_time = time.time()
             
             # Gemini 2.5 Proで構造化
-            response = self.model.generate_content(prompt)
+            response = await self.model.generate_content_async(prompt)
             response_text = response.text
             
             # JSONを抽出
@@ -103,10 +144,16 @@ class ResumeParser:
             
             # 次のマッチング判断のための遅延（処理時間を考慮）
             print(f"[ResumeParser] 次の処理のために{self.rate_limit_delay}秒待機...")
-            time.sleep(self.rate_limit_delay)
+            await asyncio.sleep(self.rate_limit_delay)
             
             # ハイブリッド型データを構築
-            return self._build_structured_resume(structured_data, resume_text)
+            structured_resume = self._build_structured_resume(structured_data, resume_text)
+            
+            # 失敗時のデフォルト構造はキャッシュしない
+            if len(self._cache) >= self.max_cache_size:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[cache_key] = structured_resume
+            return structured_resume
             
         except Exception as e:
             print(f"[ResumeParser] エラー: {e}")
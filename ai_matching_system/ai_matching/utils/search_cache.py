@@ -0,0 +1,184 @@
+"""
+Web検索結果のキャッシュ
+正規化した検索クエリをキーに、Tavilyの検索結果（信頼性スコア付き）をSQLiteに保存して
+候補者をまたいで再利用する。有効期限はクエリの種類（企業情報・市場動向など）ごとに設定する
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from .fingerprint import fingerprint
+
+
+# クエリの種類ごとのデフォルト有効期限（時間）
+DEFAULT_TTL_HOURS = {
+    "company": 24 * 30,  # 企業規模・事業内容などの企業情報
+    "market": 24 * 3,  # 年収相場・需要・業界動向
+    "general": 24 * 7
+}
+
+# 情報ギャップの種類 -> クエリの種類
+INFO_TYPE_QUERY_TYPES = {
+    "環境適応性ギャップ": "company",
+    "企業規模比較": "company",
+    "市場競争力ギャップ": "market"
+}
+
+# クエリ中のキーワード -> クエリの種類（情報ギャップの種類で判定できない場合に使用）
+_QUERY_TYPE_PATTERNS = [
+    ("market", re.compile(r"市場価値|年収|相場|需要|動向|トレンド|成長予測|将来性")),
+    ("company", re.compile(r"企業規模|従業員数|売上高|事業内容|企業文化|組織文化|株式会社|有限会社|合同会社"))
+]
+
+def normalize_query(query: str) -> str:
+    """
+    検索クエリの正規化
+
+    空白・全角/半角・大文字小文字の揺れのみを吸収する（語順や繰り返しは検索結果に影響するため保持）
+    """
+    return " ".join(unicodedata.normalize("NFKC", query or "").lower().split())
+
+
+def classify_query(query: str, info_type: Optional[str] = None) -> str:
+    """クエリの種類（company / market / general）を判定"""
+    if info_type in INFO_TYPE_QUERY_TYPES:
+        return INFO_TYPE_QUERY_TYPES[info_type]
+    for query_type, pattern in _QUERY_TYPE_PATTERNS:
+        if pattern.search(query or ""):
+            return query_type
+    return "general"
+
+
+class SearchResultCache:
+    """正規化クエリと検索パラメータをキーとする件数上限付きの検索結果キャッシュ"""
+
+    def __init__(self, storage_path: Optional[str] = None, max_entries: Optional[int] = None,
+                 ttl_hours: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            storage_path: 保存先ディレクトリ（省略時はTAVILY_CACHE_PATHまたは./tavily_cache_data）
+            max_entries: 保持する最大件数（省略時はTAVILY_CACHE_MAX_ENTRIES、デフォルト20000）
+            ttl_hours: クエリの種類 -> 有効期限（時間）。省略時はTAVILY_CACHE_TTL_HOURS（JSON）で
+                DEFAULT_TTL_HOURSを上書き
+        """
+        self.storage_path = storage_path or os.getenv("TAVILY_CACHE_PATH", "./tavily_cache_data")
+        os.makedirs(self.storage_path, exist_ok=True)
+        self.db_path = os.path.join(self.storage_path, "search_cache.db")
+        self.max_entries = max_entries or int(os.getenv("TAVILY_CACHE_MAX_ENTRIES", "20000"))
+
+        if ttl_hours is None:
+            try:
+                ttl_hours = json.loads(os.getenv("TAVILY_CACHE_TTL_HOURS", "{}"))
+            except json.JSONDecodeError as e:
+                print(f"[SearchCache] TAVILY_CACHE_TTL_HOURSを解釈できません（デフォルト値を使用）: {e}")
+                ttl_hours = {}
+        self.ttl_hours = {**DEFAULT_TTL_HOURS, **{k: float(v) for k, v in ttl_hours.items()}}
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._init_database()
+
+    @contextmanager
+    def _get_db(self):
+        """データベース接続を取得"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _init_database(self):
+        """テーブルを初期化"""
+        with self._get_db() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS search_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    normalized_query TEXT NOT NULL,
+                    query_type TEXT NOT NULL,
+                    results TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_search_cache_last_used ON search_cache(last_used_at)")
+
+    @staticmethod
+    def cache_key(query: str, **search_params: Any) -> str:
+        """正規化クエリと検索パラメータ（search_depth, max_results等）からキーを生成"""
+        return fingerprint(normalize_query(query), search_params)
+
+    def get(self, cache_key: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        有効期限内の検索結果を取得
+
+        Returns:
+            信頼性スコア付きの検索結果、存在しないか期限切れの場合はNone
+        """
+        now = time.time()
+        with self._get_db() as conn:
+            row = conn.execute(
+                "SELECT results FROM search_cache WHERE cache_key = ? AND expires_at > ?",
+                (cache_key, now)
+            ).fetchone()
+            if row:
+                conn.execute("UPDATE search_cache SET last_used_at = ? WHERE cache_key = ?", (now, cache_key))
+
+        with self._lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return json.loads(row[0]) if row else None
+
+    def put(self, cache_key: str, query: str, query_type: str, results: List[Dict[str, Any]]) -> None:
+        """検索結果を保存（件数上限を超えた場合は期限切れ・最終利用が古いものから削除）"""
+        now = time.time()
+        ttl_seconds = self.ttl_hours.get(query_type, self.ttl_hours["general"]) * 3600
+        with self._get_db() as conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO search_cache
+                   (cache_key, normalized_query, query_type, results, expires_at, last_used_at)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (cache_key, normalize_query(query), query_type,
+                 json.dumps(results, ensure_ascii=False), now + ttl_seconds, now)
+            )
+            overflow = conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    """DELETE FROM search_cache WHERE cache_key IN (
+                           SELECT cache_key FROM search_cache ORDER BY expires_at > ?, last_used_at LIMIT ?
+                       )""",
+                    (now, overflow)
+                )
+
+    def clear(self) -> None:
+        """キャッシュをすべて削除"""
+        with self._get_db() as conn:
+            conn.execute("DELETE FROM search_cache")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """キャッシュ統計を取得（ヒット数はこのプロセスでの累計）"""
+        with self._get_db() as conn:
+            rows = conn.execute(
+                "SELECT query_type, COUNT(*) FROM search_cache WHERE expires_at > ? GROUP BY query_type",
+                (time.time(),)
+            ).fetchall()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "stored_entries": sum(count for _, count in rows),
+                "entries_by_type": dict(rows),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
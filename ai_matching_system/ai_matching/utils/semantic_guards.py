@@ -4,7 +4,8 @@
 """
 
 from typing import Dict, List, Tuple, Optional
-import re
+
+from .pattern_engine import KeywordMatcher
 
 
 class SemanticGuards:
@@ -18,6 +19,29 @@ class SemanticGuards:
         "results": ["売上", "受注", "成約", "契約", "販売実績", "営業成績"]
     }
     
+    # 営業用語のマッチャー（全カテゴリを1回の走査で判定）
+    _SALES_MATCHER = KeywordMatcher(SALES_TERMS)
+    
+    # 職種のドメイン知識（同一領域 / 関連領域 / 転用可能スキル）
+    ROLE_MAPPINGS = {
+        "営業": {
+            "same": ["セールス", "販売", "ビジネス開発", "bd"],
+            "related": ["マーケティング", "企画営業", "コンサルタント"],
+            "transferable": ["接客", "カスタマーサクセス", "アカウント管理"]
+        },
+        "エンジニア": {
+            "same": ["開発者", "プログラマー", "デベロッパー", "開発"],
+            "related": ["インフラ", "システム管理", "テクニカルサポート"],
+            "transferable": ["データ分析", "業務改善", "it管理"]
+        },
+        "経理": {
+            "same": ["会計", "財務", "経理財務", "管理会計"],
+            "related": ["財務会計", "税務", "監査"],
+            "transferable": ["経営企画", "管理部門", "バックオフィス"]
+        }
+    }
+    _ROLE_MATCHERS = {role: KeywordMatcher(mappings) for role, mappings in ROLE_MAPPINGS.items()}
+    
     # 職種の本質的な違いを定義
     ROLE_BOUNDARIES = {
         "営業": {
@@ -54,19 +78,19 @@ class SemanticGuards:
         evidence = []
         confidence = 0.0
         
+        hits = cls._SALES_MATCHER.scan(resume_text)
+        
         # 直接的な営業用語をチェック
-        for term in cls.SALES_TERMS["direct"]:
-            if term in resume_text:
-                evidence.append(f"直接的な営業用語: {term}")
-                confidence = max(confidence, 0.9)
+        for term in hits.get("direct", []):
+            evidence.append(f"直接的な営業用語: {term}")
+            confidence = max(confidence, 0.9)
         
         # 間接的な指標をチェック
         indirect_count = 0
         for category in ["indirect", "activities", "results"]:
-            for term in cls.SALES_TERMS[category]:
-                if term in resume_text:
-                    evidence.append(f"{category}: {term}")
-                    indirect_count += 1
+            for term in hits.get(category, []):
+                evidence.append(f"{category}: {term}")
+                indirect_count += 1
         
         # 間接的な指標が複数ある場合
         if indirect_count >= 3:
@@ -107,48 +131,19 @@ class SemanticGuards:
             result["reasoning"].append(f"直接的な経験: {required_role}")
             return result
         
-        # ドメイン知識に基づく評価
-        role_mappings = {
-            "営業": {
-                "same": ["セールス", "販売", "ビジネス開発", "bd"],
-                "related": ["マーケティング", "企画営業", "コンサルタント"],
-                "transferable": ["接客", "カスタマーサクセス", "アカウント管理"]
-            },
-            "エンジニア": {
-                "same": ["開発者", "プログラマー", "デベロッパー", "開発"],
-                "related": ["インフラ", "システム管理", "テクニカルサポート"],
-                "transferable": ["データ分析", "業務改善", "it管理"]
-            },
-            "経理": {
-                "same": ["会計", "財務", "経理財務", "管理会計"],
-                "related": ["財務会計", "税務", "監査"],
-                "transferable": ["経営企画", "管理部門", "バックオフィス"]
-            }
-        }
-        
-        # マッピングチェック
-        if required_role in role_mappings:
-            mappings = role_mappings[required_role]
-            
-            for same_role in mappings.get("same", []):
-                if same_role in candidate_exp:
-                    result["match_type"] = "same_domain"
-                    result["score_multiplier"] = 0.8
-                    result["reasoning"].append(f"同一領域: {same_role}")
-                    return result
-            
-            for related_role in mappings.get("related", []):
-                if related_role in candidate_exp:
-                    result["match_type"] = "related_domain"
-                    result["score_multiplier"] = 0.6
-                    result["reasoning"].append(f"関連領域: {related_role}")
-                    return result
-            
-            for transferable in mappings.get("transferable", []):
-                if transferable in candidate_exp:
-                    result["match_type"] = "transferable_skills"
-                    result["score_multiplier"] = 0.4
-                    result["reasoning"].append(f"転用可能: {transferable}")
+        # ドメイン知識に基づく評価（同一領域 → 関連領域 → 転用可能スキルの順に判定）
+        matcher = cls._ROLE_MATCHERS.get(required_role)
+        if matcher:
+            hits = matcher.scan(candidate_exp)
+            for tier, match_type, multiplier, label in [
+                ("same", "same_domain", 0.8, "同一領域"),
+                ("related", "related_domain", 0.6, "関連領域"),
+                ("transferable", "transferable_skills", 0.4, "転用可能")
+            ]:
+                if tier in hits:
+                    result["match_type"] = match_type
+                    result["score_multiplier"] = multiplier
+                    result["reasoning"].append(f"{label}: {hits[tier][0]}")
                     return result
         
         return result
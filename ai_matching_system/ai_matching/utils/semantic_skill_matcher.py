@@ -3,14 +3,88 @@
 LLMを使用してスキルの意味的類似性を判定
 """
 
+import asyncio
 import os
-from typing import Dict, List, Tuple, Optional
+from collections import OrderedDict
+from typing import Dict, List, Optional
 from dataclasses import dataclass
 import google.generativeai as genai
 from functools import lru_cache
 import hashlib
 import json
 
+import numpy as np
+
+from .batch_evaluator import BatchEvaluator, BatchItem
+from .model_router import get_model_router
+from .resilience import call_sync
+from .skill_similarity_store import PairScore, SkillSimilarityStore, normalize_skill
+from .skill_taxonomy import SkillTaxonomyIndex
+
+
+# スキル埋め込みのモデル
+SKILL_EMBEDDING_MODEL = "models/text-embedding-004"
+
+# 役職関連性の判定結果をメモリに保持する最大件数
+ROLE_CACHE_SIZE = 1000
+
+
+# スキルマッチングの評価基準（全候補で共通のプレフィックス）
+SKILL_MATCH_PROMPT = """あなたは採用のプロフェッショナルです。
+求人で求められる必須スキルと、各候補の候補者スキルの類似性を評価してください。
+
+# 評価基準
+1. **完全一致（1.0）**: 同じスキルまたは同義語
+   - 例: "法人営業" = "B2B営業" = "企業向け営業"
+   - 例: "Python" = "Python3" = "Python開発"
+
+2. **高い類似性（0.8-0.9）**: 実質的に同じスキル
+   - 例: "営業経験" ≈ "新規開拓営業" ≈ "アカウント営業"
+   - 例: "マネジメント" ≈ "チームリード" ≈ "部下指導"
+
+3. **中程度の類似性（0.6-0.7）**: 関連性の高いスキル
+   - 例: "財務" ≈ "経理" ≈ "管理会計"
+   - 例: "JavaScript" ≈ "TypeScript" ≈ "フロントエンド開発"
+
+4. **低い類似性（0.3-0.5）**: 部分的に関連
+   - 例: "営業" ≈ "カスタマーサクセス" ≈ "顧客対応"
+   - 例: "Java" ≈ "C#" ≈ "オブジェクト指向言語"
+
+5. **関連なし（0.0-0.2）**: 異なるスキル
+   - 例: "営業" ≠ "エンジニア"
+   - 例: "Python" ≠ "営業"
+
+# 出力内容
+各候補について、すべての必須スキルごとにmatchesの要素を1つ出力してください。
+- required_skill: 必須スキル（入力の表記のまま）
+- matched_candidate_skill: 最も類似した候補者スキル（ない場合は空文字）
+- match_score: 0.0-1.0の数値
+- reasoning: 判定理由
+- is_match: 0.3以上でtrue
+"""
+
+# 1候補分のレスポンススキーマ
+SKILL_MATCH_ITEM_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "matches": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "required_skill": {"type": "STRING"},
+                    "matched_candidate_skill": {"type": "STRING"},
+                    "match_score": {"type": "NUMBER"},
+                    "reasoning": {"type": "STRING"},
+                    "is_match": {"type": "BOOLEAN"}
+                },
+                "required": ["required_skill", "matched_candidate_skill", "match_score", "reasoning", "is_match"]
+            }
+        }
+    },
+    "required": ["matches"]
+}
+
 
 @dataclass
 class SkillMatchResult:
@@ -20,6 +94,7 @@ class SkillMatchResult:
     match_score: float  # 0.0-1.0
     reasoning: str
     is_match: bool
+    evaluated: bool = True  # LLM評価に失敗した場合はFalse（類似度ストアに保存しない）
 
 
 @dataclass
@@ -36,155 +111,334 @@ class SemanticSkillMatcher:
     
     def __init__(self, api_key: str):
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
-        self._cache = {}  # シンプルなメモリキャッシュ
+        self.model = get_model_router().model_for("SemanticSkillMatcher")
+        self._cache: "OrderedDict[str, RoleRelevanceResult]" = OrderedDict()  # 役職関連性のLRUキャッシュ
+        
+        # スキルペアの判定結果（一致・不一致とも）をプロセス間で共有するストア
+        self.similarity_store = SkillSimilarityStore()
+        # 判定済みペアの一部だけで一致を確定してよいスコア
+        self.confident_match_score = 0.8
+        # 一致判定時に保存する、最良ではなかったペアの上限数（必須スキルごと）
+        self.max_non_best_pairs = 20
+        # 埋め込み類似度による即時判定（閾値の間はLLMで判定）
+        self.use_embedding_shortcut = os.getenv("SKILL_EMBEDDING_SHORTCUT", "true").lower() == "true"
+        self.embedding_match_threshold = float(os.getenv("SKILL_EMBEDDING_MATCH_THRESHOLD", "0.92"))
+        self.embedding_mismatch_threshold = float(os.getenv("SKILL_EMBEDDING_MISMATCH_THRESHOLD", "0.45"))
+        # スキル体系（正規スキル・別名・埋め込み行列）。LLMで確認された同義ペアで拡張される
+        self.taxonomy = SkillTaxonomyIndex(embed_fn=self._embed_skills)
+        # LLMを使わずスキル体系の埋め込みのみで判定するか（閾値以上を一致とする）
+        self.local_only = os.getenv("SKILL_MATCH_LOCAL_ONLY", "false").lower() == "true"
+        self.local_match_threshold = float(os.getenv("SKILL_LOCAL_MATCH_THRESHOLD", "0.8"))
+        # 複数候補を1リクエストにまとめるスキル評価（1リクエストあたりの候補数はSKILL_MATCH_BATCH_SIZE）
+        self.batch_evaluator = BatchEvaluator(
+            self.model, "SemanticSkillMatcher", SKILL_MATCH_ITEM_SCHEMA,
+            max_batch_size=int(os.getenv("SKILL_MATCH_BATCH_SIZE", "8"))
+        )
     
     def _get_cache_key(self, skill1: str, skill2: str) -> str:
         """キャッシュキーを生成"""
-        combined = f"{skill1.lower()}|{skill2.lower()}"
+        combined = f"{normalize_skill(skill1)}|{normalize_skill(skill2)}"
         return hashlib.md5(combined.encode()).hexdigest()
     
     async def match_skills_batch(self, 
                                 required_skills: List[str], 
                                 candidate_skills: List[str]) -> List[SkillMatchResult]:
         """バッチでスキルマッチングを実行"""
+        return (await self.match_skills_multi(required_skills, {"candidate": candidate_skills}))["candidate"]
+    
+    async def match_skills_multi(self,
+                                 required_skills: List[str],
+                                 candidate_skill_sets: Dict[str, List[str]]) -> Dict[str, List[SkillMatchResult]]:
+        """
+        同じ必須スキルに対して複数の候補（候補者・職歴期間など）のスキルをまとめて評価
         
-        # キャッシュから既存の結果を取得
-        results = []
-        uncached_pairs = []
+        類似度ストア（過去の判定結果）→ 埋め込み類似度による即時判定 → LLMの順に解決し、
+        LLMには未解決のスキルだけを1回のバッチリクエストで問い合わせる
         
-        for req_skill in required_skills:
-            cached_result = None
-            for cand_skill in candidate_skills:
-                cache_key = self._get_cache_key(req_skill, cand_skill)
-                if cache_key in self._cache:
-                    cached_result = self._cache[cache_key]
-                    break
+        Args:
+            required_skills: 必須スキル（全候補で共通）
+            candidate_skill_sets: 候補ID -> 候補者スキルのリスト
             
-            if cached_result:
-                results.append(cached_result)
-            else:
-                uncached_pairs.append((req_skill, candidate_skills))
+        Returns:
+            候補ID -> 必須スキルの順に並べたSkillMatchResultのリスト
+        """
+        # 候補ごとの 正規化スキル -> 元の表記
+        normalized_sets = {
+            candidate_id: {normalize_skill(skill): skill for skill in reversed(skills) if normalize_skill(skill)}
+            for candidate_id, skills in candidate_skill_sets.items()
+        }
         
-        # キャッシュにない項目をバッチでLLMに問い合わせ
-        if uncached_pairs:
-            new_results = await self._batch_evaluate_skills(uncached_pairs)
-            results.extend(new_results)
-            
-            # キャッシュに保存
-            for result in new_results:
-                if result.matched_candidate_skill:
-                    cache_key = self._get_cache_key(
-                        result.required_skill, 
-                        result.matched_candidate_skill
-                    )
-                    self._cache[cache_key] = result
+        resolved: Dict[str, Dict[str, SkillMatchResult]] = {candidate_id: {} for candidate_id in candidate_skill_sets}
+        unresolved = self._resolve_from_store(required_skills, normalized_sets, resolved)
         
-        return results
-    
-    async def _batch_evaluate_skills(self, 
-                                   skill_pairs: List[Tuple[str, List[str]]]) -> List[SkillMatchResult]:
-        """バッチでスキルを評価"""
+        # 埋め込みの取得（call_sync）と行列計算は同期処理のためスレッドで実行し、イベントループを塞がない
+        if unresolved and self.use_embedding_shortcut:
+            await asyncio.to_thread(self._decide_by_embedding, unresolved, normalized_sets)
+            unresolved = self._resolve_from_store(required_skills, normalized_sets, resolved)
         
-        prompt = """あなたは採用のプロフェッショナルです。
-求人で求められるスキルと候補者のスキルの類似性を評価してください。
-
-# 評価基準
-1. **完全一致（1.0）**: 同じスキルまたは同義語
-   - 例: "法人営業" = "B2B営業" = "企業向け営業"
-   - 例: "Python" = "Python3" = "Python開発"
-
-2. **高い類似性（0.8-0.9）**: 実質的に同じスキル
-   - 例: "営業経験" ≈ "新規開拓営業" ≈ "アカウント営業"
-   - 例: "マネジメント" ≈ "チームリード" ≈ "部下指導"
-
-3. **中程度の類似性（0.6-0.7）**: 関連性の高いスキル
-   - 例: "財務" ≈ "経理" ≈ "管理会計"
-   - 例: "JavaScript" ≈ "TypeScript" ≈ "フロントエンド開発"
-
-4. **低い類似性（0.3-0.5）**: 部分的に関連
-   - 例: "営業" ≈ "カスタマーサクセス" ≈ "顧客対応"
-   - 例: "Java" ≈ "C#" ≈ "オブジェクト指向言語"
-
-5. **関連なし（0.0-0.2）**: 異なるスキル
-   - 例: "営業" ≠ "エンジニア"
-   - 例: "Python" ≠ "営業"
-
-# 入力データ
-以下の必須スキルと候補者スキルを評価してください：
-
-"""
+        if unresolved and self.local_only:
+            for candidate_id, req_skills in unresolved.items():
+                local_results = await asyncio.to_thread(
+                    self.match_skills_local, list(req_skills), candidate_skill_sets[candidate_id]
+                )
+                resolved[candidate_id].update((result.required_skill, result) for result in local_results)
+            unresolved = {}
         
-        # 各ペアを追加
-        for i, (req_skill, cand_skills) in enumerate(skill_pairs):
-            prompt += f"\n## 評価{i+1}\n"
-            prompt += f"必須スキル: {req_skill}\n"
-            prompt += f"候補者スキル: {', '.join(cand_skills)}\n"
+        if unresolved:
+            llm_skills = [skill for skill in required_skills if any(skill in skills for skills in unresolved.values())]
+            llm_skills = list(dict.fromkeys(llm_skills))
+            llm_results = await self._llm_match_multi(
+                llm_skills, {candidate_id: candidate_skill_sets[candidate_id] for candidate_id in unresolved}
+            )
+            for candidate_id, candidate_results in llm_results.items():
+                self._store_llm_results(candidate_results, normalized_sets[candidate_id])
+                for result in candidate_results:
+                    if result.required_skill in unresolved[candidate_id]:
+                        resolved[candidate_id][result.required_skill] = result
         
-        prompt += """
-# 出力フォーマット
-各評価について、以下のJSON形式で出力してください：
-```json
-[
-  {
-    "required_skill": "必須スキル",
-    "matched_candidate_skill": "最も類似した候補者スキル（ない場合はnull）",
-    "match_score": 0.0-1.0の数値,
-    "reasoning": "判定理由",
-    "is_match": true/false（0.3以上でtrue）
-  }
-]
-```
-"""
+        return {
+            candidate_id: [resolved[candidate_id][req_skill] for req_skill in required_skills]
+            for candidate_id in candidate_skill_sets
+        }
+    
+    def _resolve_from_store(self,
+                            required_skills: List[str],
+                            normalized_sets: Dict[str, Dict[str, str]],
+                            resolved: Dict[str, Dict[str, SkillMatchResult]]) -> Dict[str, set]:
+        """
+        類似度ストアで判定できる必須スキルを解決
         
-        try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text
-            
-            # JSONを抽出
-            import re
-            json_match = re.search(r'```json\s*([\s\S]*?)\s*```', response_text)
-            if json_match:
-                json_text = json_match.group(1)
-                evaluations = json.loads(json_text)
+        候補者スキルのすべてのペアが判定済みの場合は最もスコアの高いペアを採用する。
+        一部のみ判定済みでも、十分に高いスコアで一致しているペアがあればそれを採用する。
+        LLMが最良として選ばなかったペア（スコアは上限値）は、それ以上のスコアの判定済みペアがある場合のみ判定済みとみなす
+        
+        Returns:
+            候補ID -> 未解決の必須スキルの集合（未解決がない候補は含まない）
+        """
+        unresolved: Dict[str, set] = {}
+        for candidate_id, candidate_norms in normalized_sets.items():
+            for req_skill in required_skills:
+                if req_skill in resolved[candidate_id]:
+                    continue
+                if not candidate_norms:
+                    resolved[candidate_id][req_skill] = self._fallback_results([req_skill], "候補者スキルがありません")[0]
+                    continue
                 
-                results = []
-                for eval_data in evaluations:
-                    results.append(SkillMatchResult(
-                        required_skill=eval_data["required_skill"],
-                        matched_candidate_skill=eval_data["matched_candidate_skill"],
-                        match_score=float(eval_data["match_score"]),
-                        reasoning=eval_data["reasoning"],
-                        is_match=eval_data["is_match"]
-                    ))
+                req_norm = normalize_skill(req_skill)
+                if req_norm in candidate_norms:
+                    resolved[candidate_id][req_skill] = SkillMatchResult(
+                        required_skill=req_skill,
+                        matched_candidate_skill=candidate_norms[req_norm],
+                        match_score=1.0,
+                        reasoning="同一スキル（表記揺れを除いて一致）",
+                        is_match=True
+                    )
+                    continue
                 
-                return results
-            else:
-                # フォールバック: 空の結果を返す
-                return [
-                    SkillMatchResult(
+                req_canonical = self.taxonomy.canonical(req_norm)
+                synonym = next(
+                    (norm for norm in candidate_norms if req_canonical and self.taxonomy.canonical(norm) == req_canonical),
+                    None
+                )
+                if synonym:
+                    resolved[candidate_id][req_skill] = SkillMatchResult(
                         required_skill=req_skill,
-                        matched_candidate_skill=None,
-                        match_score=0.0,
-                        reasoning="評価に失敗しました",
-                        is_match=False
+                        matched_candidate_skill=candidate_norms[synonym],
+                        match_score=1.0,
+                        reasoning=f"スキル体系上の同義語（{req_canonical}）",
+                        is_match=True
                     )
-                    for req_skill, _ in skill_pairs
-                ]
+                    continue
                 
-        except Exception as e:
-            print(f"[SemanticSkillMatcher] エラー: {e}")
-            # エラー時は空の結果を返す
-            return [
-                SkillMatchResult(
-                    required_skill=req_skill,
-                    matched_candidate_skill=None,
-                    match_score=0.0,
-                    reasoning=f"エラー: {str(e)}",
-                    is_match=False
+                known = self.similarity_store.get_many(req_norm, candidate_norms)
+                decided = {skill: pair for skill, pair in known.items() if pair.source != "llm_non_best"}
+                if decided:
+                    best_skill, best = max(decided.items(), key=lambda item: item[1].score)
+                    ceiling = max((pair.score for pair in known.values() if pair.source == "llm_non_best"), default=0.0)
+                    all_known = len(known) == len(candidate_norms)
+                    if best.score >= ceiling and (all_known or (best.is_match and best.score >= self.confident_match_score)):
+                        resolved[candidate_id][req_skill] = SkillMatchResult(
+                            required_skill=req_skill,
+                            matched_candidate_skill=candidate_norms[best_skill] if best.is_match else None,
+                            match_score=best.score,
+                            reasoning=best.reasoning,
+                            is_match=best.is_match
+                        )
+                        continue
+                
+                unresolved.setdefault(candidate_id, set()).add(req_skill)
+        return unresolved
+    
+    def _decide_by_embedding(self, unresolved: Dict[str, set], normalized_sets: Dict[str, Dict[str, str]]) -> None:
+        """埋め込みの類似度が明らかに高い/低いペアをLLMを使わずに判定してストアに保存"""
+        entries = []
+        compared = 0
+        for candidate_id, req_skills in unresolved.items():
+            candidate_norms = list(normalized_sets[candidate_id])
+            req_norms = list(dict.fromkeys(normalize_skill(req_skill) for req_skill in req_skills))
+            # 候補ごとに必須スキル × 候補者スキルの類似度を1回の行列積で計算
+            similarity = self.taxonomy.similarity_matrix(req_norms, candidate_norms)
+            for i, req_norm in enumerate(req_norms):
+                known = self.similarity_store.get_many(req_norm, candidate_norms, record_stats=False)
+                for j, candidate_norm in enumerate(candidate_norms):
+                    score = similarity[i, j]
+                    if candidate_norm in known or np.isnan(score):
+                        continue
+                    compared += 1
+                    if score >= self.embedding_match_threshold:
+                        entries.append((req_norm, candidate_norm, PairScore(
+                            score=round(min(float(score), 1.0), 3), is_match=True,
+                            reasoning=f"埋め込み類似度{score:.2f}（同義と判定）", source="embedding"
+                        )))
+                    elif score <= self.embedding_mismatch_threshold:
+                        entries.append((req_norm, candidate_norm, PairScore(
+                            score=0.0, is_match=False,
+                            reasoning=f"埋め込み類似度{score:.2f}（関連なしと判定）", source="embedding"
+                        )))
+        
+        if entries:
+            self.similarity_store.put_many(entries)
+            print(f"[SemanticSkillMatcher] 埋め込み類似度で{len(entries)}/{compared}ペアを判定")
+    
+    def match_skills_local(self, required_skills: List[str], candidate_skills: List[str]) -> List[SkillMatchResult]:
+        """
+        スキル体系インデックスの埋め込みのみでスキルマッチング（LLMを使用しない）
+        
+        Returns:
+            必須スキルの順に並べたSkillMatchResultのリスト
+        """
+        results = []
+        for req_skill, (index, score) in zip(required_skills, self.taxonomy.best_matches(required_skills, candidate_skills)):
+            if index is None:
+                results.extend(self._fallback_results([req_skill], "埋め込みを取得できません"))
+                continue
+            is_match = score >= self.local_match_threshold
+            results.append(SkillMatchResult(
+                required_skill=req_skill,
+                matched_candidate_skill=candidate_skills[index] if is_match else None,
+                match_score=round(min(max(score, 0.0), 1.0), 3),
+                reasoning=f"埋め込み類似度{score:.2f}（最も近いスキル: {candidate_skills[index]}）",
+                is_match=is_match
+            ))
+        return results
+    
+    def _embed_skills(self, skills: set) -> Dict[str, np.ndarray]:
+        """スキルの埋め込み（正規化済みベクトル）を取得し、未保存のものはまとめて生成"""
+        vectors = self.similarity_store.get_embeddings(skills)
+        missing = [skill for skill in skills if skill not in vectors]
+        if missing:
+            try:
+                result = call_sync(
+                    "gemini", genai.embed_content,
+                    model=SKILL_EMBEDDING_MODEL, content=missing, task_type="semantic_similarity"
                 )
-                for req_skill, _ in skill_pairs
-            ]
+                new_vectors = {}
+                for skill, embedding in zip(missing, result["embedding"]):
+                    vector = np.asarray(embedding, dtype=np.float32)
+                    norm = np.linalg.norm(vector)
+                    if norm > 0:
+                        new_vectors[skill] = vector / norm
+                self.similarity_store.put_embeddings(new_vectors)
+                vectors.update(new_vectors)
+            except Exception as e:
+                print(f"[SemanticSkillMatcher] 埋め込み生成エラー（LLM判定に切り替え）: {e}")
+        return vectors
+    
+    def _store_llm_results(self, results: List[SkillMatchResult], candidate_norms: Dict[str, str]) -> None:
+        """
+        LLMの判定結果をペア単位で保存
+        
+        一致した場合は最も類似したペアを一致として、その他のペア（未判定のもののみ、件数上限付き）を
+        最良ではなかったペアとして保存する。不一致の場合は最も類似したスキルでも不一致だったため
+        全ペアを不一致として保存する
+        """
+        entries = []
+        for result in results:
+            if not result.evaluated:
+                continue
+            req_norm = normalize_skill(result.required_skill)
+            matched_norm = normalize_skill(result.matched_candidate_skill or "")
+            if result.is_match:
+                if matched_norm in candidate_norms:
+                    entries.append((req_norm, matched_norm, PairScore(
+                        score=result.match_score, is_match=True, reasoning=result.reasoning, source="llm"
+                    )))
+                    # 同じ候補者スキルの組み合わせで再度LLMに問い合わせないよう、他のペアも保存する
+                    others = [norm for norm in candidate_norms if norm != matched_norm]
+                    known = self.similarity_store.get_many(req_norm, others, record_stats=False)
+                    for candidate_norm in [norm for norm in others if norm not in known][:self.max_non_best_pairs]:
+                        entries.append((req_norm, candidate_norm, PairScore(
+                            score=result.match_score, is_match=False,
+                            reasoning=f"{candidate_norms[matched_norm]}より類似度が低い", source="llm_non_best"
+                        )))
+                    self.taxonomy.learn(result.required_skill, candidate_norms[matched_norm], result.match_score)
+                continue
+            for candidate_norm in candidate_norms:
+                entries.append((req_norm, candidate_norm, PairScore(
+                    score=result.match_score if candidate_norm == matched_norm else 0.0,
+                    is_match=False, reasoning=result.reasoning, source="llm"
+                )))
+        self.similarity_store.put_many(entries)
+    
+    async def _llm_match_multi(self,
+                               required_skills: List[str],
+                               candidate_skill_sets: Dict[str, List[str]]) -> Dict[str, List[SkillMatchResult]]:
+        """複数の候補のスキルを1回のバッチリクエストでLLMに評価させる"""
+        results: Dict[str, List[SkillMatchResult]] = {}
+        items = []
+        for candidate_id, skills in candidate_skill_sets.items():
+            if not skills:
+                results[candidate_id] = self._fallback_results(required_skills, "候補者スキルがありません")
+            else:
+                items.append(BatchItem(item_id=str(candidate_id), content=f"候補者スキル: {', '.join(skills)}"))
+        
+        if not required_skills or not items:
+            for candidate_id in candidate_skill_sets:
+                results.setdefault(candidate_id, [])
+            return results
+        
+        shared_prompt = SKILL_MATCH_PROMPT + "\n# 必須スキル\n" + "\n".join(f"- {skill}" for skill in required_skills)
+        batch_results = await self.batch_evaluator.evaluate(shared_prompt, items)
+        
+        for candidate_id in candidate_skill_sets:
+            if candidate_id in results:
+                continue
+            batch_result = batch_results[str(candidate_id)]
+            if not batch_result.ok:
+                results[candidate_id] = self._fallback_results(required_skills, batch_result.error or "評価に失敗しました")
+                continue
+            
+            matches = {match["required_skill"]: match for match in batch_result.data["matches"]}
+            candidate_results = []
+            for req_skill in required_skills:
+                match = matches.get(req_skill)
+                if match is None:
+                    candidate_results.extend(self._fallback_results([req_skill], "評価に失敗しました"))
+                    continue
+                candidate_results.append(SkillMatchResult(
+                    required_skill=req_skill,
+                    matched_candidate_skill=match.get("matched_candidate_skill") or None,
+                    match_score=float(match["match_score"]),
+                    reasoning=match["reasoning"],
+                    is_match=match["is_match"]
+                ))
+            results[candidate_id] = candidate_results
+        
+        return {candidate_id: results[candidate_id] for candidate_id in candidate_skill_sets}
+    
+    def _fallback_results(self, required_skills: List[str], reasoning: str) -> List[SkillMatchResult]:
+        """評価できなかった必須スキルの結果（不一致として扱う）"""
+        return [
+            SkillMatchResult(
+                required_skill=req_skill,
+                matched_candidate_skill=None,
+                match_score=0.0,
+                reasoning=reasoning,
+                is_match=False,
+                evaluated=False
+            )
+            for req_skill in required_skills
+        ]
     
     async def evaluate_role_relevance(self,
                                     required_experience: str,
@@ -195,6 +449,7 @@ class SemanticSkillMatcher:
         # キャッシュチェック
         cache_key = self._get_cache_key(required_experience, f"{candidate_role}|{candidate_description}")
         if cache_key in self._cache:
+            self._cache.move_to_end(cache_key)
             return self._cache[cache_key]
         
         prompt = f"""あなたは採用のプロフェッショナルです。
@@ -236,7 +491,7 @@ class SemanticSkillMatcher:
 """
         
         try:
-            response = self.model.generate_content(prompt)
+            response = await self.model.generate_content_async(prompt)
             response_text = response.text
             
             # JSONを抽出
@@ -255,6 +510,8 @@ class SemanticSkillMatcher:
                 
                 # キャッシュに保存
                 self._cache[cache_key] = result
+                if len(self._cache) > ROLE_CACHE_SIZE:
+                    self._cache.popitem(last=False)
                 
                 return result
             else:
@@ -275,9 +532,18 @@ class SemanticSkillMatcher:
                 reasoning=f"エラー: {str(e)}"
             )
     
-    def clear_cache(self):
-        """キャッシュをクリア"""
+    def clear_cache(self, persistent: bool = False):
+        """
+        キャッシュをクリア
+        
+        Args:
+            persistent: 類似度ストア（プロセス間で共有）の判定結果も削除するか
+        """
         self._cache.clear()
+        if persistent:
+            self.similarity_store.clear()
+        else:
+            self.similarity_store.clear_memory()
     
     def get_cache_stats(self) -> Dict[str, int]:
         """キャッシュ統計を取得"""
@@ -286,5 +552,7 @@ class SemanticSkillMatcher:
             "memory_usage_bytes": sum(
                 len(str(k)) + len(str(v)) 
                 for k, v in self._cache.items()
-            )
-        }
\ No newline at end of file
+            ),
+            "skill_pairs": self.similarity_store.get_stats(),
+            "taxonomy": self.taxonomy.get_stats()
+        }
@@ -0,0 +1,244 @@
+"""
+スキルペアの類似度ストア
+正規化したスキル文字列のペアごとに判定結果（一致・不一致の両方）を保存し、
+プロセス内のLRUキャッシュとSQLite（プロセス間で共有）の2層で再利用する
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+def normalize_skill(skill: str) -> str:
+    """スキル文字列の正規化（全角/半角・大文字小文字・空白の揺れを吸収）"""
+    return " ".join(unicodedata.normalize("NFKC", skill or "").lower().split())
+
+
+@dataclass
+class PairScore:
+    """スキルペアの判定結果"""
+    score: float  # 0.0-1.0
+    is_match: bool
+    reasoning: str
+    source: str  # exact / embedding / llm / llm_non_best（LLMが最良として選ばなかったペア。scoreは上限値）
+
+
+class SkillSimilarityStore:
+    """(必須スキル, 候補者スキル) をキーとする件数上限付きの類似度ストア"""
+
+    def __init__(self, storage_path: Optional[str] = None, max_entries: Optional[int] = None,
+                 memory_entries: int = 10000, touch_batch_size: int = 500):
+        """
+        Args:
+            storage_path: 保存先ディレクトリ（省略時はSKILL_SIMILARITY_CACHE_PATHまたは./skill_similarity_data）
+            max_entries: SQLiteに保持する最大ペア数（省略時はSKILL_SIMILARITY_MAX_ENTRIES、デフォルト200000）
+            memory_entries: プロセス内LRUキャッシュの最大ペア数
+            touch_batch_size: 最終利用時刻の更新をまとめて書き込むペア数
+        """
+        self.storage_path = storage_path or os.getenv("SKILL_SIMILARITY_CACHE_PATH", "./skill_similarity_data")
+        os.makedirs(self.storage_path, exist_ok=True)
+        self.db_path = os.path.join(self.storage_path, "skill_similarity.db")
+        self.max_entries = max_entries or int(os.getenv("SKILL_SIMILARITY_MAX_ENTRIES", "200000"))
+        self.memory_entries = memory_entries
+        self.touch_batch_size = touch_batch_size
+
+        self._memory: "OrderedDict[Tuple[str, str], PairScore]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._touched: Dict[Tuple[str, str], float] = {}  # 未書き込みの最終利用時刻
+        self.hits = 0
+        self.misses = 0
+        self._init_database()
+
+    @contextmanager
+    def _get_db(self):
+        """データベース接続を取得"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _init_database(self):
+        """テーブルを初期化"""
+        with self._get_db() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS skill_pairs (
+                    required_skill TEXT NOT NULL,
+                    candidate_skill TEXT NOT NULL,
+                    score REAL NOT NULL,
+                    is_match INTEGER NOT NULL,
+                    reasoning TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    last_used_at REAL NOT NULL,
+                    PRIMARY KEY (required_skill, candidate_skill)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_skill_pairs_last_used ON skill_pairs(last_used_at)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS skill_embeddings (
+                    skill TEXT PRIMARY KEY,
+                    vector BLOB NOT NULL
+                )
+            """)
+
+    def get_many(self, required_skill: str, candidate_skills: Iterable[str],
+                 record_stats: bool = True) -> Dict[str, PairScore]:
+        """
+        必須スキルに対する候補者スキルごとの判定結果を取得
+
+        Args:
+            required_skill: 正規化済みの必須スキル
+            candidate_skills: 正規化済みの候補者スキル
+            record_stats: ヒット率の統計に含めるか
+
+        Returns:
+            候補者スキル -> PairScore（未判定のスキルは含まない）
+        """
+        candidate_skills = list(dict.fromkeys(candidate_skills))
+        found: Dict[str, PairScore] = {}
+        remaining = []
+        with self._lock:
+            for candidate_skill in candidate_skills:
+                key = (required_skill, candidate_skill)
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[candidate_skill] = self._memory[key]
+                else:
+                    remaining.append(candidate_skill)
+
+        if remaining:
+            placeholders = ",".join("?" * len(remaining))
+            with self._get_db() as conn:
+                rows = conn.execute(
+                    f"""SELECT candidate_skill, score, is_match, reasoning, source FROM skill_pairs
+                        WHERE required_skill = ? AND candidate_skill IN ({placeholders})""",
+                    [required_skill, *remaining]
+                ).fetchall()
+            with self._lock:
+                for candidate_skill, score, is_match, reasoning, source in rows:
+                    pair = PairScore(score=score, is_match=bool(is_match), reasoning=reasoning, source=source)
+                    found[candidate_skill] = pair
+                    self._remember((required_skill, candidate_skill), pair)
+
+        # 最終利用時刻は読み取りのたびに書き込まず、まとめて反映する
+        now = time.time()
+        with self._lock:
+            for candidate_skill in found:
+                self._touched[(required_skill, candidate_skill)] = now
+            if record_stats:
+                self.hits += len(found)
+                self.misses += len(candidate_skills) - len(found)
+            flush = len(self._touched) >= self.touch_batch_size
+        if flush:
+            with self._get_db() as conn:
+                self._flush_touched(conn)
+        return found
+
+    def _flush_touched(self, conn: sqlite3.Connection) -> None:
+        """まとめておいた最終利用時刻を書き込む"""
+        with self._lock:
+            touched, self._touched = self._touched, {}
+        if touched:
+            conn.executemany(
+                "UPDATE skill_pairs SET last_used_at = ? WHERE required_skill = ? AND candidate_skill = ?",
+                [(used_at, required_skill, candidate_skill) for (required_skill, candidate_skill), used_at in touched.items()]
+            )
+
+    def put_many(self, entries: List[Tuple[str, str, PairScore]]) -> None:
+        """判定結果を保存（件数上限を超えた場合は最終利用が古いものから削除）"""
+        if not entries:
+            return
+        now = time.time()
+        with self._get_db() as conn:
+            # 削除対象の判定前に最終利用時刻を反映
+            self._flush_touched(conn)
+            conn.executemany(
+                """INSERT OR REPLACE INTO skill_pairs
+                   (required_skill, candidate_skill, score, is_match, reasoning, source, last_used_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                [
+                    (required_skill, candidate_skill, pair.score, int(pair.is_match), pair.reasoning, pair.source, now)
+                    for required_skill, candidate_skill, pair in entries
+                ]
+            )
+            overflow = conn.execute("SELECT COUNT(*) FROM skill_pairs").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    """DELETE FROM skill_pairs WHERE rowid IN (
+                           SELECT rowid FROM skill_pairs ORDER BY last_used_at LIMIT ?
+                       )""",
+                    (overflow,)
+                )
+        with self._lock:
+            for required_skill, candidate_skill, pair in entries:
+                self._remember((required_skill, candidate_skill), pair)
+
+    def _remember(self, key: Tuple[str, str], pair: PairScore) -> None:
+        """プロセス内LRUキャッシュに登録（ロック取得済みで呼び出す）"""
+        self._memory[key] = pair
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_embeddings(self, skills: Iterable[str]) -> Dict[str, np.ndarray]:
+        """保存済みのスキル埋め込みを取得"""
+        skills = list(dict.fromkeys(skills))
+        if not skills:
+            return {}
+        placeholders = ",".join("?" * len(skills))
+        with self._get_db() as conn:
+            rows = conn.execute(
+                f"SELECT skill, vector FROM skill_embeddings WHERE skill IN ({placeholders})", skills
+            ).fetchall()
+        return {skill: np.frombuffer(vector, dtype=np.float32) for skill, vector in rows}
+
+    def put_embeddings(self, embeddings: Dict[str, np.ndarray]) -> None:
+        """スキル埋め込みを保存"""
+        if not embeddings:
+            return
+        with self._get_db() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO skill_embeddings (skill, vector) VALUES (?, ?)",
+                [(skill, np.asarray(vector, dtype=np.float32).tobytes()) for skill, vector in embeddings.items()]
+            )
+
+    def clear(self) -> None:
+        """判定結果をすべて削除（埋め込みは保持）"""
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+        with self._get_db() as conn:
+            conn.execute("DELETE FROM skill_pairs")
+
+    def clear_memory(self) -> None:
+        """プロセス内LRUキャッシュのみクリア"""
+        with self._lock:
+            self._memory.clear()
+
+    def get_stats(self) -> Dict[str, float]:
+        """ストア統計を取得"""
+        with self._get_db() as conn:
+            size = conn.execute("SELECT COUNT(*) FROM skill_pairs").fetchone()[0]
+            negatives = conn.execute("SELECT COUNT(*) FROM skill_pairs WHERE is_match = 0").fetchone()[0]
+            embeddings = conn.execute("SELECT COUNT(*) FROM skill_embeddings").fetchone()[0]
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "stored_pairs": size,
+                "negative_pairs": negatives,
+                "stored_embeddings": embeddings,
+                "memory_pairs": len(self._memory),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
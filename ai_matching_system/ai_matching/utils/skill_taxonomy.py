@@ -0,0 +1,277 @@
+"""
+スキル体系インデックス
+正規スキルと別名（日本語・英語の表記揺れなど）を管理し、正規スキルの埋め込みをNumPy行列として保持する。
+候補者スキルと必須スキルの類似度を1回の行列積で計算し、LLMで確認された同義ペアから自動的に拡張する
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .skill_similarity_store import normalize_skill
+
+
+# 初期のスキル体系（正規スキル -> 別名）
+SEED_TAXONOMY = {
+    "法人営業": ["B2B営業", "企業向け営業", "アカウント営業", "直接営業", "外勤営業"],
+    "新規開拓営業": ["新規開拓", "新規顧客開拓"],
+    "ルート営業": ["既存顧客営業"],
+    "営業": ["セールス", "販売", "ビジネス開発", "BD", "ビジネスデベロップメント", "アカウントエグゼクティブ"],
+    "マネジメント": ["チームマネジメント", "チームリード", "部下指導", "ピープルマネジメント"],
+    "プロダクトマネージャー": ["PdM", "プロダクトオーナー"],
+    "エンジニア": ["開発者", "プログラマー", "ソフトウェアエンジニア", "デベロッパー"],
+    "Python": ["Python3", "Python開発", "Pythonプログラミング"],
+    "JavaScript": ["JS", "ECMAScript"],
+    "TypeScript": ["TS"],
+    "人工知能": ["AI"],
+    "機械学習": ["ML", "マシンラーニング"],
+    "データ分析": ["データアナリティクス", "アナリティクス"],
+    "データサイエンス": ["データサイエンティスト"],
+    "AWS": ["Amazon Web Services"],
+    "GCP": ["Google Cloud", "Google Cloud Platform"],
+    "Azure": ["Microsoft Azure"],
+    "経理": ["会計", "経理財務"],
+    "マーケティング": ["マーケター", "デジタルマーケティング"]
+}
+
+
+def seed_aliases(skill: str) -> List[str]:
+    """初期スキル体系上の別名（埋め込みを使わない参照用）"""
+    normalized = normalize_skill(skill)
+    for canonical, aliases in SEED_TAXONOMY.items():
+        if normalized in {normalize_skill(s) for s in [canonical, *aliases]}:
+            return [s for s in [canonical, *aliases] if normalize_skill(s) != normalized]
+    return []
+
+
+class SkillTaxonomyIndex:
+    """正規スキルの埋め込み行列による高速なスキル類似度計算"""
+
+    def __init__(self, embed_fn: Callable[[Set[str]], Dict[str, np.ndarray]], storage_path: Optional[str] = None,
+                 learn_threshold: float = 1.0):
+        """
+        Args:
+            embed_fn: 正規化済みスキルの集合 -> 正規化済み埋め込みベクトル（取得できないスキルは含めない）
+            storage_path: 保存先ディレクトリ（省略時はSKILL_TAXONOMY_PATHまたは./skill_taxonomy_data）
+            learn_threshold: LLMで確認されたペアを別名として登録する最低スコア（1.0は同義語の判定）
+        """
+        self.embed_fn = embed_fn
+        self.storage_path = storage_path or os.getenv("SKILL_TAXONOMY_PATH", "./skill_taxonomy_data")
+        os.makedirs(self.storage_path, exist_ok=True)
+        self.taxonomy_file = os.path.join(self.storage_path, "skill_taxonomy.json")
+        self.matrix_file = os.path.join(self.storage_path, "skill_taxonomy.npz")
+        self.learn_threshold = learn_threshold
+
+        self._lock = threading.Lock()
+        self.aliases: Dict[str, List[str]] = {}  # 正規スキル -> 別名
+        self._canonical_of: Dict[str, str] = {}  # 正規化済みスキル -> 正規スキル
+        self._canonicals: List[str] = []  # 行列の行順
+        self._matrix: Optional[np.ndarray] = None  # 正規スキル数 × 次元（各行は正規化済み）
+        self._load()
+
+    def _load(self) -> None:
+        """スキル体系と埋め込み行列を読み込む（初回は初期スキル体系から作成）"""
+        taxonomy = {canonical: list(aliases) for canonical, aliases in SEED_TAXONOMY.items()}
+        if os.path.exists(self.taxonomy_file):
+            try:
+                with open(self.taxonomy_file, "r", encoding="utf-8") as f:
+                    taxonomy = json.load(f)
+            except Exception as e:
+                print(f"[SkillTaxonomy] スキル体系の読み込みエラー（初期スキル体系を使用）: {e}")
+        self._set_taxonomy(taxonomy)
+
+        if os.path.exists(self.matrix_file):
+            try:
+                data = np.load(self.matrix_file, allow_pickle=False)
+                if str(data["signature"]) == self._signature():
+                    self._canonicals = [str(c) for c in data["canonicals"]]
+                    self._matrix = data["matrix"]
+            except Exception as e:
+                print(f"[SkillTaxonomy] 埋め込み行列の読み込みエラー（再計算します）: {e}")
+
+    def _set_taxonomy(self, taxonomy: Dict[str, List[str]]) -> None:
+        """スキル体系を設定し、別名の索引を作り直す（内容が変わった場合のみ埋め込み行列を破棄）"""
+        if self._matrix is not None and self._signature(taxonomy) != self._signature():
+            self._matrix = None
+        self.aliases = taxonomy
+        self._canonical_of = {}
+        for canonical, aliases in taxonomy.items():
+            for skill in [canonical, *aliases]:
+                self._canonical_of.setdefault(normalize_skill(skill), canonical)
+
+    def _signature(self, taxonomy: Optional[Dict[str, List[str]]] = None) -> str:
+        """スキル体系の内容から行列の整合性確認用の署名を生成（省略時は現在のスキル体系）"""
+        content = json.dumps(self.aliases if taxonomy is None else taxonomy, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def canonical(self, skill: str) -> Optional[str]:
+        """スキルの正規スキル（体系にない場合はNone）"""
+        return self._canonical_of.get(normalize_skill(skill))
+
+    def _ensure_matrix(self) -> Tuple[List[str], Optional[np.ndarray]]:
+        """
+        正規スキルの埋め込み行列（別名を含む埋め込みの重心）を用意
+
+        埋め込みの取得（ネットワーク呼び出し）はロックの外で行い、計算中にスキル体系が
+        更新されていなければ結果を公開する
+
+        Returns:
+            (行順の正規スキル, 埋め込み行列。用意できない場合はNone)
+        """
+        with self._lock:
+            if self._matrix is not None:
+                return self._canonicals, self._matrix
+            taxonomy = {canonical: list(aliases) for canonical, aliases in self.aliases.items()}
+            signature = self._signature()
+
+        members = {canonical: {normalize_skill(s) for s in [canonical, *aliases]}
+                   for canonical, aliases in taxonomy.items()}
+        vectors = self.embed_fn(set().union(*members.values())) if members else {}
+
+        rows, kept = [], []
+        for canonical in taxonomy:
+            member_vectors = [vectors[s] for s in members[canonical] if s in vectors]
+            if not member_vectors:
+                continue
+            centroid = np.mean(member_vectors, axis=0)
+            norm = np.linalg.norm(centroid)
+            if norm > 0:
+                rows.append(centroid / norm)
+                kept.append(canonical)
+        if not rows:
+            return [], None
+        matrix = np.vstack(rows).astype(np.float32)
+
+        with self._lock:
+            if self._matrix is not None:
+                return self._canonicals, self._matrix
+            if self._signature() != signature:
+                # 計算中に別名が追加された（この呼び出しでは計算した行列を使い、次回作り直す）
+                return kept, matrix
+            self._canonicals = kept
+            self._matrix = matrix
+        try:
+            np.savez(self.matrix_file, matrix=matrix, canonicals=np.array(kept), signature=signature)
+        except Exception as e:
+            print(f"[SkillTaxonomy] 埋め込み行列の保存エラー: {e}")
+        return kept, matrix
+
+    def vectors(self, skills: List[str]) -> Tuple[np.ndarray, List[bool]]:
+        """
+        スキルを埋め込み行列に変換（体系内のスキルは正規スキルの重心ベクトルを使用）
+
+        Returns:
+            (スキル数 × 次元の行列, 各スキルのベクトルを取得できたか)
+        """
+        canonicals, canonical_matrix = self._ensure_matrix()
+        row_of = {canonical: i for i, canonical in enumerate(canonicals)}
+        normalized = [normalize_skill(skill) for skill in skills]
+        unknown = {s for s in normalized if self._canonical_of.get(s) not in row_of}
+        embedded = self.embed_fn(unknown) if unknown else {}
+
+        dimension = canonical_matrix.shape[1] if canonical_matrix is not None else (
+            len(next(iter(embedded.values()))) if embedded else 0
+        )
+        matrix = np.zeros((len(skills), dimension), dtype=np.float32)
+        available = []
+        for i, skill in enumerate(normalized):
+            canonical = self._canonical_of.get(skill)
+            if canonical in row_of:
+                matrix[i] = canonical_matrix[row_of[canonical]]
+                available.append(True)
+            elif skill in embedded and len(embedded[skill]) == dimension:
+                matrix[i] = embedded[skill]
+                available.append(True)
+            else:
+                available.append(False)
+        return matrix, available
+
+    def similarity_matrix(self, required_skills: List[str], candidate_skills: List[str]) -> np.ndarray:
+        """
+        必須スキル × 候補者スキルのコサイン類似度（1回の行列積）
+
+        Returns:
+            必須スキル数 × 候補者スキル数の行列。ベクトルを取得できないスキルを含むペアはnan
+        """
+        similarity = np.full((len(required_skills), len(candidate_skills)), np.nan, dtype=np.float32)
+        if not required_skills or not candidate_skills:
+            return similarity
+
+        matrix, available = self.vectors(list(required_skills) + list(candidate_skills))
+        if matrix.shape[1] == 0:
+            return similarity
+        split = len(required_skills)
+        required_matrix, required_ok = matrix[:split], available[:split]
+        candidate_matrix, candidate_ok = matrix[split:], available[split:]
+
+        valid = np.outer(required_ok, candidate_ok)
+        similarity[valid] = (required_matrix @ candidate_matrix.T)[valid]
+        return similarity
+
+    def best_matches(self, required_skills: List[str], candidate_skills: List[str]) -> List[Tuple[Optional[int], float]]:
+        """
+        必須スキルごとに最も類似した候補者スキルを求める
+
+        Returns:
+            必須スキルの順に (候補者スキルのインデックス, コサイン類似度)。判定できない場合は (None, 0.0)
+        """
+        similarity = self.similarity_matrix(required_skills, candidate_skills)
+        matches = []
+        for row in similarity:
+            if row.size == 0 or np.isnan(row).all():
+                matches.append((None, 0.0))
+            else:
+                best = int(np.nanargmax(row))
+                matches.append((best, float(row[best])))
+        return matches
+
+    def learn(self, required_skill: str, candidate_skill: str, score: float) -> bool:
+        """
+        LLMで同義語（完全一致）と確認されたペアをスキル体系に追加
+
+        別名は正規スキルの全別名と同一視されるため、既存の正規スキルを経由した推移的な統合は行わず、
+        どちらも体系にないペアのみ必須スキルを正規スキルとして登録する
+
+        Returns:
+            スキル体系が更新されたか
+        """
+        if score < self.learn_threshold:
+            return False
+        required_norm, candidate_norm = normalize_skill(required_skill), normalize_skill(candidate_skill)
+        if not required_norm or not candidate_norm or required_norm == candidate_norm:
+            return False
+
+        with self._lock:
+            # 他のプロセスが追加した内容を取り込んでから更新
+            if os.path.exists(self.taxonomy_file):
+                try:
+                    with open(self.taxonomy_file, "r", encoding="utf-8") as f:
+                        self._set_taxonomy(json.load(f))
+                except Exception:
+                    pass
+
+            required_canonical = self._canonical_of.get(required_norm)
+            candidate_canonical = self._canonical_of.get(candidate_norm)
+            if required_canonical or candidate_canonical:
+                return False
+            self._set_taxonomy({**self.aliases, required_skill: [candidate_skill]})
+
+            temp_file = f"{self.taxonomy_file}.{os.getpid()}.tmp"
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump(self.aliases, f, ensure_ascii=False, indent=2)
+            os.replace(temp_file, self.taxonomy_file)
+
+        print(f"[SkillTaxonomy] 同義スキルを登録: {required_skill} = {candidate_skill}（スコア{score:.2f}）")
+        return True
+
+    def get_stats(self) -> Dict[str, int]:
+        """スキル体系の統計"""
+        return {
+            "canonical_skills": len(self.aliases),
+            "aliases": sum(len(aliases) for aliases in self.aliases.values()),
+            "matrix_rows": len(self._canonicals) if self._matrix is not None else 0
+        }
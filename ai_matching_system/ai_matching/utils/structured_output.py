@@ -0,0 +1,245 @@
+"""
+構造化出力（JSONモード）
+LLMにスキーマ制約付きのJSONを出力させ、ノードごとに1つの検証付きデコーダーで解釈する
+デコードに失敗した場合は各ノードの従来のテキストパーサーにフォールバックし、その回数とコストを記録する
+"""
+
+import json
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+import google.generativeai as genai
+
+from .prompt_budget import estimate_tokens
+
+
+# スコア内訳のカテゴリキー
+SCORE_CATEGORIES = ["required_skills", "practical_ability", "preferred_skills", "organizational_fit", "outstanding_career"]
+
+# 候補者評価（EvaluatorNode / EnhancedEvaluatorNode）
+EVALUATION_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "score": {"type": "INTEGER"},
+        "confidence": {"type": "STRING", "enum": ["低", "中", "高"]},
+        "score_breakdown": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "category": {"type": "STRING", "enum": SCORE_CATEGORIES},
+                    "max_score": {"type": "NUMBER"},
+                    "subtotal": {"type": "NUMBER"},
+                    "items": {
+                        "type": "ARRAY",
+                        "items": {
+                            "type": "OBJECT",
+                            "properties": {
+                                "name": {"type": "STRING"},
+                                "score": {"type": "NUMBER"},
+                                "max_score": {"type": "NUMBER"},
+                                "evidence": {"type": "STRING"}
+                            },
+                            "required": ["name", "score", "max_score"]
+                        }
+                    }
+                },
+                "required": ["category", "max_score", "subtotal"]
+            }
+        },
+        "strengths": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "concerns": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "interview_points": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "summary": {"type": "STRING"}
+    },
+    "required": ["score", "confidence", "score_breakdown", "strengths", "concerns", "summary"]
+}
+
+# 最終判定（ReportGeneratorNode）
+FINAL_JUDGMENT_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "recommendation": {"type": "STRING", "enum": ["A", "B", "C", "D"]},
+        "reason": {"type": "STRING"},
+        "strengths": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "concerns": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "overall_assessment": {"type": "STRING"}
+    },
+    "required": ["recommendation", "reason", "strengths", "concerns", "overall_assessment"]
+}
+
+# 情報ギャップ分析（GapAnalyzerNode）
+GAP_ANALYSIS_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "no_additional_info_needed": {"type": "BOOLEAN"},
+        "gaps": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "info_type": {
+                        "type": "STRING",
+                        "enum": ["環境適応性ギャップ", "実務遂行能力ギャップ", "役割期待値ギャップ", "市場競争力ギャップ"]
+                    },
+                    "description": {"type": "STRING"},
+                    "search_query": {"type": "STRING"},
+                    "importance": {"type": "STRING", "enum": ["高", "中", "低"]},
+                    "rationale": {"type": "STRING"}
+                },
+                "required": ["info_type", "description", "search_query", "importance", "rationale"]
+            }
+        }
+    },
+    "required": ["no_additional_info_needed", "gaps"]
+}
+
+# 評価サマリー（FinalScorerNode）
+EVALUATION_SUMMARY_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "confidence": {"type": "STRING", "enum": ["低", "中", "高"]},
+        "strengths": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "concerns": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "summary": {"type": "STRING"}
+    },
+    "required": ["confidence", "strengths", "concerns", "summary"]
+}
+
+# 検索結果の一括要約（TavilySearcherNode）
+SEARCH_SUMMARY_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "summaries": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "gap_id": {"type": "STRING"},
+                    "summary": {"type": "STRING"}
+                },
+                "required": ["gap_id", "summary"]
+            }
+        }
+    },
+    "required": ["summaries"]
+}
+
+
+_CODE_FENCE_PATTERN = re.compile(r'^```(?:json)?\s*|\s*```$')
+
+# スキーマの型 -> Pythonの型（boolはintのサブクラスのため数値型から除外して判定）
+_TYPE_CHECKS = {
+    "OBJECT": lambda v: isinstance(v, dict),
+    "ARRAY": lambda v: isinstance(v, list),
+    "STRING": lambda v: isinstance(v, str),
+    "INTEGER": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "NUMBER": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "BOOLEAN": lambda v: isinstance(v, bool),
+}
+
+# ノード名 -> デコード統計
+_parse_stats: Dict[str, Dict[str, int]] = {}
+_stats_lock = threading.Lock()
+
+
+def json_generation_config(schema: Dict) -> genai.GenerationConfig:
+    """スキーマ制約付きJSON出力の生成設定"""
+    return genai.GenerationConfig(response_mime_type="application/json", response_schema=schema)
+
+
+def parse_json_text(text: str) -> Any:
+    """コードフェンスを除去してJSONとして解釈（失敗時はjson.JSONDecodeError）"""
+    return json.loads(_CODE_FENCE_PATTERN.sub('', (text or '').strip()))
+
+
+def validate(value: Any, schema: Dict, path: str = "$") -> List[str]:
+    """
+    スキーマに対する検証（型・必須キー・列挙値のみ）
+
+    Returns:
+        エラーメッセージのリスト（空なら妥当）
+    """
+    schema_type = schema.get("type", "").upper()
+    check = _TYPE_CHECKS.get(schema_type)
+    if check and not check(value):
+        return [f"{path}: {schema_type}ではありません"]
+
+    errors = []
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"{path}: 想定外の値 {value!r}")
+
+    if schema_type == "OBJECT":
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(f"{path}.{key}: 必須キーがありません")
+        for key, sub_schema in schema.get("properties", {}).items():
+            if key in value and value[key] is not None:
+                errors.extend(validate(value[key], sub_schema, f"{path}.{key}"))
+    elif schema_type == "ARRAY" and "items" in schema:
+        for i, item in enumerate(value):
+            errors.extend(validate(item, schema["items"], f"{path}[{i}]"))
+
+    return errors
+
+
+class StructuredOutputDecoder:
+    """ノードごとのJSONデコーダー（検証とデコード統計の記録を行う）"""
+
+    def __init__(self, name: str, schema: Dict):
+        """
+        Args:
+            name: 統計用のノード名
+            schema: 期待するレスポンススキーマ
+        """
+        self.name = name
+        self.schema = schema
+
+    def decode(self, text: str) -> Optional[Dict]:
+        """
+        LLMの応答をデコード
+
+        Returns:
+            検証済みの辞書、デコード・検証に失敗した場合はNone（呼び出し元でテキストパーサーにフォールバック）
+        """
+        try:
+            data = parse_json_text(text)
+        except json.JSONDecodeError as e:
+            self._record_failure(text, f"JSONとして解釈できません: {e}")
+            return None
+
+        errors = validate(data, self.schema)
+        if errors:
+            self._record_failure(text, f"スキーマ検証エラー: {', '.join(errors[:3])}")
+            return None
+
+        self._record(decoded=1)
+        return data
+
+    def record_fallback_result(self, parsed: bool) -> None:
+        """フォールバックしたテキストパーサーの結果を記録"""
+        self._record(fallback_parsed=1 if parsed else 0, fallback_failed=0 if parsed else 1)
+
+    def _record_failure(self, text: str, reason: str) -> None:
+        """デコード失敗を記録（失敗した出力のトークン数を無駄なコストとして集計）"""
+        wasted_tokens = estimate_tokens(text or '')
+        self._record(failed=1, wasted_output_tokens=wasted_tokens)
+        print(f"  [StructuredOutput] {self.name}: {reason}（テキストパーサーにフォールバック）")
+
+    def _record(self, **counts: int) -> None:
+        with _stats_lock:
+            stats = _parse_stats.setdefault(self.name, {
+                "calls": 0, "decoded": 0, "failed": 0,
+                "fallback_parsed": 0, "fallback_failed": 0, "wasted_output_tokens": 0
+            })
+            if "decoded" in counts or "failed" in counts:
+                stats["calls"] += 1
+            for key, value in counts.items():
+                stats[key] += value
+
+
+def get_parse_stats() -> Dict[str, Dict[str, int]]:
+    """ノード別のデコード統計を取得"""
+    with _stats_lock:
+        return {name: dict(stats) for name, stats in _parse_stats.items()}
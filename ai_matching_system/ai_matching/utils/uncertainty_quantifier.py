@@ -8,6 +8,47 @@ from dataclasses import dataclass
 import re
 import math
 
+from .pattern_engine import KeywordMatcher, compile_alternation
+
+
+# 経験の記述を含む行
+_EXPERIENCE_LINE_MATCHER = KeywordMatcher(['経験', '実績', '担当', '開発', 'プロジェクト'])
+
+# レジュメの曖昧な表現
+_AMBIGUOUS_PATTERN = compile_alternation([
+    r'関わった',  # 具体的な役割が不明
+    r'サポート',  # 主体的でない可能性
+    r'補助',
+    r'一部',
+    r'など',  # 具体性の欠如
+    r'等',
+    r'様々な',
+    r'いくつかの',
+    r'複数の'
+])
+
+# 評価文の情報不足を示す表現
+_MISSING_PHRASE_MATCHER = KeywordMatcher(["情報が不足", "確認できない", "記載がない", "不明", "判断材料が少ない"])
+
+# 評価文内の矛盾表現
+_CONTRADICTION_MATCHER = KeywordMatcher(['一方で', 'しかし', 'ただし', '反面', '逆に', '矛盾', '不一致'])
+
+# 間接的な経験を示す表現
+_INDIRECT_MATCHER = KeywordMatcher(['類似', '関連', '近い', '似た', '代替', '転用可能', '応用可能'])
+
+# 時間に関する表現（N年前 / 最近 / 現在 / 過去に / 以前）
+_TIME_PATTERN = re.compile(r'(\d+)年前|最近|現在|過去に|以前')
+_TIME_UNCERTAINTY = {'最近': 0.1, '現在': 0.0, '過去に': 0.3, '以前': 0.4}
+
+# 必須要件の抽出パターン
+_REQUIREMENT_PATTERNS = [
+    re.compile(r'必須[：:]\s*(.+?)(?:\n|$)', re.MULTILINE),
+    re.compile(r'必要[：:]\s*(.+?)(?:\n|$)', re.MULTILINE),
+    re.compile(r'求める[：:]\s*(.+?)(?:\n|$)', re.MULTILINE),
+    re.compile(r'・\s*(.+?)(?:\n|$)', re.MULTILINE)  # 箇条書き
+]
+_TECH_PATTERN = re.compile(r'[A-Za-z]+(?:\s*[A-Za-z]+)*|[ァ-ヴー]+(?:開発|経験|スキル)')
+
 
 @dataclass
 class UncertaintyFactors:
@@ -81,15 +122,7 @@ class UncertaintyQuantifier:
             "具体的に": -0.2,
             "詳細に": -0.2
         }
-        
-        # 時間に関するパターン
-        self.time_patterns = [
-            (r'(\d+)年前', lambda years: min(int(years) * 0.1, 0.8)),  # 年数に応じて不確実性増加
-            (r'最近', lambda: 0.1),
-            (r'現在', lambda: 0.0),
-            (r'過去に', lambda: 0.3),
-            (r'以前', lambda: 0.4)
-        ]
+        self._uncertainty_matcher = KeywordMatcher(list(self.uncertainty_keywords))
     
     def quantify_uncertainty(self, 
                            evaluation_text: str,
@@ -136,21 +169,16 @@ class UncertaintyQuantifier:
         required_keywords = self._extract_requirements(requirements)
         
         # レジュメでカバーされていない要件をカウント
-        uncovered_count = 0
-        for keyword in required_keywords:
-            if keyword.lower() not in resume.lower():
-                uncovered_count += 1
+        resume_lower = resume.lower()
+        uncovered_count = sum(1 for keyword in required_keywords if keyword.lower() not in resume_lower)
         
         if required_keywords:
             missing_ratio = uncovered_count / len(required_keywords)
             uncertainty += missing_ratio * 0.6
         
         # 評価文に「情報不足」「確認できない」などの表現があるか
-        missing_phrases = ["情報が不足", "確認できない", "記載がない", "不明", "判断材料が少ない"]
-        for phrase in missing_phrases:
-            if phrase in evaluation:
-                uncertainty += 0.2
-                break
+        if _MISSING_PHRASE_MATCHER.contains_any(evaluation):
+            uncertainty += 0.2
         
         return min(uncertainty, 1.0)
     
@@ -158,38 +186,23 @@ class UncertaintyQuantifier:
         """経験の曖昧さを評価"""
         uncertainty = 0.0
         
-        # レジュメの曖昧な表現をカウント
-        ambiguous_patterns = [
-            r'関わった',  # 具体的な役割が不明
-            r'サポート',  # 主体的でない可能性
-            r'補助',
-            r'一部',
-            r'など',  # 具体性の欠如
-            r'等',
-            r'様々な',
-            r'いくつかの',
-            r'複数の'
-        ]
-        
-        resume_lines = resume.split('\n')
+        # 経験を記述した行のうち、曖昧な表現を含む行をカウント
         ambiguous_count = 0
         total_experience_lines = 0
-        
-        for line in resume_lines:
-            if any(pattern in ['経験', '実績', '担当', '開発', 'プロジェクト'] for pattern in line):
+        for line in resume.split('\n'):
+            if _EXPERIENCE_LINE_MATCHER.contains_any(line):
                 total_experience_lines += 1
-                for pattern in ambiguous_patterns:
-                    if re.search(pattern, line):
-                        ambiguous_count += 1
-                        break
+                if _AMBIGUOUS_PATTERN.search(line):
+                    ambiguous_count += 1
         
         if total_experience_lines > 0:
             ambiguity_ratio = ambiguous_count / total_experience_lines
             uncertainty += ambiguity_ratio * 0.5
         
         # 評価文の不確実性キーワードをチェック
+        keyword_hits = self._uncertainty_matcher.hits(evaluation)
         for keyword, weight in self.uncertainty_keywords.items():
-            if keyword in evaluation:
+            if keyword in keyword_hits:
                 uncertainty += weight * 0.1
         
         return min(uncertainty, 1.0)
@@ -198,18 +211,8 @@ class UncertaintyQuantifier:
         """矛盾するシグナルを評価"""
         uncertainty = 0.0
         
-        # 評価文内の矛盾表現
-        contradiction_patterns = [
-            r'一方で',
-            r'しかし',
-            r'ただし',
-            r'反面',
-            r'逆に',
-            r'矛盾',
-            r'不一致'
-        ]
-        
-        contradiction_count = sum(1 for pattern in contradiction_patterns if re.search(pattern, evaluation))
+        # 評価文内の矛盾表現（出現した表現の種類数）
+        contradiction_count = len(_CONTRADICTION_MATCHER.hits(evaluation))
         uncertainty += contradiction_count * 0.15
         
         # 検索結果に矛盾があるか
@@ -225,18 +228,8 @@ class UncertaintyQuantifier:
         """間接的証拠による不確実性を評価"""
         uncertainty = 0.0
         
-        # 間接的な経験を示す表現
-        indirect_patterns = [
-            r'類似',
-            r'関連',
-            r'近い',
-            r'似た',
-            r'代替',
-            r'転用可能',
-            r'応用可能'
-        ]
-        
-        indirect_count = sum(1 for pattern in indirect_patterns if re.search(pattern, evaluation))
+        # 間接的な経験を示す表現（出現した表現の種類数）
+        indirect_count = len(_INDIRECT_MATCHER.hits(evaluation))
         uncertainty += indirect_count * 0.1
         
         # 直接的な証拠の欠如
@@ -250,16 +243,13 @@ class UncertaintyQuantifier:
         uncertainty = 0.0
         max_years_ago = 0
         
-        # 経験の時期を分析
-        for pattern, uncertainty_func in self.time_patterns:
-            matches = re.findall(pattern, resume + ' ' + evaluation)
-            for match in matches:
-                if isinstance(match, tuple):
-                    years = match[0]
-                    temp_uncertainty = uncertainty_func(years)
-                else:
-                    temp_uncertainty = uncertainty_func()
-                uncertainty = max(uncertainty, temp_uncertainty)
+        # 経験の時期を分析（N年前は年数に応じて不確実性が増加）
+        for match in _TIME_PATTERN.finditer(resume + ' ' + evaluation):
+            if match.group(1):
+                temp_uncertainty = min(int(match.group(1)) * 0.1, 0.8)
+            else:
+                temp_uncertainty = _TIME_UNCERTAINTY[match.group(0)]
+            uncertainty = max(uncertainty, temp_uncertainty)
         
         # 古い経験への言及
         if "過去の経験" in evaluation or "以前の" in evaluation:
@@ -272,21 +262,11 @@ class UncertaintyQuantifier:
         keywords = []
         
         # 必須要件のパターン
-        patterns = [
-            r'必須[：:]\s*(.+?)(?:\n|$)',
-            r'必要[：:]\s*(.+?)(?:\n|$)',
-            r'求める[：:]\s*(.+?)(?:\n|$)',
-            r'・\s*(.+?)(?:\n|$)'  # 箇条書き
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, requirements, re.MULTILINE)
-            keywords.extend(matches)
+        for pattern in _REQUIREMENT_PATTERNS:
+            keywords.extend(pattern.findall(requirements))
         
         # 技術キーワードの抽出
-        tech_pattern = r'[A-Za-z]+(?:\s*[A-Za-z]+)*|[ァ-ヴー]+(?:開発|経験|スキル)'
-        tech_matches = re.findall(tech_pattern, requirements)
-        keywords.extend(tech_matches)
+        keywords.extend(_TECH_PATTERN.findall(requirements))
         
         return list(set(keywords))[:20]  # 最大20個
     
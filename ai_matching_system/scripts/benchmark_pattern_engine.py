@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+ルールベース分析器のパターンマッチングのマイクロベンチマーク
+キーワードリストの逐次判定・行×パターンのループ（従来方式）と、
+事前コンパイル済みマッチャー（pattern_engine）の1回走査をレジュメ1件あたりの時間で比較する
+--baselineを指定すると、指定リビジョンの分析器一式との比較も行う
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import re
+import subprocess
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from ai_matching.utils import (
+    age_experience_analyzer, contradiction_resolver, dynamic_weight_adjuster,
+    reliability_scorer, semantic_guards, uncertainty_quantifier
+)
+from ai_matching.utils.pattern_engine import KeywordMatcher, compile_alternation
+from ai_matching.utils.semantic_guards import SemanticGuards
+from ai_matching.utils.dynamic_weight_adjuster import INDUSTRY_KEYWORDS
+
+
+ANALYZER_MODULES = {
+    "semantic_guards": semantic_guards,
+    "dynamic_weight_adjuster": dynamic_weight_adjuster,
+    "uncertainty_quantifier": uncertainty_quantifier,
+    "contradiction_resolver": contradiction_resolver,
+    "age_experience_analyzer": age_experience_analyzer,
+    "reliability_scorer": reliability_scorer
+}
+
+
+SAMPLE_RESUME = """職務経歴書
+2012年4月～2016年3月 株式会社サンプル商事（従業員500名規模）
+法人営業として新規開拓と既存顧客のフォローを担当。B2B営業で年間売上3億円の受注実績。
+提案活動から商談、契約までを一貫して担当し、営業成績は部内1位。
+2016年4月～2020年3月 株式会社テックベンチャー
+カスタマーサクセスとして顧客対応、アカウント管理に関わった。SaaSプロダクトの導入支援など。
+一部のプロジェクトでPythonによるデータ分析を補助。様々な業務改善プロジェクトを推進。
+2020年4月～現在 株式会社クラウドソリューションズ
+マネージャーとしてセールスチーム10名を統括。ビジネス開発、マーケティング施策の企画を担当。
+複数の大手金融機関向けのソリューション提案を実施し、5年以上の経験を持つ。
+"""
+
+SAMPLE_EVALUATION = """適合度スコア：72
+確信度：中
+営業経験は豊富で、法人営業の実績が高いと思われる。しかし、マネジメント経験の詳細は不明。
+一方で、SaaS領域での顧客対応経験は期待できる。可能性としてリーダー適性もあるかもしれない。
+"""
+
+SAMPLE_JOB = """必須：法人営業経験3年以上
+必須：SaaS業界での顧客折衝経験
+・チームマネジメント経験
+歓迎：マーケティング知識
+"""
+
+AMBIGUOUS_PATTERNS = [r'関わった', r'サポート', r'補助', r'一部', r'など', r'等', r'様々な', r'いくつかの', r'複数の']
+EXPERIENCE_WORDS = ['経験', '実績', '担当', '開発', 'プロジェクト']
+
+
+def naive_scan(text: str) -> dict:
+    """従来方式: キーワードごとの部分文字列判定と、行ごと・パターンごとのre.search"""
+    sales = {
+        category: [term for term in terms if term in text]
+        for category, terms in SemanticGuards.SALES_TERMS.items()
+    }
+    industries = [
+        industry for industry, keywords in INDUSTRY_KEYWORDS.items()
+        if any(keyword in text for keyword in keywords)
+    ]
+    ambiguous = 0
+    for line in text.split('\n'):
+        if any(word in line for word in EXPERIENCE_WORDS):
+            for pattern in AMBIGUOUS_PATTERNS:
+                if re.search(pattern, line):
+                    ambiguous += 1
+                    break
+    return {"sales": sales, "industries": industries, "ambiguous": ambiguous}
+
+
+_SALES_MATCHER = KeywordMatcher(SemanticGuards.SALES_TERMS)
+_INDUSTRY_MATCHER = KeywordMatcher(INDUSTRY_KEYWORDS)
+_EXPERIENCE_MATCHER = KeywordMatcher(EXPERIENCE_WORDS)
+_AMBIGUOUS_PATTERN = compile_alternation(AMBIGUOUS_PATTERNS)
+
+
+def matcher_scan(text: str) -> dict:
+    """新方式: 事前コンパイル済みマッチャーによる1回走査"""
+    sales_hits = _SALES_MATCHER.scan(text)
+    sales = {category: sales_hits.get(category, []) for category in SemanticGuards.SALES_TERMS}
+    industries = list(_INDUSTRY_MATCHER.scan(text))
+    ambiguous = sum(
+        1 for line in text.split('\n')
+        if _EXPERIENCE_MATCHER.contains_any(line) and _AMBIGUOUS_PATTERN.search(line)
+    )
+    return {"sales": sales, "industries": industries, "ambiguous": ambiguous}
+
+
+def load_baseline_modules(revision: str, work_dir: str) -> dict:
+    """指定リビジョンの分析器モジュールをgitから取り出して読み込む"""
+    modules = {}
+    for name in ANALYZER_MODULES:
+        source = subprocess.run(
+            ["git", "show", f"{revision}:./ai_matching/utils/{name}.py"],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        path = Path(work_dir) / f"baseline_{name}.py"
+        path.write_text(source, encoding='utf-8')
+        spec = importlib.util.spec_from_file_location(f"baseline_{name}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        modules[name] = module
+    return modules
+
+
+def build_analyzers(modules: dict) -> dict:
+    """分析器一式を生成"""
+    return {
+        "guards": modules["semantic_guards"].SemanticGuards,
+        "weights": modules["dynamic_weight_adjuster"].DynamicWeightAdjuster(),
+        "uncertainty": modules["uncertainty_quantifier"].UncertaintyQuantifier(),
+        "contradiction": modules["contradiction_resolver"].ContradictionResolver(),
+        "age": modules["age_experience_analyzer"].AgeExperienceAnalyzer(),
+        "reliability": modules["reliability_scorer"].ReliabilityScorer
+    }
+
+
+def run_analyzers(resume: str, evaluation: str, job: str, analyzers: dict) -> None:
+    """候補者1件・1サイクルあたりのルールベース分析"""
+    analyzers["guards"].detect_sales_experience(resume)
+    analyzers["guards"].evaluate_role_match("営業", resume)
+    analyzers["weights"].adjust_weights({"job_description": job, "job_memo": resume})
+    analyzers["uncertainty"].quantify_uncertainty(evaluation, resume, job)
+    analyzers["contradiction"].detect_contradictions({"resume_text": resume}, {}, evaluation)
+    analyzers["age"].analyze_age_experience_fit(35, 3, resume)
+    analyzers["reliability"].score_source("https://example.com/news", resume)
+
+
+def measure_analyzers(modules: dict, resume: str, number: int) -> float:
+    """分析器一式の1件あたりの所要時間（分析器のログ出力は計測対象外）"""
+    analyzers = build_analyzers(modules)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return per_call_microseconds(
+            lambda: run_analyzers(resume, SAMPLE_EVALUATION, SAMPLE_JOB, analyzers), number
+        )
+
+
+def per_call_microseconds(func, number: int) -> float:
+    """1回あたりの所要時間（マイクロ秒、5回計測の最小値）"""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='パターンマッチングのマイクロベンチマーク')
+    parser.add_argument('--resume', help='レジュメのテキストファイル（省略時はサンプル）')
+    parser.add_argument('--number', type=int, default=2000, help='1計測あたりの実行回数')
+    parser.add_argument('--baseline', help='比較対象のgitリビジョン（例: HEAD~1）')
+    args = parser.parse_args()
+
+    resume = Path(args.resume).read_text(encoding='utf-8') if args.resume else SAMPLE_RESUME
+
+    naive_result = naive_scan(resume)
+    matcher_result = matcher_scan(resume)
+    if naive_result != matcher_result:
+        print("エラー: 従来方式と新方式の結果が一致しません")
+        print(f"  従来方式: {naive_result}")
+        print(f"  新方式: {matcher_result}")
+        sys.exit(1)
+
+    naive_us = per_call_microseconds(lambda: naive_scan(resume), args.number)
+    matcher_us = per_call_microseconds(lambda: matcher_scan(resume), args.number)
+
+    analyzer_number = max(args.number // 10, 1)
+    analyzers_us = measure_analyzers(ANALYZER_MODULES, resume, analyzer_number)
+
+    print(f"レジュメ: {len(resume)}文字 / {resume.count(chr(10)) + 1}行")
+    print(f"キーワード走査（従来方式）: {naive_us:8.1f} μs/件")
+    print(f"キーワード走査（マッチャー）: {matcher_us:8.1f} μs/件 （{naive_us / matcher_us:.1f}倍）")
+
+    if args.baseline:
+        with tempfile.TemporaryDirectory() as work_dir:
+            baseline_modules = load_baseline_modules(args.baseline, work_dir)
+            baseline_us = measure_analyzers(baseline_modules, resume, analyzer_number)
+        print(f"ルールベース分析器一式（{args.baseline}）: {baseline_us:8.1f} μs/件")
+        print(f"ルールベース分析器一式（現在）: {analyzers_us:8.1f} μs/件 （{baseline_us / analyzers_us:.1f}倍）")
+    else:
+        print(f"ルールベース分析器一式: {analyzers_us:8.1f} μs/件")
+
+
+if __name__ == "__main__":
+    main()
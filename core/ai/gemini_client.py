@@ -9,7 +9,8 @@ class GeminiClient:
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY not found in .env file")
         genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        # 要件の構造化に使うモデル（AIマッチングの各ノードのモデルはai_matching/utils/model_router.pyで割り当て）
+        self.model = genai.GenerativeModel(os.getenv("GEMINI_REQUIREMENT_MODEL", "gemini-2.5-flash"))
 
     async def structure_requirement(self, text: str) -> dict:
         prompt = f"""あなたは採用要件をJSON形式で構造化する専門家です。以下の採用要件テキストを、指定されたJSONスキーマに従って構造化してください。
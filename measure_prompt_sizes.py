@@ -15,20 +15,11 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'ai_matching_system'))
 from ai_matching.prompts.evaluation_base import EvaluationPrompts
 from ai_matching.prompts.scoring_criteria import ScoringCriteria
 from ai_matching.prompts.requirement_rules import RequirementRules
+from ai_matching.utils.prompt_budget import estimate_tokens
 
 def count_tokens_estimate(text: str) -> int:
-    """
-    トークン数の推定（日本語を考慮）
-    - 英語: 約4文字 = 1トークン
-    - 日本語: 約2文字 = 1トークン（漢字・ひらがな・カタカナ）
-    """
-    # 簡易的な推定
-    japanese_chars = sum(1 for c in text if '\u3000' <= c <= '\u9fff' or '\u3040' <= c <= '\u309f' or '\u30a0' <= c <= '\u30ff')
-    english_chars = len(text) - japanese_chars
-    
-    # 日本語は2文字で1トークン、英語は4文字で1トークン
-    estimated_tokens = (japanese_chars / 2) + (english_chars / 4)
-    return int(estimated_tokens)
+    """トークン数の推定（プロンプト予算と同じ推定方法を使用）"""
+    return estimate_tokens(text)
 
 def measure_prompt_sizes():
     """各プロンプトのサイズを測定"""
@@ -13,7 +13,9 @@ import time
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 # プロジェクトルートをパスに追加
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+sys.path.append(os.path.join(project_root, "ai_matching_system"))
 
 # 環境変数を読み込む
 load_dotenv()
@@ -27,6 +29,13 @@ except ImportError:
     import pinecone
     Pinecone = None
 
+from ai_matching.rag.case_store import CaseStore, split_metadata
+from ai_matching.rag.lexical_backfill import SEARCH_TEXT_FIELD, get_lexical_index, lexical_metadata
+from ai_matching.utils.prompt_budget import truncate_to_tokens
+
+# コメント・評価理由の最大トークン数（日本語で約500文字）
+PAYLOAD_MAX_TOKENS = 250
+
 class ClientEvaluationSyncer:
     """クライアント評価をPineconeに同期"""
     
@@ -64,6 +73,14 @@ class ClientEvaluationSyncer:
             self.index = self.pc.Index(self.index_name)
         else:
             self.index = pinecone.Index(self.index_name)
+        
+        # コメント等の大きなフィールドはベクトルに載せず共有ケースストア（Supabase）に保持
+        self.case_store = CaseStore(self.supabase)
+        self._payload_batch = []
+        
+        # 語彙検索用インデックス（アップロード成功後にまとめて登録）
+        self.lexical_index = get_lexical_index(self.namespace)
+        self._lexical_batch = []
     
     async def sync_evaluations(self, batch_size: int = 100, max_retries: int = 3):
         """未同期の評価をPineconeに同期（エラーハンドリング強化版）"""
@@ -91,7 +108,12 @@ class ClientEvaluationSyncer:
                 
                 # バッチサイズに達したらアップロード
                 if len(batch_vectors) >= 100 or i == len(unsync_data) - 1:
+                    # ペイロードを先に保存し、補完できないベクトルが検索されないようにする
+                    self.case_store.put_many(self._payload_batch)
+                    self._payload_batch = []
                     await self._upsert_batch_with_retry(batch_vectors, max_retries)
+                    self.lexical_index.add_documents(self._lexical_batch)
+                    self._lexical_batch = []
                     
                     # 同期フラグを更新
                     for j in range(len(batch_vectors) // 3):  # 3ベクトル/評価
@@ -162,8 +184,12 @@ class ClientEvaluationSyncer:
         candidate_text = self._create_candidate_text(vectors_data)
         candidate_embedding = await self._generate_embedding(candidate_text)
         
-        # 拡張メタデータの準備
-        metadata_base = self._create_enhanced_metadata(evaluation, case_id)
+        # 拡張メタデータの準備（フィルタ用のみベクトルに載せる）
+        metadata = self._create_enhanced_metadata(evaluation, case_id)
+        metadata_base, payload = split_metadata(metadata)
+        payload[SEARCH_TEXT_FIELD] = combined_text  # 語彙インデックスのバックフィル用
+        self._payload_batch.append((case_id, payload))
+        self._lexical_batch.append((case_id, combined_text, lexical_metadata(metadata)))
         
         # ベクトルを返す（アップロードはしない）
         return [
@@ -307,12 +333,6 @@ class ClientEvaluationSyncer:
         )
         return result['embedding']
     
-    def _truncate_text(self, text: str, max_length: int) -> str:
-        """テキストを指定長に切り詰める"""
-        if not text:
-            return ""
-        return text[:max_length] if len(text) > max_length else text
-    
     def _update_sync_status(self, evaluation_id: str):
         """同期ステータスを更新"""
         self.supabase.table('ai_evaluations')\
@@ -360,7 +380,8 @@ class ClientEvaluationSyncer:
             
             # クライアント評価
             'client_evaluation': evaluation.get('client_evaluation', ''),
-            'client_comment': self._truncate_text(evaluation.get('client_comment', ''), 500),
+            'client_comment': truncate_to_tokens(evaluation.get('client_comment', '') or '', PAYLOAD_MAX_TOKENS),
+            'reasoning': truncate_to_tokens(evaluation.get('overall_assessment', '') or '', PAYLOAD_MAX_TOKENS),
             
             # 評価の一致度
             'evaluation_match': evaluation.get('recommendation', '') == evaluation.get('client_evaluation', ''),
@@ -374,7 +395,7 @@ class ClientEvaluationSyncer:
             # 品質指標
             'has_detailed_feedback': len(evaluation.get('client_comment', '')) > 50,
             'data_source': 'webapp_sync',
-            'sync_version': '2.0'  # メタデータ構造のバージョン
+            'sync_version': '3.3'  # メタデータ構造のバージョン（3.2: ペイロードを共有ケースストア（Supabase）に分離、3.3: 語彙検索用の統合テキストを追加）
         }
         
         # 構造化データからの追加情報
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Pineconeに登録済みの過去事例から語彙検索用インデックスを構築するスクリプト
+初回導入時や別ホストでインデックスを作り直す場合に実行する
+
+使い方:
+  python scripts/utilities/backfill_lexical_index.py [--rebuild]
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# プロジェクトルートとai_matching_systemをPythonパスに追加
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "ai_matching_system"))
+
+from dotenv import load_dotenv
+try:
+    from pinecone import Pinecone
+except ImportError:
+    import pinecone
+    Pinecone = None
+
+from ai_matching.rag.lexical_backfill import backfill_lexical_index, get_lexical_index
+
+load_dotenv()
+
+INDEX_NAME = "recruitment-matching"
+NAMESPACE = "historical-cases"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="語彙検索用インデックスのバックフィル")
+    parser.add_argument("--rebuild", action="store_true", help="登録済みの事例も再登録する")
+    args = parser.parse_args()
+
+    api_key = os.getenv("PINECONE_API_KEY")
+    if not api_key:
+        print("❌ PINECONE_API_KEY が設定されていません")
+        sys.exit(1)
+
+    if Pinecone:
+        index = Pinecone(api_key=api_key).Index(INDEX_NAME)
+    else:
+        pinecone.init(api_key=api_key)
+        index = pinecone.Index(INDEX_NAME)
+
+    lexical_index = get_lexical_index(NAMESPACE)
+    print(f"語彙インデックス: {lexical_index.storage_path}（登録済み {len(lexical_index)}件）")
+
+    backfill_lexical_index(lexical_index, index, NAMESPACE, rebuild=args.rebuild)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+#!/bin/bash
+# 本番起動スクリプト（Render / Procfile）
+# マッチングワーカーとWebサーバーを同じコンテナで起動し、ジョブキュー（SQLite）を共有する
+# MATCHING_QUEUE_PATHは再起動後もジョブが残るよう永続ディスク上を指定すること
+
+cd "$(dirname "$0")"
+export PYTHONPATH="$(pwd):$PYTHONPATH"
+export MATCHING_QUEUE_PATH="${MATCHING_QUEUE_PATH:-./job_queue_data}"
+
+echo "Starting matching worker (queue: $MATCHING_QUEUE_PATH)"
+python -m webapp.worker &
+WORKER_PID=$!
+
+echo "Starting WebApp on port ${PORT:-8000}"
+python -m uvicorn webapp.main:app --host 0.0.0.0 --port "${PORT:-8000}" &
+WEB_PID=$!
+
+trap 'kill -TERM $WORKER_PID $WEB_PID 2>/dev/null' TERM INT
+
+# どちらかが終了したらもう一方も停止し、プラットフォームにサービスごと再起動させる
+wait -n
+STATUS=$?
+kill -TERM $WORKER_PID $WEB_PID 2>/dev/null
+wait
+exit $STATUS
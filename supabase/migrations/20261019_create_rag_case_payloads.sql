@@ -0,0 +1,17 @@
+-- RAG過去事例のペイロードテーブル
+-- Pineconeのベクトルにはフィルタ用の軽量メタデータのみを載せ、
+-- コメント・評価理由・プレビュー等の大きなフィールドはcase_id単位でここに保持する
+CREATE TABLE IF NOT EXISTS rag_case_payloads (
+    case_id TEXT PRIMARY KEY,
+    payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+-- 同期ウォーターマーク（最終更新日時）の取得用
+CREATE INDEX IF NOT EXISTS idx_rag_case_payloads_updated ON rag_case_payloads (updated_at DESC);
+
+-- RLSポリシー設定（同期バッチ・Webアプリ・ワーカーはサービスキーでアクセス）
+ALTER TABLE rag_case_payloads ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Service role can manage rag case payloads" ON rag_case_payloads
+    FOR ALL USING (auth.role() = 'service_role');
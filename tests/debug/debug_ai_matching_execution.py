@@ -61,10 +61,10 @@ async def debug_matching_execution():
         # マッチャーの状態を再確認
         print(f"\n5. マッチャー状態:")
         print(f"   - ai_matching_service.matcher: {ai_matching_service.matcher}")
-        print(f"   - hasattr match_candidate_direct: {hasattr(ai_matching_service.matcher, 'match_candidate_direct') if ai_matching_service.matcher else 'N/A'}")
+        print(f"   - hasattr match_candidate_direct_async: {hasattr(ai_matching_service.matcher, 'match_candidate_direct_async') if ai_matching_service.matcher else 'N/A'}")
         
         # 条件チェックを詳細に
-        condition = ai_matching_service.matcher and hasattr(ai_matching_service.matcher, 'match_candidate_direct')
+        condition = ai_matching_service.matcher and hasattr(ai_matching_service.matcher, 'match_candidate_direct_async')
         print(f"   - Condition result: {condition}")
         
         # フォーマットされたテキストを確認
@@ -79,8 +79,7 @@ async def debug_matching_execution():
         if condition:
             print(f"\n7. 実際のマッチングを実行（テスト）:")
             try:
-                result = await asyncio.to_thread(
-                    ai_matching_service.matcher.match_candidate_direct,
+                result = await ai_matching_service.matcher.match_candidate_direct_async(
                     resume_text=resume_text,
                     job_description_text=job_desc_text,
                     job_memo_text=job_memo_text,
@@ -146,6 +146,7 @@ async def admin_jobs(request: Request, user: Optional[dict] = Depends(get_curren
     try:
         from core.utils.supabase_client import get_supabase_client
         from core.services.candidate_counter import CandidateCounter
+        from webapp.services.job_queue import get_job_queue
         
         supabase = get_supabase_client()
         candidate_counter = CandidateCounter()
@@ -154,6 +155,17 @@ async def admin_jobs(request: Request, user: Optional[dict] = Depends(get_curren
         jobs_response = supabase.table('jobs').select('*').order('job_id', desc=False).execute()
         jobs = jobs_response.data if jobs_response.data else []
         
+        # ジョブキューの状況（待ちタスク数・完了見込み）
+        job_queue = get_job_queue()
+        queue_metrics = job_queue.get_job_metrics()
+        for job in jobs:
+            job['queue'] = queue_metrics.get(job.get('id'))
+        queue_summary = {
+            "queued": sum(m['queued'] for m in queue_metrics.values()),
+            "running": sum(m['running'] for m in queue_metrics.values()),
+            "max_concurrent": job_queue.max_concurrent
+        }
+        
         # 対象候補者数を追加（改善版）
         for job in jobs:
             try:
@@ -216,11 +228,13 @@ async def admin_jobs(request: Request, user: Optional[dict] = Depends(get_curren
         print(f"Error fetching jobs: {e}")
         jobs = []
         running_count = completed_count = pending_count = error_count = 0
+        queue_summary = None
     
     return templates.TemplateResponse("admin/jobs.html", {
         "request": request, 
         "current_user": user, 
         "jobs": jobs,
+        "queue_summary": queue_summary,
         "running_count": running_count,
         "completed_count": completed_count,
         "pending_count": pending_count,
@@ -474,11 +488,9 @@ async def admin_job_execute(job_id: str, request: Request, user: Optional[dict]
         return JSONResponse(status_code=403, content={"error": "Unauthorized"})
     
     try:
-        # 直接AIマッチングサービスを呼び出し
-        from webapp.services.ai_matching_service import ai_matching_service
+        from webapp.services.job_queue import get_job_queue
         from core.utils.supabase_client import get_supabase_client
         from datetime import datetime
-        import asyncio
         
         supabase = get_supabase_client()
         
@@ -502,9 +514,15 @@ async def admin_job_execute(job_id: str, request: Request, user: Optional[dict]
         if job.get('status') not in ['pending', 'failed']:
             return JSONResponse(status_code=400, content={"error": "このジョブは既に実行中または完了しています"})
         
-        # バックグラウンドでジョブを実行
-        print(f"Starting job execution for job_id: {job_id}")
-        asyncio.create_task(ai_matching_service.process_job(job_id))
+        # ジョブキューに登録（ワーカープロセス（webapp/worker.py）が実行する）
+        print(f"Enqueuing job execution for job_id: {job_id}")
+        supabase.table('jobs').update({
+            'status': 'running',
+            'started_at': datetime.utcnow().isoformat(),
+            'progress': 0,
+            'updated_at': datetime.utcnow().isoformat()
+        }).eq('id', job_id).execute()
+        get_job_queue().enqueue_job(job_id, client_id=job.get('client_id'), priority=job.get('priority'))
         
         return JSONResponse(status_code=200, content={
             "success": True,
@@ -585,6 +603,7 @@ async def manager_jobs(request: Request, user: Optional[dict] = Depends(get_curr
     try:
         from core.utils.supabase_client import get_supabase_client
         from core.services.candidate_counter import CandidateCounter
+        from webapp.services.job_queue import get_job_queue
         
         supabase = get_supabase_client()
         candidate_counter = CandidateCounter()
@@ -593,6 +612,17 @@ async def manager_jobs(request: Request, user: Optional[dict] = Depends(get_curr
         jobs_response = supabase.table('jobs').select('*, client:clients(name)').order('created_at', desc=True).execute()
         jobs = jobs_response.data if jobs_response.data else []
         
+        # ジョブキューの状況（待ちタスク数・完了見込み）
+        job_queue = get_job_queue()
+        queue_metrics = job_queue.get_job_metrics()
+        for job in jobs:
+            job['queue'] = queue_metrics.get(job.get('id'))
+        queue_summary = {
+            "queued": sum(m['queued'] for m in queue_metrics.values()),
+            "running": sum(m['running'] for m in queue_metrics.values()),
+            "max_concurrent": job_queue.max_concurrent
+        }
+        
         # クライアント名を展開と対象候補者数を追加（簡素化版）
         for job in jobs:
             if 'client' in job and job['client']:
@@ -640,11 +670,13 @@ async def manager_jobs(request: Request, user: Optional[dict] = Depends(get_curr
         print(f"Error fetching jobs: {e}")
         jobs = []
         running_count = completed_count = pending_count = error_count = 0
+        queue_summary = None
     
     return templates.TemplateResponse("admin/jobs.html", {
         "request": request, 
         "current_user": user, 
         "jobs": jobs,
+        "queue_summary": queue_summary,
         "running_count": running_count,
         "completed_count": completed_count,
         "pending_count": pending_count,
@@ -11,6 +11,7 @@ from pydantic import BaseModel
 import pandas as pd
 
 from core.utils.supabase_client import get_supabase_client
+from webapp.services.resume_fingerprint_service import resume_fingerprint_service
 from .auth import get_current_user, get_current_user_from_cookie
 
 router = APIRouter(prefix="/api/csv", tags=["csv"])
@@ -74,6 +75,8 @@ async def process_candidates_csv(df: pd.DataFrame, user_id: str) -> UploadResult
             detail=f"必須カラムが不足しています: {', '.join(missing_columns)}"
         )
     
+    saved_candidates = []
+    
     # 各行を処理
     for index, row in df.iterrows():
         try:
@@ -97,6 +100,7 @@ async def process_candidates_csv(df: pd.DataFrame, user_id: str) -> UploadResult
                 candidate_data,
                 on_conflict="candidate_id"
             ).execute()
+            saved_candidates.extend(response.data or [])
             
             result.success += 1
             
@@ -107,6 +111,9 @@ async def process_candidates_csv(df: pd.DataFrame, user_id: str) -> UploadResult
                 "message": str(e)
             })
     
+    # 近似重複検出用にレジュメ指紋を登録
+    resume_fingerprint_service.register_candidates(saved_candidates)
+    
     return result
 
 
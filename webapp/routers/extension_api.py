@@ -9,6 +9,7 @@ from supabase import create_client
 
 from core.utils.supabase_client import get_supabase_client
 from webapp.middleware.extension_auth import get_extension_user
+from webapp.services.resume_fingerprint_service import resume_fingerprint_service
 
 router = APIRouter(prefix="/api/extension", tags=["extension-api"])
 
@@ -336,6 +337,9 @@ async def save_candidates_batch(
                     status_code=500,
                     detail="候補者データの保存に失敗しました"
                 )
+            
+            # 近似重複検出用にレジュメ指紋を登録
+            resume_fingerprint_service.register_candidates(insert_result.data)
         
         # セッションの統計を更新
         session_update = {
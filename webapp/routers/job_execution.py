@@ -2,11 +2,11 @@
 ジョブ実行管理エンドポイント
 AIマッチングジョブの実行を管理
 """
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Request
+from fastapi import APIRouter, HTTPException, Depends, Request
 from typing import Optional
 
 from webapp.dependencies import authenticated_user
-from webapp.services.ai_matching_service import ai_matching_service
+from webapp.services.job_queue import get_job_queue
 from core.utils.supabase_client import get_supabase_client
 
 router = APIRouter(prefix="/api/jobs", tags=["job-execution"])
@@ -14,7 +14,6 @@ router = APIRouter(prefix="/api/jobs", tags=["job-execution"])
 @router.post("/{job_id}/execute")
 async def execute_job(
     job_id: str,
-    background_tasks: BackgroundTasks,
     current_user: dict = Depends(authenticated_user)
 ):
     """ジョブを実行"""
@@ -50,11 +49,8 @@ async def execute_job(
             'updated_at': datetime.utcnow().isoformat()
         }).eq('id', job_id).execute()
         
-        # バックグラウンドでジョブを実行
-        background_tasks.add_task(
-            ai_matching_service.process_job,
-            job_id
-        )
+        # ジョブキューに登録（ワーカープロセス（webapp/worker.py）が実行する）
+        get_job_queue().enqueue_job(job_id, client_id=job.get('client_id'), priority=job.get('priority'))
         
         return {
             "success": True,
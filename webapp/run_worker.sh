@@ -0,0 +1,36 @@
+#!/bin/bash
+# マッチングワーカー起動スクリプト
+# 使い方: ./run_worker.sh [ワーカープロセス数] [プロセスあたりの同時処理数]
+
+# スクリプトのディレクトリを取得
+SCRIPT_DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" && pwd )"
+WEBAPP_DIR="$SCRIPT_DIR"
+PROJECT_ROOT="$(dirname "$SCRIPT_DIR")"
+
+# ワーカープロセス数
+WORKERS=${1:-${MATCHING_WORKERS:-2}}
+
+# プロセスあたりの同時処理数（全体の上限はMATCHING_MAX_CONCURRENT_EVALUATIONS）
+CONCURRENCY=${2:-${MATCHING_WORKER_CONCURRENCY:-1}}
+
+# プロジェクトルートに移動
+cd "$PROJECT_ROOT"
+
+# 環境変数の読み込み
+if [ -f .env ]; then
+    export $(cat .env | grep -v '^#' | xargs)
+fi
+
+# DeepResearchのチェックポイント（再起動で中断された候補者を最後に完了したサイクルから再開）
+export RESEARCH_CHECKPOINT_PATH=${RESEARCH_CHECKPOINT_PATH:-./research_checkpoint_data}
+
+# Pythonパスの設定
+export PYTHONPATH="${PROJECT_ROOT}:${WEBAPP_DIR}"
+
+# ワーカー起動（異常終了時は自動再起動。処理中だったタスクはリース切れ後に再取得される）
+echo "Starting $WORKERS matching worker(s) x $CONCURRENCY slot(s)"
+while true; do
+    python -m webapp.worker --workers "$WORKERS" --concurrency "$CONCURRENCY"
+    echo "Workers stopped. Restarting in 5 seconds..."
+    sleep 5
+done
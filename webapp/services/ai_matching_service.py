@@ -5,8 +5,7 @@ AIマッチングシステムとの統合サービス
 import os
 import sys
 import json
-import asyncio
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Set, Tuple
 from datetime import datetime
 import uuid
 from dotenv import load_dotenv
@@ -24,12 +23,15 @@ sys.path.append(ai_matching_path)
 try:
     from ai_matching.nodes.orchestrator import SeparatedDeepResearchMatcher
     from ai_matching.utils.resume_parser import ResumeParser
+    from ai_matching.utils.resilience import call_blocking
 except ImportError as e:
     print(f"Warning: Could not import AI matching system: {e}")
     SeparatedDeepResearchMatcher = None
     ResumeParser = None
+    call_blocking = None
 
 from core.utils.supabase_client import get_supabase_client
+from webapp.services.resume_fingerprint_service import resume_fingerprint_service
 
 class AIMatchingService:
     """AIマッチングシステムとの統合サービス"""
@@ -97,53 +99,20 @@ class AIMatchingService:
             self.resume_parser = None
     
     async def process_job(self, job_id: str):
-        """ジョブを処理"""
+        """ジョブを処理（Webプロセス内で全候補者を順に評価。通常はワーカー（webapp/worker.py）経由で実行する）"""
         try:
-            # ジョブ情報を取得
-            job = await self._get_job_details(job_id)
-            if not job:
-                raise Exception(f"Job {job_id} not found")
-            
-            # ジョブステータスを更新（既にrunningの場合はスキップ）
-            job_status = job.get('status')
-            if job_status != 'running':
-                await self._update_job_status(job_id, 'running', 0)
-            
-            # 要件情報を取得
-            requirement = await self._get_requirement(job['requirement_id'])
-            if not requirement:
-                raise Exception(f"Requirement {job['requirement_id']} not found")
-            
-            # 候補者を取得（スクレイピング結果から）
-            candidates, all_candidates, evaluated_candidate_ids = await self._get_candidates_for_job(job)
-            
-            print(f"Job {job_id}: Found {len(candidates)} candidates to process")
-            print(f"Job details: client_id={job.get('client_id')}, requirement_id={job.get('requirement_id')}")
-            
-            # 進捗計算用の変数
-            total_candidates_count = len(all_candidates)  # 要件に合致する全候補者数
-            already_evaluated_count = len(evaluated_candidate_ids)  # 既に評価済みの数
-            processed = 0  # 今回処理した数
-            
-            # 既に全て評価済みの場合
-            if not candidates and total_candidates_count > 0:
-                print(f"All {total_candidates_count} candidates already evaluated for job {job_id}")
-                await self._update_job_status(job_id, 'completed', 100)
-                return
-            elif not candidates:
-                print(f"No candidates found for job {job_id}")
-                await self._update_job_status(job_id, 'completed', 100)
+            prepared = await self.prepare_job(job_id)
+            if not prepared:
                 return
             
-            print(f"Progress calculation - Total: {total_candidates_count}, Already evaluated: {already_evaluated_count}, To process: {len(candidates)}")
-            
-            # 開始時の進捗率を計算して更新
-            initial_progress = int((already_evaluated_count / total_candidates_count) * 100) if total_candidates_count > 0 else 0
-            await self._update_job_status(job_id, 'running', initial_progress)
-            print(f"Initial progress: {already_evaluated_count}/{total_candidates_count} = {initial_progress}%")
+            requirement = prepared['requirement']
+            total_candidates_count = prepared['total_candidates_count']
+            already_evaluated_count = prepared['already_evaluated_count']
+            processed = 0  # 今回処理した数
             
             # 各候補者を評価
-            for candidate in candidates:
+            for group in prepared['candidate_groups']:
+                candidate = group['representative']
                 try:
                     # ジョブのステータスを確認（停止要求チェック）
                     current_job = await self._get_job_details(job_id)
@@ -154,101 +123,10 @@ class AIMatchingService:
                             return
                         break
                     
-                    # Supabaseから取得したデータを直接使用
-                    resume_text = candidate.get('candidate_resume', '')
-                    job_desc_text = self._format_job_description(requirement)
-                    job_memo_text = self._format_job_memo(requirement)
-                    
-                    # レジュメが空の場合はスキップ
-                    if not resume_text:
-                        print(f"[AI Matching] Skipping candidate {candidate.get('id')} - no resume text")
-                        processed += 1
-                        continue
-                    
-                    # 構造化データの使用状況をログ出力
-                    if requirement.get('structured_data', {}).get('basic_info'):
-                        print(f"[AI Matching] Using new structured data format for requirement {requirement.get('id')}")
-                    elif requirement.get('structured_data'):
-                        print(f"[AI Matching] Using legacy structured data format for requirement {requirement.get('id')}")
-                    else:
-                        print(f"[AI Matching] No structured data found for requirement {requirement.get('id')}")
-                    
-                    # フォーマットされた内容のプレビューをログ出力
-                    print(f"[AI Matching] Formatted job description preview (first 200 chars):")
-                    print(f"  {job_desc_text[:200]}...")
-                    print(f"[AI Matching] Formatted job memo preview (first 200 chars):")
-                    print(f"  {job_memo_text[:200]}...")
-                    
-                    # レジュメを構造化
-                    structured_resume_data = None
-                    if self.resume_parser and resume_text:
-                        try:
-                            print(f"[AI Matching] Parsing resume for candidate {candidate.get('id')}")
-                            structured_resume = await self.resume_parser.parse_resume(resume_text)
-                            # StructuredResumeオブジェクトからディクショナリに変換
-                            structured_resume_data = {
-                                'basic_info': structured_resume.basic_info,
-                                'raw_data': structured_resume.raw_data,
-                                'matching_data': structured_resume.matching_data,
-                                'metadata': structured_resume.metadata
-                            }
-                            print(f"[AI Matching] Resume parsed successfully - extracted {len(structured_resume.matching_data.get('skills_flat', []))} skills")
-                        except Exception as e:
-                            print(f"[AI Matching] Failed to parse resume: {e}")
-                            # パースに失敗してもマッチングは続行
-                    
-                    # 再度停止チェック（AI処理の直前）
-                    current_job = await self._get_job_details(job_id)
-                    if current_job and current_job.get('status') != 'running':
-                        print(f"Job {job_id} stopped before AI processing")
+                    saved = await self.evaluate_candidate_group(job_id, requirement, group)
+                    if saved is None:
                         return
-                    
-                    # AIマッチング実行
-                    if self.matcher and hasattr(self.matcher, 'match_candidate_direct'):
-                        # 数値パラメータの安全な変換
-                        def safe_int_convert(value):
-                            if value is None:
-                                return None
-                            try:
-                                return int(value)
-                            except (ValueError, TypeError):
-                                return None
-                        
-                        # 直接テキストを渡す
-                        print(f"[AI Matching] Using real AI matching for candidate {candidate.get('id')}")
-                        print(f"[AI Matching] Candidate info - age: {candidate.get('age')}, gender: {candidate.get('gender')}, company: {candidate.get('candidate_company')}")
-                        
-                        # 数値パラメータを安全に変換
-                        candidate_age = safe_int_convert(candidate.get('age'))
-                        enrolled_company_count = safe_int_convert(candidate.get('enrolled_company_count'))
-                        
-                        result = await asyncio.to_thread(
-                            self.matcher.match_candidate_direct,
-                            resume_text=resume_text,
-                            job_description_text=job_desc_text,
-                            job_memo_text=job_memo_text,
-                            max_cycles=3,
-                            # 候補者情報を追加
-                            candidate_id=candidate.get('candidate_id'),
-                            candidate_age=candidate_age,
-                            candidate_gender=candidate.get('gender'),
-                            candidate_company=candidate.get('candidate_company'),
-                            enrolled_company_count=enrolled_company_count,
-                            # 構造化データを追加
-                            structured_job_data=requirement.get('structured_data'),
-                            structured_resume_data=structured_resume_data
-                        )
-                        print(f"[AI Matching] Real result - Score: {result.get('final_score')}, Rec: {result.get('final_judgment', {}).get('recommendation')}")
-                    else:
-                        # マッチャーが初期化されていない場合のダミー結果
-                        print(f"[AI Matching] Using dummy result - matcher: {self.matcher}, has method: {hasattr(self.matcher, 'match_candidate_direct') if self.matcher else False}")
-                        result = self._generate_dummy_result()
-                        print(f"[AI Matching] Dummy result - Score: {result.get('final_score')}, Rec: {result.get('final_judgment', {}).get('recommendation')}")
-                    
-                    # 結果を保存
-                    await self._save_evaluation_result(job_id, candidate, result)
-                    
-                    processed += 1
+                    processed += saved
                     
                     # 進捗更新（処理後に更新）
                     current_evaluated_count = already_evaluated_count + processed
@@ -267,14 +145,218 @@ class AIMatchingService:
             print(f"Error processing job {job_id}: {e}")
             await self._update_job_status(job_id, 'failed', error_message=str(e))
     
+    async def prepare_job(self, job_id: str) -> Optional[Dict]:
+        """
+        ジョブを実行中にし、評価対象の候補者グループを用意
+        
+        Returns:
+            requirement, candidate_groups, total_candidates_count, already_evaluated_count を持つ辞書
+            （評価対象がなくジョブを完了した場合はNone）
+        """
+        # ジョブ情報を取得
+        job = await self._get_job_details(job_id)
+        if not job:
+            raise Exception(f"Job {job_id} not found")
+        
+        # ジョブステータスを更新（既にrunningの場合はスキップ）
+        job_status = job.get('status')
+        if job_status != 'running':
+            await self._update_job_status(job_id, 'running', 0)
+        
+        # 要件情報を取得
+        requirement = await self._get_requirement(job['requirement_id'])
+        if not requirement:
+            raise Exception(f"Requirement {job['requirement_id']} not found")
+        
+        # 候補者を取得（スクレイピング結果から）
+        candidates, all_candidates, evaluated_candidate_ids = await self._get_candidates_for_job(job)
+        
+        print(f"Job {job_id}: Found {len(candidates)} candidates to process")
+        print(f"Job details: client_id={job.get('client_id')}, requirement_id={job.get('requirement_id')}")
+        
+        # 進捗計算用の変数
+        total_candidates_count = len(all_candidates)  # 要件に合致する全候補者数
+        already_evaluated_count = len(evaluated_candidate_ids)  # 既に評価済みの数
+        
+        # 既に全て評価済みの場合
+        if not candidates and total_candidates_count > 0:
+            print(f"All {total_candidates_count} candidates already evaluated for job {job_id}")
+            await self._update_job_status(job_id, 'completed', 100)
+            return None
+        elif not candidates:
+            print(f"No candidates found for job {job_id}")
+            await self._update_job_status(job_id, 'completed', 100)
+            return None
+        
+        print(f"Progress calculation - Total: {total_candidates_count}, Already evaluated: {already_evaluated_count}, To process: {len(candidates)}")
+        
+        # 開始時の進捗率を計算して更新
+        initial_progress = int((already_evaluated_count / total_candidates_count) * 100) if total_candidates_count > 0 else 0
+        await self._update_job_status(job_id, 'running', initial_progress)
+        print(f"Initial progress: {already_evaluated_count}/{total_candidates_count} = {initial_progress}%")
+        
+        # 近似重複（再スクレイピング等）をグループ化し、代表者のみ評価する
+        candidate_groups = resume_fingerprint_service.group_candidates(candidates)
+        duplicate_count = sum(len(group['duplicates']) for group in candidate_groups)
+        if duplicate_count:
+            print(f"[AI Matching] Near-duplicate resumes: {duplicate_count} candidates will reuse a representative's result ({len(candidate_groups)} evaluations)")
+        
+        return {
+            'requirement': requirement,
+            'candidate_groups': candidate_groups,
+            'total_candidates_count': total_candidates_count,
+            'already_evaluated_count': already_evaluated_count
+        }
+    
+    async def evaluate_candidate_group(self, job_id: str, requirement: Dict, group: Dict,
+                                       saved_ids: Optional[Set[str]] = None) -> Optional[int]:
+        """
+        候補者グループ（代表者と近似重複）を評価して結果を保存
+        
+        Args:
+            job_id: ジョブID
+            requirement: 要件情報
+            group: representative（代表者）と duplicates（(候補者, 類似度) のリスト）
+            saved_ids: 前回の試行で評価結果を保存済みの候補者ID（再保存しない）
+            
+        Returns:
+            処理した候補者数（AI処理の直前にジョブが停止されていた場合はNone）
+        """
+        candidate = group['representative']
+        
+        # Supabaseから取得したデータを直接使用
+        resume_text = candidate.get('candidate_resume', '')
+        job_desc_text = self._format_job_description(requirement)
+        job_memo_text = self._format_job_memo(requirement)
+        
+        # レジュメが空の場合はスキップ
+        if not resume_text:
+            print(f"[AI Matching] Skipping candidate {candidate.get('id')} - no resume text")
+            return 1
+        
+        # 構造化データの使用状況をログ出力
+        if requirement.get('structured_data', {}).get('basic_info'):
+            print(f"[AI Matching] Using new structured data format for requirement {requirement.get('id')}")
+        elif requirement.get('structured_data'):
+            print(f"[AI Matching] Using legacy structured data format for requirement {requirement.get('id')}")
+        else:
+            print(f"[AI Matching] No structured data found for requirement {requirement.get('id')}")
+        
+        # フォーマットされた内容のプレビューをログ出力
+        print(f"[AI Matching] Formatted job description preview (first 200 chars):")
+        print(f"  {job_desc_text[:200]}...")
+        print(f"[AI Matching] Formatted job memo preview (first 200 chars):")
+        print(f"  {job_memo_text[:200]}...")
+        
+        # レジュメを構造化
+        structured_resume_data = None
+        if self.resume_parser and resume_text:
+            try:
+                print(f"[AI Matching] Parsing resume for candidate {candidate.get('id')}")
+                structured_resume = await self.resume_parser.parse_resume(resume_text)
+                # StructuredResumeオブジェクトからディクショナリに変換
+                structured_resume_data = {
+                    'basic_info': structured_resume.basic_info,
+                    'raw_data': structured_resume.raw_data,
+                    'matching_data': structured_resume.matching_data,
+                    'metadata': structured_resume.metadata
+                }
+                print(f"[AI Matching] Resume parsed successfully - extracted {len(structured_resume.matching_data.get('skills_flat', []))} skills")
+            except Exception as e:
+                print(f"[AI Matching] Failed to parse resume: {e}")
+                # パースに失敗してもマッチングは続行
+        
+        # 再度停止チェック（AI処理の直前）
+        current_job = await self._get_job_details(job_id)
+        if current_job and current_job.get('status') != 'running':
+            print(f"Job {job_id} stopped before AI processing")
+            return None
+        
+        # AIマッチング実行
+        if self.matcher and hasattr(self.matcher, 'match_candidate_direct_async'):
+            # 数値パラメータの安全な変換
+            def safe_int_convert(value):
+                if value is None:
+                    return None
+                try:
+                    return int(value)
+                except (ValueError, TypeError):
+                    return None
+            
+            # 直接テキストを渡す
+            print(f"[AI Matching] Using real AI matching for candidate {candidate.get('id')}")
+            print(f"[AI Matching] Candidate info - age: {candidate.get('age')}, gender: {candidate.get('gender')}, company: {candidate.get('candidate_company')}")
+            
+            # 数値パラメータを安全に変換
+            candidate_age = safe_int_convert(candidate.get('age'))
+            enrolled_company_count = safe_int_convert(candidate.get('enrolled_company_count'))
+            
+            # サービスのイベントループ上で直接実行（候補者ごとのスレッド・イベントループを作らない）
+            result = await self.matcher.match_candidate_direct_async(
+                resume_text=resume_text,
+                job_description_text=job_desc_text,
+                job_memo_text=job_memo_text,
+                max_cycles=3,
+                # 候補者情報を追加
+                candidate_id=candidate.get('candidate_id'),
+                candidate_age=candidate_age,
+                candidate_gender=candidate.get('gender'),
+                candidate_company=candidate.get('candidate_company'),
+                enrolled_company_count=enrolled_company_count,
+                # 構造化データを追加
+                structured_job_data=requirement.get('structured_data'),
+                structured_resume_data=structured_resume_data
+            )
+            print(f"[AI Matching] Real result - Score: {result.get('final_score')}, Rec: {result.get('final_judgment', {}).get('recommendation')}")
+        else:
+            # マッチャーが初期化されていない場合のダミー結果
+            print(f"[AI Matching] Using dummy result - matcher: {self.matcher}, has method: {hasattr(self.matcher, 'match_candidate_direct_async') if self.matcher else False}")
+            result = self._generate_dummy_result()
+            print(f"[AI Matching] Dummy result - Score: {result.get('final_score')}, Rec: {result.get('final_judgment', {}).get('recommendation')}")
+        
+        # 結果を保存
+        saved_ids = saved_ids or set()
+        if candidate['id'] not in saved_ids:
+            await self._save_evaluation_result(job_id, candidate, result)
+        
+        # 近似重複の候補者には代表者の評価結果をリンクして保存
+        for duplicate, similarity in group['duplicates']:
+            if duplicate['id'] in saved_ids:
+                continue
+            linked_result = {
+                **result,
+                'duplicate_of': candidate['id'],
+                'duplicate_similarity': round(similarity, 3)
+            }
+            await self._save_evaluation_result(job_id, duplicate, linked_result)
+            print(f"[AI Matching] Linked candidate {duplicate.get('id')} to {candidate.get('id')} (similarity: {similarity:.2f})")
+        
+        return 1 + len(group['duplicates'])
+    
+    async def _execute(self, query, idempotent: bool = True):
+        """
+        Supabaseクエリを実行（期限・リトライ・サーキットブレーカー付き、イベントループをブロックしない）
+        
+        Args:
+            idempotent: 再実行してよいクエリか（挿入など、期限切れ後に反映済みの可能性がある書き込みはFalse）
+        """
+        if call_blocking is None:
+            return query.execute()
+        return await call_blocking('supabase', query.execute, idempotent=idempotent)
+    
     async def _get_job_details(self, job_id: str) -> Optional[Dict]:
         """ジョブ詳細を取得"""
-        response = self.supabase.table('jobs').select('*').eq('id', job_id).single().execute()
+        response = await self._execute(self.supabase.table('jobs').select('*').eq('id', job_id).single())
         return response.data
     
+    async def _get_evaluated_candidate_ids(self, job_id: str, candidate_ids: List[str]) -> Set[str]:
+        """このジョブで評価結果が保存済みの候補者ID"""
+        response = await self._execute(self.supabase.table('ai_evaluations').select('candidate_id').eq('job_id', job_id).in_('candidate_id', candidate_ids))
+        return {row['candidate_id'] for row in response.data or []}
+    
     async def _get_requirement(self, requirement_id: str) -> Optional[Dict]:
         """要件情報を取得"""
-        response = self.supabase.table('job_requirements').select('*, client:clients(*)').eq('id', requirement_id).single().execute()
+        response = await self._execute(self.supabase.table('job_requirements').select('*, client:clients(*)').eq('id', requirement_id).single())
         requirement = response.data
         
         # デバッグ: 取得したデータを確認
@@ -302,7 +384,7 @@ class AIMatchingService:
         print(f"  requirement_id: {job.get('requirement_id')}")
         
         # まず、このジョブで既に評価済みの候補者IDを取得
-        evaluated_response = self.supabase.table('ai_evaluations').select('candidate_id').eq('job_id', job_id).execute()
+        evaluated_response = await self._execute(self.supabase.table('ai_evaluations').select('candidate_id').eq('job_id', job_id))
         evaluated_candidate_ids = [eval['candidate_id'] for eval in (evaluated_response.data or [])]
         
         print(f"  Already evaluated candidates: {len(evaluated_candidate_ids)}")
@@ -323,7 +405,7 @@ class AIMatchingService:
         # 全件取得（limit削除）
         query = query.order('scraped_at', desc=True)
         
-        response = query.execute()
+        response = await self._execute(query)
         all_candidates = response.data or []
         
         # 評価済みの候補者を除外
@@ -525,7 +607,8 @@ class AIMatchingService:
         print(f"Saving evaluation for candidate {candidate['id']}, requirement_id: {requirement_id}")
         
         try:
-            self.supabase.table('ai_evaluations').upsert(evaluation_data).execute()
+            # idは毎回生成するため、再実行すると同じ候補者の評価が重複して保存される
+            await self._execute(self.supabase.table('ai_evaluations').upsert(evaluation_data), idempotent=False)
             print(f"✓ Evaluation saved successfully for candidate {candidate['id']}")
         except Exception as e:
             print(f"✗ Error saving evaluation for candidate {candidate['id']}: {e}")
@@ -547,7 +630,7 @@ class AIMatchingService:
         elif status in ['completed', 'failed']:
             update_data['completed_at'] = datetime.utcnow().isoformat()
         
-        self.supabase.table('jobs').update(update_data).eq('id', job_id).execute()
+        await self._execute(self.supabase.table('jobs').update(update_data).eq('id', job_id))
         
         # ステータス履歴も更新
         history_data = {
@@ -556,7 +639,7 @@ class AIMatchingService:
             'message': error_message or f'Status changed to {status}',
             'created_at': datetime.utcnow().isoformat()
         }
-        self.supabase.table('job_status_history').insert(history_data).execute()
+        await self._execute(self.supabase.table('job_status_history').insert(history_data), idempotent=False)
     
     def _convert_confidence(self, confidence: str) -> str:
         """英語のconfidenceを日本語に変換"""
@@ -3,12 +3,22 @@ Gemini Embeddingサービス
 テキストのベクトル化処理
 """
 import os
+import sys
 import logging
 import asyncio
 from typing import List, Optional
 import google.generativeai as genai
 from datetime import datetime
 
+# ai_matching_systemをインポートパスに追加
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+ai_matching_path = os.path.join(project_root, "ai_matching_system")
+if ai_matching_path not in sys.path:
+    sys.path.append(ai_matching_path)
+
+from ai_matching.utils.prompt_budget import estimate_tokens, truncate_to_tokens
+
 logger = logging.getLogger(__name__)
 
 class GeminiEmbeddingService:
@@ -22,6 +32,7 @@ class GeminiEmbeddingService:
     # エンベディングモデル
     EMBEDDING_MODEL = "models/embedding-001"
     EMBEDDING_DIMENSION = 768
+    MAX_INPUT_TOKENS = 2048  # エンベディング入力の最大トークン数
     
     def __init__(self):
         # Gemini APIの設定
@@ -97,11 +108,10 @@ class GeminiEmbeddingService:
         # 空白の正規化
         text = ' '.join(text.split())
         
-        # 長さ制限（約2048トークン相当の文字数）
-        max_chars = 8000
-        if len(text) > max_chars:
-            text = text[:max_chars] + "..."
-            logger.warning(f"Text truncated to {max_chars} characters")
+        # 長さ制限（推定トークン数で判定）
+        if estimate_tokens(text) > self.MAX_INPUT_TOKENS:
+            text = truncate_to_tokens(text, self.MAX_INPUT_TOKENS)
+            logger.warning(f"Text truncated to {self.MAX_INPUT_TOKENS} tokens")
         
         return text
     
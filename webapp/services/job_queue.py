@@ -0,0 +1,453 @@
+"""
+マッチングジョブの永続キュー
+ジョブと候補者グループ単位のタスクをSQLiteに保存し、有効期限付きのリースとハートビートで
+複数のワーカープロセスに配布する。停止したワーカーのタスクはリース切れ後に別のワーカーが再取得する
+
+タスクの配布は全ジョブ共通のスケジューラーとして動作する:
+- 優先度（jobs.priority: high / normal / low）の高いジョブから配布
+- 同じ優先度ではクライアント・ジョブの重みあたりの実行中タスク数が最も少ないものに配布（フェアシェア）
+- 実行中タスクの総数はGeminiのクォータに合わせた上限（MATCHING_MAX_CONCURRENT_EVALUATIONS）まで
+"""
+
+import json
+import math
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# jobs.priority -> スケジューリング上の優先度（大きいほど優先）
+PRIORITY_LEVELS = {"high": 2, "normal": 1, "low": 0}
+
+
+@dataclass
+class QueueTask:
+    """リースしたタスク"""
+    task_id: str
+    job_id: str
+    payload: Dict[str, Any]
+    units: int  # 完了時に進捗へ加算する候補者数
+    attempts: int
+
+
+class JobQueue:
+    """
+    SQLiteによるジョブ・タスクのリース型キュー（同一ホスト上の複数プロセスで共有）
+
+    Webプロセスとワーカーは同じ保存先を参照する必要がある。本番ではstart_production.shで
+    同じコンテナ内に両方を起動し、MATCHING_QUEUE_PATHを永続ディスク上に置く
+    """
+
+    def __init__(self, storage_path: Optional[str] = None, lease_seconds: Optional[int] = None,
+                 max_attempts: int = 3, max_concurrent: Optional[int] = None,
+                 client_weights: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            storage_path: 保存先ディレクトリ（省略時はMATCHING_QUEUE_PATHまたは./job_queue_data）
+            lease_seconds: リースの有効期間（省略時はMATCHING_QUEUE_LEASE_SECONDS、デフォルト120秒）
+            max_attempts: タスクの最大試行回数（超えたタスクは失敗扱い）
+            max_concurrent: 全ワーカー合計の同時評価数の上限（省略時はMATCHING_MAX_CONCURRENT_EVALUATIONS、デフォルト4）
+            client_weights: クライアントID -> 重み（省略時はMATCHING_CLIENT_WEIGHTS（JSON）、未指定のクライアントは1.0）
+        """
+        self.storage_path = storage_path or os.getenv("MATCHING_QUEUE_PATH", "./job_queue_data")
+        os.makedirs(self.storage_path, exist_ok=True)
+        self.db_path = os.path.join(self.storage_path, "job_queue.db")
+        self.lease_seconds = lease_seconds or int(os.getenv("MATCHING_QUEUE_LEASE_SECONDS", "120"))
+        self.max_attempts = max_attempts
+        self.max_concurrent = max_concurrent or int(os.getenv("MATCHING_MAX_CONCURRENT_EVALUATIONS", "4"))
+        if client_weights is None:
+            try:
+                client_weights = json.loads(os.getenv("MATCHING_CLIENT_WEIGHTS", "{}"))
+            except json.JSONDecodeError as e:
+                print(f"[JobQueue] MATCHING_CLIENT_WEIGHTSを解釈できません（重みは1.0）: {e}")
+                client_weights = {}
+        self.client_weights = {str(k): float(v) for k, v in client_weights.items()}
+        self._init_database()
+
+    @contextmanager
+    def _get_db(self, immediate: bool = False):
+        """データベース接続を取得（immediate=Trueの場合は書き込みロックを先に取得）"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            if immediate:
+                conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _init_database(self):
+        """テーブルを初期化"""
+        with self._get_db() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS queue_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    client_id TEXT,
+                    priority INTEGER NOT NULL DEFAULT 1,
+                    weight REAL NOT NULL DEFAULT 1.0,
+                    payload TEXT,
+                    total_units INTEGER NOT NULL DEFAULT 0,
+                    base_units INTEGER NOT NULL DEFAULT 0,
+                    lease_owner TEXT,
+                    lease_expires_at REAL,
+                    enqueued_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS queue_tasks (
+                    task_id TEXT PRIMARY KEY,
+                    job_id TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    units INTEGER NOT NULL DEFAULT 1,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    lease_owner TEXT,
+                    lease_expires_at REAL,
+                    last_error TEXT,
+                    started_at REAL,
+                    finished_at REAL,
+                    enqueued_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            # 既存のデータベースにスケジューリング用の列を追加
+            for table, column, definition in [
+                ("queue_jobs", "client_id", "TEXT"),
+                ("queue_jobs", "priority", "INTEGER NOT NULL DEFAULT 1"),
+                ("queue_jobs", "weight", "REAL NOT NULL DEFAULT 1.0"),
+                ("queue_tasks", "started_at", "REAL"),
+                ("queue_tasks", "finished_at", "REAL"),
+            ]:
+                columns = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_queue_tasks_status ON queue_tasks(status, enqueued_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_queue_tasks_job ON queue_tasks(job_id, status)")
+
+    # ジョブ
+
+    def enqueue_job(self, job_id: str, client_id: Optional[str] = None, priority: Optional[str] = None,
+                    weight: float = 1.0) -> None:
+        """
+        ジョブを登録（再実行時は前回のタスクをすべて破棄して候補者の展開からやり直す）
+
+        Args:
+            job_id: ジョブID
+            client_id: クライアントID（クライアント間のフェアシェアに使用）
+            priority: jobs.priority（high / normal / low。省略時はnormal）
+            weight: 同じクライアント内でのジョブの重み
+        """
+        now = time.time()
+        level = PRIORITY_LEVELS.get(priority or "normal", PRIORITY_LEVELS["normal"])
+        with self._get_db(immediate=True) as conn:
+            # 前回の完了・失敗タスクが新しいbase_unitsに二重計上されないよう全件削除する
+            conn.execute("DELETE FROM queue_tasks WHERE job_id = ?", (job_id,))
+            conn.execute(
+                """INSERT INTO queue_jobs (job_id, status, client_id, priority, weight, enqueued_at, updated_at)
+                   VALUES (?, 'queued', ?, ?, ?, ?, ?)
+                   ON CONFLICT(job_id) DO UPDATE SET
+                       status = 'queued', client_id = excluded.client_id, priority = excluded.priority,
+                       weight = excluded.weight, payload = NULL, total_units = 0, base_units = 0,
+                       lease_owner = NULL, lease_expires_at = NULL, enqueued_at = excluded.enqueued_at,
+                       updated_at = excluded.updated_at""",
+                (job_id, client_id, level, max(weight, 0.01), now, now)
+            )
+        print(f"[JobQueue] ジョブを登録: {job_id}（クライアント: {client_id or '-'}、優先度: {priority or 'normal'}）")
+
+    def lease_job(self, worker_id: str) -> Optional[str]:
+        """候補者の展開が必要なジョブをリース（リース切れの展開中ジョブも対象）"""
+        now = time.time()
+        with self._get_db(immediate=True) as conn:
+            row = conn.execute(
+                """SELECT job_id FROM queue_jobs
+                   WHERE status = 'queued' OR (status = 'expanding' AND lease_expires_at < ?)
+                   ORDER BY priority DESC, enqueued_at LIMIT 1""",
+                (now,)
+            ).fetchone()
+            if not row:
+                return None
+            conn.execute(
+                """UPDATE queue_jobs SET status = 'expanding', lease_owner = ?, lease_expires_at = ?, updated_at = ?
+                   WHERE job_id = ?""",
+                (worker_id, now + self.lease_seconds, now, row["job_id"])
+            )
+            return row["job_id"]
+
+    def activate_job(self, job_id: str, worker_id: str, payload: Dict[str, Any],
+                     tasks: List[Tuple[str, Dict[str, Any], int]], total_units: int, base_units: int) -> bool:
+        """
+        展開した候補者グループをタスクとして登録し、ジョブを実行中にする
+
+        Args:
+            payload: ワーカー間で共有するジョブ情報（要件など）
+            tasks: (タスクID, ペイロード, 候補者数) のリスト
+            total_units: 進捗計算の分母（全候補者数）
+            base_units: 展開前に評価済みの候補者数
+
+        Returns:
+            登録できたか（リースを失っていた場合はFalse）
+        """
+        now = time.time()
+        with self._get_db(immediate=True) as conn:
+            updated = conn.execute(
+                """UPDATE queue_jobs SET status = 'active', payload = ?, total_units = ?, base_units = ?,
+                       lease_owner = NULL, lease_expires_at = NULL, updated_at = ?
+                   WHERE job_id = ? AND status = 'expanding' AND lease_owner = ?""",
+                (json.dumps(payload, ensure_ascii=False, default=str), total_units, base_units, now, job_id, worker_id)
+            ).rowcount
+            if not updated:
+                return False
+            conn.executemany(
+                """INSERT OR REPLACE INTO queue_tasks (task_id, job_id, status, payload, units, enqueued_at, updated_at)
+                   VALUES (?, ?, 'queued', ?, ?, ?, ?)""",
+                [
+                    (task_id, job_id, json.dumps(task_payload, ensure_ascii=False, default=str), units, now, now)
+                    for task_id, task_payload, units in tasks
+                ]
+            )
+        return True
+
+    def finish_job(self, job_id: str) -> None:
+        """ジョブを終了（未処理のタスクは取り消す）"""
+        now = time.time()
+        with self._get_db(immediate=True) as conn:
+            conn.execute(
+                "UPDATE queue_tasks SET status = 'cancelled', updated_at = ? WHERE job_id = ? AND status IN ('queued', 'leased')",
+                (now, job_id)
+            )
+            conn.execute(
+                "UPDATE queue_jobs SET status = 'done', lease_owner = NULL, lease_expires_at = NULL, updated_at = ? WHERE job_id = ?",
+                (now, job_id)
+            )
+
+    def get_job_payload(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """ジョブのペイロードを取得"""
+        with self._get_db() as conn:
+            row = conn.execute("SELECT payload FROM queue_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row["payload"]) if row and row["payload"] else None
+
+    def job_progress(self, job_id: str) -> Dict[str, int]:
+        """
+        ジョブの進捗
+
+        Returns:
+            total（全候補者数）, evaluated（評価済みの候補者数）, remaining_tasks（未完了タスク数）
+        """
+        with self._get_db() as conn:
+            job = conn.execute("SELECT total_units, base_units FROM queue_jobs WHERE job_id = ?", (job_id,)).fetchone()
+            done = conn.execute(
+                "SELECT COALESCE(SUM(units), 0) FROM queue_tasks WHERE job_id = ? AND status = 'done'", (job_id,)
+            ).fetchone()[0]
+            remaining = conn.execute(
+                "SELECT COUNT(*) FROM queue_tasks WHERE job_id = ? AND status IN ('queued', 'leased')", (job_id,)
+            ).fetchone()[0]
+        if not job:
+            return {"total": 0, "evaluated": 0, "remaining_tasks": 0}
+        return {"total": job["total_units"], "evaluated": job["base_units"] + done, "remaining_tasks": remaining}
+
+    # タスク
+
+    def lease_task(self, worker_id: str) -> Optional[QueueTask]:
+        """
+        次のタスクをリース（リース切れのタスクも再取得する）
+
+        同時評価数が上限に達している場合はNone。試行回数が上限に達したリース切れのタスクは再取得せず、
+        fail_expired_tasksで失敗扱いにする
+        """
+        now = time.time()
+        with self._get_db(immediate=True) as conn:
+            running = conn.execute(
+                "SELECT COUNT(*) FROM queue_tasks WHERE status = 'leased' AND lease_expires_at >= ?", (now,)
+            ).fetchone()[0]
+            if running >= self.max_concurrent:
+                return None
+
+            job_id = self._pick_job(conn, now)
+            if job_id is None:
+                return None
+            row = conn.execute(
+                """SELECT * FROM queue_tasks
+                   WHERE job_id = ? AND (status = 'queued' OR (status = 'leased' AND lease_expires_at < ? AND attempts < ?))
+                   ORDER BY enqueued_at, task_id LIMIT 1""",
+                (job_id, now, self.max_attempts)
+            ).fetchone()
+            if row["status"] == "leased":
+                print(f"[JobQueue] リース切れのタスクを再取得: {row['task_id']}（前回のワーカー: {row['lease_owner']}）")
+            conn.execute(
+                """UPDATE queue_tasks SET status = 'leased', lease_owner = ?, lease_expires_at = ?,
+                       attempts = attempts + 1, started_at = ?, updated_at = ?
+                   WHERE task_id = ?""",
+                (worker_id, now + self.lease_seconds, now, now, row["task_id"])
+            )
+        return QueueTask(
+            task_id=row["task_id"], job_id=row["job_id"], payload=json.loads(row["payload"]),
+            units=row["units"], attempts=row["attempts"] + 1
+        )
+
+    def fail_expired_tasks(self) -> List[str]:
+        """
+        試行回数が上限に達したリース切れのタスクを失敗扱いにする
+
+        Returns:
+            失敗扱いにしたタスクのジョブID（呼び出し側で完了判定を行う）
+        """
+        now = time.time()
+        with self._get_db(immediate=True) as conn:
+            rows = conn.execute(
+                """SELECT task_id, job_id FROM queue_tasks
+                   WHERE status = 'leased' AND lease_expires_at < ? AND attempts >= ?""",
+                (now, self.max_attempts)
+            ).fetchall()
+            conn.executemany(
+                """UPDATE queue_tasks SET status = 'failed', last_error = 'リース切れが上限回数に達しました',
+                       lease_owner = NULL, lease_expires_at = NULL, updated_at = ?
+                   WHERE task_id = ?""",
+                [(now, row["task_id"]) for row in rows]
+            )
+        for row in rows:
+            print(f"[JobQueue] リース切れが上限回数に達したタスクを失敗扱い: {row['task_id']}")
+        return sorted({row["job_id"] for row in rows})
+
+    def _pick_job(self, conn: sqlite3.Connection, now: float) -> Optional[str]:
+        """
+        次にタスクを配布するジョブを選ぶ
+
+        優先度の高い順に、クライアントの重みあたりの実行中タスク数、ジョブの重みあたりの実行中タスク数、
+        ジョブの重みあたりの完了タスク数が少ない順（同じなら登録順）
+        """
+        rows = conn.execute(
+            """SELECT j.job_id, j.client_id, j.priority, j.weight, j.enqueued_at,
+                      SUM(t.status = 'leased' AND t.lease_expires_at >= :now) AS running,
+                      SUM(t.status = 'done') AS done,
+                      SUM(t.status = 'queued' OR (t.status = 'leased' AND t.lease_expires_at < :now
+                                                  AND t.attempts < :max_attempts)) AS available
+               FROM queue_jobs j JOIN queue_tasks t ON t.job_id = j.job_id
+               WHERE j.status = 'active'
+               GROUP BY j.job_id""",
+            {"now": now, "max_attempts": self.max_attempts}
+        ).fetchall()
+        if not rows:
+            return None
+
+        client_running: Dict[str, int] = {}
+        for row in rows:
+            client_running[row["client_id"]] = client_running.get(row["client_id"], 0) + row["running"]
+
+        candidates = [row for row in rows if row["available"]]
+        if not candidates:
+            return None
+        best = min(candidates, key=lambda row: (
+            -row["priority"],
+            client_running[row["client_id"]] / self.client_weights.get(str(row["client_id"]), 1.0),
+            row["running"] / row["weight"],
+            row["done"] / row["weight"],
+            row["enqueued_at"]
+        ))
+        return best["job_id"]
+
+    def heartbeat(self, task_id: str, worker_id: str) -> bool:
+        """タスクのリースを延長（リースを失っていた場合はFalse）"""
+        now = time.time()
+        with self._get_db() as conn:
+            return conn.execute(
+                """UPDATE queue_tasks SET lease_expires_at = ?, updated_at = ?
+                   WHERE task_id = ? AND status = 'leased' AND lease_owner = ?""",
+                (now + self.lease_seconds, now, task_id, worker_id)
+            ).rowcount > 0
+
+    def complete_task(self, task_id: str, worker_id: str) -> bool:
+        """タスクを完了にする"""
+        with self._get_db() as conn:
+            return conn.execute(
+                """UPDATE queue_tasks SET status = 'done', lease_owner = NULL, lease_expires_at = NULL,
+                       finished_at = ?, updated_at = ?
+                   WHERE task_id = ? AND status = 'leased' AND lease_owner = ?""",
+                (time.time(), time.time(), task_id, worker_id)
+            ).rowcount > 0
+
+    def fail_task(self, task_id: str, worker_id: str, error: str) -> None:
+        """タスクの失敗を記録（試行回数が上限未満なら再実行待ちに戻す）"""
+        with self._get_db() as conn:
+            conn.execute(
+                """UPDATE queue_tasks
+                   SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END,
+                       lease_owner = NULL, lease_expires_at = NULL, last_error = ?, updated_at = ?
+                   WHERE task_id = ? AND status = 'leased' AND lease_owner = ?""",
+                (self.max_attempts, error, time.time(), task_id, worker_id)
+            )
+
+    def get_job_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        未完了ジョブごとのキューの状況と完了見込み
+
+        Returns:
+            ジョブID -> status, priority, queued（待ちタスク数）, running, done, failed,
+            avg_task_seconds（タスクあたりの平均処理時間）, eta_seconds（完了までの見込み秒数。算出できない場合はNone）
+        """
+        now = time.time()
+        with self._get_db() as conn:
+            rows = conn.execute(
+                """SELECT j.job_id, j.status, j.priority,
+                          COALESCE(SUM(t.status = 'queued' OR (t.status = 'leased' AND t.lease_expires_at < :now)), 0) AS queued,
+                          COALESCE(SUM(t.status = 'leased' AND t.lease_expires_at >= :now), 0) AS running,
+                          COALESCE(SUM(t.status = 'done'), 0) AS done,
+                          COALESCE(SUM(t.status = 'failed'), 0) AS failed,
+                          AVG(CASE WHEN t.status = 'done' THEN t.finished_at - t.started_at END) AS avg_seconds
+                   FROM queue_jobs j LEFT JOIN queue_tasks t ON t.job_id = j.job_id
+                   WHERE j.status != 'done'
+                   GROUP BY j.job_id""",
+                {"now": now}
+            ).fetchall()
+            overall_avg = conn.execute(
+                "SELECT AVG(finished_at - started_at) FROM queue_tasks WHERE status = 'done' AND finished_at IS NOT NULL"
+            ).fetchone()[0]
+
+        labels = {level: name for name, level in PRIORITY_LEVELS.items()}
+        metrics = {}
+        for row in rows:
+            avg_seconds = row["avg_seconds"] or overall_avg
+            remaining = row["queued"] + row["running"]
+            eta_seconds = None
+            if avg_seconds and row["status"] == "active":
+                # 現在の同時実行数が続くとみなす（未割り当てのジョブは1件ずつ処理される想定）
+                eta_seconds = math.ceil(remaining / max(row["running"], 1)) * avg_seconds
+            metrics[row["job_id"]] = {
+                "status": row["status"],
+                "priority": labels.get(row["priority"], "normal"),
+                "queued": row["queued"],
+                "running": row["running"],
+                "done": row["done"],
+                "failed": row["failed"],
+                "avg_task_seconds": avg_seconds,
+                "eta_seconds": eta_seconds
+            }
+        return metrics
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """ステータス別のジョブ数・タスク数"""
+        with self._get_db() as conn:
+            jobs = conn.execute("SELECT status, COUNT(*) FROM queue_jobs GROUP BY status").fetchall()
+            tasks = conn.execute("SELECT status, COUNT(*) FROM queue_tasks GROUP BY status").fetchall()
+        return {"jobs": {row[0]: row[1] for row in jobs}, "tasks": {row[0]: row[1] for row in tasks}}
+
+
+# シングルトンインスタンス（インポート時に保存先を作らないよう初回利用時に生成）
+_job_queue_instance = None
+
+
+def get_job_queue() -> JobQueue:
+    """シングルトンのジョブキューを取得"""
+    global _job_queue_instance
+    if _job_queue_instance is None:
+        _job_queue_instance = JobQueue()
+    return _job_queue_instance
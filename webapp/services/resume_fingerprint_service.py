@@ -0,0 +1,109 @@
+"""
+レジュメ指紋サービス
+取り込み時にレジュメのMinHash署名を登録し、マッチングジョブで近似重複をグループ化する
+"""
+import os
+import sys
+import logging
+from typing import Dict, List
+
+# ai_matching_systemをインポートパスに追加
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+ai_matching_path = os.path.join(project_root, "ai_matching_system")
+if ai_matching_path not in sys.path:
+    sys.path.append(ai_matching_path)
+
+try:
+    from ai_matching.utils.resume_fingerprint import ResumeFingerprintIndex, DuplicateGroup
+except ImportError as e:
+    print(f"Warning: Could not import resume fingerprint index: {e}")
+    ResumeFingerprintIndex = None
+    DuplicateGroup = None
+
+logger = logging.getLogger(__name__)
+
+
+class ResumeFingerprintService:
+    """レジュメ指紋サービス"""
+
+    def __init__(self):
+        self.index = None
+        if ResumeFingerprintIndex is None:
+            logger.warning("Resume fingerprint index is not available")
+            return
+
+        try:
+            threshold = float(os.getenv('RESUME_DUPLICATE_THRESHOLD', '0.85'))
+            self.index = ResumeFingerprintIndex(threshold=threshold)
+        except Exception as e:
+            logger.error(f"Error initializing resume fingerprint index: {e}")
+            self.index = None
+
+    @staticmethod
+    def _resume_text(candidate: Dict) -> str:
+        """候補者レコードからレジュメテキストを取得（CSV取り込みはresume_textカラム）"""
+        return candidate.get('candidate_resume') or candidate.get('resume_text') or ''
+
+    def register_candidates(self, candidates: List[Dict]) -> int:
+        """
+        保存済みの候補者レコードのレジュメ署名を登録
+
+        Args:
+            candidates: candidatesテーブルのレコード（idを含む）
+
+        Returns:
+            登録件数
+        """
+        if not self.index:
+            return 0
+
+        try:
+            items = [
+                (str(c['id']), self._resume_text(c))
+                for c in candidates
+                if c.get('id') and self._resume_text(c)
+            ]
+            return len(self.index.add_many(items))
+        except Exception as e:
+            # 指紋登録の失敗で取り込みを止めない
+            logger.error(f"Error registering resume fingerprints: {e}")
+            return 0
+
+    def group_candidates(self, candidates: List[Dict]) -> List[Dict]:
+        """
+        候補者を近似重複グループにまとめる
+
+        Args:
+            candidates: 評価対象の候補者レコード
+
+        Returns:
+            [{'representative': candidate, 'duplicates': [(candidate, similarity), ...]}, ...]
+            （指紋インデックスが使えない場合は全員が単独グループ）
+        """
+        if not self.index:
+            return [{'representative': c, 'duplicates': []} for c in candidates]
+
+        by_id = {str(c['id']): c for c in candidates}
+        try:
+            groups = self.index.group_near_duplicates([
+                (str(c['id']), self._resume_text(c)) for c in candidates
+            ])
+        except Exception as e:
+            logger.error(f"Error grouping near-duplicate candidates: {e}")
+            return [{'representative': c, 'duplicates': []} for c in candidates]
+
+        return [
+            {
+                'representative': by_id[group.representative_id],
+                'duplicates': [
+                    (by_id[dup_id], group.similarities.get(dup_id, 0.0))
+                    for dup_id in group.duplicate_ids
+                ]
+            }
+            for group in groups
+        ]
+
+
+# サービスのシングルトンインスタンス
+resume_fingerprint_service = ResumeFingerprintService()
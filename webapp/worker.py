@@ -0,0 +1,237 @@
+"""
+マッチングワーカー
+永続キュー（webapp/services/job_queue.py）からジョブと候補者グループをリースして評価する。
+Webプロセスとは独立して起動し、プロセス数を増やすことで処理量をスケールさせる
+
+    python -m webapp.worker --workers 4 --concurrency 2
+
+本番（Render / Procfile）ではstart_production.shがWebサーバーと同じコンテナで起動する
+（キューのSQLiteを共有する必要があるため、別サービスとしては起動しない）
+
+全ワーカー合計の同時評価数はキュー側の上限（MATCHING_MAX_CONCURRENT_EVALUATIONS）で制限される
+キューの操作はSQLiteのロック待ちを伴うため、評価中のタスクを止めないようスレッドで実行する
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import uuid
+from typing import Optional
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from webapp.services.job_queue import JobQueue, QueueTask
+
+
+class MatchingWorker:
+    """キューからジョブ・タスクを取得して処理するワーカー（1プロセスにつき1つ）"""
+
+    def __init__(self, queue: JobQueue, service, worker_id: Optional[str] = None, poll_interval: float = 2.0,
+                 concurrency: int = 1):
+        """
+        Args:
+            queue: ジョブキュー
+            service: AIMatchingService
+            worker_id: リース所有者の識別子（省略時はホスト名・PIDから生成）
+            poll_interval: キューが空またはキューの同時評価数が上限のときの待機秒数
+            concurrency: このプロセスで同時に処理するタスク数
+        """
+        self.queue = queue
+        self.service = service
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.poll_interval = poll_interval
+        self.concurrency = max(concurrency, 1)
+        self.heartbeat_interval = max(queue.lease_seconds / 3, 1)
+        self._stopping = False
+
+    def stop(self) -> None:
+        """処理中のタスクを終えたら停止"""
+        self._stopping = True
+
+    async def run(self) -> None:
+        """停止要求まで処理を続ける"""
+        print(f"[Worker {self.worker_id}] 起動（リース{self.queue.lease_seconds}秒、同時処理{self.concurrency}件）")
+        await asyncio.gather(*(self._run_slot() for _ in range(self.concurrency)))
+        print(f"[Worker {self.worker_id}] 停止")
+
+    async def _run_slot(self) -> None:
+        """ジョブの展開またはタスクの評価を1件ずつ繰り返す"""
+        while not self._stopping:
+            # 停止したワーカーのタスクが上限回数に達したら、そのジョブの完了判定を行う
+            for expired_job_id in await asyncio.to_thread(self.queue.fail_expired_tasks):
+                await self._finish_if_done(expired_job_id)
+
+            job_id = await asyncio.to_thread(self.queue.lease_job, self.worker_id)
+            if job_id:
+                await self._expand_job(job_id)
+                continue
+
+            task = await asyncio.to_thread(self.queue.lease_task, self.worker_id)
+            if task:
+                await self._run_task(task)
+                continue
+
+            await asyncio.sleep(self.poll_interval)
+
+    async def _expand_job(self, job_id: str) -> None:
+        """ジョブの候補者をグループ化してタスクとして登録"""
+        print(f"[Worker {self.worker_id}] ジョブを展開: {job_id}")
+        try:
+            # 展開前に停止されたジョブは実行しない
+            current_job = await self.service._get_job_details(job_id)
+            if not current_job or current_job.get('status') != 'running':
+                print(f"[Worker {self.worker_id}] ジョブ{job_id}は実行中ではないためスキップ")
+                await asyncio.to_thread(self.queue.finish_job, job_id)
+                return
+            prepared = await self.service.prepare_job(job_id)
+        except Exception as e:
+            print(f"[Worker {self.worker_id}] ジョブの展開に失敗: {job_id}: {e}")
+            await asyncio.to_thread(self.queue.finish_job, job_id)
+            await self.service._update_job_status(job_id, 'failed', error_message=str(e))
+            return
+
+        if not prepared:
+            # 評価対象なし（prepare_jobがジョブを完了済み）
+            await asyncio.to_thread(self.queue.finish_job, job_id)
+            return
+
+        tasks = [
+            (
+                f"{job_id}:{group['representative']['id']}",
+                {"group": group},
+                1 + len(group['duplicates'])
+            )
+            for group in prepared['candidate_groups']
+        ]
+        activated = await asyncio.to_thread(
+            self.queue.activate_job, job_id, self.worker_id,
+            payload={"requirement": prepared['requirement']},
+            tasks=tasks,
+            total_units=prepared['total_candidates_count'],
+            base_units=prepared['already_evaluated_count']
+        )
+        if activated:
+            print(f"[Worker {self.worker_id}] {len(tasks)}件のタスクを登録: {job_id}")
+        else:
+            print(f"[Worker {self.worker_id}] ジョブのリースを失ったため展開結果を破棄: {job_id}")
+
+    async def _run_task(self, task: QueueTask) -> None:
+        """候補者グループを評価（処理中はハートビートでリースを延長）"""
+        # 停止要求チェック（キャンセル・削除されたジョブの残りタスクは取り消す）
+        current_job = await self.service._get_job_details(task.job_id)
+        if not current_job or current_job.get('status') != 'running':
+            print(f"[Worker {self.worker_id}] ジョブ{task.job_id}は{current_job.get('status') if current_job else '削除済み'}のため残りのタスクを取り消し")
+            await asyncio.to_thread(self.queue.finish_job, task.job_id)
+            return
+
+        # 再取得したタスクは、前回のワーカーがグループ全員の保存まで終えていれば評価し直さない
+        group = task.payload['group']
+        saved_ids = set()
+        if task.attempts > 1:
+            member_ids = {group['representative']['id']} | {duplicate['id'] for duplicate, _ in group['duplicates']}
+            saved_ids = await self.service._get_evaluated_candidate_ids(task.job_id, list(member_ids))
+            if saved_ids >= member_ids:
+                print(f"[Worker {self.worker_id}] 評価結果が保存済みのため完了扱い: {task.task_id}")
+                await asyncio.to_thread(self.queue.complete_task, task.task_id, self.worker_id)
+                await self._finish_if_done(task.job_id)
+                return
+
+        job_payload = await asyncio.to_thread(self.queue.get_job_payload, task.job_id) or {}
+        evaluation = asyncio.create_task(
+            self.service.evaluate_candidate_group(task.job_id, job_payload.get('requirement', {}), group, saved_ids)
+        )
+        heartbeat = asyncio.create_task(self._heartbeat(task, evaluation))
+        try:
+            saved = await evaluation
+        except asyncio.CancelledError:
+            print(f"[Worker {self.worker_id}] リースを失ったためタスクを中断: {task.task_id}")
+            return
+        except Exception as e:
+            print(f"[Worker {self.worker_id}] タスク失敗（{task.attempts}/{self.queue.max_attempts}回目）: {task.task_id}: {e}")
+            await asyncio.to_thread(self.queue.fail_task, task.task_id, self.worker_id, str(e))
+            await self._finish_if_done(task.job_id)
+            return
+        finally:
+            heartbeat.cancel()
+
+        if saved is None:
+            # AI処理の直前にジョブが停止された
+            await asyncio.to_thread(self.queue.finish_job, task.job_id)
+            return
+
+        await asyncio.to_thread(self.queue.complete_task, task.task_id, self.worker_id)
+        progress = await asyncio.to_thread(self.queue.job_progress, task.job_id)
+        percent = int(progress['evaluated'] / progress['total'] * 100) if progress['total'] else 100
+        await self.service._update_job_status(task.job_id, 'running', min(percent, 100))
+        print(f"Progress updated: {progress['evaluated']}/{progress['total']} = {percent}%")
+        await self._finish_if_done(task.job_id)
+
+    async def _heartbeat(self, task: QueueTask, evaluation: asyncio.Task) -> None:
+        """リースを定期的に延長し、失った場合は評価を中断"""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            if not await asyncio.to_thread(self.queue.heartbeat, task.task_id, self.worker_id):
+                evaluation.cancel()
+                return
+
+    async def _finish_if_done(self, job_id: str) -> None:
+        """未完了のタスクがなくなったらジョブを完了にする"""
+        progress = await asyncio.to_thread(self.queue.job_progress, job_id)
+        if progress['remaining_tasks'] == 0:
+            await asyncio.to_thread(self.queue.finish_job, job_id)
+            await self.service._update_job_status(job_id, 'completed', 100)
+            print(f"[Worker {self.worker_id}] ジョブ完了: {job_id}")
+
+
+def _worker_main(poll_interval: float, concurrency: int) -> None:
+    """ワーカープロセスのエントリーポイント"""
+    from webapp.services.ai_matching_service import ai_matching_service
+
+    worker = MatchingWorker(JobQueue(), ai_matching_service, poll_interval=poll_interval, concurrency=concurrency)
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    try:
+        asyncio.run(worker.run())
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='AIマッチングワーカー')
+    parser.add_argument('--workers', type=int, default=int(os.getenv('MATCHING_WORKERS', '1')),
+                        help='ワーカープロセス数（デフォルト: MATCHING_WORKERSまたは1）')
+    parser.add_argument('--concurrency', type=int, default=int(os.getenv('MATCHING_WORKER_CONCURRENCY', '1')),
+                        help='プロセスあたりの同時処理数（デフォルト: MATCHING_WORKER_CONCURRENCYまたは1）')
+    parser.add_argument('--poll-interval', type=float, default=2.0, help='キューが空のときの待機秒数')
+    args = parser.parse_args()
+
+    if args.workers <= 1:
+        _worker_main(args.poll_interval, args.concurrency)
+        return
+
+    processes = [
+        multiprocessing.Process(target=_worker_main, args=(args.poll_interval, args.concurrency),
+                                name=f"matching-worker-{i}")
+        for i in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    print(f"[Worker] {args.workers}プロセスを起動しました")
+
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()